@@ -6,6 +6,7 @@ No Steam API key required (uses Store + keyless Web API).
 from __future__ import annotations
 
 import json
+import sys
 import textwrap
 import webbrowser
 from pathlib import Path
@@ -29,6 +30,14 @@ PLUGIN_DESCRIPTION = (
     "Shows live Steam Store + review + player-count info for the selected game."
 )
 
+# Read by the launcher without importing this module (lazy loading).
+PLUGIN_MANIFEST = {
+    "name": "DeepSteamIntegration",
+    "version": "3.0.0",
+    "description": "Shows live Steam Store + review + player-count info for the selected game.",
+    "menu": [{"path": "Steam/Show game info…", "action": "show_game_info"}],
+}
+
 
 # ---------- helpers: current game / appid ----------
 
@@ -51,6 +60,12 @@ def _get_current_game(window):
         games = getattr(window, "games", None)
         selector = getattr(window, "selector", None)
         if games and selector is not None:
+            # Newer launchers store the game id as item data and index the
+            # library by id (GameLibrary.get); older ones only have positions.
+            if callable(getattr(games, "get", None)):
+                g = games.get(selector.currentData())
+                if g:
+                    return g
             idx = selector.currentIndex()
             if 0 <= idx < len(games):
                 return games[idx]
@@ -251,17 +266,10 @@ def _friends_cache_path() -> Path:
     return root / "friends_cache.json"
 
 
-def _load_friends_rows() -> List[Tuple[str, str, str]]:
-    """
-    Return cached rows from FriendsDock, if any:
-      [(gamertag, status, game_title), ...]
-    """
+def _parse_friends_rows(p) -> List[Tuple[str, str, str]]:
     rows: List[Tuple[str, str, str]] = []
     try:
-        p = _friends_cache_path()
-        if not p.exists():
-            return rows
-        raw = p.read_text(encoding="utf-8", errors="ignore")
+        raw = Path(p).read_text(encoding="utf-8", errors="ignore")
         if not raw.strip():
             return rows
         arr = json.loads(raw)
@@ -282,6 +290,26 @@ def _load_friends_rows() -> List[Tuple[str, str, str]]:
     return rows
 
 
+def _load_friends_rows() -> List[Tuple[str, str, str]]:
+    """
+    Return cached rows from FriendsDock, if any:
+      [(gamertag, status, game_title), ...]
+
+    Goes through the launcher's ConfigStore when available, so the cache file
+    is only re-parsed after FriendsDock rewrites it.
+    """
+    p = _friends_cache_path()
+    store = getattr(sys.modules.get("__main__"), "CONFIG_STORE", None)
+    if store is not None:
+        try:
+            return list(store.read(p, default=(), parse=_parse_friends_rows))
+        except Exception:
+            pass
+    if not p.exists():
+        return []
+    return _parse_friends_rows(p)
+
+
 def _friends_playing_title(game_title: str) -> List[str]:
     """
     Return a list of Xbox gamertags currently playing *approximately* this game,
@@ -515,6 +543,68 @@ def _show_game_info_dialog(
 # ---------- plugin hook ----------
 
 
+def show_game_info(window):
+    """Menu action (also the PLUGIN_MANIFEST action)."""
+    if requests is None:
+        QtWidgets.QMessageBox.warning(
+            window,
+            "Deep Steam Integration",
+            "The 'requests' module is not available in this build.\n\n"
+            "Rebuild the launcher with 'requests' included to use this plugin.",
+        )
+        return
+
+    game = _get_current_game(window)
+    appid = _require_appid(window, game)
+    if not appid:
+        return
+
+    # Network calls (best-effort; none of these are fatal)
+    store_data = _fetch_steam_store_data(appid)
+    if not store_data:
+        QtWidgets.QMessageBox.warning(
+            window,
+            "Deep Steam Integration",
+            "Failed to fetch Steam Store data for this game.\n\n"
+            "It may not exist on Steam, or there may be a network error.",
+        )
+        return
+
+    review_info = _fetch_review_summary(appid)
+    player_count = _fetch_live_player_count(appid)
+
+    # Xbox friends flavor, if FriendsDock has a cache
+    friends_playing: Optional[List[str]] = None
+    try:
+        title = _guess_game_title(game or {})
+        if title:
+            friends_playing = _friends_playing_title(title)
+    except Exception:
+        friends_playing = None
+
+    # Optional toast if we detect friends playing this now
+    try:
+        if friends_playing:
+            # Show at most first three names in the toast to avoid giant strings
+            names_preview = ", ".join(friends_playing[:3])
+            if hasattr(window, "_show_toast"):
+                window._show_toast(
+                    f"{names_preview} playing this now (Xbox friends cache).",
+                    "info",
+                )
+    except Exception:
+        pass
+
+    _show_game_info_dialog(
+        window,
+        appid,
+        store_data,
+        review_info=review_info,
+        player_count=player_count,
+        friends_playing=friends_playing,
+    )
+
+
 def register_plugin(window):
     """
     Main plugin registration hook. Called once at startup with the main window.
@@ -540,68 +630,7 @@ def register_plugin(window):
     steam_menu = menu.addMenu("Steam")
 
     act_info = steam_menu.addAction("Show game info…")
-
-    def on_show_info():
-        if requests is None:
-            QtWidgets.QMessageBox.warning(
-                window,
-                "Deep Steam Integration",
-                "The 'requests' module is not available in this build.\n\n"
-                "Rebuild the launcher with 'requests' included to use this plugin.",
-            )
-            return
-
-        game = _get_current_game(window)
-        appid = _require_appid(window, game)
-        if not appid:
-            return
-
-        # Network calls (best-effort; none of these are fatal)
-        store_data = _fetch_steam_store_data(appid)
-        if not store_data:
-            QtWidgets.QMessageBox.warning(
-                window,
-                "Deep Steam Integration",
-                "Failed to fetch Steam Store data for this game.\n\n"
-                "It may not exist on Steam, or there may be a network error.",
-            )
-            return
-
-        review_info = _fetch_review_summary(appid)
-        player_count = _fetch_live_player_count(appid)
-
-        # Xbox friends flavor, if FriendsDock has a cache
-        friends_playing: Optional[List[str]] = None
-        try:
-            title = _guess_game_title(game or {})
-            if title:
-                friends_playing = _friends_playing_title(title)
-        except Exception:
-            friends_playing = None
-
-        # Optional toast if we detect friends playing this now
-        try:
-            if friends_playing:
-                # Show at most first three names in the toast to avoid giant strings
-                names_preview = ", ".join(friends_playing[:3])
-                if hasattr(window, "_show_toast"):
-                    window._show_toast(
-                        f"{names_preview} playing this now (Xbox friends cache).",
-                        "info",
-                    )
-        except Exception:
-            pass
-
-        _show_game_info_dialog(
-            window,
-            appid,
-            store_data,
-            review_info=review_info,
-            player_count=player_count,
-            friends_playing=friends_playing,
-        )
-
-    act_info.triggered.connect(on_show_info)
+    act_info.triggered.connect(lambda: show_game_info(window))
 
     # Metadata for Plugin Manager
     return {
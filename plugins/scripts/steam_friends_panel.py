@@ -33,6 +33,14 @@ PLUGIN_NAME = "SteamFriends"
 PLUGIN_VERSION = "1.0.0"
 PLUGIN_DESCRIPTION = "Shows your Steam friends and who is playing the selected game."
 
+# Read by the launcher without importing this module (lazy loading).
+PLUGIN_MANIFEST = {
+    "name": "SteamFriends",
+    "version": "1.0.0",
+    "description": "Shows your Steam friends and who is playing the selected game.",
+    "menu": [{"path": "Steam/Steam Friends…", "action": "open_friends"}],
+}
+
 
 # ---- encryption helpers (match UWPLauncher) ----
 
@@ -169,9 +177,13 @@ def _current_game_appid(window) -> str:
             games = getattr(window, "games", None)
             selector = getattr(window, "selector", None)
             if games and selector is not None:
-                idx = selector.currentIndex()
-                if 0 <= idx < len(games):
-                    g = games[idx]
+                # Prefer the launcher's id index (GameLibrary.get) when present
+                if callable(getattr(games, "get", None)):
+                    g = games.get(selector.currentData())
+                if g is None:
+                    idx = selector.currentIndex()
+                    if 0 <= idx < len(games):
+                        g = games[idx]
         except Exception:
             g = None
 
@@ -283,6 +295,30 @@ def _show_friends_dialog(window, steamid: str, api_key: str):
 # ---- plugin hook ----
 
 
+def open_friends(window):
+    """Menu action (also the PLUGIN_MANIFEST action)."""
+    if requests is None:
+        QtWidgets.QMessageBox.warning(
+            window,
+            "Steam Friends",
+            "The 'requests' module is not available in this build.\n\n"
+            "Rebuild the launcher with 'requests' included to use this plugin.",
+        )
+        return
+
+    steamid, api_key = _load_steam_credentials()
+    if not steamid or not api_key:
+        QtWidgets.QMessageBox.warning(
+            window,
+            "Steam Friends",
+            "Steam API key or SteamID is not configured.\n\n"
+            "Open the Steam sync dialog once and save your credentials.",
+        )
+        return
+
+    _show_friends_dialog(window, steamid, api_key)
+
+
 def register_plugin(window):
     """
     Main plugin registration hook. Called once at startup with the main window.
@@ -320,30 +356,7 @@ def register_plugin(window):
         steam_menu = menu.addMenu("Steam")
 
     act_friends = steam_menu.addAction("Steam Friends…")
-
-    def on_open_friends():
-        if requests is None:
-            QtWidgets.QMessageBox.warning(
-                window,
-                "Steam Friends",
-                "The 'requests' module is not available in this build.\n\n"
-                "Rebuild the launcher with 'requests' included to use this plugin.",
-            )
-            return
-
-        steamid, api_key = _load_steam_credentials()
-        if not steamid or not api_key:
-            QtWidgets.QMessageBox.warning(
-                window,
-                "Steam Friends",
-                "Steam API key or SteamID is not configured.\n\n"
-                "Open the Steam sync dialog once and save your credentials.",
-            )
-            return
-
-        _show_friends_dialog(window, steamid, api_key)
-
-    act_friends.triggered.connect(on_open_friends)
+    act_friends.triggered.connect(lambda: open_friends(window))
 
     # Metadata for Plugin Manager
     return {
@@ -248,6 +248,15 @@ PLUGIN_META = {
     "version": "1.3.0",
 }
 
+# Read by the launcher without importing this module: the menu entry is
+# added at startup and the plugin is only imported when it is clicked.
+PLUGIN_MANIFEST = {
+    "name": "YouTube Player",
+    "description": "Search YouTube and play audio/video inside the launcher.",
+    "version": "1.3.0",
+    "menu": [{"path": "YouTube/YouTube Player…", "action": "open_player"}],
+}
+
 YOUTUBE_URL_RE = re.compile(r"(https?://)?(www\.)?(youtube\.com|youtu\.be)/", re.IGNORECASE)
 
 
@@ -1019,9 +1028,21 @@ class YouTubePlayerDialog(QtWidgets.QDialog):
 
 # ------------ Plugin entry point ------------
 
+def open_player(window):
+    """Show the (single, reused) YouTubePlayerDialog. PLUGIN_MANIFEST action."""
+    # Store dialog on the window so it’s reused
+    if getattr(window, "_youtube_player_dialog", None) is None:
+        window._youtube_player_dialog = YouTubePlayerDialog(window)
+    dlg = window._youtube_player_dialog
+    dlg.show()
+    dlg.raise_()
+    dlg.activateWindow()
+
+
 def register_plugin(window):
     """
-    Entry point used by the UWPLauncher plugin system.
+    Entry point used by the UWPLauncher plugin system (launchers without
+    PLUGIN_MANIFEST support, or with "lazy": false).
 
     We:
     - Attach a single YouTubePlayerDialog to the main window
@@ -1030,29 +1051,13 @@ def register_plugin(window):
 
     _log(window, "Registering YouTube Player plugin…")
 
-    # Store dialog on the window so it’s reused
-    if not hasattr(window, "_youtube_player_dialog"):
-        window._youtube_player_dialog = None
-
-    def _ensure_dialog():
-        if window._youtube_player_dialog is None:
-            dlg = YouTubePlayerDialog(window)
-            window._youtube_player_dialog = dlg
-        return window._youtube_player_dialog
-
     # Attach to existing settings menu if available
     actions_menu = getattr(window, "menu_actions", None)
     if isinstance(actions_menu, QtWidgets.QMenu):
         yt_menu = actions_menu.addMenu("YouTube")
         act_open = yt_menu.addAction("YouTube Player…")
 
-        act_open.triggered.connect(
-            lambda: (
-                _ensure_dialog().show(),
-                _ensure_dialog().raise_(),
-                _ensure_dialog().activateWindow(),
-            )
-        )
+        act_open.triggered.connect(lambda: open_player(window))
         _log(window, "Added YouTube Player entry to Settings menu.")
     else:
         # No menu – don't auto-open anything on startup (avoids freezes)
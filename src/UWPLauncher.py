@@ -7,6 +7,220 @@
 import sys, types
 import base64
 
+# === ADD-ONLY: startup profiler ===
+# Opt-in cold-start timeline: set UWPLAUNCHER_PROFILE_STARTUP=1 (or to a
+# directory) or pass --profile-startup[=DIR]. Phases are perf_counter_ns spans
+# (they nest by time per thread). SETTLE_MS after the first paint two files
+# are written to DIR (default config/profile):
+#   startup-<stamp>.json        phase tree, plugin import times, first paint
+#   startup-<stamp>.trace.json  Chrome trace (chrome://tracing, Perfetto)
+# When disabled, span() hands back a shared no-op object.
+import os as _pos, time as _ptime, threading as _pthreading
+
+class _NullSpan:
+    __slots__ = ()
+    def __enter__(self):
+        return self
+    def __exit__(self, *exc):
+        return False
+
+_NULL_SPAN = _NullSpan()
+
+class _Span:
+    __slots__ = ("prof", "name", "cat", "args", "start")
+
+    def __init__(self, prof, name, cat, args):
+        self.prof, self.name, self.cat, self.args = prof, name, cat, args
+
+    def __enter__(self):
+        self.start = _ptime.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.args = dict(self.args, error=f"{exc_type.__name__}: {exc}")
+        self.prof._record(self.name, self.cat, self.start, _ptime.perf_counter_ns(), self.args)
+        return False
+
+class _StartupProfiler:
+    ENV = "UWPLAUNCHER_PROFILE_STARTUP"
+    FLAG = "--profile-startup"
+    SETTLE_MS = 3000      # keep recording this long after first paint (async startup work)
+    HOLD_MAX_MS = 15000   # ...or until every hold() is released, but never longer than this
+
+    def __init__(self, argv, environ):
+        self.t0 = _ptime.perf_counter_ns()
+        env = str(environ.get(self.ENV, "") or "").strip()
+        flag = next((a for a in argv if a == self.FLAG or a.startswith(self.FLAG + "=")), None)
+        self.enabled = bool(flag) or env.lower() not in ("", "0", "false", "no", "off")
+        self.out_dir = None
+        if flag and "=" in flag:
+            self.out_dir = flag.split("=", 1)[1] or None
+        elif self.enabled and not flag and env.lower() not in ("1", "true", "yes", "on"):
+            self.out_dir = env
+        self.spans = []        # (name, cat, tid, start_ns, end_ns, args)
+        self.marks = {}        # name -> ns
+        self.threads = {}      # tid -> thread name
+        self._open = {}        # (tid, name) -> (start_ns, cat)
+        self._lock = _pthreading.Lock()
+        self._holds = set()
+        self._settled = False
+        self.finished = False
+        self.report_path = None
+
+    # ---- recording ----
+    def record(self, name, cat, start, end, **args):
+        """Add a finished span measured elsewhere (perf_counter_ns start/end)."""
+        if self.enabled and not self.finished:
+            self._record(name, cat, start, end, args)
+
+    def _record(self, name, cat, start, end, args):
+        t = _pthreading.current_thread()
+        with self._lock:
+            self.threads.setdefault(t.ident, t.name)
+            self.spans.append((name, cat, t.ident, start, end, args))
+
+    def span(self, name, cat="startup", **args):
+        """with PROFILE.span("phase"): ...  (no-op unless profiling)"""
+        if not self.enabled or self.finished:
+            return _NULL_SPAN
+        return _Span(self, name, cat, args)
+
+    def begin(self, name, cat="startup"):
+        """Open a phase that doesn't fit a with-block; close it with end(name)."""
+        if self.enabled and not self.finished:
+            self._open[(_pthreading.get_ident(), name)] = (_ptime.perf_counter_ns(), cat)
+
+    def end(self, name, **args):
+        if not self.enabled:
+            return
+        opened = self._open.pop((_pthreading.get_ident(), name), None)
+        if opened is not None and not self.finished:
+            self._record(name, opened[1], opened[0], _ptime.perf_counter_ns(), args)
+
+    def mark(self, name):
+        if self.enabled and not self.finished:
+            self.marks.setdefault(name, _ptime.perf_counter_ns())
+
+    def hold(self, name):
+        """Keep the report open past SETTLE_MS until release(name) (staged startup)."""
+        if self.enabled and not self.finished:
+            self._holds.add(name)
+
+    def release(self, name):
+        self._holds.discard(name)
+        if self._settled and not self._holds:
+            self.finish()
+
+    def _settle(self):
+        self._settled = True
+        if not self._holds:
+            self.finish()
+        else:
+            from PyQt6 import QtCore as _QtCore
+            _QtCore.QTimer.singleShot(max(0, self.HOLD_MAX_MS - self.SETTLE_MS), self.finish)
+
+    def watch_first_paint(self, widget):
+        """Mark 'first-paint' on the widget's first paint event, then finish after SETTLE_MS
+        (or once outstanding holds are released)."""
+        if not self.enabled:
+            return
+        from PyQt6 import QtCore as _QtCore
+        prof = self
+
+        class _FirstPaint(_QtCore.QObject):
+            def eventFilter(self, obj, ev):
+                if ev.type() == _QtCore.QEvent.Type.Paint and "first-paint" not in prof.marks:
+                    prof.mark("first-paint")
+                    obj.removeEventFilter(self)
+                    _QtCore.QTimer.singleShot(prof.SETTLE_MS, prof._settle)
+                return False
+
+        self._paint_filter = _FirstPaint(widget)
+        widget.installEventFilter(self._paint_filter)
+
+    # ---- reporting ----
+    def _ms(self, ns):
+        return round((ns - self.t0) / 1e6, 3)
+
+    def _tree(self, end_ns):
+        """Nest spans by containment, per thread."""
+        roots = []
+        by_tid = {}
+        for name, cat, tid, start, end, args in sorted(self.spans, key=lambda r: (r[3], -r[4])):
+            node = {"name": name, "cat": cat, "thread": self.threads.get(tid, str(tid)),
+                    "start_ms": self._ms(start), "dur_ms": round((end - start) / 1e6, 3),
+                    "children": []}
+            if args:
+                node["args"] = args
+            stack = by_tid.setdefault(tid, [])
+            while stack and stack[-1][1] < end:
+                stack.pop()
+            (stack[-1][0]["children"] if stack else roots).append(node)
+            stack.append((node, end))
+        return roots
+
+    def finish(self):
+        """Write the report (once). Phases still open are closed at this point."""
+        if not self.enabled or self.finished:
+            return self.report_path
+        now = _ptime.perf_counter_ns()
+        for (tid, name), (start, cat) in list(self._open.items()):
+            with self._lock:
+                self.spans.append((name, cat, tid, start, now, {"unfinished": True}))
+        self._open.clear()
+        self.finished = True
+        try:
+            import json as _json
+            out_dir = self.out_dir or _pos.path.join(globals().get("CONFIG_DIR", "config"), "profile")
+            _pos.makedirs(out_dir, exist_ok=True)
+            stamp = _ptime.strftime("%Y%m%d-%H%M%S")
+            plugins = [{"name": a.get("plugin", n), "module": a.get("module", ""),
+                        "import_ms": a.get("import_ms"), "register_ms": a.get("register_ms"),
+                        "error": a.get("error")}
+                       for n, c, _t, _s, _e, a in self.spans if c == "plugin"]
+            report = {
+                "format": "uwplauncher.startup-profile",
+                "version": 1,
+                "created": _ptime.strftime("%Y-%m-%dT%H:%M:%S"),
+                "python": sys.version,
+                "argv": list(sys.argv),
+                "total_ms": self._ms(now),
+                "first_paint_ms": self._ms(self.marks["first-paint"]) if "first-paint" in self.marks else None,
+                "marks": {k: self._ms(v) for k, v in self.marks.items()},
+                "unreleased_holds": sorted(self._holds),
+                "phases": self._tree(now),
+                "plugins": plugins,
+            }
+            pid = _pos.getpid()
+            events = [{"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": tname}}
+                      for tid, tname in self.threads.items()]
+            for name, cat, tid, start, end, args in self.spans:
+                events.append({"name": name, "cat": cat, "ph": "X", "pid": pid, "tid": tid,
+                               "ts": (start - self.t0) / 1000.0, "dur": (end - start) / 1000.0,
+                               "args": args or {}})
+            for name, ts in self.marks.items():
+                events.append({"name": name, "cat": "mark", "ph": "i", "s": "g", "pid": pid, "tid": 0,
+                               "ts": (ts - self.t0) / 1000.0})
+            base = _pos.path.join(out_dir, f"startup-{stamp}")
+            with open(base + ".json", "w", encoding="utf-8") as f:
+                _json.dump(report, f, indent=2, default=str)
+            with open(base + ".trace.json", "w", encoding="utf-8") as f:
+                _json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f, default=str)
+            self.report_path = base + ".json"
+            print(f"[startup] profile written: {self.report_path} "
+                  f"(first paint {report['first_paint_ms']} ms)")
+        except Exception as e:
+            print("[startup] profile not written:", e)
+        return self.report_path
+
+PROFILE = _StartupProfiler(sys.argv, _pos.environ)
+PROFILE.begin("module import")
+if PROFILE.enabled:
+    import atexit as _patexit
+    _patexit.register(PROFILE.finish)   # e.g. forwarded to a running instance or an early exit
+# === END ADD-ONLY startup profiler ===
+
 # Simple local obfuscation for Steam API key in steam.json.
 # NOTE: This is *not* strong cryptography. It only prevents casual snooping
 # (e.g. somebody opening the file in Notepad). Anyone with this file and the
@@ -37,7 +251,86 @@ def _steam_decrypt(ciphertext: str) -> str:
 
 
 # --- ADD-ONLY: Steam artwork helpers (auto-fetch, cached once) ---
-_STEAM_ARTWORK_NEG_CACHE = set()
+class _ArtworkMissIndex:
+    """Disk-backed negative cache: appids whose Steam artwork the CDN doesn't have.
+
+    Stored as config/artwork/missing.json: {appid: {"t": last miss (epoch s),
+    "status": HTTP status, "n": consecutive misses}}. An appid is skipped until
+    ttl_hours * 2**(n-1) has passed (capped at MAX_DAYS), so tools, soundtracks
+    and delisted titles are re-checked ever more rarely. Only definite answers
+    (4xx, empty body) are recorded; timeouts and 5xx are treated as transient.
+    `appid in index` is True while the entry is still fresh.
+    """
+    FILE_NAME = "missing.json"
+    DEFAULT_TTL_HOURS = 24
+    MAX_DAYS = 90
+
+    def __init__(self):
+        import threading as _threading   # module-level imports come later in this file
+        self.ttl_hours = self.DEFAULT_TTL_HOURS
+        self._lock = _threading.Lock()
+        self._entries = None      # loaded on first use
+
+    def path(self):
+        return os.path.join(ARTWORK_DIR, self.FILE_NAME)
+
+    def _load(self):
+        if self._entries is None:
+            entries = {}
+            try:
+                with open(self.path(), "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                for appid, e in (data.get("misses") or {}).items():
+                    entries[str(appid)] = {"t": float(e.get("t", 0)), "status": int(e.get("status", 0)),
+                                           "n": max(1, int(e.get("n", 1)))}
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                print(f"[ART] ignoring unreadable {self.FILE_NAME}: {e}")
+            self._entries = entries
+        return self._entries
+
+    def _save(self):
+        write_json_later(self.path(), {"version": 1, "misses": self._entries}, indent=1, sort_keys=True)
+
+    def recheck_after(self, entry):
+        """Seconds after the last miss before this appid is tried again."""
+        hours = max(0.0, float(self.ttl_hours)) * (2 ** min(int(entry.get("n", 1)) - 1, 16))
+        return min(hours * 3600.0, self.MAX_DAYS * 86400.0)
+
+    def __contains__(self, appid):
+        with self._lock:
+            entry = self._load().get(str(appid).strip())
+        return entry is not None and time.time() - entry["t"] < self.recheck_after(entry)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._load())
+
+    def record(self, appid, status):
+        appid = str(appid).strip()
+        with self._lock:
+            entries = self._load()
+            prev = entries.get(appid)
+            entries[appid] = {"t": time.time(), "status": int(status or 0),
+                              "n": (prev["n"] + 1) if prev else 1}
+            self._save()
+
+    def discard(self, appid):
+        with self._lock:
+            if self._load().pop(str(appid).strip(), None) is not None:
+                self._save()
+
+    def clear(self):
+        """Forget every recorded miss; returns how many there were."""
+        with self._lock:
+            n = len(self._load())
+            if n:
+                self._entries = {}
+                self._save()
+            return n
+
+_STEAM_ARTWORK_NEG_CACHE = _ArtworkMissIndex()
 
 def _steam_artwork_path(appid: str):
     """Return Path for cached Steam artwork: config/artwork/<appid>.jpg"""
@@ -69,8 +362,8 @@ def _steam_artwork_ensure_cached(appid: str):
             return
 
         # If we've already tried and failed to fetch this appid's artwork,
-        # don't hammer the CDN again. This keeps UI operations like the
-        # library refresh and slider from triggering repeated 404 fetches.
+        # don't hammer the CDN again until the miss expires (persisted, so
+        # this also holds across launches).
         try:
             if appid in _STEAM_ARTWORK_NEG_CACHE:
                 return
@@ -96,20 +389,26 @@ def _steam_artwork_ensure_cached(appid: str):
             f"https://steamcdn-a.akamaihd.net/steam/apps/{appid}/header.jpg",
         ]
 
+        miss_status = None        # set when every URL gave a definite "no"
         for url in urls:
             try:
                 print(f"[ART] fetching {url} ...")
                 resp = requests.get(url, timeout=2)
             except Exception as e:
                 print(f"[ART] request error for appid {appid}: {e}")
+                miss_status = False
                 continue
             status = getattr(resp, "status_code", None)
             if status != 200:
                 print(f"[ART] HTTP {status} for appid {appid} at {url}")
+                if miss_status is not False:
+                    miss_status = status if isinstance(status, int) and 400 <= status < 500 else False
                 continue
             content = getattr(resp, "content", None)
             if not content:
                 print(f"[ART] empty content for appid {appid} at {url}")
+                if miss_status is not False:
+                    miss_status = status
                 continue
 
             # Write bytes to disk (best-effort)
@@ -120,11 +419,15 @@ def _steam_artwork_ensure_cached(appid: str):
                     with open(p, "wb") as f:
                         f.write(content)
                 print(f"[ART] saved artwork for appid {appid} -> {p}")
+                miss_status = None
                 break
             except Exception as e:
                 print(f"[ART] failed to write artwork for appid {appid}: {e}")
+                miss_status = False
                 # try next URL if any
                 continue
+        if miss_status:
+            _STEAM_ARTWORK_NEG_CACHE.record(appid, miss_status)
     except Exception as e:
         # Completely best-effort; never crash the launcher over artwork
         print(f"[ART] fatal error for appid {appid}: {e}")
@@ -139,32 +442,201 @@ if "xbl" not in sys.modules:
     xbl_pkg.__path__ = []
     sys.modules["xbl"] = xbl_pkg
 
+# === ADD-ONLY: lazy importer + bytecode cache for embedded modules ===
+# Embedded helper sources are only *registered* at startup; a meta-path
+# finder compiles and executes one the first time it is imported, so the
+# friends dock, login helpers and nonuwp.launcher (COM, psutil) cost nothing
+# until used. Patches that used to be applied right after registration are
+# post-import hooks (on_embedded_import).
+#
+# Compiled code objects are kept in one marshal pack per Python build under
+# the per-user cache dir, keyed on a hash of the embedded text + virtual file
+# name + sys.version, so a later import only unmarshals. Identical sources
+# registered under two names (xbl_* and xbl.xbl_*) share one module object.
+# Set UWPLAUNCHER_NO_BYTECODE_CACHE=1 to bypass the pack.
+import os as _os, hashlib as _hashlib, marshal as _marshal
+import importlib.abc as _importlib_abc, importlib.util as _importlib_util, atexit as _atexit_embedded
+
+def _embedded_cache_dir():
+    base = _os.environ.get("LOCALAPPDATA") or _os.environ.get("XDG_CACHE_HOME") \
+        or _os.path.join(_os.path.expanduser("~"), ".cache")
+    return _os.path.join(base, "UWPLauncher", "bytecode")
+
+_EMBEDDED_PACK_PATH = _os.path.join(
+    _embedded_cache_dir(), f"embedded-{getattr(sys.implementation, 'cache_tag', None) or 'py'}.marshal")
+_EMBEDDED_SOURCES = {}         # name -> (key_text, virtual_file, make_source)
+_EMBEDDED_DIGESTS = {}         # name -> content digest (computed on demand)
+_EMBEDDED_HOOKS = {}           # name -> [hook(module)] still waiting for the import
+_EMBEDDED_CODE = None          # key -> code object, loaded from the pack on first use
+_EMBEDDED_DIRTY = False
+_EMBEDDED_STATS = {"hits": 0, "compiled": 0, "aliased": 0}
+
+def _embedded_pack():
+    global _EMBEDDED_CODE
+    if _EMBEDDED_CODE is None:
+        _EMBEDDED_CODE = {}
+        if not _os.environ.get("UWPLAUNCHER_NO_BYTECODE_CACHE"):
+            try:
+                with open(_EMBEDDED_PACK_PATH, "rb") as f:
+                    data = _marshal.loads(f.read())
+                if isinstance(data, dict) and data.get("version") == sys.version:
+                    _EMBEDDED_CODE = dict(data.get("code") or {})
+            except Exception:
+                pass
+    return _EMBEDDED_CODE
+
+def _embedded_digest(name):
+    d = _EMBEDDED_DIGESTS.get(name)
+    if d is None:
+        d = _hashlib.sha1(_EMBEDDED_SOURCES[name][0].encode("utf-8", "surrogatepass"),
+                          usedforsecurity=False).hexdigest()
+        _EMBEDDED_DIGESTS[name] = d
+    return d
+
+def _embedded_key(name):
+    return _hashlib.sha1(
+        f"{_embedded_digest(name)}\0{_EMBEDDED_SOURCES[name][1]}\0{sys.version}".encode("utf-8"),
+        usedforsecurity=False).hexdigest()
+
+def _embedded_code(name):
+    global _EMBEDDED_DIRTY
+    key = _embedded_key(name)
+    pack = _embedded_pack()
+    code = pack.get(key)
+    if code is None:
+        _key_text, virtual_file, make_source = _EMBEDDED_SOURCES[name]
+        code = compile(make_source(), virtual_file, "exec")
+        pack[key] = code
+        _EMBEDDED_DIRTY = True
+        _EMBEDDED_STATS["compiled"] += 1
+    else:
+        _EMBEDDED_STATS["hits"] += 1
+    return code
+
+def _embedded_cache_save():
+    """Write the pack if anything was compiled (or went stale) since the last save."""
+    global _EMBEDDED_DIRTY
+    if _EMBEDDED_CODE is None or _os.environ.get("UWPLAUNCHER_NO_BYTECODE_CACHE"):
+        return
+    try:
+        live = {_embedded_key(n) for n in _EMBEDDED_SOURCES}
+        if not _EMBEDDED_DIRTY and set(_EMBEDDED_CODE) <= live:
+            return
+        blob = _marshal.dumps({"version": sys.version,
+                               "code": {k: c for k, c in _EMBEDDED_CODE.items() if k in live}})
+        _os.makedirs(_os.path.dirname(_EMBEDDED_PACK_PATH), exist_ok=True)
+        tmp = f"{_EMBEDDED_PACK_PATH}.{_os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(blob)
+        _os.replace(tmp, _EMBEDDED_PACK_PATH)
+        _EMBEDDED_DIRTY = False
+    except Exception as e:
+        print("[embed] bytecode cache not saved:", e)
+
+def _run_embedded_hooks(name, module):
+    for hook in _EMBEDDED_HOOKS.pop(name, ()):
+        try:
+            hook(module)
+        except Exception as e:
+            print(f"[embed] post-import hook for {name} failed: {e}")
+
+def on_embedded_import(name: str, hook):
+    """Call hook(module) once `name` has been imported (right away if it already is)."""
+    mod = sys.modules.get(name)
+    if mod is not None:
+        try:
+            hook(mod)
+        except Exception as e:
+            print(f"[embed] post-import hook for {name} failed: {e}")
+        return
+    _EMBEDDED_HOOKS.setdefault(name, []).append(hook)
+
+def is_embedded_module(name: str) -> bool:
+    return name in _EMBEDDED_SOURCES
+
+class _EmbeddedImporter(_importlib_abc.MetaPathFinder, _importlib_abc.Loader):
+    """Serves registered embedded sources to the import system on demand."""
+
+    def find_spec(self, fullname, path=None, target=None):
+        entry = _EMBEDDED_SOURCES.get(fullname)
+        if entry is None:
+            return None
+        return _importlib_util.spec_from_loader(fullname, self, origin=entry[1])
+
+    def create_module(self, spec):
+        return None
+
+    def exec_module(self, module):
+        name = module.__name__
+        module.__file__ = _EMBEDDED_SOURCES[name][1]
+        try:
+            with PROFILE.span(f"import {name}", cat="import"):
+                exec(_embedded_code(name), module.__dict__)  # nosec B102: trusted, embedded code only
+        except SystemExit as e:
+            # e.g. nonuwp.launcher exits on missing deps; at import-on-demand time
+            # that must surface as a failed import, not end the running app
+            raise ImportError(f"{name} exited during import ({e.code})") from None
+        # Other names registered with the same text resolve to this module
+        digest = _embedded_digest(name)
+        for other in list(_EMBEDDED_SOURCES):
+            if other != name and other not in sys.modules and _embedded_digest(other) == digest:
+                sys.modules[other] = module
+                _EMBEDDED_STATS["aliased"] += 1
+                _run_embedded_hooks(other, module)
+        _run_embedded_hooks(name, module)
+
+_EMBEDDED_IMPORTER = _EmbeddedImporter()
+# First on the path: embedded copies win over stray files of the same name
+sys.meta_path.insert(0, _EMBEDDED_IMPORTER)
+# Modules imported later in the session get their bytecode saved on exit
+_atexit_embedded.register(_embedded_cache_save)
+
+def _register_module_lazy(name: str, key_text: str, virtual_file: str, make_source):
+    """
+    Register an embedded module whose source is produced by make_source()
+    (e.g. base64-decoded); key_text identifies the content. Nothing runs
+    until the module is imported, and make_source only when the bytecode
+    cache misses.
+    """
+    _EMBEDDED_SOURCES[name] = (key_text, virtual_file, make_source)
+    _EMBEDDED_DIGESTS.pop(name, None)
+
+def _alias_embedded(old_name: str, new_name: str):
+    """Make old_name import the embedded new_name (same module object)."""
+    if old_name not in _EMBEDDED_SOURCES and new_name in _EMBEDDED_SOURCES:
+        _EMBEDDED_SOURCES[old_name] = _EMBEDDED_SOURCES[new_name]
+# === END ADD-ONLY lazy importer ===
+
 def _register_module(name: str, code: str, virtual_file: str):
     """
-    Load an embedded helper module from a trusted source string.
+    Register an embedded helper module from a trusted source string.
 
     code always comes from our own embedded mapping, never from user input.
     """
-    mod = types.ModuleType(name)
-    mod.__file__ = virtual_file
-    sys.modules[name] = mod
-    exec(compile(code, virtual_file, "exec"), mod.__dict__)  # nosec B102: trusted, embedded code only
-    return mod
+    _register_module_lazy(name, code, virtual_file, lambda: code)
 
+PROFILE.begin("embedded modules: register")
 # === BEGIN EMBED: ensure nonuwp.launcher (base64) ===
 import sys as _sys, types as _types, base64 as _b64
 if "nonuwp" not in _sys.modules:
     _pkg = _types.ModuleType("nonuwp"); _pkg.__path__ = []; _sys.modules["nonuwp"] = _pkg
 try:
-    _src = _b64.b64decode("aW1wb3J0IHJlCiMgVW5pdmVyc2FsIFVXUCBHYW1lIExhdW5jaGVyIChzaW5nbGUgZmlsZSkKIyBMYXVuY2hlcyBVV1AgYXBwcyBieSBBVU1JRCB2aWEgSUFwcGxpY2F0aW9uQWN0aXZhdGlvbk1hbmFnZXIsIHBhc3NlcyBhcmd1bWVudHMsCiMgdGhlbiBhcHBsaWVzIHBlci10aXRsZSBDUFUgYWZmaW5pdHkgYW5kIHByb2Nlc3MgcHJpb3JpdHkuIEluY2x1ZGVzIGEgc2ltcGxlIFVJCiMgdG8gYWRkL2VkaXQgdGl0bGVzIGFuZCBvcHRpb25hbGx5IGNyZWF0ZSBhIGRlc2t0b3AgLmxuayB0aGF0IGNhbGxzIHRoaXMgc2NyaXB0LgoKaW1wb3J0IG9zLCBzeXMsIGpzb24sIHRpbWUsIHN1YnByb2Nlc3MsIGN0eXBlcywgcGxhdGZvcm0sIHRyYWNlYmFjawpmcm9tIHBhdGhsaWIgaW1wb3J0IFBhdGgKZnJvbSB0eXBpbmcgaW1wb3J0IE9wdGlvbmFsLCBEaWN0LCBBbnksIExpc3QsIFR1cGxlCmltcG9ydCB3ZWJicm93c2VyCmZyb20gaHR0cC5zZXJ2ZXIgaW1wb3J0IEhUVFBTZXJ2ZXIsIEJhc2VIVFRQUmVxdWVzdEhhbmRsZXIKZnJvbSB1cmxsaWIucGFyc2UgaW1wb3J0IHVybGVuY29kZSwgdXJscGFyc2UsIHBhcnNlX3FzCmZyb20gdXJsbGliLnJlcXVlc3QgaW1wb3J0IHVybG9wZW4sIFJlcXVlc3QKaW1wb3J0IHRocmVhZGluZywgc29ja2V0CgojIFRoaXJkLXBhcnR5IGRlcHMgKGluc3RhbGw6IHBpcCBpbnN0YWxsIFB5UXQ2IHBzdXRpbCBjb210eXBlcykKdHJ5OgogICAgaW1wb3J0IHBzdXRpbAogICAgaW1wb3J0IGNvbXR5cGVzCiAgICBpbXBvcnQgY29tdHlwZXMuY2xpZW50IGFzIGNjCiAgICBmcm9tIGNvbXR5cGVzIGltcG9ydCBHVUlELCBIUkVTVUxULCBJVW5rbm93biwgQ09NTUVUSE9ECiAgICBmcm9tIGN0eXBlcyBpbXBvcnQgd2ludHlwZXMKZXhjZXB0IEltcG9ydEVycm9yIGFzIGU6CiAgICBwcmludCgiTWlzc2luZyBkZXBlbmRlbmN5OiIsIGUpCiAgICBwcmludCgiSW5zdGFsbCB3aXRoOiBwaXAgaW5zdGFsbCBQeVF0NiBwc3V0aWwgY29tdHlwZXMiKQogICAgc3lzLmV4aXQoMSkKCiMgUXQKZnJvbSBQeVF0NiBpbXBvcnQgUXRXaWRnZXRzLCBRdENvcmUsIFF0R3VpCgojIC0tLSBQbGF0Zm9ybSBndWFyZCAtLS0KaWYgcGxhdGZvcm0uc3lzdGVtKCkgIT0gIldpbmRvd3MiOgogICAgcHJpbnQoIlRoaXMgdG9vbCByZXF1aXJlcyBXaW5kb3dzLiIpCiAgICBzeXMuZXhpdCgxKQoKIyA9PT09PSBXaW4zMiAvIENPTSBjb25zdGFudHMgPT09PT0KIyBQcmlvcml0eSBjbGFzc2VzCkFCT1ZFX05PUk1BTF9QUklPUklUWV9DTEFTUyA9IDB4MDAwMDgwMDAKSElHSF9QUklPUklUWV9DTEFTUyAgICAgICAgID0gMHgwMDAwMDA4MApOT1JNQUxfUFJJT1JJVFlfQ0xBU1MgICAgICAgPSAweDAwMDAwMDIwClJFQUxUSU1FX1BSSU9SSVRZX0NMQVNTICAgICA9IDB4MDAwMDAxMDAKQkVMT1dfTk9STUFMX1BSSU9SSVRZX0NMQVNTID0gMHgwMDAwNDAwMAoKUFJJT1JJVFlfTUFQID0gewogICAgIk5vcm1hbCI6IE5PUk1BTF9QUklPUklUWV9DTEFTUywKICAgICJBYm92ZSBOb3JtYWwiOiBBQk9WRV9OT1JNQUxfUFJJT1JJVFlfQ0xBU1MsCiAgICAiSGlnaCI6IEhJR0hfUFJJT1JJVFlfQ0xBU1MsCiAgICAiUmVhbHRpbWUgKGNhcmVmdWwpIjogUkVBTFRJTUVfUFJJT1JJVFlfQ0xBU1MsCiAgICAiQmVsb3cgTm9ybWFsIjogQkVMT1dfTk9STUFMX1BSSU9SSVRZX0NMQVNTCn0KCiMgSUFwcGxpY2F0aW9uQWN0aXZhdGlvbk1hbmFnZXIKQ0xTSURfQXBwbGljYXRpb25BY3RpdmF0aW9uTWFuYWdlciA9IEdVSUQoIns0NUJBMTI3RC0xMEE4LTQ2RUEtOEFCNy01NkVBOTA3ODk0M0N9IikKSUlEX0lBcHBsaWNhdGlvbkFjdGl2YXRpb25NYW5hZ2VyICA9IEdVSUQoInsyRTk0MTE0MS03Rjk3LTQ3NTYtQkExRC05REVDREU4OTRBM0R9IikKCiMgQWN0aXZhdGVPcHRpb25zCkFPX05PTkUgICAgICAgICAgICA9IDB4MApBT19OT0VSUk9SVUkgICAgICAgPSAweDEKQU9fTk9TUExBU0hTQ1JFRU4gID0gMHgyCgprZXJuZWwzMiA9IGN0eXBlcy53aW5kbGwua2VybmVsMzIKdXNlcjMyICAgPSBjdHlwZXMud2luZGxsLnVzZXIzMgpBU0ZXX0FOWSA9IC0xICAjIEFsbG93U2V0Rm9yZWdyb3VuZFdpbmRvdwoKIyAtLS0tLSBDT00gaW50ZXJmYWNlIGRlZmluaXRpb24gLS0tLS0KY2xhc3MgSUFwcGxpY2F0aW9uQWN0aXZhdGlvbk1hbmFnZXIoSVVua25vd24pOgogICAgX2lpZF8gPSBJSURfSUFwcGxpY2F0aW9uQWN0aXZhdGlvbk1hbmFnZXIKICAgIF9tZXRob2RzXyA9IFsKICAgICAgICBDT01NRVRIT0QoCiAgICAgICAgICAgIFtdLCBIUkVTVUxULCAnQWN0aXZhdGVBcHBsaWNhdGlvbicsCiAgICAgICAgICAgIChbJ2luJ10sICBjdHlwZXMuY193Y2hhcl9wLCAnYXBwVXNlck1vZGVsSWQnKSwKICAgICAgICAgICAgKFsnaW4nXSwgIGN0eXBlcy5jX3djaGFyX3AsICdhcmd1bWVudHMnKSwKICAgICAgICAgICAgKFsnaW4nXSwgIGN0eXBlcy5jX3VpbnQsICAgICdvcHRpb25zJyksCiAgICAgICAgICAgIChbJ291dCddLCBjdHlwZXMuUE9JTlRFUih3aW50eXBlcy5EV09SRCksICdwcm9jZXNzSWQnKQogICAgICAgICksCiAgICAgICAgIyBTdHVicyAodW51c2VkIGJ1dCBrZWVwIHZ0YWJsZSBsYXlvdXQpCiAgICAgICAgQ09NTUVUSE9EKFtdLCBIUkVTVUxULCAnQWN0aXZhdGVGb3JGaWxlJywKICAgICAgICAgICAgICAgICAgKFsnaW4nXSwgY3R5cGVzLmNfdm9pZF9wLCAnaXRlbUFycmF5JyksCiAgICAgICAgICAgICAgICAgIChbJ2luJ10sIGN0eXBlcy5jX3djaGFyX3AsICd2ZXJiJyksCiAgICAgICAgICAgICAgICAgIChbJ291dCddLCBjdHlwZXMuUE9JTlRFUih3aW50eXBlcy5EV09SRCksICdwcm9jZXNzSWQnKSksCiAgICAgICAgQ09NTUVUSE9EKFtdLCBIUkVTVUxULCAnQWN0aXZhdGVGb3JQcm90b2NvbCcsCiAgICAgICAgICAgICAgICAgIChbJ2luJ10sIGN0eXBlcy5jX3ZvaWRfcCwgJ2l0ZW1BcnJheScpLAogICAgICAgICAgICAgICAgICAoWydpbiddLCBjdHlwZXMuY193Y2hhcl9wLCAndmVyYicpLAogICAgICAgICAgICAgICAgICAoWydvdXQnXSwgY3R5cGVzLlBPSU5URVIod2ludHlwZXMuRFdPUkQpLCAncHJvY2Vzc0lkJykpLAogICAgXQoKZGVmIF9jcmVhdGVfYWN0aXZhdGlvbl9tYW5hZ2VyKCkgLT4gSUFwcGxpY2F0aW9uQWN0aXZhdGlvbk1hbmFnZXI6CiAgICAjIEluaXRpYWxpemUgQ09NIGFuZCBhbGxvdyBmb3JlZ3JvdW5kCiAgICBjb210eXBlcy5Db0luaXRpYWxpemUoKQogICAgdXNlcjMyLkFsbG93U2V0Rm9yZWdyb3VuZFdpbmRvdyhBU0ZXX0FOWSkKICAgICMgQ3JlYXRlIHRoZSBDT00gb2JqZWN0IChMb2NhbCBTZXJ2ZXIgY29udGV4dCkKICAgIHJldHVybiBjYy5DcmVhdGVPYmplY3QoCiAgICAgICAgQ0xTSURfQXBwbGljYXRpb25BY3RpdmF0aW9uTWFuYWdlciwKICAgICAgICBpbnRlcmZhY2U9SUFwcGxpY2F0aW9uQWN0aXZhdGlvbk1hbmFnZXIsCiAgICAgICAgY2xzY3R4PWNvbXR5cGVzLkNMU0NUWF9MT0NBTF9TRVJWRVIKICAgICkKCiMgPT09PT0gSGVscGVycyA9PT09PQojID09PT09IFN0ZWFtIFZhbGlkYXRpb24gSGVscGVycyA9PT09PQpkZWYgX2dldF9zdGVhbV9yb290KCkgLT4gT3B0aW9uYWxbUGF0aF06CiAgICAiIiJMb2NhdGUgU3RlYW0gcm9vdCB2aWEgcmVnaXN0cnkgb3IgZGVmYXVsdHMuIiIiCiAgICB0cnk6CiAgICAgICAgaW1wb3J0IHdpbnJlZwogICAgICAgIHdpdGggd2lucmVnLk9wZW5LZXkod2lucmVnLkhLRVlfQ1VSUkVOVF9VU0VSLCByIlNvZnR3YXJlXFZhbHZlXFN0ZWFtIikgYXMgazoKICAgICAgICAgICAgdmFsLCBfID0gd2lucmVnLlF1ZXJ5VmFsdWVFeChrLCAiU3RlYW1QYXRoIikKICAgICAgICAgICAgaWYgdmFsOgogICAgICAgICAgICAgICAgcCA9IFBhdGgodmFsKQogICAgICAgICAgICAgICAgcmV0dXJuIHAgaWYgcC5leGlzdHMoKSBlbHNlIE5vbmUKICAgIGV4Y2VwdCBFeGNlcHRpb246CiAgICAgICAgcGFzcwogICAgIyBjb21tb24gZGVmYXVsdAogICAgZm9yIGd1ZXNzIGluIFtQYXRoKHIiQzpcUHJvZ3JhbSBGaWxlcyAoeDg2KVxTdGVhbSIpLCBQYXRoKHIiQzpcUHJvZ3JhbSBGaWxlc1xTdGVhbSIpXToKICAgICAgICBpZiBndWVzcy5leGlzdHMoKToKICAgICAgICAgICAgcmV0dXJuIGd1ZXNzCiAgICByZXR1cm4gTm9uZQoKZGVmIF9zdGVhbV9jb250ZW50X2xvZ19wYXRoKCkgLT4gT3B0aW9uYWxbUGF0aF06CiAgICByb290ID0gX2dldF9zdGVhbV9yb290KCkKICAgIGlmIG5vdCByb290OgogICAgICAgIHJldHVybiBOb25lCiAgICBsb2cgPSByb290IC8gImxvZ3MiIC8gImNvbnRlbnRfbG9nLnR4dCIKICAgIHJldHVybiBsb2cgaWYgbG9nLmV4aXN0cygpIGVsc2UgbG9nICAjIHJldHVybiBwYXRoIGFueXdheTsgaXQgbWF5IGJlIGNyZWF0ZWQgb24gZmlyc3Qgd3JpdGUKCmRlZiBfb3Blbl9zdGVhbV91cmwodXJsOiBzdHIpIC0+IGJvb2w6CiAgICAiIiJPcGVuIGEgc3RlYW06Ly8gVVJMIHdpdGhvdXQgYmxvY2tpbmcuIiIiCiAgICB0cnk6CiAgICAgICAgIyBvcy5zdGFydGZpbGUgc3VwcG9ydHMgcHJvdG9jb2wgaGFuZGxlcnMgb24gV2luZG93cwogICAgICAgIG9zLnN0YXJ0ZmlsZSh1cmwpCiAgICAgICAgcmV0dXJuIFRydWUKICAgIGV4Y2VwdCBFeGNlcHRpb246CiAgICAgICAgdHJ5OgogICAgICAgICAgICBzdWJwcm9jZXNzLlBvcGVuKFsnY21kJywgJy9jJywgJ3N0YXJ0JywgJycsIHVybF0sIGNyZWF0aW9uZmxhZ3M9c3VicHJvY2Vzcy5DUkVBVEVfTk9fV0lORE9XKQogICAgICAgICAgICByZXR1cm4gVHJ1ZQogICAgICAgIGV4Y2VwdCBFeGNlcHRpb246CiAgICAgICAgICAgIHJldHVybiBGYWxzZQoKCgojID09PT09IFN0ZWFtIE9wZW5JRCBMb2dpbiAoZm9yIGxhdW5jaGVyIGF1dGgpID09PT09CmRlZiBfZmluZF9mcmVlX3BvcnQoc3RhcnQ9MzQxMjMsIGVuZD0zNDIyMyk6CiAgICBmb3IgcG9ydCBpbiByYW5nZShzdGFydCwgZW5kKToKICAgICAgICB3aXRoIHNvY2tldC5zb2NrZXQoc29ja2V0LkFGX0lORVQsIHNvY2tldC5TT0NLX1NUUkVBTSkgYXMgc286CiAgICAgICAgICAgIHRyeToKICAgICAgICAgICAgICAgIHNvLmJpbmQoKCIxMjcuMC4wLjEiLCBwb3J0KSkKICAgICAgICAgICAgICAgIHJldHVybiBwb3J0CiAgICAgICAgICAgIGV4Y2VwdCBPU0Vycm9yOgogICAgICAgICAgICAgICAgY29udGludWUKICAgIHJldHVybiBOb25lCgpkZWYgX3ZlcmlmeV9vcGVuaWRfd2l0aF9zdGVhbShwYXJhbXM6IERpY3Rbc3RyLCBBbnldKSAtPiBib29sOgogICAgdmVyaWZ5X3BhcmFtcyA9IHBhcmFtcy5jb3B5KCkKICAgIHZlcmlmeV9wYXJhbXNbJ29wZW5pZC5tb2RlJ10gPSAnY2hlY2tfYXV0aGVudGljYXRpb24nCiAgICBkYXRhID0gdXJsZW5jb2RlKHZlcmlmeV9wYXJhbXMpLmVuY29kZSgndXRmLTgnKQogICAgdHJ5OgogICAgICAgIHJlcSA9IFJlcXVlc3QoImh0dHBzOi8vc3RlYW1jb21tdW5pdHkuY29tL29wZW5pZC9sb2dpbiIsIGRhdGE9ZGF0YSwgbWV0aG9kPSJQT1NUIikKICAgICAgICB3aXRoIHVybG9wZW4ocmVxLCB0aW1lb3V0PTEwKSBhcyByZXNwOgogICAgICAgICAgICBib2R5ID0gcmVzcC5yZWFkKCkuZGVjb2RlKCd1dGYtOCcsIGVycm9ycz0naWdub3JlJykKICAgICAgICAgICAgcmV0dXJuICdpc192YWxpZDp0cnVlJyBpbiBib2R5CiAgICBleGNlcHQgRXhjZXB0aW9uOgogICAgICAgIHJldHVybiBGYWxzZQoKZGVmIHN0ZWFtX29wZW5pZF9sb2dpbih0aW1lb3V0PTE4MCkgLT4gT3B0aW9uYWxbc3RyXToKICAgIHBvcnQgPSBfZmluZF9mcmVlX3BvcnQoKQogICAgaWYgbm90IHBvcnQ6CiAgICAgICAgcmV0dXJuIE5vbmUKICAgIHJlc3VsdCA9IHsic3RlYW1pZCI6IE5vbmV9CiAgICBkb25lID0gdGhyZWFkaW5nLkV2ZW50KCkKCiAgICBjbGFzcyBIYW5kbGVyKEJhc2VIVFRQUmVxdWVzdEhhbmRsZXIpOgogICAgICAgIGRlZiBkb19HRVQoc2VsZik6CiAgICAgICAgICAgIHRyeToKICAgICAgICAgICAgICAgIHEgPSB1cmxwYXJzZShzZWxmLnBhdGgpCiAgICAgICAgICAgICAgICBpZiBxLnBhdGggIT0gIi9jYWxsYmFjayI6CiAgICAgICAgICAgICAgICAgICAgc2VsZi5zZW5kX3Jlc3BvbnNlKDQwNCk7IHNlbGYuZW5kX2hlYWRlcnMoKTsgcmV0dXJuCiAgICAgICAgICAgICAgICBwYXJhbXMgPSB7azogdlswXSBmb3IgaywgdiBpbiBwYXJzZV9xcyhxLnF1ZXJ5KS5pdGVtcygpfQogICAgICAgICAgICAgICAgb2sgPSBfdmVyaWZ5X29wZW5pZF93aXRoX3N0ZWFtKHBhcmFtcykKICAgICAgICAgICAgICAgIGNsYWltZWQgPSBwYXJhbXMuZ2V0KCJvcGVuaWQuY2xhaW1lZF9pZCIsIiIpCiAgICAgICAgICAgICAgICBzdGVhbWlkID0gIiIKICAgICAgICAgICAgICAgIGlmIGNsYWltZWQgYW5kIGNsYWltZWQucnNwbGl0KCIvIiwgMSlbLTFdLmlzZGlnaXQoKToKICAgICAgICAgICAgICAgICAgICBzdGVhbWlkID0gY2xhaW1lZC5yc3BsaXQoIi8iLCAxKVstMV0KICAgICAgICAgICAgICAgIGlmIG9rIGFuZCBzdGVhbWlkOgogICAgICAgICAgICAgICAgICAgIHJlc3VsdFsic3RlYW1pZCJdID0gc3RlYW1pZAogICAgICAgICAgICAgICAgICAgIGJvZHkgPSBmIjxodG1sPjxib2R5PjxoMz5Mb2dpbiBzdWNjZXNzZnVsLiBZb3UgY2FuIGNsb3NlIHRoaXMgd2luZG93LjwvaDM+PHA+U3RlYW1JRDoge3N0ZWFtaWR9PC9wPjwvYm9keT48L2h0bWw+Ii5lbmNvZGUoInV0Zi04IikKICAgICAgICAgICAgICAgIGVsc2U6CiAgICAgICAgICAgICAgICAgICAgYm9keSA9IGIiPGh0bWw+PGJvZHk+PGgzPkxvZ2luIGZhaWxlZCBvciBjYW5jZWxlZC4gUGxlYXNlIGNsb3NlIHRoaXMgd2luZG93LjwvaDM+PC9ib2R5PjwvaHRtbD4iCiAgICAgICAgICAgICAgICBzZWxmLnNlbmRfcmVzcG9uc2UoMjAwKTsgc2VsZi5zZW5kX2hlYWRlcigiQ29udGVudC1UeXBlIiwidGV4dC9odG1sIik7IHNlbGYuZW5kX2hlYWRlcnMoKTsgc2VsZi53ZmlsZS53cml0ZShib2R5KQogICAgICAgICAgICAgICAgZG9uZS5zZXQoKQogICAgICAgICAgICBleGNlcHQgRXhjZXB0aW9uOgogICAgICAgICAgICAgICAgdHJ5OgogICAgICAgICAgICAgICAgICAgIHNlbGYuc2VuZF9yZXNwb25zZSg1MDApOyBzZWxmLmVuZF9oZWFkZXJzKCkKICAgICAgICAgICAgICAgIGV4Y2VwdCBFeGNlcHRpb246CiAgICAgICAgICAgICAgICAgICAgcGFzcwogICAgICAgICAgICAgICAgZG9uZS5zZXQoKQogICAgICAgIGRlZiBsb2dfbWVzc2FnZShzZWxmLCBmb3JtYXQsICphcmdzKTogCiAgICAgICAgICAgIHJldHVybgoKICAgIGh0dHBkID0gSFRUUFNlcnZlcigoIjEyNy4wLjAuMSIsIHBvcnQpLCBIYW5kbGVyKQogICAgdGggPSB0aHJlYWRpbmcuVGhyZWFkKHRhcmdldD1odHRwZC5zZXJ2ZV9mb3JldmVyLCBkYWVtb249VHJ1ZSkKICAgIHRoLnN0YXJ0KCkKCiAgICByZWFsbSA9IGYiaHR0cDovLzEyNy4wLjAuMTp7cG9ydH0iCiAgICByZXR1cm5fdG8gPSBmIntyZWFsbX0vY2FsbGJhY2siCiAgICBvcGVuaWRfcGFyYW1zID0gewogICAgICAgICJvcGVuaWQubnMiOiAiaHR0cDovL3NwZWNzLm9wZW5pZC5uZXQvYXV0aC8yLjAiLAogICAgICAgICJvcGVuaWQubW9kZSI6ICJjaGVja2lkX3NldHVwIiwKICAgICAgICAib3BlbmlkLnJldHVybl90byI6IHJldHVybl90bywKICAgICAgICAib3BlbmlkLnJlYWxtIjogcmVhbG0sCiAgICAgICAgIm9wZW5pZC5pZGVudGl0eSI6ICJodHRwOi8vc3BlY3Mub3BlbmlkLm5ldC9hdXRoLzIuMC9pZGVudGlmaWVyX3NlbGVjdCIsCiAgICAgICAgIm9wZW5pZC5jbGFpbWVkX2lkIjogImh0dHA6Ly9zcGVjcy5vcGVuaWQubmV0L2F1dGgvMi4wL2lkZW50aWZpZXJfc2VsZWN0IiwKICAgIH0KICAgIHVybCA9ICJodHRwczovL3N0ZWFtY29tbXVuaXR5LmNvbS9vcGVuaWQvbG9naW4/IiArIHVybGVuY29kZShvcGVuaWRfcGFyYW1zKQogICAgd2ViYnJvd3Nlci5vcGVuKHVybCkKCiAgICBpZiBub3QgZG9uZS53YWl0KHRpbWVvdXQpOgogICAgICAgIHRyeTogaHR0cGQuc2h1dGRvd24oKQogICAgICAgIGV4Y2VwdCBFeGNlcHRpb246IHBhc3MKICAgICAgICByZXR1cm4gTm9uZQogICAgdHJ5OiBodHRwZC5zaHV0ZG93bigpCiAgICBleGNlcHQgRXhjZXB0aW9uOiBwYXNzCiAgICByZXR1cm4gcmVzdWx0WyJzdGVhbWlkIl0KCmRlZiBzeW5jX3N0ZWFtX2xpYnJhcnkoc3RlYW1pZDogc3RyLCBhcGlfa2V5OiBPcHRpb25hbFtzdHJdKSAtPiBUdXBsZVtib29sLCBzdHIsIE9wdGlvbmFsW2RpY3RdXToKICAgIGlmIG5vdCBzdGVhbWlkIG9yIG5vdCBzdGVhbWlkLmlzZGlnaXQoKToKICAgICAgICByZXR1cm4gKEZhbHNlLCAiTm8gdmFsaWQgU3RlYW1JRC4iLCBOb25lKQogICAgaWYgbm90IGFwaV9rZXk6CiAgICAgICAgcmV0dXJuIChGYWxzZSwgIk5vIFN0ZWFtIFdlYiBBUEkga2V5IHNldC4gQWRkIG9uZSB0byBTZXR0aW5ncyB0byBzeW5jIGZ1bGwgbGlicmFyeS4iLCBOb25lKQogICAgdHJ5OgogICAgICAgIHFzID0gdXJsZW5jb2RlKHsia2V5IjogYXBpX2tleSwgInN0ZWFtaWQiOiBzdGVhbWlkLCAiaW5jbHVkZV9hcHBpbmZvIjogMSwgImluY2x1ZGVfcGxheWVkX2ZyZWVfZ2FtZXMiOiAxfSkKICAgICAgICB1cmwgPSAiaHR0cHM6Ly9hcGkuc3RlYW1wb3dlcmVkLmNvbS9JUGxheWVyU2VydmljZS9HZXRPd25lZEdhbWVzL3YxLz8iICsgcXMKICAgICAgICB3aXRoIHVybG9wZW4odXJsLCB0aW1lb3V0PTE1KSBhcyByZXNwOgogICAgICAgICAgICBpbXBvcnQganNvbiBhcyBfanNvbgogICAgICAgICAgICBkYXRhID0gX2pzb24ubG9hZHMocmVzcC5yZWFkKCkuZGVjb2RlKCJ1dGYtOCIsIGVycm9ycz0iaWdub3JlIikpCiAgICAgICAgICAgIHJldHVybiAoVHJ1ZSwgZiJGZXRjaGVkIHtsZW4oZGF0YS5nZXQoJ3Jlc3BvbnNlJyx7fSkuZ2V0KCdnYW1lcycsIFtdKSl9IGdhbWVzLiIsIGRhdGEpCiAgICBleGNlcHQgRXhjZXB0aW9uIGFzIGU6CiAgICAgICAgcmV0dXJuIChGYWxzZSwgZiJGYWlsZWQgdG8gZmV0Y2ggbGlicmFyeToge2V9IiwgTm9uZSkKZGVmIHN0ZWFtX3ZhbGlkYXRlX2FuZF93YWl0KGFwcGlkOiBzdHIsIHRpbWVvdXRfczogaW50ID0gMTgwMCwgcG9sbF9pbnRlcnZhbDogZmxvYXQgPSAxLjAsIGZhbGxiYWNrX3dhaXRfczogaW50ID0gNjApOgogICAgIiIiCiAgICBUcmlnZ2VyIFN0ZWFtIHZhbGlkYXRpb24gKHN0ZWFtOi8vdmFsaWRhdGUvPGFwcGlkPikgYW5kIHdhaXQgdW50aWwgaXQncyAqbGlrZWx5KiBkb25lLgogICAgUHJpb3JpdHkgMTogd2F0Y2ggU3RlYW0gd2luZG93IHRpdGxlcyBmb3IgYW55IG9mOiAnVmFsaWRhdGluZycsICdWZXJpZnlpbmcnLCAnVXBkYXRpbmcnLgogICAgICAgICAgICAgICAgT25jZSBzZWVuIGF0IGxlYXN0IG9uY2UgYW5kIHRoZW4gYWJzZW50IGZvciB+NXMsIGNvbnNpZGVyIGl0IGZpbmlzaGVkLgogICAgUHJpb3JpdHkgMjogaWYgd2UgbmV2ZXIgc2VlIHRob3NlIHRpdGxlcyBhdCBhbGwsIGZhbGwgYmFjayB0byBhIGZpeGVkIHdhaXQgKGBmYWxsYmFja193YWl0X3NgKS4KICAgIE5vIGxvZyBwYXJzaW5nLiBObyBmaWxlIEkvTy4KICAgICIiIgogICAgYXBwaWQgPSBzdHIoYXBwaWQpLnN0cmlwKCkKICAgIGlmIG5vdCBhcHBpZC5pc2RpZ2l0KCk6CiAgICAgICAgcmV0dXJuIEZhbHNlLCBmIlt4XSBJbnZhbGlkIFN0ZWFtIEFwcElEOiB7YXBwaWR9IgoKICAgIF9vcGVuX3N0ZWFtX3VybChmInN0ZWFtOi8vdmFsaWRhdGUve2FwcGlkfSIpCgogICAgaW1wb3J0IHRpbWUKICAgIHN0YXJ0X3RzID0gdGltZS50aW1lKCkKICAgIGxhc3Rfc2VlbiA9IDAuMAogICAgc2Vlbl9hbnkgPSBGYWxzZQogICAgZ3JhY2VfYWZ0ZXJfaGlkZSA9IDUuMAogICAga2V5d29yZHMgPSAoIlZhbGlkYXRpbmciLCAiVmVyaWZ5aW5nIiwgIlVwZGF0aW5nIikKCiAgICB3aGlsZSAodGltZS50aW1lKCkgLSBzdGFydF90cykgPCB0aW1lb3V0X3M6CiAgICAgICAgdHJ5OgogICAgICAgICAgICBpZiBhbnkoX3N0ZWFtX3dpbmRvd190aXRsZV9oYXMoaykgZm9yIGsgaW4ga2V5d29yZHMpOgogICAgICAgICAgICAgICAgc2Vlbl9hbnkgPSBUcnVlCiAgICAgICAgICAgICAgICBsYXN0X3NlZW4gPSB0aW1lLnRpbWUoKQogICAgICAgIGV4Y2VwdCBFeGNlcHRpb246CiAgICAgICAgICAgIHBhc3MKCiAgICAgICAgaWYgc2Vlbl9hbnkgYW5kICh0aW1lLnRpbWUoKSAtIGxhc3Rfc2VlbikgPj0gZ3JhY2VfYWZ0ZXJfaGlkZToKICAgICAgICAgICAgcmV0dXJuIFRydWUsIGYiW+Kck10gU3RlYW0gdmFsaWRhdGlvbiBmaW5pc2hlZCBmb3IgQXBwSUQge2FwcGlkfS4iCgogICAgICAgICMgRmFsbGJhY2sgcGF0aDogbmV2ZXIgc2F3IGEgJ3ZhbGlkYXRpbmcnIGtpbmQgb2YgdGl0bGUgYXQgYWxsIOKAlCBqdXN0IHdhaXQgb3V0IGEgc2hvcnQgd2luZG93CiAgICAgICAgaWYgKG5vdCBzZWVuX2FueSkgYW5kICh0aW1lLnRpbWUoKSAtIHN0YXJ0X3RzKSA+PSBmYWxsYmFja193YWl0X3M6CiAgICAgICAgICAgIHJldHVybiBUcnVlLCBmIlt+XSBQcm9jZWVkaW5nIGFmdGVyIGZhbGxiYWNrIHdhaXQgKHtmYWxsYmFja193YWl0X3N9cykgZm9yIEFwcElEIHthcHBpZH0uIgoKICAgICAgICB0aW1lLnNsZWVwKHBvbGxfaW50ZXJ2YWwpCgogICAgcmV0dXJuIEZhbHNlLCBmIlshXSBUaW1lZCBvdXQgd2FpdGluZyBmb3IgU3RlYW0gdmFsaWRhdGlvbiBvZiBBcHBJRCB7YXBwaWR9IGFmdGVyIHt0aW1lb3V0X3N9cy4iCmRlZiBzZXRfcHJpb3JpdHlfYW5kX2FmZmluaXR5KHBpZDogaW50LCBwcmlvcml0eV9jb25zdDogaW50LCBtYXNrOiBPcHRpb25hbFtpbnRdKSAtPiBUdXBsZVtib29sLCBzdHJdOgogICAgIiIiQXBwbHkgcHJpb3JpdHkgYW5kIG9wdGlvbmFsIENQVSBhZmZpbml0eSB0byBhIHByb2Nlc3MuIiIiCiAgICB0cnk6CiAgICAgICAgUFJPQ0VTU19TRVRfSU5GT1JNQVRJT04gPSAweDAyMDAKICAgICAgICBQUk9DRVNTX1FVRVJZX0xJTUlURURfSU5GT1JNQVRJT04gPSAweDEwMDAKICAgICAgICBQUk9DRVNTX1NFVF9BRkZJTklUWSA9IDB4MDEwMAogICAgICAgIGRlc2lyZWQgPSBQUk9DRVNTX1NFVF9JTkZPUk1BVElPTiB8IFBST0NFU1NfUVVFUllfTElNSVRFRF9JTkZPUk1BVElPTiB8IFBST0NFU1NfU0VUX0FGRklOSVRZCiAgICAgICAgaGFuZGxlID0ga2VybmVsMzIuT3BlblByb2Nlc3MoZGVzaXJlZCwgRmFsc2UsIHBpZCkKICAgICAgICBpZiBub3QgaGFuZGxlOgogICAgICAgICAgICByZXR1cm4gRmFsc2UsIGYiT3BlblByb2Nlc3MgZmFpbGVkIChQSUQge3BpZH0pLiBUcnkgcnVubmluZyBhcyBBZG1pbmlzdHJhdG9yLiIKCiAgICAgICAgaWYgbm90IGtlcm5lbDMyLlNldFByaW9yaXR5Q2xhc3MoaGFuZGxlLCBwcmlvcml0eV9jb25zdCk6CiAgICAgICAgICAgIGtlcm5lbDMyLkNsb3NlSGFuZGxlKGhhbmRsZSkKICAgICAgICAgICAgcmV0dXJuIEZhbHNlLCBmIlNldFByaW9yaXR5Q2xhc3MgZmFpbGVkIGZvciBQSUQge3BpZH0uIFRyeSBBZG1pbi4iCgogICAgICAgIGlmIG1hc2sgaXMgbm90IE5vbmU6CiAgICAgICAgICAgIHBtYXNrID0gY3R5cGVzLmNfc2l6ZV90KG1hc2spCiAgICAgICAgICAgIGlmIG5vdCBrZXJuZWwzMi5TZXRQcm9jZXNzQWZmaW5pdHlNYXNrKGhhbmRsZSwgcG1hc2spOgogICAgICAgICAgICAgICAga2VybmVsMzIuQ2xvc2VIYW5kbGUoaGFuZGxlKQogICAgICAgICAgICAgICAgcmV0dXJuIEZhbHNlLCBmIlNldFByb2Nlc3NBZmZpbml0eU1hc2sgZmFpbGVkIGZvciBQSUQge3BpZH0uIE1hc2s9MHh7bWFzazpYfS4gVHJ5IEFkbWluLiIKCiAgICAgICAga2VybmVsMzIuQ2xvc2VIYW5kbGUoaGFuZGxlKQogICAgICAgIHJldHVybiBUcnVlLCAiQXBwbGllZCBwcmlvcml0eXt9LiIuZm9ybWF0KCIgKyBhZmZpbml0eSIgaWYgbWFzayBpcyBub3QgTm9uZSBlbHNlICIiKQogICAgZXhjZXB0IEV4Y2VwdGlvbiBhcyBlOgogICAgICAgIHJldHVybiBGYWxzZSwgZiJXaW4zMiBlcnJvcjoge2V9IgoKZGVmIGNwdV9jb3VudF9sb2dpY2FsKCkgLT4gaW50OgogICAgcmV0dXJuIG9zLmNwdV9jb3VudCgpIG9yIDgKCmRlZiBtYXNrX2FsbF9idXRfY3B1MCgpIC0+IGludDoKICAgIG4gPSBjcHVfY291bnRfbG9naWNhbCgpCiAgICByZXR1cm4gKCgxIDw8IG4pIC0gMSkgJiB+MHgxIGlmIG4gPiAxIGVsc2UgMQoKZGVmIHBhcnNlX2hleF9tYXNrKHM6IHN0cikgLT4gT3B0aW9uYWxbaW50XToKICAgIHMgPSAocyBvciAiIikuc3RyaXAoKQogICAgaWYgbm90IHM6CiAgICAgICAgcmV0dXJuIE5vbmUKICAgIGlmIHMubG93ZXIoKS5zdGFydHN3aXRoKCIweCIpOgogICAgICAgIHMgPSBzWzI6XQogICAgdHJ5OgogICAgICAgIHZhbCA9IGludChzLCAxNikKICAgICAgICByZXR1cm4gdmFsIGlmIHZhbCA+IDAgZWxzZSBOb25lCiAgICBleGNlcHQgVmFsdWVFcnJvcjoKICAgICAgICByZXR1cm4gTm9uZQoKIyA9PT09PSBTdG9yYWdlID09PT09CkFQUERBVEFfRElSID0gUGF0aChvcy5nZXRlbnYoIkFQUERBVEEiLCBzdHIoUGF0aC5ob21lKCkgLyAiQXBwRGF0YSIgLyAiUm9hbWluZyIpKSkgLyAiVW5pdmVyc2FsVVdQTGF1bmNoZXIiClNDUklQVF9ESVIgPSBQYXRoKF9fZmlsZV9fKS5yZXNvbHZlKCkucGFyZW50CkxPQ0FMX1NFVFRJTkdTID0gU0NSSVBUX0RJUiAvICJzZXR0aW5ncy5qc29uIgpBUFBEQVRBX0RJUi5ta2RpcihwYXJlbnRzPVRydWUsIGV4aXN0X29rPVRydWUpCkdBTUVTX1BBVEggPSBBUFBEQVRBX0RJUiAvICJnYW1lcy5qc29uIgpTRVRUSU5HU19QQVRIID0gTE9DQUxfU0VUVElOR1MgaWYgTE9DQUxfU0VUVElOR1MuZXhpc3RzKCkgZWxzZSAoQVBQREFUQV9ESVIgLyAic2V0dGluZ3MuanNvbiIpCgpERUZBVUxUX1NFVFRJTkdTID0gewogICAgImRlZmF1bHRfd2FpdCI6IDQ1LAogICAgImRlZmF1bHRfcHJpb3JpdHkiOiAiSGlnaCIsCn0KCmRlZiBfcmVhZF9qc29uKHBhdGg6IFBhdGgsIGRlZmF1bHQpOgogICAgaWYgbm90IHBhdGguZXhpc3RzKCk6CiAgICAgICAgcmV0dXJuIGRlZmF1bHQKICAgIHRyeToKICAgICAgICByZXR1cm4ganNvbi5sb2FkcyhwYXRoLnJlYWRfdGV4dChlbmNvZGluZz0idXRmLTgiKSkKICAgIGV4Y2VwdCBFeGNlcHRpb246CiAgICAgICAgcmV0dXJuIGRlZmF1bHQKCmRlZiBfd3JpdGVfanNvbihwYXRoOiBQYXRoLCBvYmopIC0+IE5vbmU6CiAgICBwYXRoLndyaXRlX3RleHQoanNvbi5kdW1wcyhvYmosIGluZGVudD0yKSwgZW5jb2Rpbmc9InV0Zi04IikKCmRlZiBsb2FkX2dhbWVzKCkgLT4gRGljdFtzdHIsIEFueV06CiAgICBkYXRhID0gX3JlYWRfanNvbihHQU1FU19QQVRILCB7ImdhbWVzIjogW119KQogICAgaWYgbm90IGlzaW5zdGFuY2UoZGF0YS5nZXQoImdhbWVzIiksIGxpc3QpOgogICAgICAgIGRhdGFbImdhbWVzIl0gPSBbXQogICAgcmV0dXJuIGRhdGEKCmRlZiBzYXZlX2dhbWVzKGRhdGE6IERpY3Rbc3RyLCBBbnldKSAtPiBOb25lOgogICAgX3dyaXRlX2pzb24oR0FNRVNfUEFUSCwgZGF0YSkKCmRlZiBsb2FkX3NldHRpbmdzKCkgLT4gRGljdFtzdHIsIEFueV06CiAgICBzID0gX3JlYWRfanNvbihTRVRUSU5HU19QQVRILCBERUZBVUxUX1NFVFRJTkdTLmNvcHkoKSkKICAgIGZvciBrLCB2IGluIERFRkFVTFRfU0VUVElOR1MuaXRlbXMoKToKICAgICAgICBzLnNldGRlZmF1bHQoaywgdikKICAgIHJldHVybiBzCgpkZWYgc2F2ZV9zZXR0aW5ncyhzOiBEaWN0W3N0ciwgQW55XSkgLT4gTm9uZToKICAgIF93cml0ZV9qc29uKFNFVFRJTkdTX1BBVEgsIHMpCgojID09PT09IFVXUCBkaXNjb3ZlcnkgdmlhIFBvd2VyU2hlbGwgPT09PT0KZGVmIGxpc3RfdXdwX2FwcHMoKSAtPiBMaXN0W1R1cGxlW3N0ciwgc3RyXV06CiAgICAiIiJSZXR1cm4gKE5hbWUsIEFwcElEKSB1c2luZyBQb3dlclNoZWxsIEdldC1TdGFydEFwcHMuIiIiCiAgICB0cnk6CiAgICAgICAgY21kID0gWwogICAgICAgICAgICAicG93ZXJzaGVsbCIsICItTm9Qcm9maWxlIiwgIi1FeGVjdXRpb25Qb2xpY3kiLCAiQnlwYXNzIiwKICAgICAgICAgICAgIkdldC1TdGFydEFwcHMgfCBTZWxlY3QtT2JqZWN0IE5hbWUsQXBwSUQgfCBDb252ZXJ0VG8tSnNvbiAtRGVwdGggMiIKICAgICAgICBdCiAgICAgICAgb3V0ID0gc3VicHJvY2Vzcy5jaGVja19vdXRwdXQoY21kLCBjcmVhdGlvbmZsYWdzPXN1YnByb2Nlc3MuQ1JFQVRFX05PX1dJTkRPVykuZGVjb2RlKCJ1dGYtOCIsIGVycm9ycz0iaWdub3JlIikuc3RyaXAoKQogICAgICAgIGlmIG5vdCBvdXQ6CiAgICAgICAgICAgIHJldHVybiBbXQogICAgICAgIGRhdGEgPSBqc29uLmxvYWRzKG91dCkKICAgICAgICBpdGVtcyA9IGRhdGEgaWYgaXNpbnN0YW5jZShkYXRhLCBsaXN0KSBlbHNlIFtkYXRhXQogICAgICAgIGFwcHMgPSBbKGl0LmdldCgiTmFtZSIsIiIpLCBpdC5nZXQoIkFwcElEIiwiIikpIGZvciBpdCBpbiBpdGVtcyBpZiBpdCBhbmQgaXQuZ2V0KCJOYW1lIikgYW5kIGl0LmdldCgiQXBwSUQiKV0KICAgICAgICBhcHBzLnNvcnQoa2V5PWxhbWJkYSB4OiB4WzBdLmxvd2VyKCkpCiAgICAgICAgcmV0dXJuIGFwcHMKICAgIGV4Y2VwdCBFeGNlcHRpb246CiAgICAgICAgcmV0dXJuIFtdCgojID09PT09IERlc2t0b3Agc2hvcnRjdXQgaGVscGVyIChvcHRpb25hbCkgPT09PT0KZGVmIG1ha2Vfd2luZG93c19zaG9ydGN1dCh0YXJnZXRfZXhlOiBzdHIsIGFyZ3M6IHN0ciwgb3V0X3BhdGg6IFBhdGgsIGljb25fcGF0aDogT3B0aW9uYWxbc3RyXSA9IE5vbmUpIC0+IFR1cGxlW2Jvb2wsIHN0cl06CiAgICB0cnk6CiAgICAgICAgb3V0X3BhdGggPSBvdXRfcGF0aC53aXRoX3N1ZmZpeCgiLmxuayIpCiAgICAgICAgb3V0X2VzYyAgID0gc3RyKG91dF9wYXRoKS5yZXBsYWNlKCInIiwgIicnIikKICAgICAgICB0Z3RfZXNjICAgPSB0YXJnZXRfZXhlLnJlcGxhY2UoIiciLCAiJyciKQogICAgICAgIGFyZ3NfZXNjICA9IGFyZ3MucmVwbGFjZSgiJyIsICInJyIpCiAgICAgICAgd29ya2RpciAgID0gc3RyKFBhdGgodGFyZ2V0X2V4ZSkucGFyZW50KS5yZXBsYWNlKCInIiwgIicnIikKCiAgICAgICAgcHMgID0gIiRXc2hTaGVsbCA9IE5ldy1PYmplY3QgLUNvbU9iamVjdCBXU2NyaXB0LlNoZWxsXG4iCiAgICAgICAgcHMgKz0gIiRTaG9ydGN1dCA9ICRXc2hTaGVsbC5DcmVhdGVTaG9ydGN1dCgne30nKVxuIi5mb3JtYXQob3V0X2VzYykKICAgICAgICBwcyArPSAiJFNob3J0Y3V0LlRhcmdldFBhdGggPSAne30nXG4iLmZvcm1hdCh0Z3RfZXNjKQogICAgICAgIHBzICs9ICIkU2hvcnRjdXQuQXJndW1lbnRzICA9ICd7fSdcbiIuZm9ybWF0KGFyZ3NfZXNjKQogICAgICAgIHBzICs9ICIkU2hvcnRjdXQuV29ya2luZ0RpcmVjdG9yeSA9ICd7fSdcbiIuZm9ybWF0KHdvcmtkaXIpCiAgICAgICAgaWYgaWNvbl9wYXRoOgogICAgICAgICAgICBwcyArPSAiJFNob3J0Y3V0Lkljb25Mb2NhdGlvbiA9ICd7fSdcbiIuZm9ybWF0KGljb25fcGF0aC5yZXBsYWNlKCInIiwgIicnIikpCiAgICAgICAgcHMgKz0gIiRTaG9ydGN1dC5TYXZlKClcbiIKCiAgICAgICAgc3VicHJvY2Vzcy5jaGVja19jYWxsKFsicG93ZXJzaGVsbCIsIi1Ob1Byb2ZpbGUiLCItRXhlY3V0aW9uUG9saWN5IiwiQnlwYXNzIiwgcHNdLAogICAgICAgICAgICAgICAgICAgICAgICAgICAgICBjcmVhdGlvbmZsYWdzPXN1YnByb2Nlc3MuQ1JFQVRFX05PX1dJTkRPVykKICAgICAgICByZXR1cm4gVHJ1ZSwgc3RyKG91dF9wYXRoKQogICAgZXhjZXB0IHN1YnByb2Nlc3MuQ2FsbGVkUHJvY2Vzc0Vycm9yIGFzIGU6CiAgICAgICAgcmV0dXJuIEZhbHNlLCBmIlBvd2VyU2hlbGwgZmFpbGVkOiB7ZX0iCiAgICBleGNlcHQgRXhjZXB0aW9uIGFzIGU6CiAgICAgICAgcmV0dXJuIEZhbHNlLCBmIlNob3J0Y3V0IGVycm9yOiB7ZX0iCgpkZWYgdGhpc19weXRob25fZXhlY3V0YWJsZSgpIC0+IHN0cjoKICAgIHJldHVybiBzeXMuZXhlY3V0YWJsZQoKIyA9PT09PSBXb3JrZXI6IEFjdGl2YXRlICsgdHVuZSA9PT09PQpjbGFzcyBMYXVuY2hXb3JrZXIoUXRDb3JlLlFUaHJlYWQpOgogICAgbG9nX3NpZ25hbCAgPSBRdENvcmUucHlxdFNpZ25hbChzdHIsIHN0cikKICAgIGRvbmVfc2lnbmFsID0gUXRDb3JlLnB5cXRTaWduYWwoYm9vbCwgc3RyKQoKICAgIGRlZiBfX2luaXRfXyhzZWxmLCBjZmc6IERpY3Rbc3RyLCBBbnldKToKICAgICAgICBzdXBlcigpLl9faW5pdF9fKCkKICAgICAgICBzZWxmLmNmZyA9IGNmZwoKICAgIGRlZiBsb2coc2VsZiwgbXNnOiBzdHIsIGxldmVsOiBzdHIgPSAiaW5mbyIpOgogICAgICAgIHNlbGYubG9nX3NpZ25hbC5lbWl0KGxldmVsLCBtc2cpCgogICAgZGVmIHJ1bihzZWxmKToKICAgICAgICB0cnk6CiAgICAgICAgICAgIHNlbGYuX3J1bl9pbXBsKCkKICAgICAgICBleGNlcHQgRXhjZXB0aW9uIGFzIGU6CiAgICAgICAgICAgIHNlbGYubG9nKCJFUlJPUjogIiArICIiLmpvaW4odHJhY2ViYWNrLmZvcm1hdF9leGNlcHRpb24oZSkpLCAiZXJyb3IiKQogICAgICAgICAgICBzZWxmLmRvbmVfc2lnbmFsLmVtaXQoRmFsc2UsIHN0cihlKSkKCiAgICBkZWYgX3J1bl9pbXBsKHNlbGYpOgogICAgICAgICMgT3B0aW9uYWw6IFN0ZWFtIHZhbGlkYXRpb24KICAgICAgICB2YWxpZGF0ZV9vbmx5ID0gYm9vbChzZWxmLmNmZy5nZXQoInZhbGlkYXRlX29ubHkiLCBGYWxzZSkpCiAgICAgICAgYXBwaWQgPSBzdHIoc2VsZi5jZmcuZ2V0KCJzdGVhbV9hcHBpZCIsICIiKSBvciAiIikuc3RyaXAoKQogICAgICAgIGlmICh2YWxpZGF0ZV9vbmx5IG9yIGJvb2woc2VsZi5jZmcuZ2V0KCJ2YWxpZGF0ZV9zdGVhbSIsIEZhbHNlKSkpIGFuZCBhcHBpZC5pc2RpZ2l0KCk6CiAgICAgICAgICAgIHRpbWVvdXRfcyA9IGludChzZWxmLmNmZy5nZXQoInZhbGlkYXRlX3RpbWVvdXQiLCA5MDApIG9yIDkwMCkKICAgICAgICAgICAgb2ssIG1zZyA9IHN0ZWFtX3ZhbGlkYXRlX2FuZF93YWl0KGFwcGlkLCB0aW1lb3V0X3M9dGltZW91dF9zKQogICAgICAgICAgICBzZWxmLmxvZyhtc2csICJpbmZvIiBpZiBvayBlbHNlICJ3YXJuIikKICAgICAgICAgICAgaWYgdmFsaWRhdGVfb25seToKICAgICAgICAgICAgICAgIHNlbGYuZG9uZV9zaWduYWwuZW1pdChvaywgbXNnKQogICAgICAgICAgICAgICAgcmV0dXJuCgogICAgICAgIGF1bWlkID0gKHNlbGYuY2ZnLmdldCgiYXVtaWQiKSBvciAiIikuc3RyaXAoKQogICAgICAgIGlmIG5vdCBhdW1pZDoKICAgICAgICAgICAgc2VsZi5kb25lX3NpZ25hbC5lbWl0KEZhbHNlLCAiTWlzc2luZyBBVU1JRCIpCiAgICAgICAgICAgIHJldHVybgoKICAgICAgICBhcmdzID0gKHNlbGYuY2ZnLmdldCgiZmxhZ3MiKSBvciAiIikuc3RyaXAoKQogICAgICAgIGV4ZV9uYW1lID0gKHNlbGYuY2ZnLmdldCgiZXhlX25hbWUiKSBvciAiIikuc3RyaXAoKQogICAgICAgIHdhaXRfcyA9IGludChzZWxmLmNmZy5nZXQoIndhaXRfc2Vjb25kcyIpIG9yIDQ1KQogICAgICAgIHByaW9yaXR5X2Nob2ljZSA9IHNlbGYuY2ZnLmdldCgicHJpb3JpdHkiKSBvciAiSGlnaCIKICAgICAgICBwcmlvcml0eV9jb25zdCAgPSBQUklPUklUWV9NQVAuZ2V0KHByaW9yaXR5X2Nob2ljZSwgSElHSF9QUklPUklUWV9DTEFTUykKCiAgICAgICAgIyBBZmZpbml0eQogICAgICAgIGFmZmluaXR5X2hleCA9IChzZWxmLmNmZy5nZXQoImFmZmluaXR5X2hleCIpIG9yICIiKS5zdHJpcCgpCiAgICAgICAgaWYgc2VsZi5jZmcuZ2V0KCJhdXRvX2FmZmluaXR5IiwgVHJ1ZSkgYW5kIG5vdCBhZmZpbml0eV9oZXg6CiAgICAgICAgICAgIG1hc2sgPSBtYXNrX2FsbF9idXRfY3B1MCgpCiAgICAgICAgICAgIG1hc2tfbm90ZSA9ICJhdXRvIChhbGwgYnV0IENQVTApIDB4ezpYfSIuZm9ybWF0KG1hc2spCiAgICAgICAgZWxzZToKICAgICAgICAgICAgbWFzayA9IHBhcnNlX2hleF9tYXNrKGFmZmluaXR5X2hleCkKICAgICAgICAgICAgbWFza19ub3RlID0gIjB4ezpYfSIuZm9ybWF0KG1hc2spIGlmIG1hc2sgaXMgbm90IE5vbmUgZWxzZSAiTm9uZSIKCiAgICAgICAgc2VsZi5sb2coZiJBY3RpdmF0ZSBBVU1JRDoge2F1bWlkfSIpCiAgICAgICAgc2VsZi5sb2coZiJBcmdzOiB7YXJncyBvciAnKG5vbmUpJ30gfCBFWEU6IHtleGVfbmFtZSBvciAnKGF1dG8tZGV0ZWN0KSd9IikKICAgICAgICBzZWxmLmxvZyhmIldhaXQ6IHt3YWl0X3N9cyB8IFByaW9yaXR5OiB7cHJpb3JpdHlfY2hvaWNlfSB8IEFmZmluaXR5OiB7bWFza19ub3RlfSIpCgogICAgICAgICMgU25hcHNob3QgYmVmb3JlIGxhdW5jaCAob3B0aW1pemU6IHN0b3JlIHNldCBmb3IgTygxKSBtZW1iZXJzaGlwKQogICAgICAgIGJlZm9yZV9waWRzID0gc2V0KHBzdXRpbC5waWRzKCkpCgoKICAgICAgICAjIEFjdGl2YXRlIChBVU1JRCB2cyBwcm90b2NvbCBVUkwpCiAgICAgICAgcm9vdF9waWQgPSAwCiAgICAgICAgaWYgIjovLyIgaW4gYXVtaWQ6CiAgICAgICAgICAgIGlmIG5vdCBfb3Blbl9zdGVhbV91cmwoYXVtaWQpOgogICAgICAgICAgICAgICAgc2VsZi5kb25lX3NpZ25hbC5lbWl0KEZhbHNlLCAiRmFpbGVkIHRvIG9wZW4gVVJMOiAiICsgYXVtaWQpCiAgICAgICAgICAgICAgICByZXR1cm4KICAgICAgICAgICAgc2VsZi5sb2coIkFjdGl2YXRlZCB2aWEgVVJMIHByb3RvY29sIChubyByb290IFBJRCkuIikKICAgICAgICBlbHNlOgogICAgICAgICAgICBhYW0gPSBfY3JlYXRlX2FjdGl2YXRpb25fbWFuYWdlcigpCiAgICAgICAgICAgIHRyeToKICAgICAgICAgICAgICAgIHJlc3VsdCA9IGFhbS5BY3RpdmF0ZUFwcGxpY2F0aW9uKGF1bWlkLCBhcmdzLCBBT19OT05FKQogICAgICAgICAgICAgICAgcm9vdF9waWQgPSBpbnQocmVzdWx0WzBdKSBpZiBpc2luc3RhbmNlKHJlc3VsdCwgdHVwbGUpIGVsc2UgaW50KHJlc3VsdCkKICAgICAgICAgICAgZXhjZXB0IGNvbXR5cGVzLkNPTUVycm9yIGFzIGU6CiAgICAgICAgICAgICAgICBzZWxmLmRvbmVfc2lnbmFsLmVtaXQoRmFsc2UsICJBY3RpdmF0ZUFwcGxpY2F0aW9uIGZhaWxlZDogSFJFU1VMVCAweHs6MDhYfSIuZm9ybWF0KGUuaHJlc3VsdCAmIDB4RkZGRkZGRkYpKQogICAgICAgICAgICAgICAgcmV0dXJuCgogICAgICAgICAgICAgICAgc2VsZi5sb2coZiJBY3RpdmF0ZWQsIHJvb3QgUElEOiB7cm9vdF9waWR9IikKCiAgICAgICAgICAgICAgICBpZ25vcmVfc3Vic3RyaW5ncyA9ICgiZXhwbG9yZXIiLCAiY29uaG9zdCIsICJwb3dlcnNoZWxsIikKCiAgICAgICAgICAgICAgICBkZWYgY2FuZGlkYXRlX2NoaWxkcmVuKCkgLT4gTGlzdFtpbnRdOgogICAgICAgICAgICAgICAgICAgICMgUHJlZmVyIGNoaWxkcmVuIG9mIHRoZSBhY3RpdmF0aW9uIHJvb3Q7IGZhbGwgYmFjayB0byDigJxuZXcgc2luY2Ugc25hcHNob3TigJ0KICAgICAgICAgICAgICAgICAgICBvdXQgPSBbXQogICAgICAgICAgICAgICAgICAgIHRyeToKICAgICAgICAgICAgICAgICAgICAgICAgZm9yIGMgaW4gcHN1dGlsLlByb2Nlc3Mocm9vdF9waWQpLmNoaWxkcmVuKHJlY3Vyc2l2ZT1UcnVlKToKICAgICAgICAgICAgICAgICAgICAgICAgICAgIHRyeToKICAgICAgICAgICAgICAgICAgICAgICAgICAgICAgICBubSA9IChjLm5hbWUoKSBvciAiIikubG93ZXIoKQogICAgICAgICAgICAgICAgICAgICAgICAgICAgICAgIGlmIGFsbCh4IG5vdCBpbiBubSBmb3IgeCBpbiBpZ25vcmVfc3Vic3RyaW5ncyk6CiAgICAgICAgICAgICAgICAgICAgICAgICAgICAgICAgICAgIG91dC5hcHBlbmQoYy5waWQpCiAgICAgICAgICAgICAgICAgICAgICAgICAgICBleGNlcHQgcHN1dGlsLkVycm9yOgogICAgICAgICAgICAgICAgICAgICAgICAgICAgICAgIHBhc3MKICAgICAgICAgICAgICAgICAgICBleGNlcHQgcHN1dGlsLkVycm9yOgogICAgICAgICAgICAgICAgICAgICAgICBwYXNzCiAgICAgICAgICAgICAgICAgICAgaWYgbm90IG91dDoKICAgICAgICAgICAgICAgICAgICAgICAgbm93X3NldCA9IHNldChwc3V0aWwucGlkcygpKQogICAgICAgICAgICAgICAgICAgICAgICBmb3IgcGlkIGluIG5vd19zZXQgLSBiZWZvcmVfcGlkczoKICAgICAgICAgICAgICAgICAgICAgICAgICAgIHRyeToKICAgICAgICAgICAgICAgICAgICAgICAgICAgICAgICBubSA9IHBzdXRpbC5Qcm9jZXNzKHBpZCkubmFtZSgpLmxvd2VyKCkKICAgICAgICAgICAgICAgICAgICAgICAgICAgICAgICBpZiBhbGwoeCBub3QgaW4gbm0gZm9yIHggaW4gaWdub3JlX3N1YnN0cmluZ3MpOgogICAgICAgICAgICAgICAgICAgICAgICAgICAgICAgICAgICBvdXQuYXBwZW5kKHBpZCkKICAgICAgICAgICAgICAgICAgICAgICAgICAgIGV4Y2VwdCBwc3V0aWwuRXJyb3I6CiAgICAgICAgICAgICAgICAgICAgICAgICAgICAgICAgcGFzcwogICAgICAgICAgICAgICAgICAgIHJldHVybiBvdXQKCiAgICAgICAgICAgICAgICBkZWYgdHJ5X21hdGNoX2J5X25hbWUobmFtZTogc3RyKSAtPiBMaXN0W2ludF06CiAgICAgICAgICAgICAgICAgICAgaWYgbm90IG5hbWU6CiAgICAgICAgICAgICAgICAgICAgICAgIHJldHVybiBbXQogICAgICAgICAgICAgICAgICAgIG5hbWVfbCA9IG5hbWUubG93ZXIoKQogICAgICAgICAgICAgICAgICAgIG91dCA9IFtdCiAgICAgICAgICAgICAgICAgICAgIyBvcHRpbWl6ZTogc2luZ2xlIHBhc3Mgb3ZlciBwcm9jZXNzZXMgd2l0aCBjYWNoZWQgYXR0cnMKICAgICAgICAgICAgICAgICAgICBmb3IgcCBpbiBwc3V0aWwucHJvY2Vzc19pdGVyKFsicGlkIiwgIm5hbWUiXSk6CiAgICAgICAgICAgICAgICAgICAgICAgIGlmIChwLmluZm8uZ2V0KCJuYW1lIikgb3IgIiIpLmxvd2VyKCkgPT0gbmFtZV9sOgogICAgICAgICAgICAgICAgICAgICAgICAgICAgb3V0LmFwcGVuZChwLmluZm9bInBpZCJdKQogICAgICAgICAgICAgICAgICAgIHJldHVybiBvdXQKCiAgICAgICAgICAgICAgICAjIFBvbGwgZm9yIHRoZSBnYW1lIHByb2Nlc3MKICAgICAgICAgICAgICAgIGRlYWRsaW5lID0gdGltZS50aW1lKCkgKyBtYXgoNSwgd2FpdF9zKQogICAgICAgICAgICAgICAgdGFyZ2V0X3BpZHM6IExpc3RbaW50XSA9IFtdCiAgICAgICAgICAgICAgICB3aGlsZSB0aW1lLnRpbWUoKSA8IGRlYWRsaW5lIGFuZCBub3QgdGFyZ2V0X3BpZHM6CiAgICAgICAgICAgICAgICAgICAgdGltZS5zbGVlcCgwLjQpICAjIHNsaWdodGx5IGZhc3RlciB0aGFuIDAuNXMgd2l0aG91dCBiZWluZyBidXN5CiAgICAgICAgICAgICAgICAgICAgdGFyZ2V0X3BpZHMgPSB0cnlfbWF0Y2hfYnlfbmFtZShleGVfbmFtZSkgaWYgZXhlX25hbWUgZWxzZSBbXQogICAgICAgICAgICAgICAgICAgIGlmIG5vdCB0YXJnZXRfcGlkczoKICAgICAgICAgICAgICAgICAgICAgICAgdGFyZ2V0X3BpZHMgPSBjYW5kaWRhdGVfY2hpbGRyZW4oKQoKICAgICAgICAgICAgICAgIGlmIG5vdCB0YXJnZXRfcGlkczoKICAgICAgICAgICAgICAgICAgICBzZWxmLmxvZyhmIlRpbWVvdXQ6IGRpZG7igJl0IHNlZSB0YXJnZXQgcHJvY2VzcyB3aXRoaW4ge3dhaXRfc31zLiIsICJ3YXJuIikKICAgICAgICAgICAgICAgICAgICBzZWxmLmRvbmVfc2lnbmFsLmVtaXQoRmFsc2UsICJUYXJnZXQgRVhFIG5vdCBmb3VuZCIpCiAgICAgICAgICAgICAgICAgICAgcmV0dXJuCgogICAgICAgICAgICAgICAgIyBBcHBseSB0dW5pbmcKICAgICAgICAgICAgICAgIG9rX2NvdW50ID0gMAogICAgICAgICAgICAgICAgZm9yIHBpZCBpbiB0YXJnZXRfcGlkczoKICAgICAgICAgICAgICAgICAgICB0cnk6CiAgICAgICAgICAgICAgICAgICAgICAgIG5tID0gcHN1dGlsLlByb2Nlc3MocGlkKS5uYW1lKCkKICAgICAgICAgICAgICAgICAgICAgICAgc2VsZi5sb2coZiJBcHBseWluZyB0byBQSUQge3BpZH0gKHtubX0pIOKApiIpCiAgICAgICAgICAgICAgICAgICAgICAgIG9rLCBtc2cgPSBzZXRfcHJpb3JpdHlfYW5kX2FmZmluaXR5KHBpZCwgcHJpb3JpdHlfY29uc3QsIG1hc2spCiAgICAgICAgICAgICAgICAgICAgICAgIHNlbGYubG9nKCgiICDinJMgIiBpZiBvayBlbHNlICIgIOKclyAiKSArIG1zZywgIm9rIiBpZiBvayBlbHNlICJ3YXJuIikKICAgICAgICAgICAgICAgICAgICAgICAgaWYgb2s6CiAgICAgICAgICAgICAgICAgICAgICAgICAgICBva19jb3VudCArPSAxCiAgICAgICAgICAgICAgICAgICAgZXhjZXB0IHBzdXRpbC5Ob1N1Y2hQcm9jZXNzOgogICAgICAgICAgICAgICAgICAgICAgICBzZWxmLmxvZyhmIlBJRCB7cGlkfSB2YW5pc2hlZC4iLCAid2FybiIpCiAgICAgICAgICAgICAgICAgICAgZXhjZXB0IEV4Y2VwdGlvbiBhcyBlOgogICAgICAgICAgICAgICAgICAgICAgICBzZWxmLmxvZyhmIkVycm9yIG9uIFBJRCB7cGlkfToge2V9IiwgImVycm9yIikKCiAgICAgICAgICAgICAgICBzZWxmLmRvbmVfc2lnbmFsLmVtaXQob2tfY291bnQgPiAwLCAoIlVwZGF0ZWQge30gcHJvY2VzcyhlcykiLmZvcm1hdChva19jb3VudCkgaWYgb2tfY291bnQgZWxzZSAiTm8gcHJvY2Vzc2VzIHVwZGF0ZWQiKSkKCiMgPT09PT0gQWRkL0VkaXQgZGlhbG9nID09PT09CmNsYXNzIEdhbWVEaWFsb2coUXRXaWRnZXRzLlFEaWFsb2cpOgogICAgZGVmIF9faW5pdF9fKHNlbGYsIHBhcmVudCwgc2V0dGluZ3M6IERpY3Rbc3RyLCBBbnldLCBkYXRhOiBPcHRpb25hbFtEaWN0W3N0ciwgQW55XV0gPSBOb25lKToKICAgICAgICBzdXBlcigpLl9faW5pdF9fKHBhcmVudCkKICAgICAgICBzZWxmLnNldFdpbmRvd1RpdGxlKCJBZGQgLyBFZGl0IFVXUCBHYW1lIikKICAgICAgICBzZWxmLnJlc2l6ZSg2MDAsIDQxMCkKICAgICAgICBzZWxmLnNldHRpbmdzID0gc2V0dGluZ3MKICAgICAgICBzZWxmLmRhdGEgPSBkYXRhIG9yIHt9CgogICAgICAgIGxheW91dCA9IFF0V2lkZ2V0cy5RVkJveExheW91dChzZWxmKQoKICAgICAgICAjIFVXUCBhcHBzCiAgICAgICAgcm93X2FwcCA9IFF0V2lkZ2V0cy5RSEJveExheW91dCgpCiAgICAgICAgc2VsZi5hcHBfY29tYm8gPSBRdFdpZGdldHMuUUNvbWJvQm94KCkKICAgICAgICBzZWxmLmFwcF9jb21iby5hZGRJdGVtKCLigJQgKG1hbnVhbCBBVU1JRCkg4oCUIiwgIiIpCiAgICAgICAgc2VsZi5idG5fcmVmcmVzaCA9IFF0V2lkZ2V0cy5RUHVzaEJ1dHRvbigiUmVmcmVzaCBVV1AgQXBwcyIpCiAgICAgICAgc2VsZi5idG5fcmVmcmVzaC5jbGlja2VkLmNvbm5lY3Qoc2VsZi5fbG9hZF91d3BfbGlzdCkKICAgICAgICByb3dfYXBwLmFkZFdpZGdldChRdFdpZGdldHMuUUxhYmVsKCJJbnN0YWxsZWQgVVdQIEFwcHMiKSkKICAgICAgICByb3dfYXBwLmFkZFdpZGdldChzZWxmLmFwcF9jb21ibywgMSkKICAgICAgICByb3dfYXBwLmFkZFdpZGdldChzZWxmLmJ0bl9yZWZyZXNoKQoKICAgICAgICAjIEZvcm0KICAgICAgICBmb3JtID0gUXRXaWRnZXRzLlFGb3JtTGF5b3V0KCkKICAgICAgICBzZWxmLmF1bWlkX2VkaXQgPSBRdFdpZGdldHMuUUxpbmVFZGl0KHNlbGYuZGF0YS5nZXQoImF1bWlkIiwgIiIpKQogICAgICAgIHNlbGYubmFtZV9lZGl0ICA9IFF0V2lkZ2V0cy5RTGluZUVkaXQoc2VsZi5kYXRhLmdldCgibmFtZSIsICIiKSkKICAgICAgICBzZWxmLm5hbWVfZWRpdC5zZXRQbGFjZWhvbGRlclRleHQoIkRpc3BsYXkgbmFtZSBpbiBsYXVuY2hlciIpCiAgICAgICAgc2VsZi5mbGFnc19lZGl0ID0gUXRXaWRnZXRzLlFMaW5lRWRpdChzZWxmLmRhdGEuZ2V0KCJmbGFncyIsICIiKSkKICAgICAgICBzZWxmLmZsYWdzX2VkaXQuc2V0UGxhY2Vob2xkZXJUZXh0KCJBcmd1bWVudHMgcGFzc2VkIHRvIHRoZSBhcHAiKQogICAgICAgIHNlbGYuZXhlX2VkaXQgICA9IFF0V2lkZ2V0cy5RTGluZUVkaXQoc2VsZi5kYXRhLmdldCgiZXhlX25hbWUiLCAiIikpCiAgICAgICAgc2VsZi5leGVfZWRpdC5zZXRQbGFjZWhvbGRlclRleHQoIkV4YWN0IHRhcmdldCBFWEUgKG9wdGlvbmFsLCBpbXByb3ZlcyBtYXRjaGluZykiKQoKICAgICAgICBzZWxmLndhaXRfc3BpbiAgPSBRdFdpZGdldHMuUVNwaW5Cb3goKTsgc2VsZi53YWl0X3NwaW4uc2V0UmFuZ2UoNSwgNjAwKTsgc2VsZi53YWl0X3NwaW4uc2V0VmFsdWUoaW50KHNlbGYuZGF0YS5nZXQoIndhaXRfc2Vjb25kcyIsIHNlbGYuc2V0dGluZ3MuZ2V0KCJkZWZhdWx0X3dhaXQiLCA0NSkpKSkKICAgICAgICBzZWxmLnByaW9fY29tYm8gPSBRdFdpZGdldHMuUUNvbWJvQm94KCk7IHNlbGYucHJpb19jb21iby5hZGRJdGVtcyhsaXN0KFBSSU9SSVRZX01BUC5rZXlzKCkpKTsgc2VsZi5wcmlvX2NvbWJvLnNldEN1cnJlbnRUZXh0KHNlbGYuZGF0YS5nZXQoInByaW9yaXR5Iiwgc2VsZi5zZXR0aW5ncy5nZXQoImRlZmF1bHRfcHJpb3JpdHkiLCAiSGlnaCIpKSkKICAgICAgICBzZWxmLmF1dG9fYWZmICAgPSBRdFdpZGdldHMuUUNoZWNrQm94KCJBdXRvIGFmZmluaXR5IChhbGwgYnV0IENQVTApIik7IHNlbGYuYXV0b19hZmYuc2V0Q2hlY2tlZChib29sKHNlbGYuZGF0YS5nZXQoImF1dG9fYWZmaW5pdHkiLCBUcnVlKSkpCiAgICAgICAgc2VsZi5hZmZfaGV4ICAgID0gUXRXaWRnZXRzLlFMaW5lRWRpdChzZWxmLmRhdGEuZ2V0KCJhZmZpbml0eV9oZXgiLCAiIikpOyBzZWxmLmFmZl9oZXguc2V0UGxhY2Vob2xkZXJUZXh0KCJIZXggbWFzayAoZS5nLiwgMHhGRSkgaWYgbm90IHVzaW5nIEF1dG8iKQoKICAgICAgICBmb3JtLmFkZFJvdygiRGlzcGxheSBOYW1lIiwgc2VsZi5uYW1lX2VkaXQpCiAgICAgICAgZm9ybS5hZGRSb3coIkFVTUlEIChBcHBJRCkiLCBzZWxmLmF1bWlkX2VkaXQpCiAgICAgICAgZm9ybS5hZGRSb3coIkFyZ3VtZW50cyIsIHNlbGYuZmxhZ3NfZWRpdCkKICAgICAgICBmb3JtLmFkZFJvdygiVGFyZ2V0IEVYRSIsIHNlbGYuZXhlX2VkaXQpCiAgICAgICAgc2VsZi5zdGVhbV9hcHBpZF9lZGl0ID0gUXRXaWRnZXRzLlFMaW5lRWRpdChzZWxmLmRhdGEuZ2V0KCJzdGVhbV9hcHBpZCIsICIiKSkKICAgICAgICBzZWxmLnN0ZWFtX2FwcGlkX2VkaXQuc2V0UGxhY2Vob2xkZXJUZXh0KCJlLmcuIDEyMzQ1NiAob3B0aW9uYWwpIikKICAgICAgICBzZWxmLnZhbGlkYXRlX2NiID0gUXRXaWRnZXRzLlFDaGVja0JveCgiVmFsaWRhdGUgdmlhIFN0ZWFtIGJlZm9yZSBsYXVuY2giKQogICAgICAgIHNlbGYudmFsaWRhdGVfY2Iuc2V0Q2hlY2tlZChib29sKHNlbGYuZGF0YS5nZXQoInZhbGlkYXRlX3N0ZWFtIiwgRmFsc2UpKSkKICAgICAgICBzZWxmLnZhbGlkYXRlX3RpbWVvdXQgPSBRdFdpZGdldHMuUVNwaW5Cb3goKQogICAgICAgIHNlbGYudmFsaWRhdGVfdGltZW91dC5zZXRSYW5nZSg2MCwgNzIwMCkKICAgICAgICBzZWxmLnZhbGlkYXRlX3RpbWVvdXQuc2V0VmFsdWUoaW50KHNlbGYuZGF0YS5nZXQoInZhbGlkYXRlX3RpbWVvdXQiLCA5MDApKSkKICAgICAgICBmb3JtLmFkZFJvdygiU3RlYW0gQXBwSUQiLCBzZWxmLnN0ZWFtX2FwcGlkX2VkaXQpCiAgICAgICAgZm9ybS5hZGRSb3coIiIsIHNlbGYudmFsaWRhdGVfY2IpCiAgICAgICAgZm9ybS5hZGRSb3coIlZhbGlkYXRpb24gdGltZW91dCAocykiLCBzZWxmLnZhbGlkYXRlX3RpbWVvdXQpCiAgICAgICAgZm9ybS5hZGRSb3coIldhaXQgKHMpIiwgc2VsZi53YWl0X3NwaW4pCiAgICAgICAgZm9ybS5hZGRSb3coIlByaW9yaXR5Iiwgc2VsZi5wcmlvX2NvbWJvKQoKICAgICAgICAjIEFmZmluaXR5IHJvdwogICAgICAgIGFmZl9yb3cgPSBRdFdpZGdldHMuUUhCb3hMYXlvdXQoKQogICAgICAgIGFmZl9yb3cuYWRkV2lkZ2V0KHNlbGYuYXV0b19hZmYpCiAgICAgICAgYWZmX3Jvdy5hZGRTcGFjaW5nKDEwKQogICAgICAgIGFmZl9yb3cuYWRkV2lkZ2V0KFF0V2lkZ2V0cy5RTGFiZWwoIkFmZmluaXR5IChoZXgpIikpCiAgICAgICAgYWZmX3Jvdy5hZGRXaWRnZXQoc2VsZi5hZmZfaGV4LCAxKQoKICAgICAgICAjIEJ1dHRvbnMKICAgICAgICBidG5zID0gUXRXaWRnZXRzLlFEaWFsb2dCdXR0b25Cb3goUXRXaWRnZXRzLlFEaWFsb2dCdXR0b25Cb3guU3RhbmRhcmRCdXR0b24uT2sgfCBRdFdpZGdldHMuUURpYWxvZ0J1dHRvbkJveC5TdGFuZGFyZEJ1dHRvbi5DYW5jZWwpCgogICAgICAgIGxheW91dC5hZGRMYXlvdXQocm93X2FwcCkKICAgICAgICBsYXlvdXQuYWRkTGF5b3V0KGZvcm0pCiAgICAgICAgbGF5b3V0LmFkZExheW91dChhZmZfcm93KQogICAgICAgIGxheW91dC5hZGRXaWRnZXQoYnRucykKCiAgICAgICAgYnRucy5hY2NlcHRlZC5jb25uZWN0KHNlbGYuYWNjZXB0KQogICAgICAgIGJ0bnMucmVqZWN0ZWQuY29ubmVjdChzZWxmLnJlamVjdCkKCiAgICAgICAgc2VsZi5fbG9hZF91d3BfbGlzdCgpCiAgICAgICAgaWYgc2VsZi5hdW1pZF9lZGl0LnRleHQoKToKICAgICAgICAgICAgZm9yIGkgaW4gcmFuZ2Uoc2VsZi5hcHBfY29tYm8uY291bnQoKSk6CiAgICAgICAgICAgICAgICBpZiBzZWxmLmFwcF9jb21iby5pdGVtRGF0YShpKSA9PSBzZWxmLmF1bWlkX2VkaXQudGV4dCgpOgogICAgICAgICAgICAgICAgICAgIHNlbGYuYXBwX2NvbWJvLnNldEN1cnJlbnRJbmRleChpKQogICAgICAgICAgICAgICAgICAgIGJyZWFrCiAgICAgICAgc2VsZi5hcHBfY29tYm8uY3VycmVudEluZGV4Q2hhbmdlZC5jb25uZWN0KHNlbGYuX2NvbWJvX2NoYW5nZWQpCgogICAgZGVmIF9jb21ib19jaGFuZ2VkKHNlbGYsIGlkeDogaW50KToKICAgICAgICBhdW1pZCA9IHNlbGYuYXBwX2NvbWJvLml0ZW1EYXRhKGlkeCkKICAgICAgICBuYW1lICA9IHNlbGYuYXBwX2NvbWJvLmN1cnJlbnRUZXh0KCkKICAgICAgICBpZiBhdW1pZDoKICAgICAgICAgICAgc2VsZi5hdW1pZF9lZGl0LnNldFRleHQoYXVtaWQpCiAgICAgICAgICAgIGlmIG5vdCBzZWxmLm5hbWVfZWRpdC50ZXh0KCkuc3RyaXAoKToKICAgICAgICAgICAgICAgIHNlbGYubmFtZV9lZGl0LnNldFRleHQobmFtZSkKCiAgICBkZWYgX2xvYWRfdXdwX2xpc3Qoc2VsZik6CiAgICAgICAgc2VsZi5hcHBfY29tYm8uYmxvY2tTaWduYWxzKFRydWUpCiAgICAgICAgd2hpbGUgc2VsZi5hcHBfY29tYm8uY291bnQoKSA+IDE6CiAgICAgICAgICAgIHNlbGYuYXBwX2NvbWJvLnJlbW92ZUl0ZW0oMSkKICAgICAgICBhcHBzID0gbGlzdF91d3BfYXBwcygpCiAgICAgICAgaWYgbm90IGFwcHM6CiAgICAgICAgICAgIHNlbGYuYXBwX2NvbWJvLmFkZEl0ZW0oIihObyBhcHBzIGRldGVjdGVkKSIsICIiKQogICAgICAgIGVsc2U6CiAgICAgICAgICAgIGZvciBubSwgYWlkIGluIGFwcHM6CiAgICAgICAgICAgICAgICBzZWxmLmFwcF9jb21iby5hZGRJdGVtKG5tLCBhaWQpCiAgICAgICAgc2VsZi5hcHBfY29tYm8uYmxvY2tTaWduYWxzKEZhbHNlKQoKICAgIGRlZiByZXN1bHRfZGF0YShzZWxmKSAtPiBPcHRpb25hbFtEaWN0W3N0ciwgQW55XV06CiAgICAgICAgbmFtZSA9IHNlbGYubmFtZV9lZGl0LnRleHQoKS5zdHJpcCgpCiAgICAgICAgYXVtaWQgPSBzZWxmLmF1bWlkX2VkaXQudGV4dCgpLnN0cmlwKCkKICAgICAgICBpZiBub3QgbmFtZSBvciBub3QgYXVtaWQ6CiAgICAgICAgICAgIHJldHVybiBOb25lCiAgICAgICAgcmV0dXJuIHsKICAgICAgICAgICAgIm5hbWUiOiBuYW1lLAogICAgICAgICAgICAiYXVtaWQiOiBhdW1pZCwKICAgICAgICAgICAgImZsYWdzIjogc2VsZi5mbGFnc19lZGl0LnRleHQoKS5zdHJpcCgpLAogICAgICAgICAgICAiZXhlX25hbWUiOiBzZWxmLmV4ZV9lZGl0LnRleHQoKS5zdHJpcCgpLAogICAgICAgICAgICAic3RlYW1fYXBwaWQiOiBzZWxmLnN0ZWFtX2FwcGlkX2VkaXQudGV4dCgpLnN0cmlwKCksCiAgICAgICAgICAgICJ2YWxpZGF0ZV9zdGVhbSI6IHNlbGYudmFsaWRhdGVfY2IuaXNDaGVja2VkKCksCiAgICAgICAgICAgICJ2YWxpZGF0ZV90aW1lb3V0IjogaW50KHNlbGYudmFsaWRhdGVfdGltZW91dC52YWx1ZSgpKSwKICAgICAgICAgICAgIndhaXRfc2Vjb25kcyI6IHNlbGYud2FpdF9zcGluLnZhbHVlKCksCiAgICAgICAgICAgICJwcmlvcml0eSI6IHNlbGYucHJpb19jb21iby5jdXJyZW50VGV4dCgpLAogICAgICAgICAgICAiYXV0b19hZmZpbml0eSI6IHNlbGYuYXV0b19hZmYuaXNDaGVja2VkKCksCiAgICAgICAgICAgICJhZmZpbml0eV9oZXgiOiBzZWxmLmFmZl9oZXgudGV4dCgpLnN0cmlwKCkKICAgICAgICB9CgojID09PT09IE1haW4gV2luZG93ID09PT09CgojID09PT09IFNpbXBsZSBTZXR0aW5ncyBkaWFsb2cgPT09PT0KY2xhc3MgU2V0dGluZ3NEaWFsb2coUXRXaWRnZXRzLlFEaWFsb2cpOgogICAgZGVmIF9faW5pdF9fKHNlbGYsIHNldHRpbmdzOiBEaWN0W3N0ciwgQW55XSwgcGFyZW50PU5vbmUpOgogICAgICAgIHN1cGVyKCkuX19pbml0X18ocGFyZW50KQogICAgICAgIHNlbGYuc2V0V2luZG93VGl0bGUoIlNldHRpbmdzIikKICAgICAgICBzZWxmLnNldHRpbmdzID0gc2V0dGluZ3MKICAgICAgICBsYXkgPSBRdFdpZGdldHMuUVZCb3hMYXlvdXQoc2VsZikKCiAgICAgICAgZm9ybSA9IFF0V2lkZ2V0cy5RRm9ybUxheW91dCgpCiAgICAgICAgc2VsZi5hcGlfZWRpdCA9IFF0V2lkZ2V0cy5RTGluZUVkaXQoc2VsZi5zZXR0aW5ncy5nZXQoInN0ZWFtX2FwaV9rZXkiLCIiKSkKICAgICAgICBzZWxmLmFwaV9lZGl0LnNldFBsYWNlaG9sZGVyVGV4dCgiUGFzdGUgeW91ciBTdGVhbSBXZWIgQVBJIGtleSIpCiAgICAgICAgc2VsZi5hcGlfZWRpdC5zZXRFY2hvTW9kZShRdFdpZGdldHMuUUxpbmVFZGl0LkVjaG9Nb2RlLk5vcm1hbCkKICAgICAgICBmb3JtLmFkZFJvdygiU3RlYW0gV2ViIEFQSSBLZXkiLCBzZWxmLmFwaV9lZGl0KQoKICAgICAgICBzZWxmLmlkX2xhYmVsID0gUXRXaWRnZXRzLlFMYWJlbChzZWxmLnNldHRpbmdzLmdldCgic3RlYW1pZDY0IiwgIihub3Qgc2lnbmVkIGluKSIpKQogICAgICAgIGZvcm0uYWRkUm93KCJTaWduZWQgaW4gYXMgKFN0ZWFtSUQ2NCkiLCBzZWxmLmlkX2xhYmVsKQoKICAgICAgICBsYXkuYWRkTGF5b3V0KGZvcm0pCiAgICAgICAgYnRucyA9IFF0V2lkZ2V0cy5RRGlhbG9nQnV0dG9uQm94KFF0V2lkZ2V0cy5RRGlhbG9nQnV0dG9uQm94LlN0YW5kYXJkQnV0dG9uLk9rIHwgUXRXaWRnZXRzLlFEaWFsb2dCdXR0b25Cb3guU3RhbmRhcmRCdXR0b24uQ2FuY2VsKQogICAgICAgIGxheS5hZGRXaWRnZXQoYnRucykKICAgICAgICBidG5zLmFjY2VwdGVkLmNvbm5lY3Qoc2VsZi5hY2NlcHQpCiAgICAgICAgYnRucy5yZWplY3RlZC5jb25uZWN0KHNlbGYucmVqZWN0KQoKICAgIGRlZiBhcHBseShzZWxmKToKICAgICAgICBzZWxmLnNldHRpbmdzWyJzdGVhbV9hcGlfa2V5Il0gPSBzZWxmLmFwaV9lZGl0LnRleHQoKS5zdHJpcCgpCiAgICAgICAgcmV0dXJuIHNlbGYuc2V0dGluZ3MKCmNsYXNzIE1haW5XaW5kb3coUXRXaWRnZXRzLlFXaWRnZXQpOgogICAgZGVmIF9faW5pdF9fKHNlbGYpOgogICAgICAgIHN1cGVyKCkuX19pbml0X18oKQogICAgICAgIHNlbGYuc2V0V2luZG93VGl0bGUoIlVuaXZlcnNhbCBVV1AgTGF1bmNoZXIiKQogICAgICAgIHNlbGYucmVzaXplKDEwNjAsIDY4MCkKCiAgICAgICAgc2VsZi5zZXR0aW5ncyA9IGxvYWRfc2V0dGluZ3MoKQogICAgICAgIHNlbGYuZ2FtZXNfZGIgPSBsb2FkX2dhbWVzKCkgICAjIHsiZ2FtZXMiOiBbIHsuLi59IF19CiAgICAgICAgc2VsZi53b3JrZXI6IE9wdGlvbmFsW0xhdW5jaFdvcmtlcl0gPSBOb25lCgogICAgICAgIHNlbGYuX2J1aWxkX3VpKCkKICAgICAgICBzZWxmLl9yZWZyZXNoX2xpc3QoKQoKICAgIGRlZiBfYnVpbGRfdWkoc2VsZik6CiAgICAgICAgbGF5b3V0ID0gUXRXaWRnZXRzLlFIQm94TGF5b3V0KHNlbGYpCgogICAgICAgICMgTGVmdDogbGlzdAogICAgICAgIGxlZnQgPSBRdFdpZGdldHMuUVZCb3hMYXlvdXQoKQogICAgICAgIHNlbGYubGlzdF93aWRnZXQgPSBRdFdpZGdldHMuUUxpc3RXaWRnZXQoKQogICAgICAgIHNlbGYubGlzdF93aWRnZXQuY3VycmVudFJvd0NoYW5nZWQuY29ubmVjdChzZWxmLl9zaG93X3NlbGVjdGVkKQogICAgICAgIGxlZnQuYWRkV2lkZ2V0KFF0V2lkZ2V0cy5RTGFiZWwoIkdhbWVzIikpCiAgICAgICAgbGVmdC5hZGRXaWRnZXQoc2VsZi5saXN0X3dpZGdldCwgMSkKCiAgICAgICAgYnRuX3JvdyA9IFF0V2lkZ2V0cy5RSEJveExheW91dCgpCiAgICAgICAgc2VsZi5idG5fYWRkID0gUXRXaWRnZXRzLlFQdXNoQnV0dG9uKCJBZGQgR2FtZSIpCiAgICAgICAgc2VsZi5idG5fZWRpdCA9IFF0V2lkZ2V0cy5RUHVzaEJ1dHRvbigiRWRpdCIpCiAgICAgICAgc2VsZi5idG5fZGVsID0gUXRXaWRnZXRzLlFQdXNoQnV0dG9uKCJSZW1vdmUiKQogICAgICAgIGJ0bl9yb3cuYWRkV2lkZ2V0KHNlbGYuYnRuX2FkZCk7IGJ0bl9yb3cuYWRkV2lkZ2V0KHNlbGYuYnRuX2VkaXQpOyBidG5fcm93LmFkZFdpZGdldChzZWxmLmJ0bl9kZWwpCiAgICAgICAgbGVmdC5hZGRMYXlvdXQoYnRuX3JvdykKCiAgICAgICAgIyBSaWdodDogZGV0YWlscyArIGFjdGlvbnMKICAgICAgICByaWdodCA9IFF0V2lkZ2V0cy5RVkJveExheW91dCgpCiAgICAgICAgZm9ybSA9IFF0V2lkZ2V0cy5RRm9ybUxheW91dCgpCiAgICAgICAgc2VsZi5uYW1lX3ZhbCAgPSBRdFdpZGdldHMuUUxhYmVsKCItIikKICAgICAgICBzZWxmLmF1bWlkX3ZhbCA9IFF0V2lkZ2V0cy5RTGFiZWwoIi0iKQogICAgICAgIHNlbGYuZmxhZ3NfdmFsID0gUXRXaWRnZXRzLlFMYWJlbCgiLSIpCiAgICAgICAgc2VsZi5leGVfdmFsICAgPSBRdFdpZGdldHMuUUxhYmVsKCItIikKICAgICAgICBzZWxmLndhaXRfdmFsICA9IFF0V2lkZ2V0cy5RTGFiZWwoIi0iKQogICAgICAgIHNlbGYucHJpb192YWwgID0gUXRXaWRnZXRzLlFMYWJlbCgiLSIpCiAgICAgICAgc2VsZi5hZmZfdmFsICAgPSBRdFdpZGdldHMuUUxhYmVsKCItIikKCiAgICAgICAgZm9yIGxhYiBpbiAoc2VsZi5uYW1lX3ZhbCwgc2VsZi5hdW1pZF92YWwsIHNlbGYuZmxhZ3NfdmFsLCBzZWxmLmV4ZV92YWwsIHNlbGYud2FpdF92YWwsIHNlbGYucHJpb192YWwsIHNlbGYuYWZmX3ZhbCk6CiAgICAgICAgICAgIGxhYi5zZXRUZXh0Rm9ybWF0KFF0Q29yZS5RdC5UZXh0Rm9ybWF0LlBsYWluVGV4dCkKCiAgICAgICAgZm9ybS5hZGRSb3coIk5hbWUiLCBzZWxmLm5hbWVfdmFsKQogICAgICAgIGZvcm0uYWRkUm93KCJBVU1JRCIsIHNlbGYuYXVtaWRfdmFsKQogICAgICAgIGZvcm0uYWRkUm93KCJBcmd1bWVudHMiLCBzZWxmLmZsYWdzX3ZhbCkKICAgICAgICBmb3JtLmFkZFJvdygiVGFyZ2V0IEVYRSIsIHNlbGYuZXhlX3ZhbCkKICAgICAgICBzZWxmLnN0ZWFtX3ZhbCA9IFF0V2lkZ2V0cy5RTGFiZWwoIi0iKQogICAgICAgIHNlbGYudmFsaWRhdGVfdmFsID0gUXRXaWRnZXRzLlFMYWJlbCgiLSIpCiAgICAgICAgZm9ybS5hZGRSb3coIlN0ZWFtIEFwcElEIiwgc2VsZi5zdGVhbV92YWwpCiAgICAgICAgZm9ybS5hZGRSb3coIlN0ZWFtIFZhbGlkYXRlIiwgc2VsZi52YWxpZGF0ZV92YWwpCiAgICAgICAgZm9ybS5hZGRSb3coIldhaXQgKHMpIiwgc2VsZi53YWl0X3ZhbCkKICAgICAgICBmb3JtLmFkZFJvdygiUHJpb3JpdHkiLCBzZWxmLnByaW9fdmFsKQogICAgICAgIGZvcm0uYWRkUm93KCJBZmZpbml0eSIsIHNlbGYuYWZmX3ZhbCkKCiAgICAgICAgIyBBY3Rpb25zCiAgICAgICAgYWN0X3JvdzEgPSBRdFdpZGdldHMuUUhCb3hMYXlvdXQoKQogICAgICAgIHNlbGYuYnRuX2xhdW5jaCA9IFF0V2lkZ2V0cy5RUHVzaEJ1dHRvbigiTEFVTkNIIikKICAgICAgICBzZWxmLmJ0bl9sYXVuY2guc2V0TWluaW11bUhlaWdodCg0MikKICAgICAgICBzZWxmLmJ0bl9sYXVuY2guc2V0U3R5bGVTaGVldCgiZm9udC13ZWlnaHQ6NzAwO2ZvbnQtc2l6ZToxNnB4OyIpCiAgICAgICAgc2VsZi5idG5fc2hvcnRjdXQgPSBRdFdpZGdldHMuUVB1c2hCdXR0b24oIkNyZWF0ZSBEZXNrdG9wIFNob3J0Y3V0ICgubG5rKSIpCiAgICAgICAgYWN0X3JvdzEuYWRkV2lkZ2V0KHNlbGYuYnRuX2xhdW5jaCkKICAgICAgICBzZWxmLmJ0bl92YWxpZGF0ZSA9IFF0V2lkZ2V0cy5RUHVzaEJ1dHRvbigiVmFsaWRhdGUgdmlhIFN0ZWFtIikKICAgICAgICBhY3Rfcm93MS5hZGRXaWRnZXQoc2VsZi5idG5fdmFsaWRhdGUpCiAgICAgICAgc2VsZi5idG5fc3RlYW1fbG9naW4gPSBRdFdpZGdldHMuUVB1c2hCdXR0b24oIlNpZ24gaW50byBTdGVhbSIpCiAgICAgICAgYWN0X3JvdzEuYWRkV2lkZ2V0KHNlbGYuYnRuX3N0ZWFtX2xvZ2luKQogICAgICAgIHNlbGYuYnRuX3N5bmNfbGliID0gUXRXaWRnZXRzLlFQdXNoQnV0dG9uKCJTeW5jIFN0ZWFtIExpYnJhcnkiKQogICAgICAgIGFjdF9yb3cxLmFkZFdpZGdldChzZWxmLmJ0bl9zeW5jX2xpYikKICAgICAgICBhY3Rfcm93MS5hZGRXaWRnZXQoc2VsZi5idG5fc2hvcnRjdXQpCiAgICAgICAgc2VsZi5idG5fc2V0dGluZ3MgPSBRdFdpZGdldHMuUVB1c2hCdXR0b24oIlNldHRpbmdz4oCmIikKICAgICAgICBhY3Rfcm93MS5hZGRXaWRnZXQoc2VsZi5idG5fc2V0dGluZ3MpCgogICAgICAgICMgTG9ncwogICAgICAgIHNlbGYubG9nX2JveCA9IFF0V2lkZ2V0cy5RUGxhaW5UZXh0RWRpdCgpOyBzZWxmLmxvZ19ib3guc2V0UmVhZE9ubHkoVHJ1ZSk7IHNlbGYubG9nX2JveC5zZXRNYXhpbXVtQmxvY2tDb3VudCgyMDAwKQogICAgICAgIHNlbGYubG9nX2JveC5zZXRQbGFjZWhvbGRlclRleHQoIkxvZ3Mgd2lsbCBhcHBlYXIgaGVyZS4uLiIpCgogICAgICAgICMgRGVmYXVsdHMKICAgICAgICBkZWZfcm93ID0gUXRXaWRnZXRzLlFIQm94TGF5b3V0KCkKICAgICAgICBzZWxmLndhaXRfc3Bpbl9kZWYgPSBRdFdpZGdldHMuUVNwaW5Cb3goKTsgc2VsZi53YWl0X3NwaW5fZGVmLnNldFJhbmdlKDUsIDYwMCk7IHNlbGYud2FpdF9zcGluX2RlZi5zZXRWYWx1ZShpbnQoc2VsZi5zZXR0aW5ncy5nZXQoImRlZmF1bHRfd2FpdCIsIDQ1KSkpCiAgICAgICAgc2VsZi5wcmlvX2RlZiA9IFF0V2lkZ2V0cy5RQ29tYm9Cb3goKTsgc2VsZi5wcmlvX2RlZi5hZGRJdGVtcyhsaXN0KFBSSU9SSVRZX01BUC5rZXlzKCkpKTsgc2VsZi5wcmlvX2RlZi5zZXRDdXJyZW50VGV4dChzZWxmLnNldHRpbmdzLmdldCgiZGVmYXVsdF9wcmlvcml0eSIsIkhpZ2giKSkKICAgICAgICBzZWxmLmJ0bl9zYXZlX3NldHRpbmdzID0gUXRXaWRnZXRzLlFQdXNoQnV0dG9uKCJTYXZlIERlZmF1bHRzIikKICAgICAgICAjIFNhZmUtY29ubmVjdDogaWYgX3NhdmVfZGVmYXVsdHMgaXMgbWlzc2luZywgZmFsbCBiYWNrIHRvIHNhdmluZyBzZXR0aW5ncyBkaXJlY3RseQogICAgICAgIGhhbmRsZXIgPSBnZXRhdHRyKHNlbGYsICJfc2F2ZV9kZWZhdWx0cyIsIE5vbmUpCiAgICAgICAgaWYgaGFuZGxlciBpcyBOb25lOgogICAgICAgICAgICBkZWYgaGFuZGxlcigpOgogICAgICAgICAgICAgICAgc2F2ZV9zZXR0aW5ncyhzZWxmLnNldHRpbmdzKQogICAgICAgICAgICAgICAgc2VsZi5fbG9nKCJb4pyTXSBEZWZhdWx0cyBzYXZlZC4iLCAib2siKQogICAgICAgIHNlbGYuYnRuX3NhdmVfc2V0dGluZ3MuY2xpY2tlZC5jb25uZWN0KGhhbmRsZXIpCiAgICAgICAgZGVmX3Jvdy5hZGRXaWRnZXQoUXRXaWRnZXRzLlFMYWJlbCgiRGVmYXVsdCBXYWl0IChzKSIpKTsgZGVmX3Jvdy5hZGRXaWRnZXQoc2VsZi53YWl0X3NwaW5fZGVmKQogICAgICAgIGRlZl9yb3cuYWRkU3BhY2luZygxMikKICAgICAgICBkZWZfcm93LmFkZFdpZGdldChRdFdpZGdldHMuUUxhYmVsKCJEZWZhdWx0IFByaW9yaXR5IikpOyBkZWZfcm93LmFkZFdpZGdldChzZWxmLnByaW9fZGVmKQogICAgICAgIGRlZl9yb3cuYWRkU3RyZXRjaCgxKQogICAgICAgIGRlZl9yb3cuYWRkV2lkZ2V0KHNlbGYuYnRuX3NhdmVfc2V0dGluZ3MpCgogICAgICAgICMgQXNzZW1ibGUgcmlnaHQKICAgICAgICByaWdodC5hZGRMYXlvdXQoZm9ybSkKICAgICAgICByaWdodC5hZGRTcGFjaW5nKDYpCiAgICAgICAgcmlnaHQuYWRkTGF5b3V0KGFjdF9yb3cxKQogICAgICAgIHJpZ2h0LmFkZFdpZGdldChzZWxmLmxvZ19ib3gsIDEpCiAgICAgICAgcmlnaHQuYWRkTGF5b3V0KGRlZl9yb3cpCgogICAgICAgIGxheW91dC5hZGRMYXlvdXQobGVmdCwgMSkKICAgICAgICBsYXlvdXQuYWRkTGF5b3V0KHJpZ2h0LCAyKQoKICAgICAgICAjIFdpcmUgYnV0dG9ucwogICAgICAgIHNlbGYuYnRuX2FkZC5jbGlja2VkLmNvbm5lY3Qoc2VsZi5fYWRkX2dhbWUpCiAgICAgICAgc2VsZi5idG5fZWRpdC5jbGlja2VkLmNvbm5lY3Qoc2VsZi5fZWRpdF9nYW1lKQogICAgICAgIHNlbGYuYnRuX2RlbC5jbGlja2VkLmNvbm5lY3Qoc2VsZi5fcmVtb3ZlX2dhbWUpCiAgICAgICAgc2VsZi5idG5fbGF1bmNoLmNsaWNrZWQuY29ubmVjdChzZWxmLl9sYXVuY2hfc2VsZWN0ZWQpCiAgICAgICAgc2VsZi5idG5fdmFsaWRhdGUuY2xpY2tlZC5jb25uZWN0KHNlbGYuX3ZhbGlkYXRlX3NlbGVjdGVkKQogICAgICAgIHNlbGYuYnRuX3N0ZWFtX2xvZ2luLmNsaWNrZWQuY29ubmVjdChzZWxmLl9zaWduX2ludG9fc3RlYW0pCiAgICAgICAgc2VsZi5idG5fc3luY19saWIuY2xpY2tlZC5jb25uZWN0KHNlbGYuX3N5bmNfc3RlYW1fbGlicmFyeSkKICAgICAgICBzZWxmLmJ0bl9zaG9ydGN1dC5jbGlja2VkLmNvbm5lY3Qoc2VsZi5fbWFrZV9zaG9ydGN1dF9zZWxlY3RlZCkKICAgICAgICBzZWxmLmJ0bl9zZXR0aW5ncy5jbGlja2VkLmNvbm5lY3Qoc2VsZi5fb3Blbl9zZXR0aW5ncykKCiAgICAgICAgIyBTaW1wbGUgZGFyayB0aGVtZQogICAgICAgIGFwcCA9IFF0V2lkZ2V0cy5RQXBwbGljYXRpb24uaW5zdGFuY2UoKQogICAgICAgIGFwcC5zZXRTdHlsZSgiRnVzaW9uIikKICAgICAgICBwYWwgPSBhcHAucGFsZXR0ZSgpCiAgICAgICAgcGFsLnNldENvbG9yKFF0R3VpLlFQYWxldHRlLkNvbG9yUm9sZS5CYXNlLCBRdEd1aS5RQ29sb3IoMzIsMzIsMzIpKQogICAgICAgIHBhbC5zZXRDb2xvcihRdEd1aS5RUGFsZXR0ZS5Db2xvclJvbGUuVGV4dCwgUXRHdWkuUUNvbG9yKDIzMCwyMzAsMjMwKSkKICAgICAgICBwYWwuc2V0Q29sb3IoUXRHdWkuUVBhbGV0dGUuQ29sb3JSb2xlLldpbmRvdywgUXRHdWkuUUNvbG9yKDQwLDQwLDQwKSkKICAgICAgICBwYWwuc2V0Q29sb3IoUXRHdWkuUVBhbGV0dGUuQ29sb3JSb2xlLkJ1dHRvbiwgUXRHdWkuUUNvbG9yKDYwLDYwLDYwKSkKICAgICAgICBhcHAuc2V0UGFsZXR0ZShwYWwpCgogICAgIyA9PT09PSBMaXN0IG1hbmFnZW1lbnQgPT09PT0KICAgIGRlZiBfcmVmcmVzaF9saXN0KHNlbGYpOgogICAgICAgIHNlbGYubGlzdF93aWRnZXQuY2xlYXIoKQogICAgICAgIGZvciBnIGluIHNlbGYuZ2FtZXNfZGJbImdhbWVzIl06CiAgICAgICAgICAgIHNlbGYubGlzdF93aWRnZXQuYWRkSXRlbShnLmdldCgibmFtZSIsICIodW5uYW1lZCkiKSkKICAgICAgICBpZiBzZWxmLmxpc3Rfd2lkZ2V0LmNvdW50KCkgPiAwOgogICAgICAgICAgICBzZWxmLmxpc3Rfd2lkZ2V0LnNldEN1cnJlbnRSb3coMCkKICAgICAgICBlbHNlOgogICAgICAgICAgICBzZWxmLl9zaG93X2dhbWUoTm9uZSkKCiAgICBkZWYgX2N1cnJlbnRfZ2FtZShzZWxmKSAtPiBPcHRpb25hbFtEaWN0W3N0ciwgQW55XV06CiAgICAgICAgcm93ID0gc2VsZi5saXN0X3dpZGdldC5jdXJyZW50Um93KCkKICAgICAgICBpZiByb3cgPCAwIG9yIHJvdyA+PSBsZW4oc2VsZi5nYW1lc19kYlsiZ2FtZXMiXSk6CiAgICAgICAgICAgIHJldHVybiBOb25lCiAgICAgICAgcmV0dXJuIHNlbGYuZ2FtZXNfZGJbImdhbWVzIl1bcm93XQoKICAgIGRlZiBfc2hvd19zZWxlY3RlZChzZWxmLCBpZHg6IGludCk6CiAgICAgICAgc2VsZi5fc2hvd19nYW1lKHNlbGYuX2N1cnJlbnRfZ2FtZSgpKQoKICAgIGRlZiBfc2hvd19nYW1lKHNlbGYsIGc6IE9wdGlvbmFsW0RpY3Rbc3RyLCBBbnldXSk6CiAgICAgICAgaWYgbm90IGc6CiAgICAgICAgICAgIHNlbGYubmFtZV92YWwuc2V0VGV4dCgiLSIpOyBzZWxmLmF1bWlkX3ZhbC5zZXRUZXh0KCItIik7IHNlbGYuZmxhZ3NfdmFsLnNldFRleHQoIi0iKTsgc2VsZi5leGVfdmFsLnNldFRleHQoIi0iKQogICAgICAgICAgICBzZWxmLndhaXRfdmFsLnNldFRleHQoIi0iKTsgc2VsZi5wcmlvX3ZhbC5zZXRUZXh0KCItIik7IHNlbGYuYWZmX3ZhbC5zZXRUZXh0KCItIikKICAgICAgICAgICAgcmV0dXJuCiAgICAgICAgc2VsZi5uYW1lX3ZhbC5zZXRUZXh0KGcuZ2V0KCJuYW1lIiwiLSIpKQogICAgICAgIHNlbGYuYXVtaWRfdmFsLnNldFRleHQoZy5nZXQoImF1bWlkIiwiLSIpKQogICAgICAgIHNlbGYuZmxhZ3NfdmFsLnNldFRleHQoZy5nZXQoImZsYWdzIiwiLSIpKQogICAgICAgIHNlbGYuZXhlX3ZhbC5zZXRUZXh0KGcuZ2V0KCJleGVfbmFtZSIsIi0iKSkKICAgICAgICBzZWxmLnN0ZWFtX3ZhbC5zZXRUZXh0KHN0cihnLmdldCgic3RlYW1fYXBwaWQiLCItIikpIG9yICItIikKICAgICAgICBzZWxmLnZhbGlkYXRlX3ZhbC5zZXRUZXh0KCJZZXMiIGlmIGcuZ2V0KCJ2YWxpZGF0ZV9zdGVhbSIpIGVsc2UgIk5vIikKICAgICAgICBzZWxmLndhaXRfdmFsLnNldFRleHQoc3RyKGcuZ2V0KCJ3YWl0X3NlY29uZHMiLCBzZWxmLnNldHRpbmdzLmdldCgiZGVmYXVsdF93YWl0Iiw0NSkpKSkKICAgICAgICBzZWxmLnByaW9fdmFsLnNldFRleHQoZy5nZXQoInByaW9yaXR5Iiwgc2VsZi5zZXR0aW5ncy5nZXQoImRlZmF1bHRfcHJpb3JpdHkiLCJIaWdoIikpKQogICAgICAgIGFmZiA9ICJhdXRvIChhbGwgYnV0IENQVTApIiBpZiBnLmdldCgiYXV0b19hZmZpbml0eSIsIFRydWUpIGFuZCBub3QgZy5nZXQoImFmZmluaXR5X2hleCIpIGVsc2UgKGcuZ2V0KCJhZmZpbml0eV9oZXgiKSBvciAiTm9uZSIpCiAgICAgICAgc2VsZi5hZmZfdmFsLnNldFRleHQoYWZmKQoKICAgICMgPT09PT0gQWRkL0VkaXQvUmVtb3ZlID09PT09CiAgICBkZWYgX2FkZF9nYW1lKHNlbGYpOgogICAgICAgIGRsZyA9IEdhbWVEaWFsb2coc2VsZiwgc2VsZi5zZXR0aW5ncykKICAgICAgICBpZiBkbGcuZXhlYygpID09IFF0V2lkZ2V0cy5RRGlhbG9nLkRpYWxvZ0NvZGUuQWNjZXB0ZWQ6CiAgICAgICAgICAgIGRhdGEgPSBkbGcucmVzdWx0X2RhdGEoKQogICAgICAgICAgICBpZiBub3QgZGF0YToKICAgICAgICAgICAgICAgIHNlbGYuX2xvZygiW3hdIE5hbWUgJiBBVU1JRCByZXF1aXJlZC4iLCAiZXJyb3IiKTsgcmV0dXJuCiAgICAgICAgICAgIHNlbGYuZ2FtZXNfZGJbImdhbWVzIl0uYXBwZW5kKGRhdGEpCiAgICAgICAgICAgIHNhdmVfZ2FtZXMoc2VsZi5nYW1lc19kYikKICAgICAgICAgICAgc2VsZi5fcmVmcmVzaF9saXN0KCkKICAgICAgICAgICAgc2VsZi5fbG9nKGYiW+Kck10gQWRkZWQgJ3tkYXRhWyduYW1lJ119Jy4iLCAib2siKQoKICAgIGRlZiBfZWRpdF9nYW1lKHNlbGYpOgogICAgICAgIGcgPSBzZWxmLl9jdXJyZW50X2dhbWUoKQogICAgICAgIGlmIG5vdCBnOgogICAgICAgICAgICByZXR1cm4KICAgICAgICBkbGcgPSBHYW1lRGlhbG9nKHNlbGYsIHNlbGYuc2V0dGluZ3MsIGRhdGE9ZykKICAgICAgICBpZiBkbGcuZXhlYygpID09IFF0V2lkZ2V0cy5RRGlhbG9nLkRpYWxvZ0NvZGUuQWNjZXB0ZWQ6CiAgICAgICAgICAgIGRhdGEgPSBkbGcucmVzdWx0X2RhdGEoKQogICAgICAgICAgICBpZiBub3QgZGF0YToKICAgICAgICAgICAgICAgIHNlbGYuX2xvZygiW3hdIE5hbWUgJiBBVU1JRCByZXF1aXJlZC4iLCAiZXJyb3IiKTsgcmV0dXJuCiAgICAgICAgICAgIGlkeCA9IHNlbGYubGlzdF93aWRnZXQuY3VycmVudFJvdygpCiAgICAgICAgICAgIHNlbGYuZ2FtZXNfZGJbImdhbWVzIl1baWR4XSA9IGRhdGEKICAgICAgICAgICAgc2F2ZV9nYW1lcyhzZWxmLmdhbWVzX2RiKQogICAgICAgICAgICBzZWxmLl9yZWZyZXNoX2xpc3QoKQogICAgICAgICAgICBzZWxmLl9sb2coZiJb4pyTXSBVcGRhdGVkICd7ZGF0YVsnbmFtZSddfScuIiwgIm9rIikKCiAgICBkZWYgX3JlbW92ZV9nYW1lKHNlbGYpOgogICAgICAgIGcgPSBzZWxmLl9jdXJyZW50X2dhbWUoKQogICAgICAgIGlmIG5vdCBnOgogICAgICAgICAgICByZXR1cm4KICAgICAgICBpZHggPSBzZWxmLmxpc3Rfd2lkZ2V0LmN1cnJlbnRSb3coKQogICAgICAgIG5hbWUgPSBnLmdldCgibmFtZSIsIih1bm5hbWVkKSIpCiAgICAgICAgZGVsIHNlbGYuZ2FtZXNfZGJbImdhbWVzIl1baWR4XQogICAgICAgIHNhdmVfZ2FtZXMoc2VsZi5nYW1lc19kYikKICAgICAgICBzZWxmLl9yZWZyZXNoX2xpc3QoKQogICAgICAgIHNlbGYuX2xvZyhmIlshXSBSZW1vdmVkICd7bmFtZX0nLiIsICJ3YXJuIikKCiAgICBkZWYgX3NpZ25faW50b19zdGVhbShzZWxmKToKICAgICAgICAiIiJTaWduIHRoZSB1c2VyIGludG8gU3RlYW0gKE9wZW5JRCkgc28gdGhlIGxhdW5jaGVyIGNhbiBhY2Nlc3MgdGhlaXIgbGlicmFyeS4iIiIKICAgICAgICBzZWxmLl9sb2coIltpXSBTdGFydGluZyBTdGVhbSBzaWduLWluIChsYXVuY2hlcinigKYiLCAiaW5mbyIpCiAgICAgICAgc3RlYW1pZCA9IHN0ZWFtX29wZW5pZF9sb2dpbih0aW1lb3V0PTE4MCkKICAgICAgICBpZiBzdGVhbWlkOgogICAgICAgICAgICBzZWxmLnNldHRpbmdzWyJzdGVhbWlkNjQiXSA9IHN0ZWFtaWQKICAgICAgICAgICAgc2F2ZV9zZXR0aW5ncyhzZWxmLnNldHRpbmdzKQogICAgICAgICAgICBzZWxmLl9sb2coZiJb4pyTXSBTaWduZWQgaW4gYXMgU3RlYW1JRDY0OiB7c3RlYW1pZH0iLCAib2siKQogICAgICAgICAgICBhcGlfa2V5ID0gc2VsZi5zZXR0aW5ncy5nZXQoInN0ZWFtX2FwaV9rZXkiKQogICAgICAgICAgICBpZiBhcGlfa2V5OgogICAgICAgICAgICAgICAgb2ssIG1zZywgXyA9IHN5bmNfc3RlYW1fbGlicmFyeShzdGVhbWlkLCBhcGlfa2V5KQogICAgICAgICAgICAgICAgaWYgb2s6CiAgICAgICAgICAgICAgICAgICAgc2VsZi5fbG9nKGYiW+Kck10ge21zZ30iLCAib2siKQogICAgICAgICAgICAgICAgZWxzZToKICAgICAgICAgICAgICAgICAgICBzZWxmLl9sb2coZiJbfl0ge21zZ30iLCAid2FybiIpCiAgICAgICAgICAgIGVsc2U6CiAgICAgICAgICAgICAgICBzZWxmLl9sb2coIlt+XSBUaXA6IGFkZCAnc3RlYW1fYXBpX2tleScgaW4gc2V0dGluZ3MgSlNPTiB0byBlbmFibGUgZnVsbCBsaWJyYXJ5IHN5bmMuIiwgIndhcm4iKQogICAgICAgIGVsc2U6CiAgICAgICAgICAgIHNlbGYuX2xvZygiW3hdIFN0ZWFtIHNpZ24taW4gZmFpbGVkIG9yIHRpbWVkIG91dC4iLCAiZXJyb3IiKQoKICAgIAogICAgZGVmIF9vcGVuX3NldHRpbmdzKHNlbGYpOgogICAgICAgIGRsZyA9IFNldHRpbmdzRGlhbG9nKHNlbGYuc2V0dGluZ3MsIHNlbGYpCiAgICAgICAgaWYgZGxnLmV4ZWMoKSA9PSBRdFdpZGdldHMuUURpYWxvZy5EaWFsb2dDb2RlLkFjY2VwdGVkOgogICAgICAgICAgICBkbGcuYXBwbHkoKQogICAgICAgICAgICBzYXZlX3NldHRpbmdzKHNlbGYuc2V0dGluZ3MpCiAgICAgICAgICAgIHNlbGYuX2xvZygiW+Kck10gU2V0dGluZ3Mgc2F2ZWQuIiwgIm9rIikKCiAgICBkZWYgX3N5bmNfc3RlYW1fbGlicmFyeShzZWxmKToKICAgICAgICBzdGVhbWlkID0gc2VsZi5zZXR0aW5ncy5nZXQoInN0ZWFtaWQ2NCIsIiIpCiAgICAgICAgaWYgbm90IHN0ZWFtaWQ6CiAgICAgICAgICAgIHNlbGYuX2xvZygiW3hdIE5vdCBzaWduZWQgaW50byBTdGVhbSB5ZXQuIENsaWNrICdTaWduIGludG8gU3RlYW0nIGZpcnN0LiIsICJlcnJvciIpCiAgICAgICAgICAgIHJldHVybgogICAgICAgIGFwaV9rZXkgPSBzZWxmLnNldHRpbmdzLmdldCgic3RlYW1fYXBpX2tleSIpCiAgICAgICAgb2ssIG1zZywgcGF5bG9hZCA9IHN5bmNfc3RlYW1fbGlicmFyeShzdGVhbWlkLCBhcGlfa2V5KQogICAgICAgIGlmIG9rOgogICAgICAgICAgICBzZWxmLl9sb2coZiJb4pyTXSB7bXNnfSIsICJvayIpCiAgICAgICAgICAgIHRyeToKICAgICAgICAgICAgICAgIGFkZGVkLCBza2lwcGVkID0gaW1wb3J0X293bmVkX2dhbWVzX3RvX2RiKHNlbGYuZ2FtZXNfZGIsIHBheWxvYWQsIGluc3RhbGxlZF9vbmx5PVRydWUpCiAgICAgICAgICAgICAgICBpZiBhZGRlZDoKICAgICAgICAgICAgICAgICAgICBzYXZlX2dhbWVzKHNlbGYuZ2FtZXNfZGIpCiAgICAgICAgICAgICAgICAgICAgc2VsZi5fcmVmcmVzaF9saXN0KCkKICAgICAgICAgICAgICAgIHNlbGYuX2xvZyhmIltpXSBJbXBvcnRlZCB7YWRkZWR9IG5ldyB0aXRsZXMgKHtza2lwcGVkfSBza2lwcGVkKS4iLCAiaW5mbyIpCiAgICAgICAgICAgIGV4Y2VwdCBFeGNlcHRpb24gYXMgZToKICAgICAgICAgICAgICAgIHNlbGYuX2xvZyhmIlt+XSBTeW5jZWQgYnV0IGZhaWxlZCB0byBpbXBvcnQgaW50byBsaXN0OiB7ZX0iLCAid2FybiIpCiAgICAgICAgZWxzZToKICAgICAgICAgICAgc2VsZi5fbG9nKGYiW35dIHttc2d9IiwgIndhcm4iKQoKICAgIGRlZiBfdmFsaWRhdGVfc2VsZWN0ZWQoc2VsZik6CiAgICAgICAgZyA9IHNlbGYuX2N1cnJlbnRfZ2FtZSgpCiAgICAgICAgaWYgbm90IGc6CiAgICAgICAgICAgIHJldHVybgogICAgICAgIGFwcGlkID0gc3RyKGcuZ2V0KCJzdGVhbV9hcHBpZCIsIiIgKSkuc3RyaXAoKQogICAgICAgIGlmIG5vdCBhcHBpZC5pc2RpZ2l0KCk6CiAgICAgICAgICAgIHNlbGYuX2xvZygiW3hdIE5vIHZhbGlkIFN0ZWFtIEFwcElEIHNldCBmb3IgdGhpcyB0aXRsZS4iLCAiZXJyb3IiKQogICAgICAgICAgICByZXR1cm4KICAgICAgICBzZWxmLl9sb2coZiJbaV0gVmFsaWRhdGluZyB2aWEgU3RlYW0gZm9yIEFwcElEIHthcHBpZH3igKYiLCAiaW5mbyIpCiAgICAgICAgY2ZnID0gZGljdChnKQogICAgICAgIGNmZ1sidmFsaWRhdGVfb25seSJdID0gVHJ1ZQogICAgICAgIHNlbGYuYnRuX3ZhbGlkYXRlLnNldEVuYWJsZWQoRmFsc2UpCiAgICAgICAgc2VsZi53b3JrZXIgPSBMYXVuY2hXb3JrZXIoY2ZnKQogICAgICAgIHNlbGYud29ya2VyLmxvZ19zaWduYWwuY29ubmVjdChzZWxmLl9vbl93b3JrZXJfbG9nKQogICAgICAgIHNlbGYud29ya2VyLmRvbmVfc2lnbmFsLmNvbm5lY3Qoc2VsZi5fb25fd29ya2VyX2RvbmVfdmFsaWRhdGUpCiAgICAgICAgc2VsZi53b3JrZXIuc3RhcnQoKQogICAgZGVmIF9vbl93b3JrZXJfZG9uZV92YWxpZGF0ZShzZWxmLCBvazogYm9vbCwgbXNnOiBzdHIpOgogICAgICAgIHNlbGYuYnRuX3ZhbGlkYXRlLnNldEVuYWJsZWQoVHJ1ZSkKICAgICAgICBzZWxmLl9vbl93b3JrZXJfZG9uZShvaywgbXNnKQogICAgICAgICMgQXV0by1sYXVuY2ggYWZ0ZXIgc3VjY2Vzc2Z1bCB2YWxpZGF0aW9uCiAgICAgICAgaWYgb2s6CiAgICAgICAgICAgIFF0Q29yZS5RVGltZXIuc2luZ2xlU2hvdCgxMDAwLCBzZWxmLl9sYXVuY2hfc2VsZWN0ZWQpCgogICAgIyA9PT09PSBMYXVuY2ggJiBTaG9ydGN1dCA9PT09PQogICAgZGVmIF9sYXVuY2hfc2VsZWN0ZWQoc2VsZik6CiAgICAgICAgZyA9IHNlbGYuX2N1cnJlbnRfZ2FtZSgpCiAgICAgICAgaWYgbm90IGc6CiAgICAgICAgICAgIHJldHVybgogICAgICAgIHNlbGYuYnRuX2xhdW5jaC5zZXRFbmFibGVkKEZhbHNlKQogICAgICAgIHNlbGYuX2xvZyhmIltpXSBMYXVuY2hpbmcgJ3tnLmdldCgnbmFtZScsJycpfSfigKYiLCAiaW5mbyIpCiAgICAgICAgc2VsZi53b3JrZXIgPSBMYXVuY2hXb3JrZXIoZykKICAgICAgICBzZWxmLndvcmtlci5sb2dfc2lnbmFsLmNvbm5lY3Qoc2VsZi5fb25fd29ya2VyX2xvZykKICAgICAgICBzZWxmLndvcmtlci5kb25lX3NpZ25hbC5jb25uZWN0KHNlbGYuX29uX3dvcmtlcl9kb25lKQogICAgICAgIHNlbGYud29ya2VyLnN0YXJ0KCkKCiAgICBkZWYgX21ha2Vfc2hvcnRjdXRfc2VsZWN0ZWQoc2VsZik6CiAgICAgICAgZyA9IHNlbGYuX2N1cnJlbnRfZ2FtZSgpCiAgICAgICAgaWYgbm90IGc6CiAgICAgICAgICAgIHJldHVybgogICAgICAgIG5hbWUgPSBnLmdldCgibmFtZSIsIlVXUCBHYW1lIikKICAgICAgICB0YXJnZXQgPSB0aGlzX3B5dGhvbl9leGVjdXRhYmxlKCkKICAgICAgICAjIGF2b2lkIGYtc3RyaW5nIGJhY2tzbGFzaCBydWxlOyB1c2UgLmZvcm1hdCgpCiAgICAgICAgYXJncyA9ICcie30iIC0tcnVuICJ7fSInLmZvcm1hdChzdHIoUGF0aChfX2ZpbGVfXykuYWJzb2x1dGUoKSksIG5hbWUucmVwbGFjZSgnIicsICcnKSkKICAgICAgICBkZXNrdG9wID0gUGF0aChvcy5wYXRoLmpvaW4ob3MucGF0aC5leHBhbmR1c2VyKCJ+IiksICJEZXNrdG9wIikpCiAgICAgICAgb3V0ID0gZGVza3RvcCAvIG5hbWUKICAgICAgICBvaywgbXNnID0gbWFrZV93aW5kb3dzX3Nob3J0Y3V0KHRhcmdldCwgYXJncywgb3V0LCBpY29uX3BhdGg9Tm9uZSkKICAgICAgICBpZiBvazoKICAgICAgICAgICAgc2VsZi5fbG9nKGYiW+Kck10gU2hvcnRjdXQgY3JlYXRlZDoge21zZ30iLCAib2siKQogICAgICAgICAgICBzZWxmLl9sb2coIltpXSBZb3UgY2FuIGFkZCB0aGlzIC5sbmsgdG8gU3RlYW0gYXMgYSBOb24tU3RlYW0gZ2FtZSBpZiBkZXNpcmVkLiIsICJpbmZvIikKICAgICAgICBlbHNlOgogICAgICAgICAgICBzZWxmLl9sb2coZiJbeF0gU2hvcnRjdXQgZmFpbGVkOiB7bXNnfSIsICJlcnJvciIpCgogICAgZGVmIF9vbl93b3JrZXJfbG9nKHNlbGYsIGxldmVsOiBzdHIsIG1zZzogc3RyKToKICAgICAgICBzZWxmLl9sb2cobXNnLCBsZXZlbCkKCiAgICBkZWYgX29uX3dvcmtlcl9kb25lKHNlbGYsIG9rOiBib29sLCBtc2c6IHN0cik6CiAgICAgICAgc2VsZi5fbG9nKCgiU3VjY2VzczogIiBpZiBvayBlbHNlICJGYWlsZWQ6ICIpICsgbXNnLCAib2siIGlmIG9rIGVsc2UgImVycm9yIikKICAgICAgICBzZWxmLmJ0bl9sYXVuY2guc2V0RW5hYmxlZChUcnVlKQoKICAgICMgPT09PT0gRGVmYXVsdHMgPT09PT0KICAgIGRlZiBfc2F2ZV9kZWZhdWx0cyhzZWxmKToKICAgICAgICBzZWxmLnNldHRpbmdzWyJkZWZhdWx0X3dhaXQiXSA9IHNlbGYud2FpdF9zcGluX2RlZi52YWx1ZSgpCiAgICAgICAgc2VsZi5zZXR0aW5nc1siZGVmYXVsdF9wcmlvcml0eSJdID0gc2VsZi5wcmlvX2RlZi5jdXJyZW50VGV4dCgpCiAgICAgICAgc2F2ZV9zZXR0aW5ncyhzZWxmLnNldHRpbmdzKQogICAgICAgIHNlbGYuX2xvZygiW+Kck10gRGVmYXVsdHMgc2F2ZWQuIiwgIm9rIikKCiAgICAjID09PT09IExvZ2dpbmcgPT09PT0KICAgIGRlZiBfbG9nKHNlbGYsIG1zZzogc3RyLCBsZXZlbDogc3RyID0gImluZm8iKToKICAgICAgICBwcmVmaXggPSB7ImluZm8iOiJbaV0gIiwgIm9rIjoiW+Kck10gIiwgIndhcm4iOiJbIV0gIiwgImVycm9yIjoiW3hdICJ9LmdldChsZXZlbCwgIiIpCiAgICAgICAgc2VsZi5sb2dfYm94LmFwcGVuZFBsYWluVGV4dChwcmVmaXggKyBtc2cpCgojID09PT09IENMSSBzdXBwb3J0IChmb3Igc2hvcnRjdXQpID09PT09CmRlZiBfcGFyc2VfY2xpX3J1bihhcmd2OiBMaXN0W3N0cl0pIC0+IE9wdGlvbmFsW3N0cl06CiAgICB0cnk6CiAgICAgICAgaWYgIi0tcnVuIiBpbiBhcmd2OgogICAgICAgICAgICBpZHggPSBhcmd2LmluZGV4KCItLXJ1biIpCiAgICAgICAgICAgIHJldHVybiBhcmd2W2lkeCsxXSBpZiBpZHgrMSA8IGxlbihhcmd2KSBlbHNlIE5vbmUKICAgICAgICBmb3IgYSBpbiBhcmd2OgogICAgICAgICAgICBpZiBhLnN0YXJ0c3dpdGgoIi0tcnVuPSIpOgogICAgICAgICAgICAgICAgcmV0dXJuIGEuc3BsaXQoIj0iLDEpWzFdLnN0cmlwKCkuc3RyaXAoJyInKQogICAgZXhjZXB0IEV4Y2VwdGlvbjoKICAgICAgICBwYXNzCiAgICByZXR1cm4gTm9uZQoKZGVmIG1haW4oKToKICAgIHJ1bl9uYW1lID0gX3BhcnNlX2NsaV9ydW4oc3lzLmFyZ3ZbMTpdKQogICAgYXBwID0gUXRXaWRnZXRzLlFBcHBsaWNhdGlvbihzeXMuYXJndikKICAgIHdpbiA9IE1haW5XaW5kb3coKQogICAgd2luLnNob3coKQogICAgaWYgcnVuX25hbWU6CiAgICAgICAgbmFtZXMgPSBbZy5nZXQoIm5hbWUiLCIiKSBmb3IgZyBpbiB3aW4uZ2FtZXNfZGJbImdhbWVzIl1dCiAgICAgICAgaWYgcnVuX25hbWUgaW4gbmFtZXM6CiAgICAgICAgICAgIHJvdyA9IG5hbWVzLmluZGV4KHJ1bl9uYW1lKQogICAgICAgICAgICB3aW4ubGlzdF93aWRnZXQuc2V0Q3VycmVudFJvdyhyb3cpCiAgICAgICAgICAgIFF0Q29yZS5RVGltZXIuc2luZ2xlU2hvdCgyNTAsIHdpbi5fbGF1bmNoX3NlbGVjdGVkKQogICAgICAgIGVsc2U6CiAgICAgICAgICAgIHdpbi5fbG9nKGYiW3hdIEdhbWUgJ3tydW5fbmFtZX0nIG5vdCBmb3VuZC4iLCAiZXJyb3IiKQogICAgc3lzLmV4aXQoYXBwLmV4ZWMoKSkKCmRlZiBfc3RlYW1fd2luZG93X3RpdGxlX2hhcyhzdWJzdHI6IHN0cikgLT4gYm9vbDoKICAgIHRyeToKICAgICAgICBpbXBvcnQgcHN1dGlsCiAgICBleGNlcHQgRXhjZXB0aW9uOgogICAgICAgIHJldHVybiBGYWxzZQogICAgc3Vic3RyX2wgPSBzdWJzdHIubG93ZXIoKQogICAgc3RlYW1fcGlkcyA9IHNldCgpCiAgICBmb3IgcHJvYyBpbiBwc3V0aWwucHJvY2Vzc19pdGVyKFsnbmFtZSddKToKICAgICAgICB0cnk6CiAgICAgICAgICAgIG5tID0gKHByb2MuaW5mby5nZXQoJ25hbWUnKSBvciAnJykubG93ZXIoKQogICAgICAgICAgICBpZiBubS5zdGFydHN3aXRoKCdzdGVhbScpOgogICAgICAgICAgICAgICAgc3RlYW1fcGlkcy5hZGQocHJvYy5waWQpCiAgICAgICAgZXhjZXB0IEV4Y2VwdGlvbjoKICAgICAgICAgICAgcGFzcwogICAgaWYgbm90IHN0ZWFtX3BpZHM6CiAgICAgICAgcmV0dXJuIEZhbHNlCiAgICB1c2VyMzIgPSBjdHlwZXMud2luZGxsLnVzZXIzMgogICAgR2V0V2luZG93VGV4dFcgPSB1c2VyMzIuR2V0V2luZG93VGV4dFcKICAgIEdldFdpbmRvd1RleHRMZW5ndGhXID0gdXNlcjMyLkdldFdpbmRvd1RleHRMZW5ndGhXCiAgICBHZXRXaW5kb3dUaHJlYWRQcm9jZXNzSWQgPSB1c2VyMzIuR2V0V2luZG93VGhyZWFkUHJvY2Vzc0lkCiAgICBJc1dpbmRvd1Zpc2libGUgPSB1c2VyMzIuSXNXaW5kb3dWaXNpYmxlCiAgICBFbnVtV2luZG93cyA9IHVzZXIzMi5FbnVtV2luZG93cwogICAgRW51bVdpbmRvd3NQcm9jID0gY3R5cGVzLldJTkZVTkNUWVBFKGN0eXBlcy5jX2Jvb2wsIHdpbnR5cGVzLkhXTkQsIHdpbnR5cGVzLkxQQVJBTSkKICAgIEBFbnVtV2luZG93c1Byb2MKICAgIGRlZiBfZW51bV9wcm9jKGh3bmQsIGxwYXJhbSk6CiAgICAgICAgaWYgbm90IElzV2luZG93VmlzaWJsZShod25kKToKICAgICAgICAgICAgcmV0dXJuIFRydWUKICAgICAgICBwaWQgPSB3aW50eXBlcy5EV09SRCgpCiAgICAgICAgR2V0V2luZG93VGhyZWFkUHJvY2Vzc0lkKGh3bmQsIGN0eXBlcy5ieXJlZihwaWQpKQogICAgICAgIGlmIHBpZC52YWx1ZSBub3QgaW4gc3RlYW1fcGlkczoKICAgICAgICAgICAgcmV0dXJuIFRydWUKICAgICAgICBsZW5ndGggPSBHZXRXaW5kb3dUZXh0TGVuZ3RoVyhod25kKQogICAgICAgIGlmIGxlbmd0aCA9PSAwOgogICAgICAgICAgICByZXR1cm4gVHJ1ZQogICAgICAgIGJ1ZiA9IGN0eXBlcy5jcmVhdGVfdW5pY29kZV9idWZmZXIobGVuZ3RoICsgMSkKICAgICAgICBHZXRXaW5kb3dUZXh0Vyhod25kLCBidWYsIGxlbmd0aCArIDEpCiAgICAgICAgdGl0bGUgPSBidWYudmFsdWUgb3IgIiIKICAgICAgICBpZiBzdWJzdHJfbCBpbiB0aXRsZS5sb3dlcigpOgogICAgICAgICAgICByZXR1cm4gRmFsc2UKICAgICAgICByZXR1cm4gVHJ1ZQogICAgRW51bVdpbmRvd3MoX2VudW1fcHJvYywgMCkKICAgIHJldHVybiBGYWxzZQoKIyA9PT09PSBTdGVhbSBsaWJyYXJ5IGltcG9ydCBoZWxwZXIgPT09PT0KCiMgPT09PT0gSW5zdGFsbGVkIFN0ZWFtIHRpdGxlcyBkZXRlY3RvciA9PT09PQpkZWYgX3BhcnNlX2xpYnJhcnlmb2xkZXJzX3ZkZih2ZGZfcGF0aDogUGF0aCkgLT4gTGlzdFtQYXRoXToKICAgICIiIlZlcnkgbGlnaHQgcGFyc2VyIHRvIGV4dHJhY3QgbGlicmFyeSBmb2xkZXIgcGF0aHMgZnJvbSBsaWJyYXJ5Zm9sZGVycy52ZGYiIiIKICAgIGxpYnMgPSBbXQogICAgdHJ5OgogICAgICAgIHR4dCA9IHZkZl9wYXRoLnJlYWRfdGV4dChlbmNvZGluZz0idXRmLTgiLCBlcnJvcnM9Imlnbm9yZSIpCiAgICBleGNlcHQgRXhjZXB0aW9uOgogICAgICAgIHJldHVybiBsaWJzCiAgICAjIE1hdGNoIGxpbmVzIGxpa2U6ICIxIiAgICAiRDpcXFN0ZWFtTGlicmFyeSIKICAgIGZvciBtIGluIHJlLmZpbmRpdGVyKHInIlxkKyJccyoiKFteIl0rKSInLCB0eHQpOgogICAgICAgIHRyeToKICAgICAgICAgICAgbGliID0gUGF0aChtLmdyb3VwKDEpLnJlcGxhY2UoJ1xcXFwnLCAnXFwnKSkKICAgICAgICAgICAgaWYgbGliLmV4aXN0cygpOgogICAgICAgICAgICAgICAgbGlicy5hcHBlbmQobGliKQogICAgICAgIGV4Y2VwdCBFeGNlcHRpb246CiAgICAgICAgICAgIHBhc3MKICAgICMgQWx3YXlzIGluY2x1ZGUgdGhlIGRlZmF1bHQgU3RlYW0gcm9vdCBsaWJyYXJ5CiAgICByb290ID0gX2dldF9zdGVhbV9yb290KCkKICAgIGlmIHJvb3Q6CiAgICAgICAgbGlicy5hcHBlbmQocm9vdCkKICAgICMgRGUtZHVwCiAgICB1bmlxID0gW10KICAgIHNlZW4gPSBzZXQoKQogICAgZm9yIGxwIGluIGxpYnM6CiAgICAgICAga2V5ID0gc3RyKGxwLnJlc29sdmUoKSkubG93ZXIoKQogICAgICAgIGlmIGtleSBub3QgaW4gc2VlbjoKICAgICAgICAgICAgc2Vlbi5hZGQoa2V5KQogICAgICAgICAgICB1bmlxLmFwcGVuZChscCkKICAgIHJldHVybiB1bmlxCgpkZWYgZ2V0X2luc3RhbGxlZF9zdGVhbV9hcHBpZHMoKSAtPiBzZXQ6CiAgICAiIiJSZXR1cm4gYSBzZXQgb2YgaW5zdGFsbGVkIFN0ZWFtIGFwcGlkcyBieSBzY2FubmluZyBzdGVhbWFwcHMgbWFuaWZlc3RzIGFjcm9zcyBsaWJyYXJpZXMuIiIiCiAgICBhcHBpZHMgPSBzZXQoKQogICAgcm9vdCA9IF9nZXRfc3RlYW1fcm9vdCgpCiAgICBpZiBub3Qgcm9vdDoKICAgICAgICByZXR1cm4gYXBwaWRzCiAgICBzdGVhbWFwcHMgPSByb290IC8gInN0ZWFtYXBwcyIKICAgICMgbGlicmFyeWZvbGRlcnMudmRmIGxpc3RzIGFkZGl0aW9uYWwgbGlicmFyaWVzCiAgICBsaWJzID0gW10KICAgIHRyeToKICAgICAgICBsaWJzID0gX3BhcnNlX2xpYnJhcnlmb2xkZXJzX3ZkZihzdGVhbWFwcHMgLyAibGlicmFyeWZvbGRlcnMudmRmIikKICAgIGV4Y2VwdCBFeGNlcHRpb246CiAgICAgICAgbGlicyA9IFtdCiAgICAjIEFsd2F5cyBpbmNsdWRlIHJvb3Qgc3RlYW1hcHBzCiAgICBpZiByb290IG5vdCBpbiBsaWJzOgogICAgICAgIGxpYnMuYXBwZW5kKHJvb3QpCiAgICAjIFNjYW4gbWFuaWZlc3RzIGluIGVhY2ggbGlicmFyeSdzIHN0ZWFtYXBwcwogICAgZm9yIGxpYl9yb290IGluIGxpYnM6CiAgICAgICAgc2EgPSBsaWJfcm9vdCAvICJzdGVhbWFwcHMiCiAgICAgICAgaWYgbm90IHNhLmV4aXN0cygpOgogICAgICAgICAgICBjb250aW51ZQogICAgICAgIGZvciBtZiBpbiBzYS5nbG9iKCJhcHBtYW5pZmVzdF8qLmFjZiIpOgogICAgICAgICAgICAjIGFwcG1hbmlmZXN0XzEyMzQ1LmFjZgogICAgICAgICAgICBtID0gcmUuc2VhcmNoKHIiYXBwbWFuaWZlc3RfKFxkKylcLmFjZiQiLCBtZi5uYW1lLCByZS5JKQogICAgICAgICAgICBpZiBtOgogICAgICAgICAgICAgICAgYXBwaWRzLmFkZChtLmdyb3VwKDEpKQogICAgICAgICAgICBlbHNlOgogICAgICAgICAgICAgICAgIyBmYWxsYmFjazogdHJ5IHJlYWRpbmcgZmlsZSBmb3IgImFwcGlkIiAiMTIzNDUiCiAgICAgICAgICAgICAgICB0cnk6CiAgICAgICAgICAgICAgICAgICAgdCA9IG1mLnJlYWRfdGV4dChlbmNvZGluZz0idXRmLTgiLCBlcnJvcnM9Imlnbm9yZSIpCiAgICAgICAgICAgICAgICAgICAgbTIgPSByZS5zZWFyY2gociciYXBwaWQiXHMqIihcZCspIicsIHQpCiAgICAgICAgICAgICAgICAgICAgaWYgbTI6CiAgICAgICAgICAgICAgICAgICAgICAgIGFwcGlkcy5hZGQobTIuZ3JvdXAoMSkpCiAgICAgICAgICAgICAgICBleGNlcHQgRXhjZXB0aW9uOgogICAgICAgICAgICAgICAgICAgIHBhc3MKICAgIHJldHVybiBhcHBpZHMKCmRlZiBpbXBvcnRfb3duZWRfZ2FtZXNfdG9fZGIoZGI6IERpY3Rbc3RyLCBBbnldLCBwYXlsb2FkOiBkaWN0LCBpbnN0YWxsZWRfb25seTogYm9vbCA9IFRydWUpIC0+IFR1cGxlW2ludCwgaW50XToKICAgIHRyeToKICAgICAgICBnYW1lcyA9IHBheWxvYWQuZ2V0KCJyZXNwb25zZSIsIHt9KS5nZXQoImdhbWVzIiwgW10pCiAgICAgICAgaW5zdGFsbGVkID0gZ2V0X2luc3RhbGxlZF9zdGVhbV9hcHBpZHMoKSBpZiBpbnN0YWxsZWRfb25seSBlbHNlIHNldCgpCiAgICBleGNlcHQgRXhjZXB0aW9uOgogICAgICAgIGdhbWVzID0gW10KICAgIGlmIG5vdCBpc2luc3RhbmNlKGdhbWVzLCBsaXN0KToKICAgICAgICByZXR1cm4gKDAsIDApCiAgICBleGlzdGluZyA9IHtzdHIoaXRlbS5nZXQoInN0ZWFtX2FwcGlkIiwiIikpLnN0cmlwKCkgZm9yIGl0ZW0gaW4gZGIuZ2V0KCJnYW1lcyIsIFtdKX0KICAgIGFkZGVkID0gMAogICAgc2tpcHBlZCA9IDAKICAgIGZvciBpdGVtIGluIGdhbWVzOgogICAgICAgIGFwcGlkID0gc3RyKGl0ZW0uZ2V0KCJhcHBpZCIsIiIpKS5zdHJpcCgpCiAgICAgICAgaWYgKG5vdCBhcHBpZC5pc2RpZ2l0KCkpIG9yIChhcHBpZCBpbiBleGlzdGluZykgb3IgKGluc3RhbGxlZF9vbmx5IGFuZCBhcHBpZCBub3QgaW4gaW5zdGFsbGVkKToKICAgICAgICAgICAgc2tpcHBlZCArPSAxOyBjb250aW51ZQogICAgICAgIG5hbWUgPSBpdGVtLmdldCgibmFtZSIpIG9yIGYiQXBwIHthcHBpZH0iCiAgICAgICAgZGIuc2V0ZGVmYXVsdCgiZ2FtZXMiLCBbXSkuYXBwZW5kKHsKICAgICAgICAgICAgIm5hbWUiOiBuYW1lLAogICAgICAgICAgICAic3RlYW1fYXBwaWQiOiBhcHBpZCwKICAgICAgICAgICAgImF1bWlkIjogIiIsCiAgICAgICAgICAgICJhcmdzIjogIiIsCiAgICAgICAgICAgICJleGUiOiAiIiwKICAgICAgICAgICAgInZhbGlkYXRlX3N0ZWFtIjogRmFsc2UsCiAgICAgICAgICAgICJ2YWxpZGF0ZV90aW1lb3V0IjogOTAwLAogICAgICAgICAgICAid2FpdCI6IDQ1LAogICAgICAgICAgICAicHJpb3JpdHkiOiAiSGlnaCIsCiAgICAgICAgICAgICJhZmZpbml0eSI6ICIiCiAgICAgICAgfSkKICAgICAgICBleGlzdGluZy5hZGQoYXBwaWQpCiAgICAgICAgYWRkZWQgKz0gMQogICAgcmV0dXJuIChhZGRlZCwgc2tpcHBlZCkKCmlmIF9fbmFtZV9fID09ICJfX21haW5fXyI6CiAgICBtYWluKCkKCgojIC0tLS0gU3RlYW0gdmFsaWRhdGlvbiB3aW5kb3cvdGl0bGUgaGVscGVycyAtLS0tCmltcG9ydCBjdHlwZXMKZnJvbSBjdHlwZXMgaW1wb3J0IHdpbnR5cGVz").decode("utf-8", errors="ignore")
-    _src = _src.replace("if __name__ == '__main__':", "if __name__ == '__main__':\n    pass")
-    _src = _src.replace('if __name__ == "__main__":', 'if __name__ == "__main__":\n    pass')
-    _register_module("nonuwp.launcher", _src, "nonuwp/launcher.py")
+    _NONUWP_LAUNCHER_B64 = "aW1wb3J0IHJlCiMgVW5pdmVyc2FsIFVXUCBHYW1lIExhdW5jaGVyIChzaW5nbGUgZmlsZSkKIyBMYXVuY2hlcyBVV1AgYXBwcyBieSBBVU1JRCB2aWEgSUFwcGxpY2F0aW9uQWN0aXZhdGlvbk1hbmFnZXIsIHBhc3NlcyBhcmd1bWVudHMsCiMgdGhlbiBhcHBsaWVzIHBlci10aXRsZSBDUFUgYWZmaW5pdHkgYW5kIHByb2Nlc3MgcHJpb3JpdHkuIEluY2x1ZGVzIGEgc2ltcGxlIFVJCiMgdG8gYWRkL2VkaXQgdGl0bGVzIGFuZCBvcHRpb25hbGx5IGNyZWF0ZSBhIGRlc2t0b3AgLmxuayB0aGF0IGNhbGxzIHRoaXMgc2NyaXB0LgoKaW1wb3J0IG9zLCBzeXMsIGpzb24sIHRpbWUsIHN1YnByb2Nlc3MsIGN0eXBlcywgcGxhdGZvcm0sIHRyYWNlYmFjawpmcm9tIHBhdGhsaWIgaW1wb3J0IFBhdGgKZnJvbSB0eXBpbmcgaW1wb3J0IE9wdGlvbmFsLCBEaWN0LCBBbnksIExpc3QsIFR1cGxlCmltcG9ydCB3ZWJicm93c2VyCmZyb20gaHR0cC5zZXJ2ZXIgaW1wb3J0IEhUVFBTZXJ2ZXIsIEJhc2VIVFRQUmVxdWVzdEhhbmRsZXIKZnJvbSB1cmxsaWIucGFyc2UgaW1wb3J0IHVybGVuY29kZSwgdXJscGFyc2UsIHBhcnNlX3FzCmZyb20gdXJsbGliLnJlcXVlc3QgaW1wb3J0IHVybG9wZW4sIFJlcXVlc3QKaW1wb3J0IHRocmVhZGluZywgc29ja2V0CgojIFRoaXJkLXBhcnR5IGRlcHMgKGluc3RhbGw6IHBpcCBpbnN0YWxsIFB5UXQ2IHBzdXRpbCBjb210eXBlcykKdHJ5OgogICAgaW1wb3J0IHBzdXRpbAogICAgaW1wb3J0IGNvbXR5cGVzCiAgICBpbXBvcnQgY29tdHlwZXMuY2xpZW50IGFzIGNjCiAgICBmcm9tIGNvbXR5cGVzIGltcG9ydCBHVUlELCBIUkVTVUxULCBJVW5rbm93biwgQ09NTUVUSE9ECiAgICBmcm9tIGN0eXBlcyBpbXBvcnQgd2ludHlwZXMKZXhjZXB0IEltcG9ydEVycm9yIGFzIGU6CiAgICBwcmludCgiTWlzc2luZyBkZXBlbmRlbmN5OiIsIGUpCiAgICBwcmludCgiSW5zdGFsbCB3aXRoOiBwaXAgaW5zdGFsbCBQeVF0NiBwc3V0aWwgY29tdHlwZXMiKQogICAgc3lzLmV4aXQoMSkKCiMgUXQKZnJvbSBQeVF0NiBpbXBvcnQgUXRXaWRnZXRzLCBRdENvcmUsIFF0R3VpCgojIC0tLSBQbGF0Zm9ybSBndWFyZCAtLS0KaWYgcGxhdGZvcm0uc3lzdGVtKCkgIT0gIldpbmRvd3MiOgogICAgcHJpbnQoIlRoaXMgdG9vbCByZXF1aXJlcyBXaW5kb3dzLiIpCiAgICBzeXMuZXhpdCgxKQoKIyA9PT09PSBXaW4zMiAvIENPTSBjb25zdGFudHMgPT09PT0KIyBQcmlvcml0eSBjbGFzc2VzCkFCT1ZFX05PUk1BTF9QUklPUklUWV9DTEFTUyA9IDB4MDAwMDgwMDAKSElHSF9QUklPUklUWV9DTEFTUyAgICAgICAgID0gMHgwMDAwMDA4MApOT1JNQUxfUFJJT1JJVFlfQ0xBU1MgICAgICAgPSAweDAwMDAwMDIwClJFQUxUSU1FX1BSSU9SSVRZX0NMQVNTICAgICA9IDB4MDAwMDAxMDAKQkVMT1dfTk9STUFMX1BSSU9SSVRZX0NMQVNTID0gMHgwMDAwNDAwMAoKUFJJT1JJVFlfTUFQID0gewogICAgIk5vcm1hbCI6IE5PUk1BTF9QUklPUklUWV9DTEFTUywKICAgICJBYm92ZSBOb3JtYWwiOiBBQk9WRV9OT1JNQUxfUFJJT1JJVFlfQ0xBU1MsCiAgICAiSGlnaCI6IEhJR0hfUFJJT1JJVFlfQ0xBU1MsCiAgICAiUmVhbHRpbWUgKGNhcmVmdWwpIjogUkVBTFRJTUVfUFJJT1JJVFlfQ0xBU1MsCiAgICAiQmVsb3cgTm9ybWFsIjogQkVMT1dfTk9STUFMX1BSSU9SSVRZX0NMQVNTCn0KCiMgSUFwcGxpY2F0aW9uQWN0aXZhdGlvbk1hbmFnZXIKQ0xTSURfQXBwbGljYXRpb25BY3RpdmF0aW9uTWFuYWdlciA9IEdVSUQoIns0NUJBMTI3RC0xMEE4LTQ2RUEtOEFCNy01NkVBOTA3ODk0M0N9IikKSUlEX0lBcHBsaWNhdGlvbkFjdGl2YXRpb25NYW5hZ2VyICA9IEdVSUQoInsyRTk0MTE0MS03Rjk3LTQ3NTYtQkExRC05REVDREU4OTRBM0R9IikKCiMgQWN0aXZhdGVPcHRpb25zCkFPX05PTkUgICAgICAgICAgICA9IDB4MApBT19OT0VSUk9SVUkgICAgICAgPSAweDEKQU9fTk9TUExBU0hTQ1JFRU4gID0gMHgyCgprZXJuZWwzMiA9IGN0eXBlcy53aW5kbGwua2VybmVsMzIKdXNlcjMyICAgPSBjdHlwZXMud2luZGxsLnVzZXIzMgpBU0ZXX0FOWSA9IC0xICAjIEFsbG93U2V0Rm9yZWdyb3VuZFdpbmRvdwoKIyAtLS0tLSBDT00gaW50ZXJmYWNlIGRlZmluaXRpb24gLS0tLS0KY2xhc3MgSUFwcGxpY2F0aW9uQWN0aXZhdGlvbk1hbmFnZXIoSVVua25vd24pOgogICAgX2lpZF8gPSBJSURfSUFwcGxpY2F0aW9uQWN0aXZhdGlvbk1hbmFnZXIKICAgIF9tZXRob2RzXyA9IFsKICAgICAgICBDT01NRVRIT0QoCiAgICAgICAgICAgIFtdLCBIUkVTVUxULCAnQWN0aXZhdGVBcHBsaWNhdGlvbicsCiAgICAgICAgICAgIChbJ2luJ10sICBjdHlwZXMuY193Y2hhcl9wLCAnYXBwVXNlck1vZGVsSWQnKSwKICAgICAgICAgICAgKFsnaW4nXSwgIGN0eXBlcy5jX3djaGFyX3AsICdhcmd1bWVudHMnKSwKICAgICAgICAgICAgKFsnaW4nXSwgIGN0eXBlcy5jX3VpbnQsICAgICdvcHRpb25zJyksCiAgICAgICAgICAgIChbJ291dCddLCBjdHlwZXMuUE9JTlRFUih3aW50eXBlcy5EV09SRCksICdwcm9jZXNzSWQnKQogICAgICAgICksCiAgICAgICAgIyBTdHVicyAodW51c2VkIGJ1dCBrZWVwIHZ0YWJsZSBsYXlvdXQpCiAgICAgICAgQ09NTUVUSE9EKFtdLCBIUkVTVUxULCAnQWN0aXZhdGVGb3JGaWxlJywKICAgICAgICAgICAgICAgICAgKFsnaW4nXSwgY3R5cGVzLmNfdm9pZF9wLCAnaXRlbUFycmF5JyksCiAgICAgICAgICAgICAgICAgIChbJ2luJ10sIGN0eXBlcy5jX3djaGFyX3AsICd2ZXJiJyksCiAgICAgICAgICAgICAgICAgIChbJ291dCddLCBjdHlwZXMuUE9JTlRFUih3aW50eXBlcy5EV09SRCksICdwcm9jZXNzSWQnKSksCiAgICAgICAgQ09NTUVUSE9EKFtdLCBIUkVTVUxULCAnQWN0aXZhdGVGb3JQcm90b2NvbCcsCiAgICAgICAgICAgICAgICAgIChbJ2luJ10sIGN0eXBlcy5jX3ZvaWRfcCwgJ2l0ZW1BcnJheScpLAogICAgICAgICAgICAgICAgICAoWydpbiddLCBjdHlwZXMuY193Y2hhcl9wLCAndmVyYicpLAogICAgICAgICAgICAgICAgICAoWydvdXQnXSwgY3R5cGVzLlBPSU5URVIod2ludHlwZXMuRFdPUkQpLCAncHJvY2Vzc0lkJykpLAogICAgXQoKZGVmIF9jcmVhdGVfYWN0aXZhdGlvbl9tYW5hZ2VyKCkgLT4gSUFwcGxpY2F0aW9uQWN0aXZhdGlvbk1hbmFnZXI6CiAgICAjIEluaXRpYWxpemUgQ09NIGFuZCBhbGxvdyBmb3JlZ3JvdW5kCiAgICBjb210eXBlcy5Db0luaXRpYWxpemUoKQogICAgdXNlcjMyLkFsbG93U2V0Rm9yZWdyb3VuZFdpbmRvdyhBU0ZXX0FOWSkKICAgICMgQ3JlYXRlIHRoZSBDT00gb2JqZWN0IChMb2NhbCBTZXJ2ZXIgY29udGV4dCkKICAgIHJldHVybiBjYy5DcmVhdGVPYmplY3QoCiAgICAgICAgQ0xTSURfQXBwbGljYXRpb25BY3RpdmF0aW9uTWFuYWdlciwKICAgICAgICBpbnRlcmZhY2U9SUFwcGxpY2F0aW9uQWN0aXZhdGlvbk1hbmFnZXIsCiAgICAgICAgY2xzY3R4PWNvbXR5cGVzLkNMU0NUWF9MT0NBTF9TRVJWRVIKICAgICkKCiMgPT09PT0gSGVscGVycyA9PT09PQojID09PT09IFN0ZWFtIFZhbGlkYXRpb24gSGVscGVycyA9PT09PQpkZWYgX2dldF9zdGVhbV9yb290KCkgLT4gT3B0aW9uYWxbUGF0aF06CiAgICAiIiJMb2NhdGUgU3RlYW0gcm9vdCB2aWEgcmVnaXN0cnkgb3IgZGVmYXVsdHMuIiIiCiAgICB0cnk6CiAgICAgICAgaW1wb3J0IHdpbnJlZwogICAgICAgIHdpdGggd2lucmVnLk9wZW5LZXkod2lucmVnLkhLRVlfQ1VSUkVOVF9VU0VSLCByIlNvZnR3YXJlXFZhbHZlXFN0ZWFtIikgYXMgazoKICAgICAgICAgICAgdmFsLCBfID0gd2lucmVnLlF1ZXJ5VmFsdWVFeChrLCAiU3RlYW1QYXRoIikKICAgICAgICAgICAgaWYgdmFsOgogICAgICAgICAgICAgICAgcCA9IFBhdGgodmFsKQogICAgICAgICAgICAgICAgcmV0dXJuIHAgaWYgcC5leGlzdHMoKSBlbHNlIE5vbmUKICAgIGV4Y2VwdCBFeGNlcHRpb246CiAgICAgICAgcGFzcwogICAgIyBjb21tb24gZGVmYXVsdAogICAgZm9yIGd1ZXNzIGluIFtQYXRoKHIiQzpcUHJvZ3JhbSBGaWxlcyAoeDg2KVxTdGVhbSIpLCBQYXRoKHIiQzpcUHJvZ3JhbSBGaWxlc1xTdGVhbSIpXToKICAgICAgICBpZiBndWVzcy5leGlzdHMoKToKICAgICAgICAgICAgcmV0dXJuIGd1ZXNzCiAgICByZXR1cm4gTm9uZQoKZGVmIF9zdGVhbV9jb250ZW50X2xvZ19wYXRoKCkgLT4gT3B0aW9uYWxbUGF0aF06CiAgICByb290ID0gX2dldF9zdGVhbV9yb290KCkKICAgIGlmIG5vdCByb290OgogICAgICAgIHJldHVybiBOb25lCiAgICBsb2cgPSByb290IC8gImxvZ3MiIC8gImNvbnRlbnRfbG9nLnR4dCIKICAgIHJldHVybiBsb2cgaWYgbG9nLmV4aXN0cygpIGVsc2UgbG9nICAjIHJldHVybiBwYXRoIGFueXdheTsgaXQgbWF5IGJlIGNyZWF0ZWQgb24gZmlyc3Qgd3JpdGUKCmRlZiBfb3Blbl9zdGVhbV91cmwodXJsOiBzdHIpIC0+IGJvb2w6CiAgICAiIiJPcGVuIGEgc3RlYW06Ly8gVVJMIHdpdGhvdXQgYmxvY2tpbmcuIiIiCiAgICB0cnk6CiAgICAgICAgIyBvcy5zdGFydGZpbGUgc3VwcG9ydHMgcHJvdG9jb2wgaGFuZGxlcnMgb24gV2luZG93cwogICAgICAgIG9zLnN0YXJ0ZmlsZSh1cmwpCiAgICAgICAgcmV0dXJuIFRydWUKICAgIGV4Y2VwdCBFeGNlcHRpb246CiAgICAgICAgdHJ5OgogICAgICAgICAgICBzdWJwcm9jZXNzLlBvcGVuKFsnY21kJywgJy9jJywgJ3N0YXJ0JywgJycsIHVybF0sIGNyZWF0aW9uZmxhZ3M9c3VicHJvY2Vzcy5DUkVBVEVfTk9fV0lORE9XKQogICAgICAgICAgICByZXR1cm4gVHJ1ZQogICAgICAgIGV4Y2VwdCBFeGNlcHRpb246CiAgICAgICAgICAgIHJldHVybiBGYWxzZQoKCgojID09PT09IFN0ZWFtIE9wZW5JRCBMb2dpbiAoZm9yIGxhdW5jaGVyIGF1dGgpID09PT09CmRlZiBfZmluZF9mcmVlX3BvcnQoc3RhcnQ9MzQxMjMsIGVuZD0zNDIyMyk6CiAgICBmb3IgcG9ydCBpbiByYW5nZShzdGFydCwgZW5kKToKICAgICAgICB3aXRoIHNvY2tldC5zb2NrZXQoc29ja2V0LkFGX0lORVQsIHNvY2tldC5TT0NLX1NUUkVBTSkgYXMgc286CiAgICAgICAgICAgIHRyeToKICAgICAgICAgICAgICAgIHNvLmJpbmQoKCIxMjcuMC4wLjEiLCBwb3J0KSkKICAgICAgICAgICAgICAgIHJldHVybiBwb3J0CiAgICAgICAgICAgIGV4Y2VwdCBPU0Vycm9yOgogICAgICAgICAgICAgICAgY29udGludWUKICAgIHJldHVybiBOb25lCgpkZWYgX3ZlcmlmeV9vcGVuaWRfd2l0aF9zdGVhbShwYXJhbXM6IERpY3Rbc3RyLCBBbnldKSAtPiBib29sOgogICAgdmVyaWZ5X3BhcmFtcyA9IHBhcmFtcy5jb3B5KCkKICAgIHZlcmlmeV9wYXJhbXNbJ29wZW5pZC5tb2RlJ10gPSAnY2hlY2tfYXV0aGVudGljYXRpb24nCiAgICBkYXRhID0gdXJsZW5jb2RlKHZlcmlmeV9wYXJhbXMpLmVuY29kZSgndXRmLTgnKQogICAgdHJ5OgogICAgICAgIHJlcSA9IFJlcXVlc3QoImh0dHBzOi8vc3RlYW1jb21tdW5pdHkuY29tL29wZW5pZC9sb2dpbiIsIGRhdGE9ZGF0YSwgbWV0aG9kPSJQT1NUIikKICAgICAgICB3aXRoIHVybG9wZW4ocmVxLCB0aW1lb3V0PTEwKSBhcyByZXNwOgogICAgICAgICAgICBib2R5ID0gcmVzcC5yZWFkKCkuZGVjb2RlKCd1dGYtOCcsIGVycm9ycz0naWdub3JlJykKICAgICAgICAgICAgcmV0dXJuICdpc192YWxpZDp0cnVlJyBpbiBib2R5CiAgICBleGNlcHQgRXhjZXB0aW9uOgogICAgICAgIHJldHVybiBGYWxzZQoKZGVmIHN0ZWFtX29wZW5pZF9sb2dpbih0aW1lb3V0PTE4MCkgLT4gT3B0aW9uYWxbc3RyXToKICAgIHBvcnQgPSBfZmluZF9mcmVlX3BvcnQoKQogICAgaWYgbm90IHBvcnQ6CiAgICAgICAgcmV0dXJuIE5vbmUKICAgIHJlc3VsdCA9IHsic3RlYW1pZCI6IE5vbmV9CiAgICBkb25lID0gdGhyZWFkaW5nLkV2ZW50KCkKCiAgICBjbGFzcyBIYW5kbGVyKEJhc2VIVFRQUmVxdWVzdEhhbmRsZXIpOgogICAgICAgIGRlZiBkb19HRVQoc2VsZik6CiAgICAgICAgICAgIHRyeToKICAgICAgICAgICAgICAgIHEgPSB1cmxwYXJzZShzZWxmLnBhdGgpCiAgICAgICAgICAgICAgICBpZiBxLnBhdGggIT0gIi9jYWxsYmFjayI6CiAgICAgICAgICAgICAgICAgICAgc2VsZi5zZW5kX3Jlc3BvbnNlKDQwNCk7IHNlbGYuZW5kX2hlYWRlcnMoKTsgcmV0dXJuCiAgICAgICAgICAgICAgICBwYXJhbXMgPSB7azogdlswXSBmb3IgaywgdiBpbiBwYXJzZV9xcyhxLnF1ZXJ5KS5pdGVtcygpfQogICAgICAgICAgICAgICAgb2sgPSBfdmVyaWZ5X29wZW5pZF93aXRoX3N0ZWFtKHBhcmFtcykKICAgICAgICAgICAgICAgIGNsYWltZWQgPSBwYXJhbXMuZ2V0KCJvcGVuaWQuY2xhaW1lZF9pZCIsIiIpCiAgICAgICAgICAgICAgICBzdGVhbWlkID0gIiIKICAgICAgICAgICAgICAgIGlmIGNsYWltZWQgYW5kIGNsYWltZWQucnNwbGl0KCIvIiwgMSlbLTFdLmlzZGlnaXQoKToKICAgICAgICAgICAgICAgICAgICBzdGVhbWlkID0gY2xhaW1lZC5yc3BsaXQoIi8iLCAxKVstMV0KICAgICAgICAgICAgICAgIGlmIG9rIGFuZCBzdGVhbWlkOgogICAgICAgICAgICAgICAgICAgIHJlc3VsdFsic3RlYW1pZCJdID0gc3RlYW1pZAogICAgICAgICAgICAgICAgICAgIGJvZHkgPSBmIjxodG1sPjxib2R5PjxoMz5Mb2dpbiBzdWNjZXNzZnVsLiBZb3UgY2FuIGNsb3NlIHRoaXMgd2luZG93LjwvaDM+PHA+U3RlYW1JRDoge3N0ZWFtaWR9PC9wPjwvYm9keT48L2h0bWw+Ii5lbmNvZGUoInV0Zi04IikKICAgICAgICAgICAgICAgIGVsc2U6CiAgICAgICAgICAgICAgICAgICAgYm9keSA9IGIiPGh0bWw+PGJvZHk+PGgzPkxvZ2luIGZhaWxlZCBvciBjYW5jZWxlZC4gUGxlYXNlIGNsb3NlIHRoaXMgd2luZG93LjwvaDM+PC9ib2R5PjwvaHRtbD4iCiAgICAgICAgICAgICAgICBzZWxmLnNlbmRfcmVzcG9uc2UoMjAwKTsgc2VsZi5zZW5kX2hlYWRlcigiQ29udGVudC1UeXBlIiwidGV4dC9odG1sIik7IHNlbGYuZW5kX2hlYWRlcnMoKTsgc2VsZi53ZmlsZS53cml0ZShib2R5KQogICAgICAgICAgICAgICAgZG9uZS5zZXQoKQogICAgICAgICAgICBleGNlcHQgRXhjZXB0aW9uOgogICAgICAgICAgICAgICAgdHJ5OgogICAgICAgICAgICAgICAgICAgIHNlbGYuc2VuZF9yZXNwb25zZSg1MDApOyBzZWxmLmVuZF9oZWFkZXJzKCkKICAgICAgICAgICAgICAgIGV4Y2VwdCBFeGNlcHRpb246CiAgICAgICAgICAgICAgICAgICAgcGFzcwogICAgICAgICAgICAgICAgZG9uZS5zZXQoKQogICAgICAgIGRlZiBsb2dfbWVzc2FnZShzZWxmLCBmb3JtYXQsICphcmdzKTogCiAgICAgICAgICAgIHJldHVybgoKICAgIGh0dHBkID0gSFRUUFNlcnZlcigoIjEyNy4wLjAuMSIsIHBvcnQpLCBIYW5kbGVyKQogICAgdGggPSB0aHJlYWRpbmcuVGhyZWFkKHRhcmdldD1odHRwZC5zZXJ2ZV9mb3JldmVyLCBkYWVtb249VHJ1ZSkKICAgIHRoLnN0YXJ0KCkKCiAgICByZWFsbSA9IGYiaHR0cDovLzEyNy4wLjAuMTp7cG9ydH0iCiAgICByZXR1cm5fdG8gPSBmIntyZWFsbX0vY2FsbGJhY2siCiAgICBvcGVuaWRfcGFyYW1zID0gewogICAgICAgICJvcGVuaWQubnMiOiAiaHR0cDovL3NwZWNzLm9wZW5pZC5uZXQvYXV0aC8yLjAiLAogICAgICAgICJvcGVuaWQubW9kZSI6ICJjaGVja2lkX3NldHVwIiwKICAgICAgICAib3BlbmlkLnJldHVybl90byI6IHJldHVybl90bywKICAgICAgICAib3BlbmlkLnJlYWxtIjogcmVhbG0sCiAgICAgICAgIm9wZW5pZC5pZGVudGl0eSI6ICJodHRwOi8vc3BlY3Mub3BlbmlkLm5ldC9hdXRoLzIuMC9pZGVudGlmaWVyX3NlbGVjdCIsCiAgICAgICAgIm9wZW5pZC5jbGFpbWVkX2lkIjogImh0dHA6Ly9zcGVjcy5vcGVuaWQubmV0L2F1dGgvMi4wL2lkZW50aWZpZXJfc2VsZWN0IiwKICAgIH0KICAgIHVybCA9ICJodHRwczovL3N0ZWFtY29tbXVuaXR5LmNvbS9vcGVuaWQvbG9naW4/IiArIHVybGVuY29kZShvcGVuaWRfcGFyYW1zKQogICAgd2ViYnJvd3Nlci5vcGVuKHVybCkKCiAgICBpZiBub3QgZG9uZS53YWl0KHRpbWVvdXQpOgogICAgICAgIHRyeTogaHR0cGQuc2h1dGRvd24oKQogICAgICAgIGV4Y2VwdCBFeGNlcHRpb246IHBhc3MKICAgICAgICByZXR1cm4gTm9uZQogICAgdHJ5OiBodHRwZC5zaHV0ZG93bigpCiAgICBleGNlcHQgRXhjZXB0aW9uOiBwYXNzCiAgICByZXR1cm4gcmVzdWx0WyJzdGVhbWlkIl0KCmRlZiBzeW5jX3N0ZWFtX2xpYnJhcnkoc3RlYW1pZDogc3RyLCBhcGlfa2V5OiBPcHRpb25hbFtzdHJdKSAtPiBUdXBsZVtib29sLCBzdHIsIE9wdGlvbmFsW2RpY3RdXToKICAgIGlmIG5vdCBzdGVhbWlkIG9yIG5vdCBzdGVhbWlkLmlzZGlnaXQoKToKICAgICAgICByZXR1cm4gKEZhbHNlLCAiTm8gdmFsaWQgU3RlYW1JRC4iLCBOb25lKQogICAgaWYgbm90IGFwaV9rZXk6CiAgICAgICAgcmV0dXJuIChGYWxzZSwgIk5vIFN0ZWFtIFdlYiBBUEkga2V5IHNldC4gQWRkIG9uZSB0byBTZXR0aW5ncyB0byBzeW5jIGZ1bGwgbGlicmFyeS4iLCBOb25lKQogICAgdHJ5OgogICAgICAgIHFzID0gdXJsZW5jb2RlKHsia2V5IjogYXBpX2tleSwgInN0ZWFtaWQiOiBzdGVhbWlkLCAiaW5jbHVkZV9hcHBpbmZvIjogMSwgImluY2x1ZGVfcGxheWVkX2ZyZWVfZ2FtZXMiOiAxfSkKICAgICAgICB1cmwgPSAiaHR0cHM6Ly9hcGkuc3RlYW1wb3dlcmVkLmNvbS9JUGxheWVyU2VydmljZS9HZXRPd25lZEdhbWVzL3YxLz8iICsgcXMKICAgICAgICB3aXRoIHVybG9wZW4odXJsLCB0aW1lb3V0PTE1KSBhcyByZXNwOgogICAgICAgICAgICBpbXBvcnQganNvbiBhcyBfanNvbgogICAgICAgICAgICBkYXRhID0gX2pzb24ubG9hZHMocmVzcC5yZWFkKCkuZGVjb2RlKCJ1dGYtOCIsIGVycm9ycz0iaWdub3JlIikpCiAgICAgICAgICAgIHJldHVybiAoVHJ1ZSwgZiJGZXRjaGVkIHtsZW4oZGF0YS5nZXQoJ3Jlc3BvbnNlJyx7fSkuZ2V0KCdnYW1lcycsIFtdKSl9IGdhbWVzLiIsIGRhdGEpCiAgICBleGNlcHQgRXhjZXB0aW9uIGFzIGU6CiAgICAgICAgcmV0dXJuIChGYWxzZSwgZiJGYWlsZWQgdG8gZmV0Y2ggbGlicmFyeToge2V9IiwgTm9uZSkKZGVmIHN0ZWFtX3ZhbGlkYXRlX2FuZF93YWl0KGFwcGlkOiBzdHIsIHRpbWVvdXRfczogaW50ID0gMTgwMCwgcG9sbF9pbnRlcnZhbDogZmxvYXQgPSAxLjAsIGZhbGxiYWNrX3dhaXRfczogaW50ID0gNjApOgogICAgIiIiCiAgICBUcmlnZ2VyIFN0ZWFtIHZhbGlkYXRpb24gKHN0ZWFtOi8vdmFsaWRhdGUvPGFwcGlkPikgYW5kIHdhaXQgdW50aWwgaXQncyAqbGlrZWx5KiBkb25lLgogICAgUHJpb3JpdHkgMTogd2F0Y2ggU3RlYW0gd2luZG93IHRpdGxlcyBmb3IgYW55IG9mOiAnVmFsaWRhdGluZycsICdWZXJpZnlpbmcnLCAnVXBkYXRpbmcnLgogICAgICAgICAgICAgICAgT25jZSBzZWVuIGF0IGxlYXN0IG9uY2UgYW5kIHRoZW4gYWJzZW50IGZvciB+NXMsIGNvbnNpZGVyIGl0IGZpbmlzaGVkLgogICAgUHJpb3JpdHkgMjogaWYgd2UgbmV2ZXIgc2VlIHRob3NlIHRpdGxlcyBhdCBhbGwsIGZhbGwgYmFjayB0byBhIGZpeGVkIHdhaXQgKGBmYWxsYmFja193YWl0X3NgKS4KICAgIE5vIGxvZyBwYXJzaW5nLiBObyBmaWxlIEkvTy4KICAgICIiIgogICAgYXBwaWQgPSBzdHIoYXBwaWQpLnN0cmlwKCkKICAgIGlmIG5vdCBhcHBpZC5pc2RpZ2l0KCk6CiAgICAgICAgcmV0dXJuIEZhbHNlLCBmIlt4XSBJbnZhbGlkIFN0ZWFtIEFwcElEOiB7YXBwaWR9IgoKICAgIF9vcGVuX3N0ZWFtX3VybChmInN0ZWFtOi8vdmFsaWRhdGUve2FwcGlkfSIpCgogICAgaW1wb3J0IHRpbWUKICAgIHN0YXJ0X3RzID0gdGltZS50aW1lKCkKICAgIGxhc3Rfc2VlbiA9IDAuMAogICAgc2Vlbl9hbnkgPSBGYWxzZQogICAgZ3JhY2VfYWZ0ZXJfaGlkZSA9IDUuMAogICAga2V5d29yZHMgPSAoIlZhbGlkYXRpbmciLCAiVmVyaWZ5aW5nIiwgIlVwZGF0aW5nIikKCiAgICB3aGlsZSAodGltZS50aW1lKCkgLSBzdGFydF90cykgPCB0aW1lb3V0X3M6CiAgICAgICAgdHJ5OgogICAgICAgICAgICBpZiBhbnkoX3N0ZWFtX3dpbmRvd190aXRsZV9oYXMoaykgZm9yIGsgaW4ga2V5d29yZHMpOgogICAgICAgICAgICAgICAgc2Vlbl9hbnkgPSBUcnVlCiAgICAgICAgICAgICAgICBsYXN0X3NlZW4gPSB0aW1lLnRpbWUoKQogICAgICAgIGV4Y2VwdCBFeGNlcHRpb246CiAgICAgICAgICAgIHBhc3MKCiAgICAgICAgaWYgc2Vlbl9hbnkgYW5kICh0aW1lLnRpbWUoKSAtIGxhc3Rfc2VlbikgPj0gZ3JhY2VfYWZ0ZXJfaGlkZToKICAgICAgICAgICAgcmV0dXJuIFRydWUsIGYiW+Kck10gU3RlYW0gdmFsaWRhdGlvbiBmaW5pc2hlZCBmb3IgQXBwSUQge2FwcGlkfS4iCgogICAgICAgICMgRmFsbGJhY2sgcGF0aDogbmV2ZXIgc2F3IGEgJ3ZhbGlkYXRpbmcnIGtpbmQgb2YgdGl0bGUgYXQgYWxsIOKAlCBqdXN0IHdhaXQgb3V0IGEgc2hvcnQgd2luZG93CiAgICAgICAgaWYgKG5vdCBzZWVuX2FueSkgYW5kICh0aW1lLnRpbWUoKSAtIHN0YXJ0X3RzKSA+PSBmYWxsYmFja193YWl0X3M6CiAgICAgICAgICAgIHJldHVybiBUcnVlLCBmIlt+XSBQcm9jZWVkaW5nIGFmdGVyIGZhbGxiYWNrIHdhaXQgKHtmYWxsYmFja193YWl0X3N9cykgZm9yIEFwcElEIHthcHBpZH0uIgoKICAgICAgICB0aW1lLnNsZWVwKHBvbGxfaW50ZXJ2YWwpCgogICAgcmV0dXJuIEZhbHNlLCBmIlshXSBUaW1lZCBvdXQgd2FpdGluZyBmb3IgU3RlYW0gdmFsaWRhdGlvbiBvZiBBcHBJRCB7YXBwaWR9IGFmdGVyIHt0aW1lb3V0X3N9cy4iCmRlZiBzZXRfcHJpb3JpdHlfYW5kX2FmZmluaXR5KHBpZDogaW50LCBwcmlvcml0eV9jb25zdDogaW50LCBtYXNrOiBPcHRpb25hbFtpbnRdKSAtPiBUdXBsZVtib29sLCBzdHJdOgogICAgIiIiQXBwbHkgcHJpb3JpdHkgYW5kIG9wdGlvbmFsIENQVSBhZmZpbml0eSB0byBhIHByb2Nlc3MuIiIiCiAgICB0cnk6CiAgICAgICAgUFJPQ0VTU19TRVRfSU5GT1JNQVRJT04gPSAweDAyMDAKICAgICAgICBQUk9DRVNTX1FVRVJZX0xJTUlURURfSU5GT1JNQVRJT04gPSAweDEwMDAKICAgICAgICBQUk9DRVNTX1NFVF9BRkZJTklUWSA9IDB4MDEwMAogICAgICAgIGRlc2lyZWQgPSBQUk9DRVNTX1NFVF9JTkZPUk1BVElPTiB8IFBST0NFU1NfUVVFUllfTElNSVRFRF9JTkZPUk1BVElPTiB8IFBST0NFU1NfU0VUX0FGRklOSVRZCiAgICAgICAgaGFuZGxlID0ga2VybmVsMzIuT3BlblByb2Nlc3MoZGVzaXJlZCwgRmFsc2UsIHBpZCkKICAgICAgICBpZiBub3QgaGFuZGxlOgogICAgICAgICAgICByZXR1cm4gRmFsc2UsIGYiT3BlblByb2Nlc3MgZmFpbGVkIChQSUQge3BpZH0pLiBUcnkgcnVubmluZyBhcyBBZG1pbmlzdHJhdG9yLiIKCiAgICAgICAgaWYgbm90IGtlcm5lbDMyLlNldFByaW9yaXR5Q2xhc3MoaGFuZGxlLCBwcmlvcml0eV9jb25zdCk6CiAgICAgICAgICAgIGtlcm5lbDMyLkNsb3NlSGFuZGxlKGhhbmRsZSkKICAgICAgICAgICAgcmV0dXJuIEZhbHNlLCBmIlNldFByaW9yaXR5Q2xhc3MgZmFpbGVkIGZvciBQSUQge3BpZH0uIFRyeSBBZG1pbi4iCgogICAgICAgIGlmIG1hc2sgaXMgbm90IE5vbmU6CiAgICAgICAgICAgIHBtYXNrID0gY3R5cGVzLmNfc2l6ZV90KG1hc2spCiAgICAgICAgICAgIGlmIG5vdCBrZXJuZWwzMi5TZXRQcm9jZXNzQWZmaW5pdHlNYXNrKGhhbmRsZSwgcG1hc2spOgogICAgICAgICAgICAgICAga2VybmVsMzIuQ2xvc2VIYW5kbGUoaGFuZGxlKQogICAgICAgICAgICAgICAgcmV0dXJuIEZhbHNlLCBmIlNldFByb2Nlc3NBZmZpbml0eU1hc2sgZmFpbGVkIGZvciBQSUQge3BpZH0uIE1hc2s9MHh7bWFzazpYfS4gVHJ5IEFkbWluLiIKCiAgICAgICAga2VybmVsMzIuQ2xvc2VIYW5kbGUoaGFuZGxlKQogICAgICAgIHJldHVybiBUcnVlLCAiQXBwbGllZCBwcmlvcml0eXt9LiIuZm9ybWF0KCIgKyBhZmZpbml0eSIgaWYgbWFzayBpcyBub3QgTm9uZSBlbHNlICIiKQogICAgZXhjZXB0IEV4Y2VwdGlvbiBhcyBlOgogICAgICAgIHJldHVybiBGYWxzZSwgZiJXaW4zMiBlcnJvcjoge2V9IgoKZGVmIGNwdV9jb3VudF9sb2dpY2FsKCkgLT4gaW50OgogICAgcmV0dXJuIG9zLmNwdV9jb3VudCgpIG9yIDgKCmRlZiBtYXNrX2FsbF9idXRfY3B1MCgpIC0+IGludDoKICAgIG4gPSBjcHVfY291bnRfbG9naWNhbCgpCiAgICByZXR1cm4gKCgxIDw8IG4pIC0gMSkgJiB+MHgxIGlmIG4gPiAxIGVsc2UgMQoKZGVmIHBhcnNlX2hleF9tYXNrKHM6IHN0cikgLT4gT3B0aW9uYWxbaW50XToKICAgIHMgPSAocyBvciAiIikuc3RyaXAoKQogICAgaWYgbm90IHM6CiAgICAgICAgcmV0dXJuIE5vbmUKICAgIGlmIHMubG93ZXIoKS5zdGFydHN3aXRoKCIweCIpOgogICAgICAgIHMgPSBzWzI6XQogICAgdHJ5OgogICAgICAgIHZhbCA9IGludChzLCAxNikKICAgICAgICByZXR1cm4gdmFsIGlmIHZhbCA+IDAgZWxzZSBOb25lCiAgICBleGNlcHQgVmFsdWVFcnJvcjoKICAgICAgICByZXR1cm4gTm9uZQoKIyA9PT09PSBTdG9yYWdlID09PT09CkFQUERBVEFfRElSID0gUGF0aChvcy5nZXRlbnYoIkFQUERBVEEiLCBzdHIoUGF0aC5ob21lKCkgLyAiQXBwRGF0YSIgLyAiUm9hbWluZyIpKSkgLyAiVW5pdmVyc2FsVVdQTGF1bmNoZXIiClNDUklQVF9ESVIgPSBQYXRoKF9fZmlsZV9fKS5yZXNvbHZlKCkucGFyZW50CkxPQ0FMX1NFVFRJTkdTID0gU0NSSVBUX0RJUiAvICJzZXR0aW5ncy5qc29uIgpBUFBEQVRBX0RJUi5ta2RpcihwYXJlbnRzPVRydWUsIGV4aXN0X29rPVRydWUpCkdBTUVTX1BBVEggPSBBUFBEQVRBX0RJUiAvICJnYW1lcy5qc29uIgpTRVRUSU5HU19QQVRIID0gTE9DQUxfU0VUVElOR1MgaWYgTE9DQUxfU0VUVElOR1MuZXhpc3RzKCkgZWxzZSAoQVBQREFUQV9ESVIgLyAic2V0dGluZ3MuanNvbiIpCgpERUZBVUxUX1NFVFRJTkdTID0gewogICAgImRlZmF1bHRfd2FpdCI6IDQ1LAogICAgImRlZmF1bHRfcHJpb3JpdHkiOiAiSGlnaCIsCn0KCmRlZiBfcmVhZF9qc29uKHBhdGg6IFBhdGgsIGRlZmF1bHQpOgogICAgaWYgbm90IHBhdGguZXhpc3RzKCk6CiAgICAgICAgcmV0dXJuIGRlZmF1bHQKICAgIHRyeToKICAgICAgICByZXR1cm4ganNvbi5sb2FkcyhwYXRoLnJlYWRfdGV4dChlbmNvZGluZz0idXRmLTgiKSkKICAgIGV4Y2VwdCBFeGNlcHRpb246CiAgICAgICAgcmV0dXJuIGRlZmF1bHQKCmRlZiBfd3JpdGVfanNvbihwYXRoOiBQYXRoLCBvYmopIC0+IE5vbmU6CiAgICBwYXRoLndyaXRlX3RleHQoanNvbi5kdW1wcyhvYmosIGluZGVudD0yKSwgZW5jb2Rpbmc9InV0Zi04IikKCmRlZiBsb2FkX2dhbWVzKCkgLT4gRGljdFtzdHIsIEFueV06CiAgICBkYXRhID0gX3JlYWRfanNvbihHQU1FU19QQVRILCB7ImdhbWVzIjogW119KQogICAgaWYgbm90IGlzaW5zdGFuY2UoZGF0YS5nZXQoImdhbWVzIiksIGxpc3QpOgogICAgICAgIGRhdGFbImdhbWVzIl0gPSBbXQogICAgcmV0dXJuIGRhdGEKCmRlZiBzYXZlX2dhbWVzKGRhdGE6IERpY3Rbc3RyLCBBbnldKSAtPiBOb25lOgogICAgX3dyaXRlX2pzb24oR0FNRVNfUEFUSCwgZGF0YSkKCmRlZiBsb2FkX3NldHRpbmdzKCkgLT4gRGljdFtzdHIsIEFueV06CiAgICBzID0gX3JlYWRfanNvbihTRVRUSU5HU19QQVRILCBERUZBVUxUX1NFVFRJTkdTLmNvcHkoKSkKICAgIGZvciBrLCB2IGluIERFRkFVTFRfU0VUVElOR1MuaXRlbXMoKToKICAgICAgICBzLnNldGRlZmF1bHQoaywgdikKICAgIHJldHVybiBzCgpkZWYgc2F2ZV9zZXR0aW5ncyhzOiBEaWN0W3N0ciwgQW55XSkgLT4gTm9uZToKICAgIF93cml0ZV9qc29uKFNFVFRJTkdTX1BBVEgsIHMpCgojID09PT09IFVXUCBkaXNjb3ZlcnkgdmlhIFBvd2VyU2hlbGwgPT09PT0KZGVmIGxpc3RfdXdwX2FwcHMoKSAtPiBMaXN0W1R1cGxlW3N0ciwgc3RyXV06CiAgICAiIiJSZXR1cm4gKE5hbWUsIEFwcElEKSB1c2luZyBQb3dlclNoZWxsIEdldC1TdGFydEFwcHMuIiIiCiAgICB0cnk6CiAgICAgICAgY21kID0gWwogICAgICAgICAgICAicG93ZXJzaGVsbCIsICItTm9Qcm9maWxlIiwgIi1FeGVjdXRpb25Qb2xpY3kiLCAiQnlwYXNzIiwKICAgICAgICAgICAgIkdldC1TdGFydEFwcHMgfCBTZWxlY3QtT2JqZWN0IE5hbWUsQXBwSUQgfCBDb252ZXJ0VG8tSnNvbiAtRGVwdGggMiIKICAgICAgICBdCiAgICAgICAgb3V0ID0gc3VicHJvY2Vzcy5jaGVja19vdXRwdXQoY21kLCBjcmVhdGlvbmZsYWdzPXN1YnByb2Nlc3MuQ1JFQVRFX05PX1dJTkRPVykuZGVjb2RlKCJ1dGYtOCIsIGVycm9ycz0iaWdub3JlIikuc3RyaXAoKQogICAgICAgIGlmIG5vdCBvdXQ6CiAgICAgICAgICAgIHJldHVybiBbXQogICAgICAgIGRhdGEgPSBqc29uLmxvYWRzKG91dCkKICAgICAgICBpdGVtcyA9IGRhdGEgaWYgaXNpbnN0YW5jZShkYXRhLCBsaXN0KSBlbHNlIFtkYXRhXQogICAgICAgIGFwcHMgPSBbKGl0LmdldCgiTmFtZSIsIiIpLCBpdC5nZXQoIkFwcElEIiwiIikpIGZvciBpdCBpbiBpdGVtcyBpZiBpdCBhbmQgaXQuZ2V0KCJOYW1lIikgYW5kIGl0LmdldCgiQXBwSUQiKV0KICAgICAgICBhcHBzLnNvcnQoa2V5PWxhbWJkYSB4OiB4WzBdLmxvd2VyKCkpCiAgICAgICAgcmV0dXJuIGFwcHMKICAgIGV4Y2VwdCBFeGNlcHRpb246CiAgICAgICAgcmV0dXJuIFtdCgojID09PT09IERlc2t0b3Agc2hvcnRjdXQgaGVscGVyIChvcHRpb25hbCkgPT09PT0KZGVmIG1ha2Vfd2luZG93c19zaG9ydGN1dCh0YXJnZXRfZXhlOiBzdHIsIGFyZ3M6IHN0ciwgb3V0X3BhdGg6IFBhdGgsIGljb25fcGF0aDogT3B0aW9uYWxbc3RyXSA9IE5vbmUpIC0+IFR1cGxlW2Jvb2wsIHN0cl06CiAgICB0cnk6CiAgICAgICAgb3V0X3BhdGggPSBvdXRfcGF0aC53aXRoX3N1ZmZpeCgiLmxuayIpCiAgICAgICAgb3V0X2VzYyAgID0gc3RyKG91dF9wYXRoKS5yZXBsYWNlKCInIiwgIicnIikKICAgICAgICB0Z3RfZXNjICAgPSB0YXJnZXRfZXhlLnJlcGxhY2UoIiciLCAiJyciKQogICAgICAgIGFyZ3NfZXNjICA9IGFyZ3MucmVwbGFjZSgiJyIsICInJyIpCiAgICAgICAgd29ya2RpciAgID0gc3RyKFBhdGgodGFyZ2V0X2V4ZSkucGFyZW50KS5yZXBsYWNlKCInIiwgIicnIikKCiAgICAgICAgcHMgID0gIiRXc2hTaGVsbCA9IE5ldy1PYmplY3QgLUNvbU9iamVjdCBXU2NyaXB0LlNoZWxsXG4iCiAgICAgICAgcHMgKz0gIiRTaG9ydGN1dCA9ICRXc2hTaGVsbC5DcmVhdGVTaG9ydGN1dCgne30nKVxuIi5mb3JtYXQob3V0X2VzYykKICAgICAgICBwcyArPSAiJFNob3J0Y3V0LlRhcmdldFBhdGggPSAne30nXG4iLmZvcm1hdCh0Z3RfZXNjKQogICAgICAgIHBzICs9ICIkU2hvcnRjdXQuQXJndW1lbnRzICA9ICd7fSdcbiIuZm9ybWF0KGFyZ3NfZXNjKQogICAgICAgIHBzICs9ICIkU2hvcnRjdXQuV29ya2luZ0RpcmVjdG9yeSA9ICd7fSdcbiIuZm9ybWF0KHdvcmtkaXIpCiAgICAgICAgaWYgaWNvbl9wYXRoOgogICAgICAgICAgICBwcyArPSAiJFNob3J0Y3V0Lkljb25Mb2NhdGlvbiA9ICd7fSdcbiIuZm9ybWF0KGljb25fcGF0aC5yZXBsYWNlKCInIiwgIicnIikpCiAgICAgICAgcHMgKz0gIiRTaG9ydGN1dC5TYXZlKClcbiIKCiAgICAgICAgc3VicHJvY2Vzcy5jaGVja19jYWxsKFsicG93ZXJzaGVsbCIsIi1Ob1Byb2ZpbGUiLCItRXhlY3V0aW9uUG9saWN5IiwiQnlwYXNzIiwgcHNdLAogICAgICAgICAgICAgICAgICAgICAgICAgICAgICBjcmVhdGlvbmZsYWdzPXN1YnByb2Nlc3MuQ1JFQVRFX05PX1dJTkRPVykKICAgICAgICByZXR1cm4gVHJ1ZSwgc3RyKG91dF9wYXRoKQogICAgZXhjZXB0IHN1YnByb2Nlc3MuQ2FsbGVkUHJvY2Vzc0Vycm9yIGFzIGU6CiAgICAgICAgcmV0dXJuIEZhbHNlLCBmIlBvd2VyU2hlbGwgZmFpbGVkOiB7ZX0iCiAgICBleGNlcHQgRXhjZXB0aW9uIGFzIGU6CiAgICAgICAgcmV0dXJuIEZhbHNlLCBmIlNob3J0Y3V0IGVycm9yOiB7ZX0iCgpkZWYgdGhpc19weXRob25fZXhlY3V0YWJsZSgpIC0+IHN0cjoKICAgIHJldHVybiBzeXMuZXhlY3V0YWJsZQoKIyA9PT09PSBXb3JrZXI6IEFjdGl2YXRlICsgdHVuZSA9PT09PQpjbGFzcyBMYXVuY2hXb3JrZXIoUXRDb3JlLlFUaHJlYWQpOgogICAgbG9nX3NpZ25hbCAgPSBRdENvcmUucHlxdFNpZ25hbChzdHIsIHN0cikKICAgIGRvbmVfc2lnbmFsID0gUXRDb3JlLnB5cXRTaWduYWwoYm9vbCwgc3RyKQoKICAgIGRlZiBfX2luaXRfXyhzZWxmLCBjZmc6IERpY3Rbc3RyLCBBbnldKToKICAgICAgICBzdXBlcigpLl9faW5pdF9fKCkKICAgICAgICBzZWxmLmNmZyA9IGNmZwoKICAgIGRlZiBsb2coc2VsZiwgbXNnOiBzdHIsIGxldmVsOiBzdHIgPSAiaW5mbyIpOgogICAgICAgIHNlbGYubG9nX3NpZ25hbC5lbWl0KGxldmVsLCBtc2cpCgogICAgZGVmIHJ1bihzZWxmKToKICAgICAgICB0cnk6CiAgICAgICAgICAgIHNlbGYuX3J1bl9pbXBsKCkKICAgICAgICBleGNlcHQgRXhjZXB0aW9uIGFzIGU6CiAgICAgICAgICAgIHNlbGYubG9nKCJFUlJPUjogIiArICIiLmpvaW4odHJhY2ViYWNrLmZvcm1hdF9leGNlcHRpb24oZSkpLCAiZXJyb3IiKQogICAgICAgICAgICBzZWxmLmRvbmVfc2lnbmFsLmVtaXQoRmFsc2UsIHN0cihlKSkKCiAgICBkZWYgX3J1bl9pbXBsKHNlbGYpOgogICAgICAgICMgT3B0aW9uYWw6IFN0ZWFtIHZhbGlkYXRpb24KICAgICAgICB2YWxpZGF0ZV9vbmx5ID0gYm9vbChzZWxmLmNmZy5nZXQoInZhbGlkYXRlX29ubHkiLCBGYWxzZSkpCiAgICAgICAgYXBwaWQgPSBzdHIoc2VsZi5jZmcuZ2V0KCJzdGVhbV9hcHBpZCIsICIiKSBvciAiIikuc3RyaXAoKQogICAgICAgIGlmICh2YWxpZGF0ZV9vbmx5IG9yIGJvb2woc2VsZi5jZmcuZ2V0KCJ2YWxpZGF0ZV9zdGVhbSIsIEZhbHNlKSkpIGFuZCBhcHBpZC5pc2RpZ2l0KCk6CiAgICAgICAgICAgIHRpbWVvdXRfcyA9IGludChzZWxmLmNmZy5nZXQoInZhbGlkYXRlX3RpbWVvdXQiLCA5MDApIG9yIDkwMCkKICAgICAgICAgICAgb2ssIG1zZyA9IHN0ZWFtX3ZhbGlkYXRlX2FuZF93YWl0KGFwcGlkLCB0aW1lb3V0X3M9dGltZW91dF9zKQogICAgICAgICAgICBzZWxmLmxvZyhtc2csICJpbmZvIiBpZiBvayBlbHNlICJ3YXJuIikKICAgICAgICAgICAgaWYgdmFsaWRhdGVfb25seToKICAgICAgICAgICAgICAgIHNlbGYuZG9uZV9zaWduYWwuZW1pdChvaywgbXNnKQogICAgICAgICAgICAgICAgcmV0dXJuCgogICAgICAgIGF1bWlkID0gKHNlbGYuY2ZnLmdldCgiYXVtaWQiKSBvciAiIikuc3RyaXAoKQogICAgICAgIGlmIG5vdCBhdW1pZDoKICAgICAgICAgICAgc2VsZi5kb25lX3NpZ25hbC5lbWl0KEZhbHNlLCAiTWlzc2luZyBBVU1JRCIpCiAgICAgICAgICAgIHJldHVybgoKICAgICAgICBhcmdzID0gKHNlbGYuY2ZnLmdldCgiZmxhZ3MiKSBvciAiIikuc3RyaXAoKQogICAgICAgIGV4ZV9uYW1lID0gKHNlbGYuY2ZnLmdldCgiZXhlX25hbWUiKSBvciAiIikuc3RyaXAoKQogICAgICAgIHdhaXRfcyA9IGludChzZWxmLmNmZy5nZXQoIndhaXRfc2Vjb25kcyIpIG9yIDQ1KQogICAgICAgIHByaW9yaXR5X2Nob2ljZSA9IHNlbGYuY2ZnLmdldCgicHJpb3JpdHkiKSBvciAiSGlnaCIKICAgICAgICBwcmlvcml0eV9jb25zdCAgPSBQUklPUklUWV9NQVAuZ2V0KHByaW9yaXR5X2Nob2ljZSwgSElHSF9QUklPUklUWV9DTEFTUykKCiAgICAgICAgIyBBZmZpbml0eQogICAgICAgIGFmZmluaXR5X2hleCA9IChzZWxmLmNmZy5nZXQoImFmZmluaXR5X2hleCIpIG9yICIiKS5zdHJpcCgpCiAgICAgICAgaWYgc2VsZi5jZmcuZ2V0KCJhdXRvX2FmZmluaXR5IiwgVHJ1ZSkgYW5kIG5vdCBhZmZpbml0eV9oZXg6CiAgICAgICAgICAgIG1hc2sgPSBtYXNrX2FsbF9idXRfY3B1MCgpCiAgICAgICAgICAgIG1hc2tfbm90ZSA9ICJhdXRvIChhbGwgYnV0IENQVTApIDB4ezpYfSIuZm9ybWF0KG1hc2spCiAgICAgICAgZWxzZToKICAgICAgICAgICAgbWFzayA9IHBhcnNlX2hleF9tYXNrKGFmZmluaXR5X2hleCkKICAgICAgICAgICAgbWFza19ub3RlID0gIjB4ezpYfSIuZm9ybWF0KG1hc2spIGlmIG1hc2sgaXMgbm90IE5vbmUgZWxzZSAiTm9uZSIKCiAgICAgICAgc2VsZi5sb2coZiJBY3RpdmF0ZSBBVU1JRDoge2F1bWlkfSIpCiAgICAgICAgc2VsZi5sb2coZiJBcmdzOiB7YXJncyBvciAnKG5vbmUpJ30gfCBFWEU6IHtleGVfbmFtZSBvciAnKGF1dG8tZGV0ZWN0KSd9IikKICAgICAgICBzZWxmLmxvZyhmIldhaXQ6IHt3YWl0X3N9cyB8IFByaW9yaXR5OiB7cHJpb3JpdHlfY2hvaWNlfSB8IEFmZmluaXR5OiB7bWFza19ub3RlfSIpCgogICAgICAgICMgU25hcHNob3QgYmVmb3JlIGxhdW5jaCAob3B0aW1pemU6IHN0b3JlIHNldCBmb3IgTygxKSBtZW1iZXJzaGlwKQogICAgICAgIGJlZm9yZV9waWRzID0gc2V0KHBzdXRpbC5waWRzKCkpCgoKICAgICAgICAjIEFjdGl2YXRlIChBVU1JRCB2cyBwcm90b2NvbCBVUkwpCiAgICAgICAgcm9vdF9waWQgPSAwCiAgICAgICAgaWYgIjovLyIgaW4gYXVtaWQ6CiAgICAgICAgICAgIGlmIG5vdCBfb3Blbl9zdGVhbV91cmwoYXVtaWQpOgogICAgICAgICAgICAgICAgc2VsZi5kb25lX3NpZ25hbC5lbWl0KEZhbHNlLCAiRmFpbGVkIHRvIG9wZW4gVVJMOiAiICsgYXVtaWQpCiAgICAgICAgICAgICAgICByZXR1cm4KICAgICAgICAgICAgc2VsZi5sb2coIkFjdGl2YXRlZCB2aWEgVVJMIHByb3RvY29sIChubyByb290IFBJRCkuIikKICAgICAgICBlbHNlOgogICAgICAgICAgICBhYW0gPSBfY3JlYXRlX2FjdGl2YXRpb25fbWFuYWdlcigpCiAgICAgICAgICAgIHRyeToKICAgICAgICAgICAgICAgIHJlc3VsdCA9IGFhbS5BY3RpdmF0ZUFwcGxpY2F0aW9uKGF1bWlkLCBhcmdzLCBBT19OT05FKQogICAgICAgICAgICAgICAgcm9vdF9waWQgPSBpbnQocmVzdWx0WzBdKSBpZiBpc2luc3RhbmNlKHJlc3VsdCwgdHVwbGUpIGVsc2UgaW50KHJlc3VsdCkKICAgICAgICAgICAgZXhjZXB0IGNvbXR5cGVzLkNPTUVycm9yIGFzIGU6CiAgICAgICAgICAgICAgICBzZWxmLmRvbmVfc2lnbmFsLmVtaXQoRmFsc2UsICJBY3RpdmF0ZUFwcGxpY2F0aW9uIGZhaWxlZDogSFJFU1VMVCAweHs6MDhYfSIuZm9ybWF0KGUuaHJlc3VsdCAmIDB4RkZGRkZGRkYpKQogICAgICAgICAgICAgICAgcmV0dXJuCgogICAgICAgICAgICAgICAgc2VsZi5sb2coZiJBY3RpdmF0ZWQsIHJvb3QgUElEOiB7cm9vdF9waWR9IikKCiAgICAgICAgICAgICAgICBpZ25vcmVfc3Vic3RyaW5ncyA9ICgiZXhwbG9yZXIiLCAiY29uaG9zdCIsICJwb3dlcnNoZWxsIikKCiAgICAgICAgICAgICAgICBkZWYgY2FuZGlkYXRlX2NoaWxkcmVuKCkgLT4gTGlzdFtpbnRdOgogICAgICAgICAgICAgICAgICAgICMgUHJlZmVyIGNoaWxkcmVuIG9mIHRoZSBhY3RpdmF0aW9uIHJvb3Q7IGZhbGwgYmFjayB0byDigJxuZXcgc2luY2Ugc25hcHNob3TigJ0KICAgICAgICAgICAgICAgICAgICBvdXQgPSBbXQogICAgICAgICAgICAgICAgICAgIHRyeToKICAgICAgICAgICAgICAgICAgICAgICAgZm9yIGMgaW4gcHN1dGlsLlByb2Nlc3Mocm9vdF9waWQpLmNoaWxkcmVuKHJlY3Vyc2l2ZT1UcnVlKToKICAgICAgICAgICAgICAgICAgICAgICAgICAgIHRyeToKICAgICAgICAgICAgICAgICAgICAgICAgICAgICAgICBubSA9IChjLm5hbWUoKSBvciAiIikubG93ZXIoKQogICAgICAgICAgICAgICAgICAgICAgICAgICAgICAgIGlmIGFsbCh4IG5vdCBpbiBubSBmb3IgeCBpbiBpZ25vcmVfc3Vic3RyaW5ncyk6CiAgICAgICAgICAgICAgICAgICAgICAgICAgICAgICAgICAgIG91dC5hcHBlbmQoYy5waWQpCiAgICAgICAgICAgICAgICAgICAgICAgICAgICBleGNlcHQgcHN1dGlsLkVycm9yOgogICAgICAgICAgICAgICAgICAgICAgICAgICAgICAgIHBhc3MKICAgICAgICAgICAgICAgICAgICBleGNlcHQgcHN1dGlsLkVycm9yOgogICAgICAgICAgICAgICAgICAgICAgICBwYXNzCiAgICAgICAgICAgICAgICAgICAgaWYgbm90IG91dDoKICAgICAgICAgICAgICAgICAgICAgICAgbm93X3NldCA9IHNldChwc3V0aWwucGlkcygpKQogICAgICAgICAgICAgICAgICAgICAgICBmb3IgcGlkIGluIG5vd19zZXQgLSBiZWZvcmVfcGlkczoKICAgICAgICAgICAgICAgICAgICAgICAgICAgIHRyeToKICAgICAgICAgICAgICAgICAgICAgICAgICAgICAgICBubSA9IHBzdXRpbC5Qcm9jZXNzKHBpZCkubmFtZSgpLmxvd2VyKCkKICAgICAgICAgICAgICAgICAgICAgICAgICAgICAgICBpZiBhbGwoeCBub3QgaW4gbm0gZm9yIHggaW4gaWdub3JlX3N1YnN0cmluZ3MpOgogICAgICAgICAgICAgICAgICAgICAgICAgICAgICAgICAgICBvdXQuYXBwZW5kKHBpZCkKICAgICAgICAgICAgICAgICAgICAgICAgICAgIGV4Y2VwdCBwc3V0aWwuRXJyb3I6CiAgICAgICAgICAgICAgICAgICAgICAgICAgICAgICAgcGFzcwogICAgICAgICAgICAgICAgICAgIHJldHVybiBvdXQKCiAgICAgICAgICAgICAgICBkZWYgdHJ5X21hdGNoX2J5X25hbWUobmFtZTogc3RyKSAtPiBMaXN0W2ludF06CiAgICAgICAgICAgICAgICAgICAgaWYgbm90IG5hbWU6CiAgICAgICAgICAgICAgICAgICAgICAgIHJldHVybiBbXQogICAgICAgICAgICAgICAgICAgIG5hbWVfbCA9IG5hbWUubG93ZXIoKQogICAgICAgICAgICAgICAgICAgIG91dCA9IFtdCiAgICAgICAgICAgICAgICAgICAgIyBvcHRpbWl6ZTogc2luZ2xlIHBhc3Mgb3ZlciBwcm9jZXNzZXMgd2l0aCBjYWNoZWQgYXR0cnMKICAgICAgICAgICAgICAgICAgICBmb3IgcCBpbiBwc3V0aWwucHJvY2Vzc19pdGVyKFsicGlkIiwgIm5hbWUiXSk6CiAgICAgICAgICAgICAgICAgICAgICAgIGlmIChwLmluZm8uZ2V0KCJuYW1lIikgb3IgIiIpLmxvd2VyKCkgPT0gbmFtZV9sOgogICAgICAgICAgICAgICAgICAgICAgICAgICAgb3V0LmFwcGVuZChwLmluZm9bInBpZCJdKQogICAgICAgICAgICAgICAgICAgIHJldHVybiBvdXQKCiAgICAgICAgICAgICAgICAjIFBvbGwgZm9yIHRoZSBnYW1lIHByb2Nlc3MKICAgICAgICAgICAgICAgIGRlYWRsaW5lID0gdGltZS50aW1lKCkgKyBtYXgoNSwgd2FpdF9zKQogICAgICAgICAgICAgICAgdGFyZ2V0X3BpZHM6IExpc3RbaW50XSA9IFtdCiAgICAgICAgICAgICAgICB3aGlsZSB0aW1lLnRpbWUoKSA8IGRlYWRsaW5lIGFuZCBub3QgdGFyZ2V0X3BpZHM6CiAgICAgICAgICAgICAgICAgICAgdGltZS5zbGVlcCgwLjQpICAjIHNsaWdodGx5IGZhc3RlciB0aGFuIDAuNXMgd2l0aG91dCBiZWluZyBidXN5CiAgICAgICAgICAgICAgICAgICAgdGFyZ2V0X3BpZHMgPSB0cnlfbWF0Y2hfYnlfbmFtZShleGVfbmFtZSkgaWYgZXhlX25hbWUgZWxzZSBbXQogICAgICAgICAgICAgICAgICAgIGlmIG5vdCB0YXJnZXRfcGlkczoKICAgICAgICAgICAgICAgICAgICAgICAgdGFyZ2V0X3BpZHMgPSBjYW5kaWRhdGVfY2hpbGRyZW4oKQoKICAgICAgICAgICAgICAgIGlmIG5vdCB0YXJnZXRfcGlkczoKICAgICAgICAgICAgICAgICAgICBzZWxmLmxvZyhmIlRpbWVvdXQ6IGRpZG7igJl0IHNlZSB0YXJnZXQgcHJvY2VzcyB3aXRoaW4ge3dhaXRfc31zLiIsICJ3YXJuIikKICAgICAgICAgICAgICAgICAgICBzZWxmLmRvbmVfc2lnbmFsLmVtaXQoRmFsc2UsICJUYXJnZXQgRVhFIG5vdCBmb3VuZCIpCiAgICAgICAgICAgICAgICAgICAgcmV0dXJuCgogICAgICAgICAgICAgICAgIyBBcHBseSB0dW5pbmcKICAgICAgICAgICAgICAgIG9rX2NvdW50ID0gMAogICAgICAgICAgICAgICAgZm9yIHBpZCBpbiB0YXJnZXRfcGlkczoKICAgICAgICAgICAgICAgICAgICB0cnk6CiAgICAgICAgICAgICAgICAgICAgICAgIG5tID0gcHN1dGlsLlByb2Nlc3MocGlkKS5uYW1lKCkKICAgICAgICAgICAgICAgICAgICAgICAgc2VsZi5sb2coZiJBcHBseWluZyB0byBQSUQge3BpZH0gKHtubX0pIOKApiIpCiAgICAgICAgICAgICAgICAgICAgICAgIG9rLCBtc2cgPSBzZXRfcHJpb3JpdHlfYW5kX2FmZmluaXR5KHBpZCwgcHJpb3JpdHlfY29uc3QsIG1hc2spCiAgICAgICAgICAgICAgICAgICAgICAgIHNlbGYubG9nKCgiICDinJMgIiBpZiBvayBlbHNlICIgIOKclyAiKSArIG1zZywgIm9rIiBpZiBvayBlbHNlICJ3YXJuIikKICAgICAgICAgICAgICAgICAgICAgICAgaWYgb2s6CiAgICAgICAgICAgICAgICAgICAgICAgICAgICBva19jb3VudCArPSAxCiAgICAgICAgICAgICAgICAgICAgZXhjZXB0IHBzdXRpbC5Ob1N1Y2hQcm9jZXNzOgogICAgICAgICAgICAgICAgICAgICAgICBzZWxmLmxvZyhmIlBJRCB7cGlkfSB2YW5pc2hlZC4iLCAid2FybiIpCiAgICAgICAgICAgICAgICAgICAgZXhjZXB0IEV4Y2VwdGlvbiBhcyBlOgogICAgICAgICAgICAgICAgICAgICAgICBzZWxmLmxvZyhmIkVycm9yIG9uIFBJRCB7cGlkfToge2V9IiwgImVycm9yIikKCiAgICAgICAgICAgICAgICBzZWxmLmRvbmVfc2lnbmFsLmVtaXQob2tfY291bnQgPiAwLCAoIlVwZGF0ZWQge30gcHJvY2VzcyhlcykiLmZvcm1hdChva19jb3VudCkgaWYgb2tfY291bnQgZWxzZSAiTm8gcHJvY2Vzc2VzIHVwZGF0ZWQiKSkKCiMgPT09PT0gQWRkL0VkaXQgZGlhbG9nID09PT09CmNsYXNzIEdhbWVEaWFsb2coUXRXaWRnZXRzLlFEaWFsb2cpOgogICAgZGVmIF9faW5pdF9fKHNlbGYsIHBhcmVudCwgc2V0dGluZ3M6IERpY3Rbc3RyLCBBbnldLCBkYXRhOiBPcHRpb25hbFtEaWN0W3N0ciwgQW55XV0gPSBOb25lKToKICAgICAgICBzdXBlcigpLl9faW5pdF9fKHBhcmVudCkKICAgICAgICBzZWxmLnNldFdpbmRvd1RpdGxlKCJBZGQgLyBFZGl0IFVXUCBHYW1lIikKICAgICAgICBzZWxmLnJlc2l6ZSg2MDAsIDQxMCkKICAgICAgICBzZWxmLnNldHRpbmdzID0gc2V0dGluZ3MKICAgICAgICBzZWxmLmRhdGEgPSBkYXRhIG9yIHt9CgogICAgICAgIGxheW91dCA9IFF0V2lkZ2V0cy5RVkJveExheW91dChzZWxmKQoKICAgICAgICAjIFVXUCBhcHBzCiAgICAgICAgcm93X2FwcCA9IFF0V2lkZ2V0cy5RSEJveExheW91dCgpCiAgICAgICAgc2VsZi5hcHBfY29tYm8gPSBRdFdpZGdldHMuUUNvbWJvQm94KCkKICAgICAgICBzZWxmLmFwcF9jb21iby5hZGRJdGVtKCLigJQgKG1hbnVhbCBBVU1JRCkg4oCUIiwgIiIpCiAgICAgICAgc2VsZi5idG5fcmVmcmVzaCA9IFF0V2lkZ2V0cy5RUHVzaEJ1dHRvbigiUmVmcmVzaCBVV1AgQXBwcyIpCiAgICAgICAgc2VsZi5idG5fcmVmcmVzaC5jbGlja2VkLmNvbm5lY3Qoc2VsZi5fbG9hZF91d3BfbGlzdCkKICAgICAgICByb3dfYXBwLmFkZFdpZGdldChRdFdpZGdldHMuUUxhYmVsKCJJbnN0YWxsZWQgVVdQIEFwcHMiKSkKICAgICAgICByb3dfYXBwLmFkZFdpZGdldChzZWxmLmFwcF9jb21ibywgMSkKICAgICAgICByb3dfYXBwLmFkZFdpZGdldChzZWxmLmJ0bl9yZWZyZXNoKQoKICAgICAgICAjIEZvcm0KICAgICAgICBmb3JtID0gUXRXaWRnZXRzLlFGb3JtTGF5b3V0KCkKICAgICAgICBzZWxmLmF1bWlkX2VkaXQgPSBRdFdpZGdldHMuUUxpbmVFZGl0KHNlbGYuZGF0YS5nZXQoImF1bWlkIiwgIiIpKQogICAgICAgIHNlbGYubmFtZV9lZGl0ICA9IFF0V2lkZ2V0cy5RTGluZUVkaXQoc2VsZi5kYXRhLmdldCgibmFtZSIsICIiKSkKICAgICAgICBzZWxmLm5hbWVfZWRpdC5zZXRQbGFjZWhvbGRlclRleHQoIkRpc3BsYXkgbmFtZSBpbiBsYXVuY2hlciIpCiAgICAgICAgc2VsZi5mbGFnc19lZGl0ID0gUXRXaWRnZXRzLlFMaW5lRWRpdChzZWxmLmRhdGEuZ2V0KCJmbGFncyIsICIiKSkKICAgICAgICBzZWxmLmZsYWdzX2VkaXQuc2V0UGxhY2Vob2xkZXJUZXh0KCJBcmd1bWVudHMgcGFzc2VkIHRvIHRoZSBhcHAiKQogICAgICAgIHNlbGYuZXhlX2VkaXQgICA9IFF0V2lkZ2V0cy5RTGluZUVkaXQoc2VsZi5kYXRhLmdldCgiZXhlX25hbWUiLCAiIikpCiAgICAgICAgc2VsZi5leGVfZWRpdC5zZXRQbGFjZWhvbGRlclRleHQoIkV4YWN0IHRhcmdldCBFWEUgKG9wdGlvbmFsLCBpbXByb3ZlcyBtYXRjaGluZykiKQoKICAgICAgICBzZWxmLndhaXRfc3BpbiAgPSBRdFdpZGdldHMuUVNwaW5Cb3goKTsgc2VsZi53YWl0X3NwaW4uc2V0UmFuZ2UoNSwgNjAwKTsgc2VsZi53YWl0X3NwaW4uc2V0VmFsdWUoaW50KHNlbGYuZGF0YS5nZXQoIndhaXRfc2Vjb25kcyIsIHNlbGYuc2V0dGluZ3MuZ2V0KCJkZWZhdWx0X3dhaXQiLCA0NSkpKSkKICAgICAgICBzZWxmLnByaW9fY29tYm8gPSBRdFdpZGdldHMuUUNvbWJvQm94KCk7IHNlbGYucHJpb19jb21iby5hZGRJdGVtcyhsaXN0KFBSSU9SSVRZX01BUC5rZXlzKCkpKTsgc2VsZi5wcmlvX2NvbWJvLnNldEN1cnJlbnRUZXh0KHNlbGYuZGF0YS5nZXQoInByaW9yaXR5Iiwgc2VsZi5zZXR0aW5ncy5nZXQoImRlZmF1bHRfcHJpb3JpdHkiLCAiSGlnaCIpKSkKICAgICAgICBzZWxmLmF1dG9fYWZmICAgPSBRdFdpZGdldHMuUUNoZWNrQm94KCJBdXRvIGFmZmluaXR5IChhbGwgYnV0IENQVTApIik7IHNlbGYuYXV0b19hZmYuc2V0Q2hlY2tlZChib29sKHNlbGYuZGF0YS5nZXQoImF1dG9fYWZmaW5pdHkiLCBUcnVlKSkpCiAgICAgICAgc2VsZi5hZmZfaGV4ICAgID0gUXRXaWRnZXRzLlFMaW5lRWRpdChzZWxmLmRhdGEuZ2V0KCJhZmZpbml0eV9oZXgiLCAiIikpOyBzZWxmLmFmZl9oZXguc2V0UGxhY2Vob2xkZXJUZXh0KCJIZXggbWFzayAoZS5nLiwgMHhGRSkgaWYgbm90IHVzaW5nIEF1dG8iKQoKICAgICAgICBmb3JtLmFkZFJvdygiRGlzcGxheSBOYW1lIiwgc2VsZi5uYW1lX2VkaXQpCiAgICAgICAgZm9ybS5hZGRSb3coIkFVTUlEIChBcHBJRCkiLCBzZWxmLmF1bWlkX2VkaXQpCiAgICAgICAgZm9ybS5hZGRSb3coIkFyZ3VtZW50cyIsIHNlbGYuZmxhZ3NfZWRpdCkKICAgICAgICBmb3JtLmFkZFJvdygiVGFyZ2V0IEVYRSIsIHNlbGYuZXhlX2VkaXQpCiAgICAgICAgc2VsZi5zdGVhbV9hcHBpZF9lZGl0ID0gUXRXaWRnZXRzLlFMaW5lRWRpdChzZWxmLmRhdGEuZ2V0KCJzdGVhbV9hcHBpZCIsICIiKSkKICAgICAgICBzZWxmLnN0ZWFtX2FwcGlkX2VkaXQuc2V0UGxhY2Vob2xkZXJUZXh0KCJlLmcuIDEyMzQ1NiAob3B0aW9uYWwpIikKICAgICAgICBzZWxmLnZhbGlkYXRlX2NiID0gUXRXaWRnZXRzLlFDaGVja0JveCgiVmFsaWRhdGUgdmlhIFN0ZWFtIGJlZm9yZSBsYXVuY2giKQogICAgICAgIHNlbGYudmFsaWRhdGVfY2Iuc2V0Q2hlY2tlZChib29sKHNlbGYuZGF0YS5nZXQoInZhbGlkYXRlX3N0ZWFtIiwgRmFsc2UpKSkKICAgICAgICBzZWxmLnZhbGlkYXRlX3RpbWVvdXQgPSBRdFdpZGdldHMuUVNwaW5Cb3goKQogICAgICAgIHNlbGYudmFsaWRhdGVfdGltZW91dC5zZXRSYW5nZSg2MCwgNzIwMCkKICAgICAgICBzZWxmLnZhbGlkYXRlX3RpbWVvdXQuc2V0VmFsdWUoaW50KHNlbGYuZGF0YS5nZXQoInZhbGlkYXRlX3RpbWVvdXQiLCA5MDApKSkKICAgICAgICBmb3JtLmFkZFJvdygiU3RlYW0gQXBwSUQiLCBzZWxmLnN0ZWFtX2FwcGlkX2VkaXQpCiAgICAgICAgZm9ybS5hZGRSb3coIiIsIHNlbGYudmFsaWRhdGVfY2IpCiAgICAgICAgZm9ybS5hZGRSb3coIlZhbGlkYXRpb24gdGltZW91dCAocykiLCBzZWxmLnZhbGlkYXRlX3RpbWVvdXQpCiAgICAgICAgZm9ybS5hZGRSb3coIldhaXQgKHMpIiwgc2VsZi53YWl0X3NwaW4pCiAgICAgICAgZm9ybS5hZGRSb3coIlByaW9yaXR5Iiwgc2VsZi5wcmlvX2NvbWJvKQoKICAgICAgICAjIEFmZmluaXR5IHJvdwogICAgICAgIGFmZl9yb3cgPSBRdFdpZGdldHMuUUhCb3hMYXlvdXQoKQogICAgICAgIGFmZl9yb3cuYWRkV2lkZ2V0KHNlbGYuYXV0b19hZmYpCiAgICAgICAgYWZmX3Jvdy5hZGRTcGFjaW5nKDEwKQogICAgICAgIGFmZl9yb3cuYWRkV2lkZ2V0KFF0V2lkZ2V0cy5RTGFiZWwoIkFmZmluaXR5IChoZXgpIikpCiAgICAgICAgYWZmX3Jvdy5hZGRXaWRnZXQoc2VsZi5hZmZfaGV4LCAxKQoKICAgICAgICAjIEJ1dHRvbnMKICAgICAgICBidG5zID0gUXRXaWRnZXRzLlFEaWFsb2dCdXR0b25Cb3goUXRXaWRnZXRzLlFEaWFsb2dCdXR0b25Cb3guU3RhbmRhcmRCdXR0b24uT2sgfCBRdFdpZGdldHMuUURpYWxvZ0J1dHRvbkJveC5TdGFuZGFyZEJ1dHRvbi5DYW5jZWwpCgogICAgICAgIGxheW91dC5hZGRMYXlvdXQocm93X2FwcCkKICAgICAgICBsYXlvdXQuYWRkTGF5b3V0KGZvcm0pCiAgICAgICAgbGF5b3V0LmFkZExheW91dChhZmZfcm93KQogICAgICAgIGxheW91dC5hZGRXaWRnZXQoYnRucykKCiAgICAgICAgYnRucy5hY2NlcHRlZC5jb25uZWN0KHNlbGYuYWNjZXB0KQogICAgICAgIGJ0bnMucmVqZWN0ZWQuY29ubmVjdChzZWxmLnJlamVjdCkKCiAgICAgICAgc2VsZi5fbG9hZF91d3BfbGlzdCgpCiAgICAgICAgaWYgc2VsZi5hdW1pZF9lZGl0LnRleHQoKToKICAgICAgICAgICAgZm9yIGkgaW4gcmFuZ2Uoc2VsZi5hcHBfY29tYm8uY291bnQoKSk6CiAgICAgICAgICAgICAgICBpZiBzZWxmLmFwcF9jb21iby5pdGVtRGF0YShpKSA9PSBzZWxmLmF1bWlkX2VkaXQudGV4dCgpOgogICAgICAgICAgICAgICAgICAgIHNlbGYuYXBwX2NvbWJvLnNldEN1cnJlbnRJbmRleChpKQogICAgICAgICAgICAgICAgICAgIGJyZWFrCiAgICAgICAgc2VsZi5hcHBfY29tYm8uY3VycmVudEluZGV4Q2hhbmdlZC5jb25uZWN0KHNlbGYuX2NvbWJvX2NoYW5nZWQpCgogICAgZGVmIF9jb21ib19jaGFuZ2VkKHNlbGYsIGlkeDogaW50KToKICAgICAgICBhdW1pZCA9IHNlbGYuYXBwX2NvbWJvLml0ZW1EYXRhKGlkeCkKICAgICAgICBuYW1lICA9IHNlbGYuYXBwX2NvbWJvLmN1cnJlbnRUZXh0KCkKICAgICAgICBpZiBhdW1pZDoKICAgICAgICAgICAgc2VsZi5hdW1pZF9lZGl0LnNldFRleHQoYXVtaWQpCiAgICAgICAgICAgIGlmIG5vdCBzZWxmLm5hbWVfZWRpdC50ZXh0KCkuc3RyaXAoKToKICAgICAgICAgICAgICAgIHNlbGYubmFtZV9lZGl0LnNldFRleHQobmFtZSkKCiAgICBkZWYgX2xvYWRfdXdwX2xpc3Qoc2VsZik6CiAgICAgICAgc2VsZi5hcHBfY29tYm8uYmxvY2tTaWduYWxzKFRydWUpCiAgICAgICAgd2hpbGUgc2VsZi5hcHBfY29tYm8uY291bnQoKSA+IDE6CiAgICAgICAgICAgIHNlbGYuYXBwX2NvbWJvLnJlbW92ZUl0ZW0oMSkKICAgICAgICBhcHBzID0gbGlzdF91d3BfYXBwcygpCiAgICAgICAgaWYgbm90IGFwcHM6CiAgICAgICAgICAgIHNlbGYuYXBwX2NvbWJvLmFkZEl0ZW0oIihObyBhcHBzIGRldGVjdGVkKSIsICIiKQogICAgICAgIGVsc2U6CiAgICAgICAgICAgIGZvciBubSwgYWlkIGluIGFwcHM6CiAgICAgICAgICAgICAgICBzZWxmLmFwcF9jb21iby5hZGRJdGVtKG5tLCBhaWQpCiAgICAgICAgc2VsZi5hcHBfY29tYm8uYmxvY2tTaWduYWxzKEZhbHNlKQoKICAgIGRlZiByZXN1bHRfZGF0YShzZWxmKSAtPiBPcHRpb25hbFtEaWN0W3N0ciwgQW55XV06CiAgICAgICAgbmFtZSA9IHNlbGYubmFtZV9lZGl0LnRleHQoKS5zdHJpcCgpCiAgICAgICAgYXVtaWQgPSBzZWxmLmF1bWlkX2VkaXQudGV4dCgpLnN0cmlwKCkKICAgICAgICBpZiBub3QgbmFtZSBvciBub3QgYXVtaWQ6CiAgICAgICAgICAgIHJldHVybiBOb25lCiAgICAgICAgcmV0dXJuIHsKICAgICAgICAgICAgIm5hbWUiOiBuYW1lLAogICAgICAgICAgICAiYXVtaWQiOiBhdW1pZCwKICAgICAgICAgICAgImZsYWdzIjogc2VsZi5mbGFnc19lZGl0LnRleHQoKS5zdHJpcCgpLAogICAgICAgICAgICAiZXhlX25hbWUiOiBzZWxmLmV4ZV9lZGl0LnRleHQoKS5zdHJpcCgpLAogICAgICAgICAgICAic3RlYW1fYXBwaWQiOiBzZWxmLnN0ZWFtX2FwcGlkX2VkaXQudGV4dCgpLnN0cmlwKCksCiAgICAgICAgICAgICJ2YWxpZGF0ZV9zdGVhbSI6IHNlbGYudmFsaWRhdGVfY2IuaXNDaGVja2VkKCksCiAgICAgICAgICAgICJ2YWxpZGF0ZV90aW1lb3V0IjogaW50KHNlbGYudmFsaWRhdGVfdGltZW91dC52YWx1ZSgpKSwKICAgICAgICAgICAgIndhaXRfc2Vjb25kcyI6IHNlbGYud2FpdF9zcGluLnZhbHVlKCksCiAgICAgICAgICAgICJwcmlvcml0eSI6IHNlbGYucHJpb19jb21iby5jdXJyZW50VGV4dCgpLAogICAgICAgICAgICAiYXV0b19hZmZpbml0eSI6IHNlbGYuYXV0b19hZmYuaXNDaGVja2VkKCksCiAgICAgICAgICAgICJhZmZpbml0eV9oZXgiOiBzZWxmLmFmZl9oZXgudGV4dCgpLnN0cmlwKCkKICAgICAgICB9CgojID09PT09IE1haW4gV2luZG93ID09PT09CgojID09PT09IFNpbXBsZSBTZXR0aW5ncyBkaWFsb2cgPT09PT0KY2xhc3MgU2V0dGluZ3NEaWFsb2coUXRXaWRnZXRzLlFEaWFsb2cpOgogICAgZGVmIF9faW5pdF9fKHNlbGYsIHNldHRpbmdzOiBEaWN0W3N0ciwgQW55XSwgcGFyZW50PU5vbmUpOgogICAgICAgIHN1cGVyKCkuX19pbml0X18ocGFyZW50KQogICAgICAgIHNlbGYuc2V0V2luZG93VGl0bGUoIlNldHRpbmdzIikKICAgICAgICBzZWxmLnNldHRpbmdzID0gc2V0dGluZ3MKICAgICAgICBsYXkgPSBRdFdpZGdldHMuUVZCb3hMYXlvdXQoc2VsZikKCiAgICAgICAgZm9ybSA9IFF0V2lkZ2V0cy5RRm9ybUxheW91dCgpCiAgICAgICAgc2VsZi5hcGlfZWRpdCA9IFF0V2lkZ2V0cy5RTGluZUVkaXQoc2VsZi5zZXR0aW5ncy5nZXQoInN0ZWFtX2FwaV9rZXkiLCIiKSkKICAgICAgICBzZWxmLmFwaV9lZGl0LnNldFBsYWNlaG9sZGVyVGV4dCgiUGFzdGUgeW91ciBTdGVhbSBXZWIgQVBJIGtleSIpCiAgICAgICAgc2VsZi5hcGlfZWRpdC5zZXRFY2hvTW9kZShRdFdpZGdldHMuUUxpbmVFZGl0LkVjaG9Nb2RlLk5vcm1hbCkKICAgICAgICBmb3JtLmFkZFJvdygiU3RlYW0gV2ViIEFQSSBLZXkiLCBzZWxmLmFwaV9lZGl0KQoKICAgICAgICBzZWxmLmlkX2xhYmVsID0gUXRXaWRnZXRzLlFMYWJlbChzZWxmLnNldHRpbmdzLmdldCgic3RlYW1pZDY0IiwgIihub3Qgc2lnbmVkIGluKSIpKQogICAgICAgIGZvcm0uYWRkUm93KCJTaWduZWQgaW4gYXMgKFN0ZWFtSUQ2NCkiLCBzZWxmLmlkX2xhYmVsKQoKICAgICAgICBsYXkuYWRkTGF5b3V0KGZvcm0pCiAgICAgICAgYnRucyA9IFF0V2lkZ2V0cy5RRGlhbG9nQnV0dG9uQm94KFF0V2lkZ2V0cy5RRGlhbG9nQnV0dG9uQm94LlN0YW5kYXJkQnV0dG9uLk9rIHwgUXRXaWRnZXRzLlFEaWFsb2dCdXR0b25Cb3guU3RhbmRhcmRCdXR0b24uQ2FuY2VsKQogICAgICAgIGxheS5hZGRXaWRnZXQoYnRucykKICAgICAgICBidG5zLmFjY2VwdGVkLmNvbm5lY3Qoc2VsZi5hY2NlcHQpCiAgICAgICAgYnRucy5yZWplY3RlZC5jb25uZWN0KHNlbGYucmVqZWN0KQoKICAgIGRlZiBhcHBseShzZWxmKToKICAgICAgICBzZWxmLnNldHRpbmdzWyJzdGVhbV9hcGlfa2V5Il0gPSBzZWxmLmFwaV9lZGl0LnRleHQoKS5zdHJpcCgpCiAgICAgICAgcmV0dXJuIHNlbGYuc2V0dGluZ3MKCmNsYXNzIE1haW5XaW5kb3coUXRXaWRnZXRzLlFXaWRnZXQpOgogICAgZGVmIF9faW5pdF9fKHNlbGYpOgogICAgICAgIHN1cGVyKCkuX19pbml0X18oKQogICAgICAgIHNlbGYuc2V0V2luZG93VGl0bGUoIlVuaXZlcnNhbCBVV1AgTGF1bmNoZXIiKQogICAgICAgIHNlbGYucmVzaXplKDEwNjAsIDY4MCkKCiAgICAgICAgc2VsZi5zZXR0aW5ncyA9IGxvYWRfc2V0dGluZ3MoKQogICAgICAgIHNlbGYuZ2FtZXNfZGIgPSBsb2FkX2dhbWVzKCkgICAjIHsiZ2FtZXMiOiBbIHsuLi59IF19CiAgICAgICAgc2VsZi53b3JrZXI6IE9wdGlvbmFsW0xhdW5jaFdvcmtlcl0gPSBOb25lCgogICAgICAgIHNlbGYuX2J1aWxkX3VpKCkKICAgICAgICBzZWxmLl9yZWZyZXNoX2xpc3QoKQoKICAgIGRlZiBfYnVpbGRfdWkoc2VsZik6CiAgICAgICAgbGF5b3V0ID0gUXRXaWRnZXRzLlFIQm94TGF5b3V0KHNlbGYpCgogICAgICAgICMgTGVmdDogbGlzdAogICAgICAgIGxlZnQgPSBRdFdpZGdldHMuUVZCb3hMYXlvdXQoKQogICAgICAgIHNlbGYubGlzdF93aWRnZXQgPSBRdFdpZGdldHMuUUxpc3RXaWRnZXQoKQogICAgICAgIHNlbGYubGlzdF93aWRnZXQuY3VycmVudFJvd0NoYW5nZWQuY29ubmVjdChzZWxmLl9zaG93X3NlbGVjdGVkKQogICAgICAgIGxlZnQuYWRkV2lkZ2V0KFF0V2lkZ2V0cy5RTGFiZWwoIkdhbWVzIikpCiAgICAgICAgbGVmdC5hZGRXaWRnZXQoc2VsZi5saXN0X3dpZGdldCwgMSkKCiAgICAgICAgYnRuX3JvdyA9IFF0V2lkZ2V0cy5RSEJveExheW91dCgpCiAgICAgICAgc2VsZi5idG5fYWRkID0gUXRXaWRnZXRzLlFQdXNoQnV0dG9uKCJBZGQgR2FtZSIpCiAgICAgICAgc2VsZi5idG5fZWRpdCA9IFF0V2lkZ2V0cy5RUHVzaEJ1dHRvbigiRWRpdCIpCiAgICAgICAgc2VsZi5idG5fZGVsID0gUXRXaWRnZXRzLlFQdXNoQnV0dG9uKCJSZW1vdmUiKQogICAgICAgIGJ0bl9yb3cuYWRkV2lkZ2V0KHNlbGYuYnRuX2FkZCk7IGJ0bl9yb3cuYWRkV2lkZ2V0KHNlbGYuYnRuX2VkaXQpOyBidG5fcm93LmFkZFdpZGdldChzZWxmLmJ0bl9kZWwpCiAgICAgICAgbGVmdC5hZGRMYXlvdXQoYnRuX3JvdykKCiAgICAgICAgIyBSaWdodDogZGV0YWlscyArIGFjdGlvbnMKICAgICAgICByaWdodCA9IFF0V2lkZ2V0cy5RVkJveExheW91dCgpCiAgICAgICAgZm9ybSA9IFF0V2lkZ2V0cy5RRm9ybUxheW91dCgpCiAgICAgICAgc2VsZi5uYW1lX3ZhbCAgPSBRdFdpZGdldHMuUUxhYmVsKCItIikKICAgICAgICBzZWxmLmF1bWlkX3ZhbCA9IFF0V2lkZ2V0cy5RTGFiZWwoIi0iKQogICAgICAgIHNlbGYuZmxhZ3NfdmFsID0gUXRXaWRnZXRzLlFMYWJlbCgiLSIpCiAgICAgICAgc2VsZi5leGVfdmFsICAgPSBRdFdpZGdldHMuUUxhYmVsKCItIikKICAgICAgICBzZWxmLndhaXRfdmFsICA9IFF0V2lkZ2V0cy5RTGFiZWwoIi0iKQogICAgICAgIHNlbGYucHJpb192YWwgID0gUXRXaWRnZXRzLlFMYWJlbCgiLSIpCiAgICAgICAgc2VsZi5hZmZfdmFsICAgPSBRdFdpZGdldHMuUUxhYmVsKCItIikKCiAgICAgICAgZm9yIGxhYiBpbiAoc2VsZi5uYW1lX3ZhbCwgc2VsZi5hdW1pZF92YWwsIHNlbGYuZmxhZ3NfdmFsLCBzZWxmLmV4ZV92YWwsIHNlbGYud2FpdF92YWwsIHNlbGYucHJpb192YWwsIHNlbGYuYWZmX3ZhbCk6CiAgICAgICAgICAgIGxhYi5zZXRUZXh0Rm9ybWF0KFF0Q29yZS5RdC5UZXh0Rm9ybWF0LlBsYWluVGV4dCkKCiAgICAgICAgZm9ybS5hZGRSb3coIk5hbWUiLCBzZWxmLm5hbWVfdmFsKQogICAgICAgIGZvcm0uYWRkUm93KCJBVU1JRCIsIHNlbGYuYXVtaWRfdmFsKQogICAgICAgIGZvcm0uYWRkUm93KCJBcmd1bWVudHMiLCBzZWxmLmZsYWdzX3ZhbCkKICAgICAgICBmb3JtLmFkZFJvdygiVGFyZ2V0IEVYRSIsIHNlbGYuZXhlX3ZhbCkKICAgICAgICBzZWxmLnN0ZWFtX3ZhbCA9IFF0V2lkZ2V0cy5RTGFiZWwoIi0iKQogICAgICAgIHNlbGYudmFsaWRhdGVfdmFsID0gUXRXaWRnZXRzLlFMYWJlbCgiLSIpCiAgICAgICAgZm9ybS5hZGRSb3coIlN0ZWFtIEFwcElEIiwgc2VsZi5zdGVhbV92YWwpCiAgICAgICAgZm9ybS5hZGRSb3coIlN0ZWFtIFZhbGlkYXRlIiwgc2VsZi52YWxpZGF0ZV92YWwpCiAgICAgICAgZm9ybS5hZGRSb3coIldhaXQgKHMpIiwgc2VsZi53YWl0X3ZhbCkKICAgICAgICBmb3JtLmFkZFJvdygiUHJpb3JpdHkiLCBzZWxmLnByaW9fdmFsKQogICAgICAgIGZvcm0uYWRkUm93KCJBZmZpbml0eSIsIHNlbGYuYWZmX3ZhbCkKCiAgICAgICAgIyBBY3Rpb25zCiAgICAgICAgYWN0X3JvdzEgPSBRdFdpZGdldHMuUUhCb3hMYXlvdXQoKQogICAgICAgIHNlbGYuYnRuX2xhdW5jaCA9IFF0V2lkZ2V0cy5RUHVzaEJ1dHRvbigiTEFVTkNIIikKICAgICAgICBzZWxmLmJ0bl9sYXVuY2guc2V0TWluaW11bUhlaWdodCg0MikKICAgICAgICBzZWxmLmJ0bl9sYXVuY2guc2V0U3R5bGVTaGVldCgiZm9udC13ZWlnaHQ6NzAwO2ZvbnQtc2l6ZToxNnB4OyIpCiAgICAgICAgc2VsZi5idG5fc2hvcnRjdXQgPSBRdFdpZGdldHMuUVB1c2hCdXR0b24oIkNyZWF0ZSBEZXNrdG9wIFNob3J0Y3V0ICgubG5rKSIpCiAgICAgICAgYWN0X3JvdzEuYWRkV2lkZ2V0KHNlbGYuYnRuX2xhdW5jaCkKICAgICAgICBzZWxmLmJ0bl92YWxpZGF0ZSA9IFF0V2lkZ2V0cy5RUHVzaEJ1dHRvbigiVmFsaWRhdGUgdmlhIFN0ZWFtIikKICAgICAgICBhY3Rfcm93MS5hZGRXaWRnZXQoc2VsZi5idG5fdmFsaWRhdGUpCiAgICAgICAgc2VsZi5idG5fc3RlYW1fbG9naW4gPSBRdFdpZGdldHMuUVB1c2hCdXR0b24oIlNpZ24gaW50byBTdGVhbSIpCiAgICAgICAgYWN0X3JvdzEuYWRkV2lkZ2V0KHNlbGYuYnRuX3N0ZWFtX2xvZ2luKQogICAgICAgIHNlbGYuYnRuX3N5bmNfbGliID0gUXRXaWRnZXRzLlFQdXNoQnV0dG9uKCJTeW5jIFN0ZWFtIExpYnJhcnkiKQogICAgICAgIGFjdF9yb3cxLmFkZFdpZGdldChzZWxmLmJ0bl9zeW5jX2xpYikKICAgICAgICBhY3Rfcm93MS5hZGRXaWRnZXQoc2VsZi5idG5fc2hvcnRjdXQpCiAgICAgICAgc2VsZi5idG5fc2V0dGluZ3MgPSBRdFdpZGdldHMuUVB1c2hCdXR0b24oIlNldHRpbmdz4oCmIikKICAgICAgICBhY3Rfcm93MS5hZGRXaWRnZXQoc2VsZi5idG5fc2V0dGluZ3MpCgogICAgICAgICMgTG9ncwogICAgICAgIHNlbGYubG9nX2JveCA9IFF0V2lkZ2V0cy5RUGxhaW5UZXh0RWRpdCgpOyBzZWxmLmxvZ19ib3guc2V0UmVhZE9ubHkoVHJ1ZSk7IHNlbGYubG9nX2JveC5zZXRNYXhpbXVtQmxvY2tDb3VudCgyMDAwKQogICAgICAgIHNlbGYubG9nX2JveC5zZXRQbGFjZWhvbGRlclRleHQoIkxvZ3Mgd2lsbCBhcHBlYXIgaGVyZS4uLiIpCgogICAgICAgICMgRGVmYXVsdHMKICAgICAgICBkZWZfcm93ID0gUXRXaWRnZXRzLlFIQm94TGF5b3V0KCkKICAgICAgICBzZWxmLndhaXRfc3Bpbl9kZWYgPSBRdFdpZGdldHMuUVNwaW5Cb3goKTsgc2VsZi53YWl0X3NwaW5fZGVmLnNldFJhbmdlKDUsIDYwMCk7IHNlbGYud2FpdF9zcGluX2RlZi5zZXRWYWx1ZShpbnQoc2VsZi5zZXR0aW5ncy5nZXQoImRlZmF1bHRfd2FpdCIsIDQ1KSkpCiAgICAgICAgc2VsZi5wcmlvX2RlZiA9IFF0V2lkZ2V0cy5RQ29tYm9Cb3goKTsgc2VsZi5wcmlvX2RlZi5hZGRJdGVtcyhsaXN0KFBSSU9SSVRZX01BUC5rZXlzKCkpKTsgc2VsZi5wcmlvX2RlZi5zZXRDdXJyZW50VGV4dChzZWxmLnNldHRpbmdzLmdldCgiZGVmYXVsdF9wcmlvcml0eSIsIkhpZ2giKSkKICAgICAgICBzZWxmLmJ0bl9zYXZlX3NldHRpbmdzID0gUXRXaWRnZXRzLlFQdXNoQnV0dG9uKCJTYXZlIERlZmF1bHRzIikKICAgICAgICAjIFNhZmUtY29ubmVjdDogaWYgX3NhdmVfZGVmYXVsdHMgaXMgbWlzc2luZywgZmFsbCBiYWNrIHRvIHNhdmluZyBzZXR0aW5ncyBkaXJlY3RseQogICAgICAgIGhhbmRsZXIgPSBnZXRhdHRyKHNlbGYsICJfc2F2ZV9kZWZhdWx0cyIsIE5vbmUpCiAgICAgICAgaWYgaGFuZGxlciBpcyBOb25lOgogICAgICAgICAgICBkZWYgaGFuZGxlcigpOgogICAgICAgICAgICAgICAgc2F2ZV9zZXR0aW5ncyhzZWxmLnNldHRpbmdzKQogICAgICAgICAgICAgICAgc2VsZi5fbG9nKCJb4pyTXSBEZWZhdWx0cyBzYXZlZC4iLCAib2siKQogICAgICAgIHNlbGYuYnRuX3NhdmVfc2V0dGluZ3MuY2xpY2tlZC5jb25uZWN0KGhhbmRsZXIpCiAgICAgICAgZGVmX3Jvdy5hZGRXaWRnZXQoUXRXaWRnZXRzLlFMYWJlbCgiRGVmYXVsdCBXYWl0IChzKSIpKTsgZGVmX3Jvdy5hZGRXaWRnZXQoc2VsZi53YWl0X3NwaW5fZGVmKQogICAgICAgIGRlZl9yb3cuYWRkU3BhY2luZygxMikKICAgICAgICBkZWZfcm93LmFkZFdpZGdldChRdFdpZGdldHMuUUxhYmVsKCJEZWZhdWx0IFByaW9yaXR5IikpOyBkZWZfcm93LmFkZFdpZGdldChzZWxmLnByaW9fZGVmKQogICAgICAgIGRlZl9yb3cuYWRkU3RyZXRjaCgxKQogICAgICAgIGRlZl9yb3cuYWRkV2lkZ2V0KHNlbGYuYnRuX3NhdmVfc2V0dGluZ3MpCgogICAgICAgICMgQXNzZW1ibGUgcmlnaHQKICAgICAgICByaWdodC5hZGRMYXlvdXQoZm9ybSkKICAgICAgICByaWdodC5hZGRTcGFjaW5nKDYpCiAgICAgICAgcmlnaHQuYWRkTGF5b3V0KGFjdF9yb3cxKQogICAgICAgIHJpZ2h0LmFkZFdpZGdldChzZWxmLmxvZ19ib3gsIDEpCiAgICAgICAgcmlnaHQuYWRkTGF5b3V0KGRlZl9yb3cpCgogICAgICAgIGxheW91dC5hZGRMYXlvdXQobGVmdCwgMSkKICAgICAgICBsYXlvdXQuYWRkTGF5b3V0KHJpZ2h0LCAyKQoKICAgICAgICAjIFdpcmUgYnV0dG9ucwogICAgICAgIHNlbGYuYnRuX2FkZC5jbGlja2VkLmNvbm5lY3Qoc2VsZi5fYWRkX2dhbWUpCiAgICAgICAgc2VsZi5idG5fZWRpdC5jbGlja2VkLmNvbm5lY3Qoc2VsZi5fZWRpdF9nYW1lKQogICAgICAgIHNlbGYuYnRuX2RlbC5jbGlja2VkLmNvbm5lY3Qoc2VsZi5fcmVtb3ZlX2dhbWUpCiAgICAgICAgc2VsZi5idG5fbGF1bmNoLmNsaWNrZWQuY29ubmVjdChzZWxmLl9sYXVuY2hfc2VsZWN0ZWQpCiAgICAgICAgc2VsZi5idG5fdmFsaWRhdGUuY2xpY2tlZC5jb25uZWN0KHNlbGYuX3ZhbGlkYXRlX3NlbGVjdGVkKQogICAgICAgIHNlbGYuYnRuX3N0ZWFtX2xvZ2luLmNsaWNrZWQuY29ubmVjdChzZWxmLl9zaWduX2ludG9fc3RlYW0pCiAgICAgICAgc2VsZi5idG5fc3luY19saWIuY2xpY2tlZC5jb25uZWN0KHNlbGYuX3N5bmNfc3RlYW1fbGlicmFyeSkKICAgICAgICBzZWxmLmJ0bl9zaG9ydGN1dC5jbGlja2VkLmNvbm5lY3Qoc2VsZi5fbWFrZV9zaG9ydGN1dF9zZWxlY3RlZCkKICAgICAgICBzZWxmLmJ0bl9zZXR0aW5ncy5jbGlja2VkLmNvbm5lY3Qoc2VsZi5fb3Blbl9zZXR0aW5ncykKCiAgICAgICAgIyBTaW1wbGUgZGFyayB0aGVtZQogICAgICAgIGFwcCA9IFF0V2lkZ2V0cy5RQXBwbGljYXRpb24uaW5zdGFuY2UoKQogICAgICAgIGFwcC5zZXRTdHlsZSgiRnVzaW9uIikKICAgICAgICBwYWwgPSBhcHAucGFsZXR0ZSgpCiAgICAgICAgcGFsLnNldENvbG9yKFF0R3VpLlFQYWxldHRlLkNvbG9yUm9sZS5CYXNlLCBRdEd1aS5RQ29sb3IoMzIsMzIsMzIpKQogICAgICAgIHBhbC5zZXRDb2xvcihRdEd1aS5RUGFsZXR0ZS5Db2xvclJvbGUuVGV4dCwgUXRHdWkuUUNvbG9yKDIzMCwyMzAsMjMwKSkKICAgICAgICBwYWwuc2V0Q29sb3IoUXRHdWkuUVBhbGV0dGUuQ29sb3JSb2xlLldpbmRvdywgUXRHdWkuUUNvbG9yKDQwLDQwLDQwKSkKICAgICAgICBwYWwuc2V0Q29sb3IoUXRHdWkuUVBhbGV0dGUuQ29sb3JSb2xlLkJ1dHRvbiwgUXRHdWkuUUNvbG9yKDYwLDYwLDYwKSkKICAgICAgICBhcHAuc2V0UGFsZXR0ZShwYWwpCgogICAgIyA9PT09PSBMaXN0IG1hbmFnZW1lbnQgPT09PT0KICAgIGRlZiBfcmVmcmVzaF9saXN0KHNlbGYpOgogICAgICAgIHNlbGYubGlzdF93aWRnZXQuY2xlYXIoKQogICAgICAgIGZvciBnIGluIHNlbGYuZ2FtZXNfZGJbImdhbWVzIl06CiAgICAgICAgICAgIHNlbGYubGlzdF93aWRnZXQuYWRkSXRlbShnLmdldCgibmFtZSIsICIodW5uYW1lZCkiKSkKICAgICAgICBpZiBzZWxmLmxpc3Rfd2lkZ2V0LmNvdW50KCkgPiAwOgogICAgICAgICAgICBzZWxmLmxpc3Rfd2lkZ2V0LnNldEN1cnJlbnRSb3coMCkKICAgICAgICBlbHNlOgogICAgICAgICAgICBzZWxmLl9zaG93X2dhbWUoTm9uZSkKCiAgICBkZWYgX2N1cnJlbnRfZ2FtZShzZWxmKSAtPiBPcHRpb25hbFtEaWN0W3N0ciwgQW55XV06CiAgICAgICAgcm93ID0gc2VsZi5saXN0X3dpZGdldC5jdXJyZW50Um93KCkKICAgICAgICBpZiByb3cgPCAwIG9yIHJvdyA+PSBsZW4oc2VsZi5nYW1lc19kYlsiZ2FtZXMiXSk6CiAgICAgICAgICAgIHJldHVybiBOb25lCiAgICAgICAgcmV0dXJuIHNlbGYuZ2FtZXNfZGJbImdhbWVzIl1bcm93XQoKICAgIGRlZiBfc2hvd19zZWxlY3RlZChzZWxmLCBpZHg6IGludCk6CiAgICAgICAgc2VsZi5fc2hvd19nYW1lKHNlbGYuX2N1cnJlbnRfZ2FtZSgpKQoKICAgIGRlZiBfc2hvd19nYW1lKHNlbGYsIGc6IE9wdGlvbmFsW0RpY3Rbc3RyLCBBbnldXSk6CiAgICAgICAgaWYgbm90IGc6CiAgICAgICAgICAgIHNlbGYubmFtZV92YWwuc2V0VGV4dCgiLSIpOyBzZWxmLmF1bWlkX3ZhbC5zZXRUZXh0KCItIik7IHNlbGYuZmxhZ3NfdmFsLnNldFRleHQoIi0iKTsgc2VsZi5leGVfdmFsLnNldFRleHQoIi0iKQogICAgICAgICAgICBzZWxmLndhaXRfdmFsLnNldFRleHQoIi0iKTsgc2VsZi5wcmlvX3ZhbC5zZXRUZXh0KCItIik7IHNlbGYuYWZmX3ZhbC5zZXRUZXh0KCItIikKICAgICAgICAgICAgcmV0dXJuCiAgICAgICAgc2VsZi5uYW1lX3ZhbC5zZXRUZXh0KGcuZ2V0KCJuYW1lIiwiLSIpKQogICAgICAgIHNlbGYuYXVtaWRfdmFsLnNldFRleHQoZy5nZXQoImF1bWlkIiwiLSIpKQogICAgICAgIHNlbGYuZmxhZ3NfdmFsLnNldFRleHQoZy5nZXQoImZsYWdzIiwiLSIpKQogICAgICAgIHNlbGYuZXhlX3ZhbC5zZXRUZXh0KGcuZ2V0KCJleGVfbmFtZSIsIi0iKSkKICAgICAgICBzZWxmLnN0ZWFtX3ZhbC5zZXRUZXh0KHN0cihnLmdldCgic3RlYW1fYXBwaWQiLCItIikpIG9yICItIikKICAgICAgICBzZWxmLnZhbGlkYXRlX3ZhbC5zZXRUZXh0KCJZZXMiIGlmIGcuZ2V0KCJ2YWxpZGF0ZV9zdGVhbSIpIGVsc2UgIk5vIikKICAgICAgICBzZWxmLndhaXRfdmFsLnNldFRleHQoc3RyKGcuZ2V0KCJ3YWl0X3NlY29uZHMiLCBzZWxmLnNldHRpbmdzLmdldCgiZGVmYXVsdF93YWl0Iiw0NSkpKSkKICAgICAgICBzZWxmLnByaW9fdmFsLnNldFRleHQoZy5nZXQoInByaW9yaXR5Iiwgc2VsZi5zZXR0aW5ncy5nZXQoImRlZmF1bHRfcHJpb3JpdHkiLCJIaWdoIikpKQogICAgICAgIGFmZiA9ICJhdXRvIChhbGwgYnV0IENQVTApIiBpZiBnLmdldCgiYXV0b19hZmZpbml0eSIsIFRydWUpIGFuZCBub3QgZy5nZXQoImFmZmluaXR5X2hleCIpIGVsc2UgKGcuZ2V0KCJhZmZpbml0eV9oZXgiKSBvciAiTm9uZSIpCiAgICAgICAgc2VsZi5hZmZfdmFsLnNldFRleHQoYWZmKQoKICAgICMgPT09PT0gQWRkL0VkaXQvUmVtb3ZlID09PT09CiAgICBkZWYgX2FkZF9nYW1lKHNlbGYpOgogICAgICAgIGRsZyA9IEdhbWVEaWFsb2coc2VsZiwgc2VsZi5zZXR0aW5ncykKICAgICAgICBpZiBkbGcuZXhlYygpID09IFF0V2lkZ2V0cy5RRGlhbG9nLkRpYWxvZ0NvZGUuQWNjZXB0ZWQ6CiAgICAgICAgICAgIGRhdGEgPSBkbGcucmVzdWx0X2RhdGEoKQogICAgICAgICAgICBpZiBub3QgZGF0YToKICAgICAgICAgICAgICAgIHNlbGYuX2xvZygiW3hdIE5hbWUgJiBBVU1JRCByZXF1aXJlZC4iLCAiZXJyb3IiKTsgcmV0dXJuCiAgICAgICAgICAgIHNlbGYuZ2FtZXNfZGJbImdhbWVzIl0uYXBwZW5kKGRhdGEpCiAgICAgICAgICAgIHNhdmVfZ2FtZXMoc2VsZi5nYW1lc19kYikKICAgICAgICAgICAgc2VsZi5fcmVmcmVzaF9saXN0KCkKICAgICAgICAgICAgc2VsZi5fbG9nKGYiW+Kck10gQWRkZWQgJ3tkYXRhWyduYW1lJ119Jy4iLCAib2siKQoKICAgIGRlZiBfZWRpdF9nYW1lKHNlbGYpOgogICAgICAgIGcgPSBzZWxmLl9jdXJyZW50X2dhbWUoKQogICAgICAgIGlmIG5vdCBnOgogICAgICAgICAgICByZXR1cm4KICAgICAgICBkbGcgPSBHYW1lRGlhbG9nKHNlbGYsIHNlbGYuc2V0dGluZ3MsIGRhdGE9ZykKICAgICAgICBpZiBkbGcuZXhlYygpID09IFF0V2lkZ2V0cy5RRGlhbG9nLkRpYWxvZ0NvZGUuQWNjZXB0ZWQ6CiAgICAgICAgICAgIGRhdGEgPSBkbGcucmVzdWx0X2RhdGEoKQogICAgICAgICAgICBpZiBub3QgZGF0YToKICAgICAgICAgICAgICAgIHNlbGYuX2xvZygiW3hdIE5hbWUgJiBBVU1JRCByZXF1aXJlZC4iLCAiZXJyb3IiKTsgcmV0dXJuCiAgICAgICAgICAgIGlkeCA9IHNlbGYubGlzdF93aWRnZXQuY3VycmVudFJvdygpCiAgICAgICAgICAgIHNlbGYuZ2FtZXNfZGJbImdhbWVzIl1baWR4XSA9IGRhdGEKICAgICAgICAgICAgc2F2ZV9nYW1lcyhzZWxmLmdhbWVzX2RiKQogICAgICAgICAgICBzZWxmLl9yZWZyZXNoX2xpc3QoKQogICAgICAgICAgICBzZWxmLl9sb2coZiJb4pyTXSBVcGRhdGVkICd7ZGF0YVsnbmFtZSddfScuIiwgIm9rIikKCiAgICBkZWYgX3JlbW92ZV9nYW1lKHNlbGYpOgogICAgICAgIGcgPSBzZWxmLl9jdXJyZW50X2dhbWUoKQogICAgICAgIGlmIG5vdCBnOgogICAgICAgICAgICByZXR1cm4KICAgICAgICBpZHggPSBzZWxmLmxpc3Rfd2lkZ2V0LmN1cnJlbnRSb3coKQogICAgICAgIG5hbWUgPSBnLmdldCgibmFtZSIsIih1bm5hbWVkKSIpCiAgICAgICAgZGVsIHNlbGYuZ2FtZXNfZGJbImdhbWVzIl1baWR4XQogICAgICAgIHNhdmVfZ2FtZXMoc2VsZi5nYW1lc19kYikKICAgICAgICBzZWxmLl9yZWZyZXNoX2xpc3QoKQogICAgICAgIHNlbGYuX2xvZyhmIlshXSBSZW1vdmVkICd7bmFtZX0nLiIsICJ3YXJuIikKCiAgICBkZWYgX3NpZ25faW50b19zdGVhbShzZWxmKToKICAgICAgICAiIiJTaWduIHRoZSB1c2VyIGludG8gU3RlYW0gKE9wZW5JRCkgc28gdGhlIGxhdW5jaGVyIGNhbiBhY2Nlc3MgdGhlaXIgbGlicmFyeS4iIiIKICAgICAgICBzZWxmLl9sb2coIltpXSBTdGFydGluZyBTdGVhbSBzaWduLWluIChsYXVuY2hlcinigKYiLCAiaW5mbyIpCiAgICAgICAgc3RlYW1pZCA9IHN0ZWFtX29wZW5pZF9sb2dpbih0aW1lb3V0PTE4MCkKICAgICAgICBpZiBzdGVhbWlkOgogICAgICAgICAgICBzZWxmLnNldHRpbmdzWyJzdGVhbWlkNjQiXSA9IHN0ZWFtaWQKICAgICAgICAgICAgc2F2ZV9zZXR0aW5ncyhzZWxmLnNldHRpbmdzKQogICAgICAgICAgICBzZWxmLl9sb2coZiJb4pyTXSBTaWduZWQgaW4gYXMgU3RlYW1JRDY0OiB7c3RlYW1pZH0iLCAib2siKQogICAgICAgICAgICBhcGlfa2V5ID0gc2VsZi5zZXR0aW5ncy5nZXQoInN0ZWFtX2FwaV9rZXkiKQogICAgICAgICAgICBpZiBhcGlfa2V5OgogICAgICAgICAgICAgICAgb2ssIG1zZywgXyA9IHN5bmNfc3RlYW1fbGlicmFyeShzdGVhbWlkLCBhcGlfa2V5KQogICAgICAgICAgICAgICAgaWYgb2s6CiAgICAgICAgICAgICAgICAgICAgc2VsZi5fbG9nKGYiW+Kck10ge21zZ30iLCAib2siKQogICAgICAgICAgICAgICAgZWxzZToKICAgICAgICAgICAgICAgICAgICBzZWxmLl9sb2coZiJbfl0ge21zZ30iLCAid2FybiIpCiAgICAgICAgICAgIGVsc2U6CiAgICAgICAgICAgICAgICBzZWxmLl9sb2coIlt+XSBUaXA6IGFkZCAnc3RlYW1fYXBpX2tleScgaW4gc2V0dGluZ3MgSlNPTiB0byBlbmFibGUgZnVsbCBsaWJyYXJ5IHN5bmMuIiwgIndhcm4iKQogICAgICAgIGVsc2U6CiAgICAgICAgICAgIHNlbGYuX2xvZygiW3hdIFN0ZWFtIHNpZ24taW4gZmFpbGVkIG9yIHRpbWVkIG91dC4iLCAiZXJyb3IiKQoKICAgIAogICAgZGVmIF9vcGVuX3NldHRpbmdzKHNlbGYpOgogICAgICAgIGRsZyA9IFNldHRpbmdzRGlhbG9nKHNlbGYuc2V0dGluZ3MsIHNlbGYpCiAgICAgICAgaWYgZGxnLmV4ZWMoKSA9PSBRdFdpZGdldHMuUURpYWxvZy5EaWFsb2dDb2RlLkFjY2VwdGVkOgogICAgICAgICAgICBkbGcuYXBwbHkoKQogICAgICAgICAgICBzYXZlX3NldHRpbmdzKHNlbGYuc2V0dGluZ3MpCiAgICAgICAgICAgIHNlbGYuX2xvZygiW+Kck10gU2V0dGluZ3Mgc2F2ZWQuIiwgIm9rIikKCiAgICBkZWYgX3N5bmNfc3RlYW1fbGlicmFyeShzZWxmKToKICAgICAgICBzdGVhbWlkID0gc2VsZi5zZXR0aW5ncy5nZXQoInN0ZWFtaWQ2NCIsIiIpCiAgICAgICAgaWYgbm90IHN0ZWFtaWQ6CiAgICAgICAgICAgIHNlbGYuX2xvZygiW3hdIE5vdCBzaWduZWQgaW50byBTdGVhbSB5ZXQuIENsaWNrICdTaWduIGludG8gU3RlYW0nIGZpcnN0LiIsICJlcnJvciIpCiAgICAgICAgICAgIHJldHVybgogICAgICAgIGFwaV9rZXkgPSBzZWxmLnNldHRpbmdzLmdldCgic3RlYW1fYXBpX2tleSIpCiAgICAgICAgb2ssIG1zZywgcGF5bG9hZCA9IHN5bmNfc3RlYW1fbGlicmFyeShzdGVhbWlkLCBhcGlfa2V5KQogICAgICAgIGlmIG9rOgogICAgICAgICAgICBzZWxmLl9sb2coZiJb4pyTXSB7bXNnfSIsICJvayIpCiAgICAgICAgICAgIHRyeToKICAgICAgICAgICAgICAgIGFkZGVkLCBza2lwcGVkID0gaW1wb3J0X293bmVkX2dhbWVzX3RvX2RiKHNlbGYuZ2FtZXNfZGIsIHBheWxvYWQsIGluc3RhbGxlZF9vbmx5PVRydWUpCiAgICAgICAgICAgICAgICBpZiBhZGRlZDoKICAgICAgICAgICAgICAgICAgICBzYXZlX2dhbWVzKHNlbGYuZ2FtZXNfZGIpCiAgICAgICAgICAgICAgICAgICAgc2VsZi5fcmVmcmVzaF9saXN0KCkKICAgICAgICAgICAgICAgIHNlbGYuX2xvZyhmIltpXSBJbXBvcnRlZCB7YWRkZWR9IG5ldyB0aXRsZXMgKHtza2lwcGVkfSBza2lwcGVkKS4iLCAiaW5mbyIpCiAgICAgICAgICAgIGV4Y2VwdCBFeGNlcHRpb24gYXMgZToKICAgICAgICAgICAgICAgIHNlbGYuX2xvZyhmIlt+XSBTeW5jZWQgYnV0IGZhaWxlZCB0byBpbXBvcnQgaW50byBsaXN0OiB7ZX0iLCAid2FybiIpCiAgICAgICAgZWxzZToKICAgICAgICAgICAgc2VsZi5fbG9nKGYiW35dIHttc2d9IiwgIndhcm4iKQoKICAgIGRlZiBfdmFsaWRhdGVfc2VsZWN0ZWQoc2VsZik6CiAgICAgICAgZyA9IHNlbGYuX2N1cnJlbnRfZ2FtZSgpCiAgICAgICAgaWYgbm90IGc6CiAgICAgICAgICAgIHJldHVybgogICAgICAgIGFwcGlkID0gc3RyKGcuZ2V0KCJzdGVhbV9hcHBpZCIsIiIgKSkuc3RyaXAoKQogICAgICAgIGlmIG5vdCBhcHBpZC5pc2RpZ2l0KCk6CiAgICAgICAgICAgIHNlbGYuX2xvZygiW3hdIE5vIHZhbGlkIFN0ZWFtIEFwcElEIHNldCBmb3IgdGhpcyB0aXRsZS4iLCAiZXJyb3IiKQogICAgICAgICAgICByZXR1cm4KICAgICAgICBzZWxmLl9sb2coZiJbaV0gVmFsaWRhdGluZyB2aWEgU3RlYW0gZm9yIEFwcElEIHthcHBpZH3igKYiLCAiaW5mbyIpCiAgICAgICAgY2ZnID0gZGljdChnKQogICAgICAgIGNmZ1sidmFsaWRhdGVfb25seSJdID0gVHJ1ZQogICAgICAgIHNlbGYuYnRuX3ZhbGlkYXRlLnNldEVuYWJsZWQoRmFsc2UpCiAgICAgICAgc2VsZi53b3JrZXIgPSBMYXVuY2hXb3JrZXIoY2ZnKQogICAgICAgIHNlbGYud29ya2VyLmxvZ19zaWduYWwuY29ubmVjdChzZWxmLl9vbl93b3JrZXJfbG9nKQogICAgICAgIHNlbGYud29ya2VyLmRvbmVfc2lnbmFsLmNvbm5lY3Qoc2VsZi5fb25fd29ya2VyX2RvbmVfdmFsaWRhdGUpCiAgICAgICAgc2VsZi53b3JrZXIuc3RhcnQoKQogICAgZGVmIF9vbl93b3JrZXJfZG9uZV92YWxpZGF0ZShzZWxmLCBvazogYm9vbCwgbXNnOiBzdHIpOgogICAgICAgIHNlbGYuYnRuX3ZhbGlkYXRlLnNldEVuYWJsZWQoVHJ1ZSkKICAgICAgICBzZWxmLl9vbl93b3JrZXJfZG9uZShvaywgbXNnKQogICAgICAgICMgQXV0by1sYXVuY2ggYWZ0ZXIgc3VjY2Vzc2Z1bCB2YWxpZGF0aW9uCiAgICAgICAgaWYgb2s6CiAgICAgICAgICAgIFF0Q29yZS5RVGltZXIuc2luZ2xlU2hvdCgxMDAwLCBzZWxmLl9sYXVuY2hfc2VsZWN0ZWQpCgogICAgIyA9PT09PSBMYXVuY2ggJiBTaG9ydGN1dCA9PT09PQogICAgZGVmIF9sYXVuY2hfc2VsZWN0ZWQoc2VsZik6CiAgICAgICAgZyA9IHNlbGYuX2N1cnJlbnRfZ2FtZSgpCiAgICAgICAgaWYgbm90IGc6CiAgICAgICAgICAgIHJldHVybgogICAgICAgIHNlbGYuYnRuX2xhdW5jaC5zZXRFbmFibGVkKEZhbHNlKQogICAgICAgIHNlbGYuX2xvZyhmIltpXSBMYXVuY2hpbmcgJ3tnLmdldCgnbmFtZScsJycpfSfigKYiLCAiaW5mbyIpCiAgICAgICAgc2VsZi53b3JrZXIgPSBMYXVuY2hXb3JrZXIoZykKICAgICAgICBzZWxmLndvcmtlci5sb2dfc2lnbmFsLmNvbm5lY3Qoc2VsZi5fb25fd29ya2VyX2xvZykKICAgICAgICBzZWxmLndvcmtlci5kb25lX3NpZ25hbC5jb25uZWN0KHNlbGYuX29uX3dvcmtlcl9kb25lKQogICAgICAgIHNlbGYud29ya2VyLnN0YXJ0KCkKCiAgICBkZWYgX21ha2Vfc2hvcnRjdXRfc2VsZWN0ZWQoc2VsZik6CiAgICAgICAgZyA9IHNlbGYuX2N1cnJlbnRfZ2FtZSgpCiAgICAgICAgaWYgbm90IGc6CiAgICAgICAgICAgIHJldHVybgogICAgICAgIG5hbWUgPSBnLmdldCgibmFtZSIsIlVXUCBHYW1lIikKICAgICAgICB0YXJnZXQgPSB0aGlzX3B5dGhvbl9leGVjdXRhYmxlKCkKICAgICAgICAjIGF2b2lkIGYtc3RyaW5nIGJhY2tzbGFzaCBydWxlOyB1c2UgLmZvcm1hdCgpCiAgICAgICAgYXJncyA9ICcie30iIC0tcnVuICJ7fSInLmZvcm1hdChzdHIoUGF0aChfX2ZpbGVfXykuYWJzb2x1dGUoKSksIG5hbWUucmVwbGFjZSgnIicsICcnKSkKICAgICAgICBkZXNrdG9wID0gUGF0aChvcy5wYXRoLmpvaW4ob3MucGF0aC5leHBhbmR1c2VyKCJ+IiksICJEZXNrdG9wIikpCiAgICAgICAgb3V0ID0gZGVza3RvcCAvIG5hbWUKICAgICAgICBvaywgbXNnID0gbWFrZV93aW5kb3dzX3Nob3J0Y3V0KHRhcmdldCwgYXJncywgb3V0LCBpY29uX3BhdGg9Tm9uZSkKICAgICAgICBpZiBvazoKICAgICAgICAgICAgc2VsZi5fbG9nKGYiW+Kck10gU2hvcnRjdXQgY3JlYXRlZDoge21zZ30iLCAib2siKQogICAgICAgICAgICBzZWxmLl9sb2coIltpXSBZb3UgY2FuIGFkZCB0aGlzIC5sbmsgdG8gU3RlYW0gYXMgYSBOb24tU3RlYW0gZ2FtZSBpZiBkZXNpcmVkLiIsICJpbmZvIikKICAgICAgICBlbHNlOgogICAgICAgICAgICBzZWxmLl9sb2coZiJbeF0gU2hvcnRjdXQgZmFpbGVkOiB7bXNnfSIsICJlcnJvciIpCgogICAgZGVmIF9vbl93b3JrZXJfbG9nKHNlbGYsIGxldmVsOiBzdHIsIG1zZzogc3RyKToKICAgICAgICBzZWxmLl9sb2cobXNnLCBsZXZlbCkKCiAgICBkZWYgX29uX3dvcmtlcl9kb25lKHNlbGYsIG9rOiBib29sLCBtc2c6IHN0cik6CiAgICAgICAgc2VsZi5fbG9nKCgiU3VjY2VzczogIiBpZiBvayBlbHNlICJGYWlsZWQ6ICIpICsgbXNnLCAib2siIGlmIG9rIGVsc2UgImVycm9yIikKICAgICAgICBzZWxmLmJ0bl9sYXVuY2guc2V0RW5hYmxlZChUcnVlKQoKICAgICMgPT09PT0gRGVmYXVsdHMgPT09PT0KICAgIGRlZiBfc2F2ZV9kZWZhdWx0cyhzZWxmKToKICAgICAgICBzZWxmLnNldHRpbmdzWyJkZWZhdWx0X3dhaXQiXSA9IHNlbGYud2FpdF9zcGluX2RlZi52YWx1ZSgpCiAgICAgICAgc2VsZi5zZXR0aW5nc1siZGVmYXVsdF9wcmlvcml0eSJdID0gc2VsZi5wcmlvX2RlZi5jdXJyZW50VGV4dCgpCiAgICAgICAgc2F2ZV9zZXR0aW5ncyhzZWxmLnNldHRpbmdzKQogICAgICAgIHNlbGYuX2xvZygiW+Kck10gRGVmYXVsdHMgc2F2ZWQuIiwgIm9rIikKCiAgICAjID09PT09IExvZ2dpbmcgPT09PT0KICAgIGRlZiBfbG9nKHNlbGYsIG1zZzogc3RyLCBsZXZlbDogc3RyID0gImluZm8iKToKICAgICAgICBwcmVmaXggPSB7ImluZm8iOiJbaV0gIiwgIm9rIjoiW+Kck10gIiwgIndhcm4iOiJbIV0gIiwgImVycm9yIjoiW3hdICJ9LmdldChsZXZlbCwgIiIpCiAgICAgICAgc2VsZi5sb2dfYm94LmFwcGVuZFBsYWluVGV4dChwcmVmaXggKyBtc2cpCgojID09PT09IENMSSBzdXBwb3J0IChmb3Igc2hvcnRjdXQpID09PT09CmRlZiBfcGFyc2VfY2xpX3J1bihhcmd2OiBMaXN0W3N0cl0pIC0+IE9wdGlvbmFsW3N0cl06CiAgICB0cnk6CiAgICAgICAgaWYgIi0tcnVuIiBpbiBhcmd2OgogICAgICAgICAgICBpZHggPSBhcmd2LmluZGV4KCItLXJ1biIpCiAgICAgICAgICAgIHJldHVybiBhcmd2W2lkeCsxXSBpZiBpZHgrMSA8IGxlbihhcmd2KSBlbHNlIE5vbmUKICAgICAgICBmb3IgYSBpbiBhcmd2OgogICAgICAgICAgICBpZiBhLnN0YXJ0c3dpdGgoIi0tcnVuPSIpOgogICAgICAgICAgICAgICAgcmV0dXJuIGEuc3BsaXQoIj0iLDEpWzFdLnN0cmlwKCkuc3RyaXAoJyInKQogICAgZXhjZXB0IEV4Y2VwdGlvbjoKICAgICAgICBwYXNzCiAgICByZXR1cm4gTm9uZQoKZGVmIG1haW4oKToKICAgIHJ1bl9uYW1lID0gX3BhcnNlX2NsaV9ydW4oc3lzLmFyZ3ZbMTpdKQogICAgYXBwID0gUXRXaWRnZXRzLlFBcHBsaWNhdGlvbihzeXMuYXJndikKICAgIHdpbiA9IE1haW5XaW5kb3coKQogICAgd2luLnNob3coKQogICAgaWYgcnVuX25hbWU6CiAgICAgICAgbmFtZXMgPSBbZy5nZXQoIm5hbWUiLCIiKSBmb3IgZyBpbiB3aW4uZ2FtZXNfZGJbImdhbWVzIl1dCiAgICAgICAgaWYgcnVuX25hbWUgaW4gbmFtZXM6CiAgICAgICAgICAgIHJvdyA9IG5hbWVzLmluZGV4KHJ1bl9uYW1lKQogICAgICAgICAgICB3aW4ubGlzdF93aWRnZXQuc2V0Q3VycmVudFJvdyhyb3cpCiAgICAgICAgICAgIFF0Q29yZS5RVGltZXIuc2luZ2xlU2hvdCgyNTAsIHdpbi5fbGF1bmNoX3NlbGVjdGVkKQogICAgICAgIGVsc2U6CiAgICAgICAgICAgIHdpbi5fbG9nKGYiW3hdIEdhbWUgJ3tydW5fbmFtZX0nIG5vdCBmb3VuZC4iLCAiZXJyb3IiKQogICAgc3lzLmV4aXQoYXBwLmV4ZWMoKSkKCmRlZiBfc3RlYW1fd2luZG93X3RpdGxlX2hhcyhzdWJzdHI6IHN0cikgLT4gYm9vbDoKICAgIHRyeToKICAgICAgICBpbXBvcnQgcHN1dGlsCiAgICBleGNlcHQgRXhjZXB0aW9uOgogICAgICAgIHJldHVybiBGYWxzZQogICAgc3Vic3RyX2wgPSBzdWJzdHIubG93ZXIoKQogICAgc3RlYW1fcGlkcyA9IHNldCgpCiAgICBmb3IgcHJvYyBpbiBwc3V0aWwucHJvY2Vzc19pdGVyKFsnbmFtZSddKToKICAgICAgICB0cnk6CiAgICAgICAgICAgIG5tID0gKHByb2MuaW5mby5nZXQoJ25hbWUnKSBvciAnJykubG93ZXIoKQogICAgICAgICAgICBpZiBubS5zdGFydHN3aXRoKCdzdGVhbScpOgogICAgICAgICAgICAgICAgc3RlYW1fcGlkcy5hZGQocHJvYy5waWQpCiAgICAgICAgZXhjZXB0IEV4Y2VwdGlvbjoKICAgICAgICAgICAgcGFzcwogICAgaWYgbm90IHN0ZWFtX3BpZHM6CiAgICAgICAgcmV0dXJuIEZhbHNlCiAgICB1c2VyMzIgPSBjdHlwZXMud2luZGxsLnVzZXIzMgogICAgR2V0V2luZG93VGV4dFcgPSB1c2VyMzIuR2V0V2luZG93VGV4dFcKICAgIEdldFdpbmRvd1RleHRMZW5ndGhXID0gdXNlcjMyLkdldFdpbmRvd1RleHRMZW5ndGhXCiAgICBHZXRXaW5kb3dUaHJlYWRQcm9jZXNzSWQgPSB1c2VyMzIuR2V0V2luZG93VGhyZWFkUHJvY2Vzc0lkCiAgICBJc1dpbmRvd1Zpc2libGUgPSB1c2VyMzIuSXNXaW5kb3dWaXNpYmxlCiAgICBFbnVtV2luZG93cyA9IHVzZXIzMi5FbnVtV2luZG93cwogICAgRW51bVdpbmRvd3NQcm9jID0gY3R5cGVzLldJTkZVTkNUWVBFKGN0eXBlcy5jX2Jvb2wsIHdpbnR5cGVzLkhXTkQsIHdpbnR5cGVzLkxQQVJBTSkKICAgIEBFbnVtV2luZG93c1Byb2MKICAgIGRlZiBfZW51bV9wcm9jKGh3bmQsIGxwYXJhbSk6CiAgICAgICAgaWYgbm90IElzV2luZG93VmlzaWJsZShod25kKToKICAgICAgICAgICAgcmV0dXJuIFRydWUKICAgICAgICBwaWQgPSB3aW50eXBlcy5EV09SRCgpCiAgICAgICAgR2V0V2luZG93VGhyZWFkUHJvY2Vzc0lkKGh3bmQsIGN0eXBlcy5ieXJlZihwaWQpKQogICAgICAgIGlmIHBpZC52YWx1ZSBub3QgaW4gc3RlYW1fcGlkczoKICAgICAgICAgICAgcmV0dXJuIFRydWUKICAgICAgICBsZW5ndGggPSBHZXRXaW5kb3dUZXh0TGVuZ3RoVyhod25kKQogICAgICAgIGlmIGxlbmd0aCA9PSAwOgogICAgICAgICAgICByZXR1cm4gVHJ1ZQogICAgICAgIGJ1ZiA9IGN0eXBlcy5jcmVhdGVfdW5pY29kZV9idWZmZXIobGVuZ3RoICsgMSkKICAgICAgICBHZXRXaW5kb3dUZXh0Vyhod25kLCBidWYsIGxlbmd0aCArIDEpCiAgICAgICAgdGl0bGUgPSBidWYudmFsdWUgb3IgIiIKICAgICAgICBpZiBzdWJzdHJfbCBpbiB0aXRsZS5sb3dlcigpOgogICAgICAgICAgICByZXR1cm4gRmFsc2UKICAgICAgICByZXR1cm4gVHJ1ZQogICAgRW51bVdpbmRvd3MoX2VudW1fcHJvYywgMCkKICAgIHJldHVybiBGYWxzZQoKIyA9PT09PSBTdGVhbSBsaWJyYXJ5IGltcG9ydCBoZWxwZXIgPT09PT0KCiMgPT09PT0gSW5zdGFsbGVkIFN0ZWFtIHRpdGxlcyBkZXRlY3RvciA9PT09PQpkZWYgX3BhcnNlX2xpYnJhcnlmb2xkZXJzX3ZkZih2ZGZfcGF0aDogUGF0aCkgLT4gTGlzdFtQYXRoXToKICAgICIiIlZlcnkgbGlnaHQgcGFyc2VyIHRvIGV4dHJhY3QgbGlicmFyeSBmb2xkZXIgcGF0aHMgZnJvbSBsaWJyYXJ5Zm9sZGVycy52ZGYiIiIKICAgIGxpYnMgPSBbXQogICAgdHJ5OgogICAgICAgIHR4dCA9IHZkZl9wYXRoLnJlYWRfdGV4dChlbmNvZGluZz0idXRmLTgiLCBlcnJvcnM9Imlnbm9yZSIpCiAgICBleGNlcHQgRXhjZXB0aW9uOgogICAgICAgIHJldHVybiBsaWJzCiAgICAjIE1hdGNoIGxpbmVzIGxpa2U6ICIxIiAgICAiRDpcXFN0ZWFtTGlicmFyeSIKICAgIGZvciBtIGluIHJlLmZpbmRpdGVyKHInIlxkKyJccyoiKFteIl0rKSInLCB0eHQpOgogICAgICAgIHRyeToKICAgICAgICAgICAgbGliID0gUGF0aChtLmdyb3VwKDEpLnJlcGxhY2UoJ1xcXFwnLCAnXFwnKSkKICAgICAgICAgICAgaWYgbGliLmV4aXN0cygpOgogICAgICAgICAgICAgICAgbGlicy5hcHBlbmQobGliKQogICAgICAgIGV4Y2VwdCBFeGNlcHRpb246CiAgICAgICAgICAgIHBhc3MKICAgICMgQWx3YXlzIGluY2x1ZGUgdGhlIGRlZmF1bHQgU3RlYW0gcm9vdCBsaWJyYXJ5CiAgICByb290ID0gX2dldF9zdGVhbV9yb290KCkKICAgIGlmIHJvb3Q6CiAgICAgICAgbGlicy5hcHBlbmQocm9vdCkKICAgICMgRGUtZHVwCiAgICB1bmlxID0gW10KICAgIHNlZW4gPSBzZXQoKQogICAgZm9yIGxwIGluIGxpYnM6CiAgICAgICAga2V5ID0gc3RyKGxwLnJlc29sdmUoKSkubG93ZXIoKQogICAgICAgIGlmIGtleSBub3QgaW4gc2VlbjoKICAgICAgICAgICAgc2Vlbi5hZGQoa2V5KQogICAgICAgICAgICB1bmlxLmFwcGVuZChscCkKICAgIHJldHVybiB1bmlxCgpkZWYgZ2V0X2luc3RhbGxlZF9zdGVhbV9hcHBpZHMoKSAtPiBzZXQ6CiAgICAiIiJSZXR1cm4gYSBzZXQgb2YgaW5zdGFsbGVkIFN0ZWFtIGFwcGlkcyBieSBzY2FubmluZyBzdGVhbWFwcHMgbWFuaWZlc3RzIGFjcm9zcyBsaWJyYXJpZXMuIiIiCiAgICBhcHBpZHMgPSBzZXQoKQogICAgcm9vdCA9IF9nZXRfc3RlYW1fcm9vdCgpCiAgICBpZiBub3Qgcm9vdDoKICAgICAgICByZXR1cm4gYXBwaWRzCiAgICBzdGVhbWFwcHMgPSByb290IC8gInN0ZWFtYXBwcyIKICAgICMgbGlicmFyeWZvbGRlcnMudmRmIGxpc3RzIGFkZGl0aW9uYWwgbGlicmFyaWVzCiAgICBsaWJzID0gW10KICAgIHRyeToKICAgICAgICBsaWJzID0gX3BhcnNlX2xpYnJhcnlmb2xkZXJzX3ZkZihzdGVhbWFwcHMgLyAibGlicmFyeWZvbGRlcnMudmRmIikKICAgIGV4Y2VwdCBFeGNlcHRpb246CiAgICAgICAgbGlicyA9IFtdCiAgICAjIEFsd2F5cyBpbmNsdWRlIHJvb3Qgc3RlYW1hcHBzCiAgICBpZiByb290IG5vdCBpbiBsaWJzOgogICAgICAgIGxpYnMuYXBwZW5kKHJvb3QpCiAgICAjIFNjYW4gbWFuaWZlc3RzIGluIGVhY2ggbGlicmFyeSdzIHN0ZWFtYXBwcwogICAgZm9yIGxpYl9yb290IGluIGxpYnM6CiAgICAgICAgc2EgPSBsaWJfcm9vdCAvICJzdGVhbWFwcHMiCiAgICAgICAgaWYgbm90IHNhLmV4aXN0cygpOgogICAgICAgICAgICBjb250aW51ZQogICAgICAgIGZvciBtZiBpbiBzYS5nbG9iKCJhcHBtYW5pZmVzdF8qLmFjZiIpOgogICAgICAgICAgICAjIGFwcG1hbmlmZXN0XzEyMzQ1LmFjZgogICAgICAgICAgICBtID0gcmUuc2VhcmNoKHIiYXBwbWFuaWZlc3RfKFxkKylcLmFjZiQiLCBtZi5uYW1lLCByZS5JKQogICAgICAgICAgICBpZiBtOgogICAgICAgICAgICAgICAgYXBwaWRzLmFkZChtLmdyb3VwKDEpKQogICAgICAgICAgICBlbHNlOgogICAgICAgICAgICAgICAgIyBmYWxsYmFjazogdHJ5IHJlYWRpbmcgZmlsZSBmb3IgImFwcGlkIiAiMTIzNDUiCiAgICAgICAgICAgICAgICB0cnk6CiAgICAgICAgICAgICAgICAgICAgdCA9IG1mLnJlYWRfdGV4dChlbmNvZGluZz0idXRmLTgiLCBlcnJvcnM9Imlnbm9yZSIpCiAgICAgICAgICAgICAgICAgICAgbTIgPSByZS5zZWFyY2gociciYXBwaWQiXHMqIihcZCspIicsIHQpCiAgICAgICAgICAgICAgICAgICAgaWYgbTI6CiAgICAgICAgICAgICAgICAgICAgICAgIGFwcGlkcy5hZGQobTIuZ3JvdXAoMSkpCiAgICAgICAgICAgICAgICBleGNlcHQgRXhjZXB0aW9uOgogICAgICAgICAgICAgICAgICAgIHBhc3MKICAgIHJldHVybiBhcHBpZHMKCmRlZiBpbXBvcnRfb3duZWRfZ2FtZXNfdG9fZGIoZGI6IERpY3Rbc3RyLCBBbnldLCBwYXlsb2FkOiBkaWN0LCBpbnN0YWxsZWRfb25seTogYm9vbCA9IFRydWUpIC0+IFR1cGxlW2ludCwgaW50XToKICAgIHRyeToKICAgICAgICBnYW1lcyA9IHBheWxvYWQuZ2V0KCJyZXNwb25zZSIsIHt9KS5nZXQoImdhbWVzIiwgW10pCiAgICAgICAgaW5zdGFsbGVkID0gZ2V0X2luc3RhbGxlZF9zdGVhbV9hcHBpZHMoKSBpZiBpbnN0YWxsZWRfb25seSBlbHNlIHNldCgpCiAgICBleGNlcHQgRXhjZXB0aW9uOgogICAgICAgIGdhbWVzID0gW10KICAgIGlmIG5vdCBpc2luc3RhbmNlKGdhbWVzLCBsaXN0KToKICAgICAgICByZXR1cm4gKDAsIDApCiAgICBleGlzdGluZyA9IHtzdHIoaXRlbS5nZXQoInN0ZWFtX2FwcGlkIiwiIikpLnN0cmlwKCkgZm9yIGl0ZW0gaW4gZGIuZ2V0KCJnYW1lcyIsIFtdKX0KICAgIGFkZGVkID0gMAogICAgc2tpcHBlZCA9IDAKICAgIGZvciBpdGVtIGluIGdhbWVzOgogICAgICAgIGFwcGlkID0gc3RyKGl0ZW0uZ2V0KCJhcHBpZCIsIiIpKS5zdHJpcCgpCiAgICAgICAgaWYgKG5vdCBhcHBpZC5pc2RpZ2l0KCkpIG9yIChhcHBpZCBpbiBleGlzdGluZykgb3IgKGluc3RhbGxlZF9vbmx5IGFuZCBhcHBpZCBub3QgaW4gaW5zdGFsbGVkKToKICAgICAgICAgICAgc2tpcHBlZCArPSAxOyBjb250aW51ZQogICAgICAgIG5hbWUgPSBpdGVtLmdldCgibmFtZSIpIG9yIGYiQXBwIHthcHBpZH0iCiAgICAgICAgZGIuc2V0ZGVmYXVsdCgiZ2FtZXMiLCBbXSkuYXBwZW5kKHsKICAgICAgICAgICAgIm5hbWUiOiBuYW1lLAogICAgICAgICAgICAic3RlYW1fYXBwaWQiOiBhcHBpZCwKICAgICAgICAgICAgImF1bWlkIjogIiIsCiAgICAgICAgICAgICJhcmdzIjogIiIsCiAgICAgICAgICAgICJleGUiOiAiIiwKICAgICAgICAgICAgInZhbGlkYXRlX3N0ZWFtIjogRmFsc2UsCiAgICAgICAgICAgICJ2YWxpZGF0ZV90aW1lb3V0IjogOTAwLAogICAgICAgICAgICAid2FpdCI6IDQ1LAogICAgICAgICAgICAicHJpb3JpdHkiOiAiSGlnaCIsCiAgICAgICAgICAgICJhZmZpbml0eSI6ICIiCiAgICAgICAgfSkKICAgICAgICBleGlzdGluZy5hZGQoYXBwaWQpCiAgICAgICAgYWRkZWQgKz0gMQogICAgcmV0dXJuIChhZGRlZCwgc2tpcHBlZCkKCmlmIF9fbmFtZV9fID09ICJfX21haW5fXyI6CiAgICBtYWluKCkKCgojIC0tLS0gU3RlYW0gdmFsaWRhdGlvbiB3aW5kb3cvdGl0bGUgaGVscGVycyAtLS0tCmltcG9ydCBjdHlwZXMKZnJvbSBjdHlwZXMgaW1wb3J0IHdpbnR5cGVz"
+
+    def _nonuwp_launcher_source():
+        src = _b64.b64decode(_NONUWP_LAUNCHER_B64).decode("utf-8", errors="ignore")
+        src = src.replace("if __name__ == '__main__':", "if __name__ == '__main__':\n    pass")
+        src = src.replace('if __name__ == "__main__":', 'if __name__ == "__main__":\n    pass')
+        return src
+
+    # Decoding + compiling only happens when the bytecode cache misses
+    _register_module_lazy("nonuwp.launcher", _NONUWP_LAUNCHER_B64, "nonuwp/launcher.py", _nonuwp_launcher_source)
 except Exception as _e:
     print("[NONUWP] embed register failed:", _e)
 # === END EMBED ===
 
 # PyQt5 -> PyQt6 shim if only PyQt6 is available
+PROFILE.begin("PyQt6 import + PyQt5 shim")
 try:
     import PyQt6.QtWidgets as _Q6W
     import PyQt6.QtCore as _Q6C
@@ -179,6 +651,7 @@ try:
     sys.modules.setdefault("PyQt5.QtGui", _Q6G)
 except Exception:
     pass
+PROFILE.end("PyQt6 import + PyQt5 shim")
 
 # === Registered helper modules ===
 _register_module("xbl_auth_device_any", "\nimport argparse, json, sys, time\n\nCANDIDATE_CLIENT_IDS = [\n    \"00000000402B5328\",  # Xbox app (commonly used for MSA device flow)\n    \"000000004C12AE6F\",  # Alternate public Xbox client id\n]\n\ndef run_device_flow(client_id: str, out_path: str) -> bool:\n    try:\n        import msal\n    except ImportError:\n        print(\"This script requires 'msal'. Install with:  py -m pip install msal\", flush=True)\n        return False\n    app = msal.PublicClientApplication(client_id, authority=\"https://login.microsoftonline.com/consumers\")\n    # IMPORTANT: Do NOT include reserved scopes (openid, profile, offline_access)\n    scopes = [\"XboxLive.signin\"]\n    flow = app.initiate_device_flow(scopes=scopes)\n    if \"user_code\" not in flow:\n        return False\n    print(\"\\n=== Microsoft Sign-in ===\")\n    print(\"Go to:\", flow[\"verification_uri\"])\n    print(\"Enter code:\", flow[\"user_code\"])\n    print(\"Then return here; this window will finish automatically.\\n\")\n    result = app.acquire_token_by_device_flow(flow)\n    if \"access_token\" not in result:\n        print(\"Sign-in failed:\", result, file=sys.stderr)\n        return False\n    data = {\n        \"access_token\": result[\"access_token\"],\n        \"refresh_token\": result.get(\"refresh_token\",\"\"),\n        \"expires_at\": int(time.time()) + int(result.get(\"expires_in\", 28800)),\n        \"obtained_at\": int(time.time()),\n        \"token_type\": result.get(\"token_type\",\"Bearer\"),\n        \"scope\": result.get(\"scope\",\"XboxLive.signin\"),\n        \"client_id\": client_id,\n    }\n    with open(out_path, \"w\", encoding=\"utf-8\") as f:\n        json.dump(data, f, indent=2)\n    print(f\"Wrote fresh tokens to: {out_path} (client_id={client_id})\")\n    return True\n\ndef main():\n    ap = argparse.ArgumentParser()\n    ap.add_argument(\"--out\", default=\"tokens.json\", help=\"Where to write tokens.json\")\n    args = ap.parse_args()\n    for cid in CANDIDATE_CLIENT_IDS:\n        ok = run_device_flow(cid, args.out)\n        if ok:\n            return\n        else:\n            print(f\"Client {cid} failed, trying next\u2026\")\n    print(\"All client IDs failed. Ensure you are on a Microsoft Account (MSA) and try again.\", file=sys.stderr)\n    sys.exit(2)\n\nif __name__ == \"__main__\":\n    main()\n", "xbl_auth_device_any.py")
@@ -250,11 +723,13 @@ _register_module("xbl_profile_widget", "\nfrom __future__ import annotations\nim
 _register_module("xbl.xbl_profile_widget", "\nfrom __future__ import annotations\nimport sys, os, threading, time\nfrom pathlib import Path\nfrom urllib.parse import urlparse, urlunparse, urlencode, parse_qs, quote\nfrom PyQt6 import QtWidgets, QtCore\nfrom PyQt6.QtGui import QPixmap\nimport requests\n\n_HEADERS_INJECTED = None\n\ndef set_global_xbl_headers(h):\n    global _HEADERS_INJECTED\n    _HEADERS_INJECTED = h\n\ndef _possible_token_paths():\n    paths = []\n    env = os.environ.get(\"XBL_TOKENS_PATH\")\n    if env:\n        paths.append(Path(env))\n    paths.append(Path(os.getcwd()) / \"tokens.json\")\n    try:\n        here = Path(__file__).resolve().parent\n        paths.append(here / \"tokens.json\")\n    except Exception:\n        pass\n    local = Path(os.environ.get(\"LOCALAPPDATA\", Path.home())) / \"OpenXbox\" / \"xbox\" / \"tokens.json\"\n    paths.append(local)\n    return paths\n\ndef _read_headers_from_tokens():\n    from xbl_signin_from_oauth_tokens import get_xsts_from_tokens\n    last_err = None\n    for p in _possible_token_paths():\n        try:\n            if p.is_file():\n                print(f\"[xbl_profile_widget] using tokens.json at: {p}\")\n                info = get_xsts_from_tokens(str(p))\n                h = {\"Authorization\": info[\"Authorization\"], \"x-xbl-contract-version\": \"3\", \"Accept\": \"application/json\"}\n                return h\n        except Exception as e:\n            last_err = e\n            print(f\"[xbl_profile_widget] failed tokens at {p}: {e}\")\n    if last_err:\n        raise last_err\n    raise FileNotFoundError(\"tokens.json not found in any known location.\")\n\ndef _get_headers():\n    if _HEADERS_INJECTED:\n        h = dict(_HEADERS_INJECTED)\n        h.setdefault(\"Accept\", \"application/json\")\n        h.setdefault(\"x-xbl-contract-version\", \"3\")\n        return h\n    try:\n        return _read_headers_from_tokens()\n    except Exception as e:\n        print(\"[xbl_profile_widget] header load error:\", e)\n        return None\n\ndef _fetch_profile(headers):\n    url = \"https://profile.xboxlive.com/users/me/profile/settings?settings=Gamertag,GameDisplayPicRaw\"\n    print(\"[xbl_profile_widget] GET profile:\", url)\n    r = requests.get(url, headers=headers, timeout=8)\n    print(\"[xbl_profile_widget] profile status:\", r.status_code)\n    r.raise_for_status()\n    data = r.json()\n    user = (data.get(\"profileUsers\") or [None])[0] or {}\n    settings = {s.get(\"id\"): s.get(\"value\") for s in user.get(\"settings\", [])}\n    return settings.get(\"Gamertag\") or \"(unknown)\", settings.get(\"GameDisplayPicRaw\")\n\ndef _avatar_variants(u: str):\n    variants = []\n    try:\n        parsed = urlparse(u)\n        q = parse_qs(parsed.query)\n        inner = q.get(\"url\", [\"\"])[0]\n        if inner and (\"%2F\" not in inner and \"://\" in inner):\n            inner = quote(inner, safe=\"\")\n        base_q = {\"url\": inner} if inner else {}\n        size_opts = [\n            {\"w\": \"64\", \"h\": \"64\", \"format\": \"png\"},\n            {\"w\": \"128\", \"h\": \"128\", \"format\": \"png\"},\n            {\"w\": \"208\", \"h\": \"208\", \"format\": \"png\"},\n        ]\n        hosts = [\"images-eds-ssl.xboxlive.com\", \"images-eds.xboxlive.com\"]\n        for h in hosts:\n            for so in size_opts:\n                qd = dict(base_q); qd.update(so)\n                new = parsed._replace(scheme=\"https\", netloc=h, query=urlencode(qd, doseq=True), path=\"/image\")\n                variants.append(urlunparse(new))\n        variants.append(u)\n    except Exception:\n        variants.append(u)\n    seen = set(); out = []\n    for v in variants:\n        if v not in seen:\n            out.append(v); seen.add(v)\n    return out\n\ndef _download_avatar(url: str, timeout: int = 8) -> QPixmap | None:\n    ua = {\"User-Agent\": \"Mozilla/5.0\", \"Accept\": \"image/*\"}\n    variants = _avatar_variants(url)\n    last_err = None\n    for i, v in enumerate(variants, 1):\n        try:\n            print(f\"[xbl_profile_widget] avatar try {i}/{len(variants)}:\", v)\n            r = requests.get(v, headers=ua, timeout=8, allow_redirects=True)\n            print(\"[xbl_profile_widget] avatar status:\", r.status_code, \"len:\", len(r.content))\n            r.raise_for_status()\n            if not r.content:\n                raise RuntimeError(\"empty image\")\n            pm = QPixmap()\n            if pm.loadFromData(r.content):\n                return pm\n            last_err = RuntimeError(\"QPixmap load failed\")\n        except Exception as e:\n            last_err = e\n            print(f\"[xbl_profile_widget] avatar error:\", e)\n            time.sleep(0.1 if i < len(variants) else 0)\n    if last_err:\n        print(f\"[xbl_profile_widget] avatar failed: {last_err}\")\n    return None\n\nclass XboxProfileWidget(QtWidgets.QWidget):\n    profileReady = QtCore.pyqtSignal(str)     # gamertag\n    profileError = QtCore.pyqtSignal()\n    avatarReady  = QtCore.pyqtSignal(object)  # QPixmap\n\n    def __init__(self, parent=None):\n        super().__init__(parent)\n        row = QtWidgets.QHBoxLayout(self)\n        row.setContentsMargins(0,0,0,0)\n        self.lbl_avatar = QtWidgets.QLabel()\n        self.lbl_avatar.setFixedSize(48, 48)\n        self.lbl_avatar.setStyleSheet(\"border-radius:10px;background:#222;\")\n        self.lbl_name = QtWidgets.QLabel(\"<i>Not signed in</i>\")\n        self.lbl_name.setMinimumWidth(160)\n        self.btn_refresh = QtWidgets.QPushButton(\"Refresh\")\n        row.addWidget(self.lbl_avatar)\n        row.addSpacing(8)\n        row.addWidget(self.lbl_name)\n        row.addStretch(1)\n        row.addWidget(self.btn_refresh)\n\n        self._refreshing = False\n        self.btn_refresh.clicked.connect(self.refresh)\n\n        # Connect signals to UI slots (runs on main thread)\n        self.profileReady.connect(self._on_profile_ready)\n        self.profileError.connect(self._on_profile_error)\n        self.avatarReady.connect(self._on_avatar_ready)\n\n        QtCore.QTimer.singleShot(0, self.refresh)\n\n    def set_headers(self, headers: dict | None):\n        set_global_xbl_headers(headers)\n\n    @QtCore.pyqtSlot(str)\n    def _on_profile_ready(self, gamertag: str):\n        self.lbl_name.setText(gamertag)\n        self._refreshing = False\n\n    @QtCore.pyqtSlot()\n    def _on_profile_error(self):\n        self.lbl_name.setText(\"Profile error\")\n        self._refreshing = False\n\n    @QtCore.pyqtSlot(object)\n    def _on_avatar_ready(self, pm: QPixmap):\n        scaled = pm.scaled(48, 48, QtCore.Qt.AspectRatioMode.KeepAspectRatioByExpanding, QtCore.Qt.TransformationMode.SmoothTransformation)\n        self.lbl_avatar.setPixmap(scaled)\n\n    def refresh(self):\n        if self._refreshing:\n            return\n        self._refreshing = True\n        self.lbl_name.setText(\"Fetching...\")\n\n        def run_profile():\n            headers = _get_headers()\n            if not headers:\n                self.profileError.emit()\n                return\n            try:\n                gt, pic = _fetch_profile(headers)\n                self.profileReady.emit(gt)  # emit immediately (no timer races)\n                if pic:\n                    def run_avatar():\n                        pm = _download_avatar(pic, timeout=8)\n                        if pm:\n                            self.avatarReady.emit(pm)\n                    threading.Thread(target=run_avatar, daemon=True).start()\n            except Exception as e:\n                print(\"[xbl_profile_widget] profile fetch error:\", e)\n                self.profileError.emit()\n        threading.Thread(target=run_profile, daemon=True).start()\n\nif __name__ == \"__main__\":\n    app = QtWidgets.QApplication(sys.argv)\n    w = QtWidgets.QWidget()\n    w.setWindowTitle(\"Xbox Profile\")\n    lay = QtWidgets.QVBoxLayout(w)\n    lay.setContentsMargins(12,12,12,12)\n    lay.addWidget(XboxProfileWidget())\n    w.resize(320, 80)\n    w.show()\n    sys.exit(app.exec())\n", "xbl/xbl_profile_widget.py")
 _register_module("xbl_signin_from_oauth_tokens", "\nimport json, requests, pathlib, os\n\nXBL_USER_AUTH = \"https://user.auth.xboxlive.com/user/authenticate\"\nXBL_XSTS_AUTH = \"https://xsts.auth.xboxlive.com/xsts/authorize\"\n\ndef get_xsts_from_tokens(tokens_path):\n    tokens_path = pathlib.Path(tokens_path)\n    data = json.loads(tokens_path.read_text())\n    access = data[\"access_token\"]\n    # user token\n    payload_user = {\n        \"RelyingParty\": \"http://auth.xboxlive.com\",\n        \"TokenType\": \"JWT\",\n        \"Properties\": {\n            \"AuthMethod\": \"RPS\",\n            \"SiteName\": \"user.auth.xboxlive.com\",\n            \"RpsTicket\": f\"d={access}\"\n        }\n    }\n    r = requests.post(XBL_USER_AUTH, json=payload_user, headers={\"Content-Type\":\"application/json\"})\n    r.raise_for_status()\n    j = r.json()\n    user_token = j[\"Token\"]\n    uhs = j[\"DisplayClaims\"][\"xui\"][0][\"uhs\"]\n\n    # xsts\n    payload_xsts = {\n        \"RelyingParty\": \"http://xboxlive.com\",\n        \"TokenType\": \"JWT\",\n        \"Properties\": {\n            \"UserTokens\": [user_token],\n            \"SandboxId\": \"RETAIL\"\n        }\n    }\n    r2 = requests.post(XBL_XSTS_AUTH, json=payload_xsts, headers={\"Content-Type\":\"application/json\"})\n    r2.raise_for_status()\n    j2 = r2.json()\n    xsts = j2[\"Token\"]\n    uhs2 = j2[\"DisplayClaims\"][\"xui\"][0][\"uhs\"]\n    return {\"Authorization\": f\"XBL3.0 x={uhs2};{xsts}\"}\n", "xbl_signin_from_oauth_tokens.py")
 _register_module("xbl.xbl_signin_from_oauth_tokens", "\nimport json, requests, pathlib, os\n\nXBL_USER_AUTH = \"https://user.auth.xboxlive.com/user/authenticate\"\nXBL_XSTS_AUTH = \"https://xsts.auth.xboxlive.com/xsts/authorize\"\n\ndef get_xsts_from_tokens(tokens_path):\n    tokens_path = pathlib.Path(tokens_path)\n    data = json.loads(tokens_path.read_text())\n    access = data[\"access_token\"]\n    # user token\n    payload_user = {\n        \"RelyingParty\": \"http://auth.xboxlive.com\",\n        \"TokenType\": \"JWT\",\n        \"Properties\": {\n            \"AuthMethod\": \"RPS\",\n            \"SiteName\": \"user.auth.xboxlive.com\",\n            \"RpsTicket\": f\"d={access}\"\n        }\n    }\n    r = requests.post(XBL_USER_AUTH, json=payload_user, headers={\"Content-Type\":\"application/json\"})\n    r.raise_for_status()\n    j = r.json()\n    user_token = j[\"Token\"]\n    uhs = j[\"DisplayClaims\"][\"xui\"][0][\"uhs\"]\n\n    # xsts\n    payload_xsts = {\n        \"RelyingParty\": \"http://xboxlive.com\",\n        \"TokenType\": \"JWT\",\n        \"Properties\": {\n            \"UserTokens\": [user_token],\n            \"SandboxId\": \"RETAIL\"\n        }\n    }\n    r2 = requests.post(XBL_XSTS_AUTH, json=payload_xsts, headers={\"Content-Type\":\"application/json\"})\n    r2.raise_for_status()\n    j2 = r2.json()\n    xsts = j2[\"Token\"]\n    uhs2 = j2[\"DisplayClaims\"][\"xui\"][0][\"uhs\"]\n    return {\"Authorization\": f\"XBL3.0 x={uhs2};{xsts}\"}\n", "xbl/xbl_signin_from_oauth_tokens.py")
+PROFILE.end("embedded modules: register")
 
 
 # === Embedded patches to avoid external helper files ===
-try:
-    import xbl_friends_dock_INLINE_v5_REFRESH_UI_v2_PATCHED as _fd
+# Applied as a post-import hook: the dock module is only loaded when the
+# Friends UI is first opened.
+def _patch_embedded_friends_dock(_fd):
     # Resolve FriendsDock class
     FriendsDock = getattr(_fd, "FriendsDock", None)
     if FriendsDock is not None:
@@ -480,9 +955,8 @@ try:
             FriendsDock.__init__ = _uwpla_friends_init
             FriendsDock._uwpla_on_set_rows = _uwpla_on_set_rows
 
-except Exception as _e:
-    # Non-fatal; app will still run and can fall back to original behavior
-    pass
+# Non-fatal if it fails; the hook runner logs and the dock keeps its original behavior
+on_embedded_import("xbl_friends_dock_INLINE_v5_REFRESH_UI_v2_PATCHED", _patch_embedded_friends_dock)
 # === End embedded patches ===
 
 # === Begin main app (executed at top-level) ===
@@ -511,6 +985,7 @@ except Exception:
 # === Add-only: XBL compat shims (package path, legacy import alias, token loader) ===
 
 # === Add-only: SSL certs for frozen builds ===
+PROFILE.begin("certifi")
 try:
     import certifi, os as _os
     _ca = certifi.where()
@@ -518,6 +993,7 @@ try:
     _os.environ.setdefault("REQUESTS_CA_BUNDLE", _ca)
 except Exception:
     pass
+PROFILE.end("certifi")
 # === End SSL certs ===
 
 import sys, os, json
@@ -840,6 +1316,180 @@ def _iter_plugin_files():
             continue
 
 
+# --- Plugin manifests (lazy plugins) – ADD-ONLY ---
+#
+# A plugin can describe the menu actions / sidebar buttons it contributes
+# without being imported, either as a literal module-level dict
+#
+#     PLUGIN_MANIFEST = {
+#         "name": "YouTube Player", "version": "1.3.0", "description": "...",
+#         "menu": [{"path": "YouTube/YouTube Player…", "action": "open_player"}],
+#         "sidebar": [{"text": "▶", "tooltip": "YouTube Player", "action": "open_player"}],
+#     }
+#
+# (read with ast, never executed) or as a sidecar <stem>.plugin.json with the
+# same keys. The launcher adds those entries at startup and imports the
+# plugin the first time one is triggered; "action" names a module-level
+# function that is called with the main window. register_plugin() is not
+# called for manifest plugins. "lazy": false keeps the old eager behavior.
+
+PLUGIN_MANIFEST_NAME = "PLUGIN_MANIFEST"
+PLUGIN_MANIFEST_SUFFIX = ".plugin.json"
+
+
+def _parse_plugin_manifest_source(path):
+    """Literal PLUGIN_MANIFEST dict from a plugin's source, without importing it."""
+    import ast, re
+    with open(path, "rb") as f:
+        src = f.read()
+    if PLUGIN_MANIFEST_NAME.encode() not in src:
+        return None
+    # Parse just the top-level assignment (up to the next unindented
+    # statement); the whole module only if that snippet doesn't parse.
+    text = src.decode("utf-8", errors="replace")
+    m = re.search(rf"^{PLUGIN_MANIFEST_NAME}\s*(:[^=\n]*)?=", text, re.M)
+    tree = None
+    if m:
+        end = re.compile(r"^[^\s#)\]}]", re.M).search(text, text.find("\n", m.start()) + 1)
+        try:
+            tree = ast.parse(text[m.start():end.start() if end else len(text)])
+        except SyntaxError:
+            tree = None
+    if tree is None:
+        tree = ast.parse(src, filename=str(path))
+    for node in tree.body:
+        if isinstance(node, ast.Assign):
+            targets, value = node.targets, node.value
+        elif isinstance(node, ast.AnnAssign) and node.value is not None:
+            targets, value = [node.target], node.value
+        else:
+            continue
+        if any(isinstance(t, ast.Name) and t.id == PLUGIN_MANIFEST_NAME for t in targets):
+            return ast.literal_eval(value)
+    return None
+
+
+def _read_plugin_manifest(path):
+    """Normalized manifest for a plugin file, or None if it has none (or it is invalid)."""
+    path = Path(path)
+    raw = None
+    try:
+        sidecar = path.with_name(path.stem + PLUGIN_MANIFEST_SUFFIX)
+        if sidecar.is_file():
+            raw = _read_json_file(sidecar)
+        else:
+            raw = _parse_plugin_manifest_source(path)
+    except Exception as e:
+        print(f"[plugins] manifest for {path.name} ignored: {e}")
+        return None
+    if not isinstance(raw, dict):
+        return None
+
+    def _entries(key, required):
+        out = []
+        for item in raw.get(key) or []:
+            if isinstance(item, dict) and all(str(item.get(k) or "").strip() for k in required):
+                out.append(dict(item))
+        return out
+
+    menu = _entries("menu", ("path", "action"))
+    for item in menu:
+        p = item["path"]
+        item["path"] = [str(x) for x in p] if isinstance(p, (list, tuple)) else str(p).split("/")
+    sidebar = _entries("sidebar", ("text", "action"))
+    return {
+        "name": str(raw.get("name") or path.stem),
+        "version": str(raw.get("version") or ""),
+        "description": str(raw.get("description") or ""),
+        "lazy": bool(raw.get("lazy", True)) and bool(menu or sidebar),
+        "menu": menu,
+        "sidebar": sidebar,
+    }
+
+
+def _plugin_ensure_loaded(window, entry):
+    """Import a deferred plugin (once) and record its import cost on the metadata entry."""
+    mod = entry.get("module_object")
+    if mod is not None:
+        return mod
+    import importlib
+    t_import = time.perf_counter_ns()
+    try:
+        mod = importlib.import_module(entry["module"])
+    except Exception as e:
+        entry["error"] = str(e)
+        entry["state"] = "error"
+        raise
+    finally:
+        entry["import_ms"] = round((time.perf_counter_ns() - t_import) / 1e6, 2)
+    try:
+        setattr(mod, "__plugin_path__", entry.get("path", ""))
+    except Exception:
+        pass
+    entry["module_object"] = mod
+    entry["state"] = "loaded"
+    try:
+        window._plugins.append(mod)
+    except Exception:
+        pass
+    PROFILE.record(f"plugin {entry['name']}", "plugin", t_import, time.perf_counter_ns(),
+                   plugin=entry["name"], module=entry["module"], import_ms=entry["import_ms"],
+                   deferred=True)
+    return mod
+
+
+def _plugin_trigger(window, entry, action):
+    """Menu/sidebar handler for manifest entries: import on first use, then call the action."""
+    try:
+        mod = _plugin_ensure_loaded(window, entry)
+        fn = getattr(mod, action, None)
+        if not callable(fn):
+            raise AttributeError(f"plugin has no function {action!r}")
+        fn(window)
+    except Exception as e:
+        try:
+            window._append(f"[plugin:{entry.get('module')}] {action} failed: {e}")
+            window._show_toast(f"Plugin {entry.get('name')}: {e}", "error")
+        except Exception:
+            pass
+
+
+def _plugin_submenu(menu, title):
+    """Reuse an existing submenu with this title (plugins share e.g. "Steam")."""
+    try:
+        for act in menu.actions():
+            sub = act.menu()
+            if sub is not None and sub.title().replace("&", "").strip().lower() == title.strip().lower():
+                return sub
+    except Exception:
+        pass
+    return menu.addMenu(title)
+
+
+def _install_plugin_manifest(window, entry, manifest):
+    """Add a deferred plugin's menu actions and sidebar buttons to the main window."""
+    menu_root = getattr(window, "menu_actions", None)
+    if isinstance(menu_root, QtWidgets.QMenu):
+        for item in manifest["menu"]:
+            menu = menu_root
+            *parents, label = item["path"]
+            for title in parents:
+                menu = _plugin_submenu(menu, title)
+            act = menu.addAction(label)
+            if item.get("tooltip"):
+                act.setToolTip(str(item["tooltip"]))
+            act.triggered.connect(lambda _c=False, a=item["action"]: _plugin_trigger(window, entry, a))
+    sidebar = getattr(window, "_sidebar_plugins", None)
+    if sidebar is not None:
+        for item in manifest["sidebar"]:
+            btn = QtWidgets.QToolButton()
+            btn.setText(str(item["text"]))
+            btn.setToolTip(str(item.get("tooltip") or manifest["name"]))
+            btn.setAutoRaise(True)
+            btn.clicked.connect(lambda _c=False, a=item["action"]: _plugin_trigger(window, entry, a))
+            sidebar.addWidget(btn)
+
+
 def _load_launcher_plugins(window=None):
     """
     Discover and import plugin modules from scripts/ and optionally call
@@ -904,6 +1554,7 @@ def _load_launcher_plugins(window=None):
             "module": mod_name,
             "path": str(path),
             "enabled": bool(enabled),
+            "state": "disabled",
         }
         try:
             if not enabled:
@@ -911,7 +1562,21 @@ def _load_launcher_plugins(window=None):
                 meta.append(entry)
                 continue
 
-            mod = importlib.import_module(mod_name)
+            manifest = _read_plugin_manifest(path)
+            if manifest is not None:
+                entry["manifest"] = manifest
+            if manifest is not None and manifest["lazy"] and window is not None:
+                # Register the manifest's entries now; import on first use
+                entry["state"] = "deferred"
+                _install_plugin_manifest(window, entry, manifest)
+                meta.append(entry)
+                continue
+
+            t_import = time.perf_counter_ns()
+            try:
+                mod = importlib.import_module(mod_name)
+            finally:
+                entry["import_ms"] = round((time.perf_counter_ns() - t_import) / 1e6, 2)
             loaded.append(mod)
             try:
                 setattr(mod, "__plugin_path__", str(path))
@@ -919,6 +1584,7 @@ def _load_launcher_plugins(window=None):
                 pass
 
             entry["module_object"] = mod
+            entry["state"] = "loaded"
             meta.append(entry)
 
             if window is not None:
@@ -926,6 +1592,7 @@ def _load_launcher_plugins(window=None):
                 for hook_name in ("register_plugin", "register", "init_plugin"):
                     fn = getattr(mod, hook_name, None)
                     if callable(fn):
+                        t_hook = time.perf_counter_ns()
                         try:
                             fn(window)
                         except Exception as e:
@@ -934,17 +1601,24 @@ def _load_launcher_plugins(window=None):
                                     window._append(f"[plugin:{mod_name}] hook error: {e}")
                             except Exception:
                                 pass
+                        entry["register_ms"] = round((time.perf_counter_ns() - t_hook) / 1e6, 2)
                         break
         except Exception as e:
             entry["error"] = str(e)
+            entry["state"] = "error"
             meta.append(entry)
             try:
                 if window is not None and hasattr(window, "_append"):
                     window._append(f"[plugin:{mod_name}] failed to import: {e}")
             except Exception:
                 pass
+        if "import_ms" in entry:
+            PROFILE.record(f"plugin {stem}", "plugin", t_import, time.perf_counter_ns(),
+                           plugin=stem, module=mod_name, import_ms=entry["import_ms"],
+                           register_ms=entry.get("register_ms"), error=entry.get("error"))
 
     # Optionally store lists of loaded plugins + metadata on the window
+    # (deferred plugins append to _plugins when they are first imported)
     try:
         if window is not None:
             window._plugins = loaded
@@ -957,14 +1631,8 @@ if str(_app_root()) not in sys.path:
     sys.path.insert(0, str(_app_root()))
 
 # Back-compat alias: allow old code `import xbl_signin_from_oauth_tokens`
-try:
-    import importlib
-    _alias = importlib.import_module("xbl.xbl_signin_from_oauth_tokens")
-    import types as _types
-    if "xbl_signin_from_oauth_tokens" not in sys.modules:
-        sys.modules["xbl_signin_from_oauth_tokens"] = _alias
-except Exception:
-    pass
+# (lazy: resolved by the embedded importer on first use)
+_alias_embedded("xbl_signin_from_oauth_tokens", "xbl.xbl_signin_from_oauth_tokens")
 
 def _xbl_user_dir():
     base = os.environ.get("LOCALAPPDATA", str(Path.home()))
@@ -978,12 +1646,9 @@ def _xbl_tokens_get():
         Path.cwd() / "tokens.json",
         _xbl_user_dir() / "tokens.json",
     ]
-    for c in candidates:
-        try:
-            if c.exists():
-                return json.loads(c.read_text(encoding="utf-8")), c
-        except Exception:
-            continue
+    found = CONFIG_STORE.first_existing(candidates)
+    if found:
+        return CONFIG_STORE.read_copy(found), Path(found)
     return None, candidates[-1]
 # === End compat shims ===
 
@@ -991,6 +1656,10 @@ def _xbl_tokens_get():
 try:
     import importlib, sys as _sys
     def _alias_mod(old_name, new_qualname):
+        # Embedded targets are aliased without importing them now
+        if is_embedded_module(new_qualname):
+            _alias_embedded(old_name, new_qualname)
+            return
         try:
             mod = importlib.import_module(new_qualname)
             if old_name not in _sys.modules:
@@ -1228,13 +1897,112 @@ from PyQt6 import QtWidgets, QtCore, QtGui
 
 # === ADD-ONLY: Minimal ThemeManager (Xbox green/black) ===
 from PyQt6 import QtWidgets as _QW6
+
+# Launcher widget styles, parsed once as part of the application stylesheet.
+# Widgets opt in via objectName; state that rarely changes (cover art state,
+# muted labels) is a dynamic property changed with set_style_props(), so no
+# widget ever carries its own QSS string for Qt to parse and cascade. State
+# that flips at runtime (Steam LED, toast level) is painted by the widget
+# itself (StatusLed, ToastFrame): a flip is one update(), not a re-polish.
+BASE_QSS = """
+QLabel[muted="true"] { color: gray; }
+QLabel#gameCover[art="pending"], QLabel#gameCover[art="none"] { background-color: #202020; border-radius: 4px; }
+QLabel#playtime { font-size: 10px; color: #A0A0A0; }
+QFrame#toast { color: #ffffff; padding: 8px 12px; }
+QFrame#toast > QLabel { color: #ffffff; background: transparent; }
+QFrame#gameHoverCard { background-color: #202020; color: #ffffff; border-radius: 8px; border: 1px solid #4caf50; }
+QLabel#hoverTitle { font-weight: bold; }
+QLabel#hoverMeta { color: #aaaaaa; font-size: 9pt; }
+#RefreshWidget { border: 1px solid #3c3c3c; border-radius: 6px; background-color: #202020; }
+#RefreshWidget:hover { border-color: #4caf50; background-color: #262626; }
+"""
+
+def set_style_props(widget, **props):
+    """Set dynamic properties used by BASE_QSS selectors; re-polish only if one changed."""
+    changed = False
+    for key, value in props.items():
+        if widget.property(key) != value:
+            widget.setProperty(key, value)
+            changed = True
+    if changed:
+        style = widget.style()
+        style.unpolish(widget)
+        style.polish(widget)
+        widget.update()
+    return changed
+
+class StatusLed(QtWidgets.QWidget):
+    """Round status dot (red / green); the color is picked in paintEvent."""
+    COLORS = {False: QtGui.QColor("#c62828"), True: QtGui.QColor("#00c853")}
+
+    def __init__(self, parent=None, diameter=14):
+        super().__init__(parent)
+        self._ok = False
+        self.setFixedSize(diameter, diameter)
+
+    def is_ok(self) -> bool:
+        return self._ok
+
+    def set_ok(self, ok: bool):
+        ok = bool(ok)
+        if ok != self._ok:
+            self._ok = ok
+            self.update()
+
+    def paintEvent(self, event):
+        p = QtGui.QPainter(self)
+        p.setRenderHint(QtGui.QPainter.RenderHint.Antialiasing)
+        p.setPen(QtCore.Qt.PenStyle.NoPen)
+        p.setBrush(self.COLORS[self._ok])
+        p.drawEllipse(QtCore.QRectF(self.rect()))
+        p.end()
+
+class ToastFrame(QtWidgets.QFrame):
+    """In-app toast; the background for its level is painted in paintEvent."""
+    LEVEL_COLORS = {
+        "info": QtGui.QColor("#37474f"),
+        "success": QtGui.QColor("#2e7d32"),
+        "error": QtGui.QColor("#c62828"),
+    }
+    RADIUS = 8
+
+    def __init__(self, level="info", parent=None):
+        super().__init__(parent)
+        self.setObjectName("toast")
+        self._level = "info"
+        self.set_level(level)
+
+    def level(self) -> str:
+        return self._level
+
+    def set_level(self, level: str):
+        level = level if level in self.LEVEL_COLORS else "info"
+        if level != self._level:
+            self._level = level
+            self.update()
+
+    def paintEvent(self, event):
+        p = QtGui.QPainter(self)
+        p.setRenderHint(QtGui.QPainter.RenderHint.Antialiasing)
+        p.setPen(QtCore.Qt.PenStyle.NoPen)
+        p.setBrush(self.LEVEL_COLORS[self._level])
+        p.drawRoundedRect(QtCore.QRectF(self.rect()), self.RADIUS, self.RADIUS)
+        p.end()
+        super().paintEvent(event)
+
 class ThemeManager:
-    def __init__(self, app):
-        self.app = app
-    def apply(self, name: str):
-        if name == "xbox_original":
-            qss = """
-            QWidget { background-color: #0b0f0c; color: #e9f0e8; selection-background-color: #107C10; }
+    # Colors go through the palette (no per-widget QSS matching); the theme
+    # stylesheet only adds what a palette can't express (borders, radii).
+    PALETTES = {
+        "xbox_original": {
+            "Window": "#0b0f0c", "WindowText": "#e9f0e8", "Base": "#0d120d",
+            "AlternateBase": "#111711", "Text": "#e9f0e8", "Button": "#121712",
+            "ButtonText": "#e9f0e8", "Highlight": "#107C10", "HighlightedText": "#ffffff",
+            "ToolTipBase": "#0e140f", "ToolTipText": "#e9f0e8", "PlaceholderText": "#7f9a7f",
+        },
+    }
+    QSS = {
+        "xbox_original": """
             QMenuBar, QMenu { background-color: #0e140f; color: #e9f0e8; }
             QMenuBar::item:selected, QMenu::item:selected { background-color: #107C10; }
             QPushButton, QToolButton, QComboBox, QLineEdit, QSpinBox, QDoubleSpinBox {
@@ -1244,15 +2012,26 @@ class ThemeManager:
                 border: 1px solid #2fae27;
             }
             QHeaderView::section { background-color: #101510; color: #cfe5cf; border: 1px solid #1a8f13; padding: 4px; }
-            QTableView, QTreeView, QTableWidget, QTreeWidget { gridline-color: #1a8f13; background-color: #0d120d; alternate-background-color: #111711; }
+            QTableView, QTreeView, QTableWidget, QTreeWidget { gridline-color: #1a8f13; }
             QScrollBar::handle { background: #107C10; border-radius: 4px; min-height: 20px; min-width: 20px; }
             QProgressBar { background-color: #0e140f; border: 1px solid #1a8f13; border-radius: 6px; text-align: center; color: #e9f0e8; }
             QProgressBar::chunk { background-color: #107C10; margin: 1px; border-radius: 5px; }
-            """
-        else:
-            qss = ""
+            """,
+    }
+
+    def __init__(self, app):
+        self.app = app
+
+    def palette(self, name: str):
+        pal = self.app.style().standardPalette()
+        for role, color in self.PALETTES.get(name, {}).items():
+            pal.setColor(getattr(QtGui.QPalette.ColorRole, role), QtGui.QColor(color))
+        return pal
+
+    def apply(self, name: str):
         try:
-            self.app.setStyleSheet(qss)
+            self.app.setPalette(self.palette(name))
+            self.app.setStyleSheet(BASE_QSS + self.QSS.get(name, ""))
         except Exception:
             pass
 # === END ADD-ONLY ThemeManager ===
@@ -1262,23 +2041,10 @@ from pathlib import Path
 
 # ---- XBL token helpers (shared) ----
 def _discover_tokens_path():
-    # 1) explicit env
-    p = os.environ.get("XBL_TOKENS_PATH")
-    if p and Path(p).is_file():
-        return p
-    # 2) working dir
-    p2 = Path(os.getcwd()) / "tokens.json"
-    if p2.is_file():
-        return str(p2)
-    # 3) next to this script
-    p3 = Path(__file__).with_name("tokens.json")
-    if p3.is_file():
-        return str(p3)
-    # 4) OpenXbox default
-    p4 = Path(os.environ.get("LOCALAPPDATA", os.path.expanduser("~"))) / "OpenXbox" / "xbox" / "tokens.json"
-    if p4.is_file():
-        return str(p4)
-    return None
+    # Order: explicit env, working dir, next to this script, OpenXbox default.
+    # The hit is cached briefly by CONFIG_STORE instead of stat'ing all four each call.
+    env, cwd, local = _tokens_candidates()
+    return CONFIG_STORE.first_existing((env, cwd, Path(__file__).with_name("tokens.json"), local))
 
 
 
@@ -1303,12 +2069,75 @@ try:
     def __fd_cache_path(self):
         return __cfg_root / "friends_cache.json"
 
-    # Only override if methods exist on the class
-    if 'FriendsDock' in globals():
+    # Settings are read from disk once per dock and then served from memory;
+    # saves go through the launcher's write-behind queue instead of re-reading
+    # and rewriting friends_settings.json on every toggle.
+    def __fd_load_settings(self):
+        mem = getattr(self, '_uwpla_settings_mem', None)
+        if mem is None:
+            mem = {}
+            try:
+                p = str(self._settings_path())
+                data = _WRITE_BEHIND.peek(p)
+                if data is None and os.path.exists(p):
+                    with open(p, "r", encoding="utf-8", errors="ignore") as f:
+                        raw = f.read()
+                    data = json.loads(raw) if raw.strip() else {}
+                if isinstance(data, dict):
+                    mem = data
+            except Exception:
+                pass
+            self._uwpla_settings_mem = mem
+        return dict(mem)
+
+    def __fd_save_settings(self, **updates):
+        try:
+            __fd_load_settings(self)
+            self._uwpla_settings_mem.update(updates)
+            write_json_later(str(self._settings_path()), self._uwpla_settings_mem, ensure_ascii=False, indent=0)
+        except Exception:
+            pass
+
+    # Cached friends rows come from a marshal snapshot when friends_cache.json is unchanged
+    def __fd_load_cached_rows(self):
+        try:
+            p = str(self._cache_path())
+            if not os.path.exists(p):
+                return False
+
+            def _parse():
+                with open(p, "r", encoding="utf-8", errors="ignore") as f:
+                    raw = f.read()
+                arr = json.loads(raw) if raw.strip() else []
+                return [(d.get("gamertag", ""), d.get("status", ""), d.get("game", "")) for d in arr]
+
+            rows = snapshot_load("friends cache", (p,), snapshot_path_for(p), _parse,
+                                 from_snapshot=lambda rs: [tuple(r) for r in rs])
+            if rows:
+                self.sig_set_rows.emit(list(rows))
+                self.sig_set_status.emit(f"Restored {len(rows)} cached friends")
+                return True
+            return False
+        except Exception:
+            return False
+
+    # Only override if methods exist on the class (applied when the dock module loads)
+    def __fd_apply_overrides(mod):
+        FriendsDock = getattr(mod, 'FriendsDock', None)
+        if FriendsDock is None:
+            return
         if hasattr(FriendsDock, '_settings_path'):
             FriendsDock._settings_path = __fd_settings_path
         if hasattr(FriendsDock, '_cache_path'):
             FriendsDock._cache_path = __fd_cache_path
+        if hasattr(FriendsDock, '_load_settings'):
+            FriendsDock._load_settings = __fd_load_settings
+        if hasattr(FriendsDock, '_save_settings'):
+            FriendsDock._save_settings = __fd_save_settings
+        if hasattr(FriendsDock, '_load_cached_rows'):
+            FriendsDock._load_cached_rows = __fd_load_cached_rows
+
+    on_embedded_import("xbl_friends_dock_INLINE_v5_REFRESH_UI_v2_PATCHED", __fd_apply_overrides)
 except Exception:
     pass
 import subprocess, sys as _sys
@@ -1336,31 +2165,42 @@ def _launch_friends_popup_external():
     # nothing worked
     return
 
-# Optional Xbox Friends dock
-try:
-    # Try several module names for the friends dock
-    FriendsDock = None
-    try:
-        from xbl_friends_dock import FriendsDock as _FD
-        FriendsDock = _FD
-    except Exception:
+# Optional Xbox Friends dock (resolved on first use, not at startup)
+_FRIENDS_DOCK_CLASS = False      # False = not resolved yet
+
+def _friends_dock_class():
+    global _FRIENDS_DOCK_CLASS
+    if _FRIENDS_DOCK_CLASS is False:
+        # Try several module names for the friends dock
+        FriendsDock = None
         try:
-            from xbl_friends_dock_INLINE_v5_REFRESH_UI_v2_PATCHED import FriendsDock as _FD
+            from xbl_friends_dock import FriendsDock as _FD
             FriendsDock = _FD
         except Exception:
             try:
-                from xbl_friends_dock_INLINE_v5_REFRESH_UI_v2 import FriendsDock as _FD
+                from xbl_friends_dock_INLINE_v5_REFRESH_UI_v2_PATCHED import FriendsDock as _FD
                 FriendsDock = _FD
             except Exception:
-                FriendsDock = None
-except Exception:
-    FriendsDock = None
+                try:
+                    from xbl_friends_dock_INLINE_v5_REFRESH_UI_v2 import FriendsDock as _FD
+                    FriendsDock = _FD
+                except Exception:
+                    FriendsDock = None
+        _FRIENDS_DOCK_CLASS = FriendsDock
+    return _FRIENDS_DOCK_CLASS
 
-# --- Optional Xbox profile widget ---
-try:
-    from xbl_profile_widget import XboxProfileWidget
-except Exception:
-    XboxProfileWidget = None
+# --- Optional Xbox profile widget (imported when the window builds it) ---
+_PROFILE_WIDGET_CLASS = False
+
+def _xbox_profile_widget_class():
+    global _PROFILE_WIDGET_CLASS
+    if _PROFILE_WIDGET_CLASS is False:
+        try:
+            from xbl_profile_widget import XboxProfileWidget
+        except Exception:
+            XboxProfileWidget = None
+        _PROFILE_WIDGET_CLASS = XboxProfileWidget
+    return _PROFILE_WIDGET_CLASS
 
 
 # ---- Xbox Live helpers (optional) ----
@@ -1368,11 +2208,18 @@ except Exception:
 _XBL_IMPORT_ERR = ""
 _XBL_IMPORT_OK = False
 _XBL_TOKENS_OK = False
-try:
-    from xbl_signin_from_oauth_tokens import get_xsts_from_tokens as _xbl_tokens_get
+if is_embedded_module("xbl_signin_from_oauth_tokens"):
+    # Embedded helper (pulls in requests): import it on the first sign-in, not at startup
+    def _xbl_tokens_get(*args, **kwargs):
+        from xbl_signin_from_oauth_tokens import get_xsts_from_tokens
+        return get_xsts_from_tokens(*args, **kwargs)
     _XBL_TOKENS_OK = True
-except Exception as _e:
-    _XBL_IMPORT_ERR = str(_e)
+else:
+    try:
+        from xbl_signin_from_oauth_tokens import get_xsts_from_tokens as _xbl_tokens_get
+        _XBL_TOKENS_OK = True
+    except Exception as _e:
+        _XBL_IMPORT_ERR = str(_e)
 
 try:
     from xbl_signin_standalone import get_xsts as _xbl_get_xsts
@@ -1386,16 +2233,18 @@ except Exception as _e:
 UWPHOOK_EXE = ""  # no default path; will be resolved at runtime and saved in settings.json
 
 # ---- UWPHook path resolver (first-run friendly) ----
-def _resolve_uwphook_path(parent=None):
+def _resolve_uwphook_path(parent=None, prompt=True):
     """
     Return a valid path to UWPHook.exe.
     Order:
       1) settings.json → 'uwphook_path'
       2) same folder as this script
-      3) prompt the user to locate it (then persist to settings.json)
+      3) prompt the user to locate it (then persist to settings.json);
+         skipped when prompt=False or there is no QApplication (headless
+         --launch), where a file dialog would abort the process
     """
     try:
-        settings = load_settings()
+        settings = settings_view()
     except Exception:
         settings = {}
 
@@ -1415,7 +2264,7 @@ def _resolve_uwphook_path(parent=None):
             if c and os.path.isfile(c):
                 if (settings or {}).get("uwphook_path") != c:
                     try:
-                        s = dict(settings or {})
+                        s = load_settings()
                         s["uwphook_path"] = c
                         save_settings(s)
                     except Exception:
@@ -1427,6 +2276,8 @@ def _resolve_uwphook_path(parent=None):
     # Not found → ask user
     try:
         from PyQt6 import QtWidgets
+        if not prompt or QtWidgets.QApplication.instance() is None:
+            return ""
         fname, _ = QtWidgets.QFileDialog.getOpenFileName(
             parent,
             "Locate UWPHook.exe",
@@ -1435,7 +2286,7 @@ def _resolve_uwphook_path(parent=None):
         )
         if fname and os.path.basename(fname).lower() == "uwphook.exe" and os.path.isfile(fname):
             try:
-                s = dict(settings or {})
+                s = load_settings()
                 s["uwphook_path"] = fname
                 save_settings(s)
             except Exception:
@@ -1475,11 +2326,15 @@ GAMES_DB_PATH = os.path.join(CONFIG_DIR, "games.json")
 SETTINGS_PATH = os.path.join(CONFIG_DIR, "settings.json")
 
 # Kernel32 / Affinity / Priority
-kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
-OpenProcess = kernel32.OpenProcess
-SetPriorityClass = kernel32.SetPriorityClass
-SetProcessAffinityMask = kernel32.SetProcessAffinityMask
-CloseHandle = kernel32.CloseHandle
+# (Windows only; elsewhere the module still imports so the tests can run)
+if os.name == "nt":
+    kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+    OpenProcess = kernel32.OpenProcess
+    SetPriorityClass = kernel32.SetPriorityClass
+    SetProcessAffinityMask = kernel32.SetProcessAffinityMask
+    CloseHandle = kernel32.CloseHandle
+else:
+    kernel32 = OpenProcess = SetPriorityClass = SetProcessAffinityMask = CloseHandle = None
 
 PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
 PROCESS_SET_INFORMATION           = 0x0200
@@ -1514,127 +2369,1658 @@ def _seed_defaults():
     ]
 
 def load_games():
+    store = _game_store()
     try:
-        with open(GAMES_DB_PATH, "r", encoding="utf-8") as f:
-            data = json.load(f)
-            if isinstance(data, list):
-                # Normalize flags field into list
-                try:
-                    for __g in data:
-                        __f = __g.get('flags', [])
-                        if isinstance(__f, str):
-                            __g['flags'] = [x for x in __f.strip().split() if x]
-                except Exception:
-                    pass
-                return data
+        data = store.load()
+        if isinstance(data, list):
+            # Entries become GameRecords here (flags, appid, ... normalized once)
+            lib = GameLibrary(data)
+            merged = _merge_legacy_nonuwp_games(lib)
+            # Persist freshly assigned ids / legacy conversions once, in the current format
+            if lib.ids_assigned or merged or getattr(store, "needs_upgrade", False):
+                lib.take_changes()
+                store.save(lib)
+            return lib
     except Exception:
         pass
-    data = _seed_defaults()
-    save_games(data)
+    data = GameLibrary(_seed_defaults())
+    _merge_legacy_nonuwp_games(data)
+    data.take_changes()
+    store.save(data)
     return data
 
 def save_games(data):
+    """Persist the library. A GameLibrary only writes its pending changes
+    (row-level on the SQLite backend); plain lists are written in full."""
     try:
-        with open(GAMES_DB_PATH, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2)
+        store = _game_store()
+        if isinstance(data, GameLibrary):
+            store.commit(data)
+        else:
+            store.save(data)
     except Exception as e:
-        print("Failed saving games.json:", e)
+        print("Failed saving game library:", e)
 
 def get_game_by_name(name, games):
+    # Indexed lookup when we were handed a GameLibrary (the normal case)
+    if isinstance(games, GameLibrary):
+        return games.by_name(name)
     for g in games:
         if g.get("name") == name:
             return g
     return None
 
-# ============= Settings persistence (Discord RPC) =============
-def _seed_settings():
-    return {
-        "discord_enabled": DISCORD_ENABLED_DEFAULT,
-        "discord_client_id": DISCORD_CLIENT_ID_DEFAULT,
-        "discord_details_tpl": "{name}",
-        "discord_state_tpl": "HighPrio={high}  Affinity={aff}  Flags={flags}",
-        # New: opt-in artwork-based background
-        "use_artwork_theme": False,
-        # New: remember game grid cover size
-        "cover_size": 220,
-        # New: global developer mode switch for exposing advanced options
-        "dev_mode": False,
-    }
+# === ADD-ONLY: GameRecord (compact per-game storage) ===
+# Library entries used to be free-form dicts that every consumer re-normalized
+# (flags string-vs-list, str(appid).strip(), ...). GameRecord is still a dict
+# (so isinstance(g, dict), json.dumps(g), g.get("appid"), g["name"] = ... and
+# plugin code written against plain dicts keep working), but the known fields
+# are normalized once on write and exposed as typed attributes (g.appid,
+# g.flags, ...). Short repeated values are interned so thousands of entries
+# share one string object per source/platform/flag; per-entry storage is a
+# normal dict (see the GameRecord docstring for the memory trade-off).
+
+def _norm_str(v):
+    if type(v) is str:
+        return v.strip()
+    return "" if v is None else str(v).strip()
+
+def _norm_token(v):
+    # Short values repeated across thousands of entries share one string object
+    return sys.intern(_norm_str(v))
+
+def _norm_flags(v):
+    if v is None:
+        return []
+    if isinstance(v, str):
+        return [sys.intern(x) for x in v.split()]
+    try:
+        return [sys.intern(s) for s in (_norm_str(x) for x in v) if s]
+    except TypeError:
+        return []
 
-def load_settings():
+def _norm_bool(v):
+    if v is True or v is False:
+        return v
+    if isinstance(v, str):
+        return v.strip().lower() in ("1", "true", "yes", "on")
+    return bool(v)
+
+def _norm_int(v):
+    if type(v) is int:
+        return v
     try:
-        with open(SETTINGS_PATH, "r", encoding="utf-8") as f:
-            data = json.load(f)
-            if isinstance(data, dict):
-                base = _seed_settings()
-                base.update(data)
-                # Fallback order: env var -> file -> hardcoded default
-                cid_env = os.environ.get("DISCORD_CLIENT_ID", "").strip()
-                if cid_env:
-                    base["discord_client_id"] = cid_env
-                if not base.get("discord_client_id"):
-                    base["discord_client_id"] = DISCORD_CLIENT_ID_DEFAULT
-                # If we have an ID, default to enabled
-                if base.get("discord_client_id") and base.get("discord_enabled") is False:
-                    base["discord_enabled"] = DISCORD_ENABLED_DEFAULT
-                return base
-    except Exception:
-        pass
-    data = _seed_settings()
-    save_settings(data)
-    return data
+        return int(float(v or 0))
+    except (TypeError, ValueError):
+        return 0
 
-def save_settings(data):
+def _norm_float(v):
+    if type(v) is float:
+        return v
     try:
-        with open(SETTINGS_PATH, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2)
-    except Exception as e:
-        print("Failed saving settings.json:", e)
+        return float(v or 0)
+    except (TypeError, ValueError):
+        return 0.0
 
-# ============= Process helpers =============
-class PROCESSENTRY32(ctypes.Structure):
-    _fields_ = [
-        ('dwSize', ctypes.c_ulong),
-        ('cntUsage', ctypes.c_ulong),
-        ('th32ProcessID', ctypes.c_ulong),
-        ('th32DefaultHeapID', ctypes.POINTER(ctypes.c_ulong)),
-        ('th32ModuleID', ctypes.c_ulong),
-        ('cntThreads', ctypes.c_ulong),
-        ('th32ParentProcessID', ctypes.c_ulong),
-        ('pcPriClassBase', ctypes.c_long),
-        ('dwFlags', ctypes.c_ulong),
-        ('szExeFile', ctypes.c_char * 260),
-    ]
 
-CreateToolhelp32Snapshot = ctypes.windll.kernel32.CreateToolhelp32Snapshot
-Process32First           = ctypes.windll.kernel32.Process32First
-Process32Next            = ctypes.windll.kernel32.Process32Next
-_CloseHandle             = ctypes.windll.kernel32.CloseHandle
-TH32CS_SNAPPROCESS       = 0x00000002
+class _GameField:
+    """Typed attribute for a GameRecord field: rec.appid -> normalized value or default."""
+    __slots__ = ("key", "default")
 
-def iter_pids_by_name(exe_name: str):
-    exe_name_low = exe_name.lower()
-    hSnapshot = CreateToolhelp32Snapshot(TH32CS_SNAPPROCESS, 0)
-    if hSnapshot == ctypes.c_void_p(-1).value:
-        return
-    entry = PROCESSENTRY32()
-    entry.dwSize = ctypes.sizeof(PROCESSENTRY32)
-    if not Process32First(hSnapshot, ctypes.byref(entry)):
-        _CloseHandle(hSnapshot); return
-    while True:
-        name = entry.szExeFile.decode(errors='ignore').lower()
-        if name == exe_name_low:
-            yield entry.th32ProcessID
-        if not Process32Next(hSnapshot, ctypes.byref(entry)):
-            break
-    _CloseHandle(hSnapshot)
+    def __init__(self, key, default):
+        self.key = key
+        self.default = default
 
-def compute_mask(mask_hex: str | None) -> int:
-    if mask_hex:
-        try:
-            return int(mask_hex, 16)
-        except Exception:
-            pass
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return self
+        # Normalizers never return None, so None means "key not present"
+        v = dict.get(obj, self.key)
+        if v is None:
+            d = self.default
+            return list(d) if isinstance(d, list) else d
+        return v
+
+    def __set__(self, obj, value):
+        obj[self.key] = value
+
+
+class GameRecord(dict):
+    """One library entry. Known fields are normalized on write; see FIELDS for types/defaults.
+
+    This is a real dict (plugins, isinstance checks and json.dumps depend on
+    it), so a record costs about what the plain dict it replaces did: the
+    memory win is limited to interned tokens and flags parsed once (~8% for
+    a 5k library, see `python tests/bench.py game-records`). Slot storage
+    was tried and dropped because it broke json.dumps(record).
+    """
+
+    # field -> (normalizer, default returned by attribute access when unset)
+    FIELDS = {
+        "id": (_norm_str, ""),
+        "name": (_norm_str, ""),
+        "aumid": (_norm_str, ""),
+        "exe_name": (_norm_str, ""),
+        "exe": (_norm_str, ""),
+        "appid": (_norm_str, ""),
+        "source": (_norm_token, ""),
+        "platform": (_norm_token, ""),
+        "flags": (_norm_flags, []),
+        "mask_hex": (_norm_str, ""),
+        "use_flags": (_norm_bool, True),
+        "high_priority": (_norm_bool, True),
+        "apply_affinity": (_norm_bool, True),
+        "custom_art_path": (_norm_str, ""),
+        "steam_playtime_minutes": (_norm_int, 0),
+        "steam_playtime_hours": (_norm_float, 0.0),
+        "steam_last_played": (_norm_int, 0),
+    }
+    __slots__ = ()
+
+    def __init__(self, data=None, **kwargs):
+        super().__init__()
+        self.update(data or (), **kwargs)
+
+    def snapshot_row(self):
+        """Plain dict of the (already normalized) values; see from_snapshot_row()."""
+        return dict(self)
+
+    @classmethod
+    def from_snapshot_row(cls, row):
+        """Rebuild a record from snapshot_row() output without re-normalizing."""
+        rec = cls.__new__(cls)
+        dict.update(rec, row)
+        return rec
+
+    @classmethod
+    def coerce(cls, g):
+        """Return g as a GameRecord (records pass through unchanged)."""
+        return g if isinstance(g, cls) else cls(g)
+
+    # ---- writes go through the normalizers ----
+    def __setitem__(self, key, value):
+        spec = self.FIELDS.get(key)
+        dict.__setitem__(self, key, value if spec is None else spec[0](value))
+
+    def update(self, other=(), /, **kwargs):
+        fields = self.FIELDS
+        for src in (other, kwargs):
+            if not src:
+                continue
+            for k, v in (src.items() if hasattr(src, "items") else src):
+                spec = fields.get(k)
+                dict.__setitem__(self, k, v if spec is None else spec[0](v))
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return dict.__getitem__(self, key)
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    # ---- conversions ----
+    def to_dict(self) -> dict:
+        """Plain dict copy (JSON / SQLite serialization, legacy helpers)."""
+        d = dict(self)
+        if "flags" in d:
+            d["flags"] = list(d["flags"])
+        return d
+
+    def copy(self):
+        return GameRecord(self)
+
+    def __copy__(self):
+        return self.copy()
+
+    def __deepcopy__(self, memo):
+        import copy as _cp
+        return GameRecord(_cp.deepcopy(self.to_dict(), memo))
+
+    def __reduce__(self):
+        return (GameRecord, (self.to_dict(),))
+
+    def __repr__(self):
+        return f"GameRecord({dict.__repr__(self)})"
+
+for _k, (_n, _d) in GameRecord.FIELDS.items():
+    setattr(GameRecord, _k, _GameField(_k, _d))
+del _k, _n, _d
+
+# isinstance() checks for "a game entry": legacy dicts or records
+GAME_ENTRY_TYPES = (dict, GameRecord)
+
+def game_to_dict(g):
+    """Plain dict for a game entry (records are converted, dicts pass through)."""
+    return g.to_dict() if isinstance(g, GameRecord) else g
+# === END ADD-ONLY GameRecord ===
+
+# === ADD-ONLY: GameLibrary (indexed in-memory game list) ===
+# Main.games used to be a plain list that every selection change, hover and
+# launch scanned linearly. GameLibrary is still a list (so plugins and existing
+# `self.games.append(...)` call sites keep working), but every entry is stored
+# as a GameRecord with a stable "id", and hash indexes on name / appid / aumid /
+# exe_name are kept in sync by the list mutators below.
+import uuid as _uuid
+
+class GameLibrary(list):
+    """List of GameRecords with O(1) lookup by id, name, appid, aumid and exe_name.
+
+    Plain dicts handed to append/insert/assignment are converted to records;
+    if the dict had no id, the minted id is written back so callers can still
+    find their entry with get()/position().
+
+    Structural changes (append/insert/pop/remove/del/slice assignment) update
+    the indexes automatically. Field edits on an entry that is already in the
+    library must go through update()/replace()/reindex() so the indexes follow.
+
+    Every mutation is also recorded as a pending change (added / removed /
+    updated fields / reordered) that the library store consumes through
+    take_changes(), so backends that can write single rows don't have to
+    rewrite the whole library.
+    """
+
+    INDEXED_FIELDS = ("name", "appid", "aumid", "exe_name")
+
+    def __init__(self, games=None):
+        super().__init__()
+        self._by_id = {}
+        self._keys = {}                     # id -> {field: key} as indexed
+        self._indexes = {f: {} for f in self.INDEXED_FIELDS}
+        self._positions = {}                # id -> list position
+        self._positions_valid = True
+        self.ids_assigned = False           # True if load had to mint ids
+        self._reset_changes()
+        for g in (games or []):
+            if isinstance(g, GAME_ENTRY_TYPES):
+                self.append(g)
+        self._reset_changes()
+
+    # ---- keys / ids ----
+    @staticmethod
+    def _key(field, value):
+        try:
+            key = str(value if value is not None else "").strip()
+        except Exception:
+            return ""
+        # Process names are case-insensitive on Windows
+        if field == "exe_name":
+            key = key.lower()
+        return key
+
+    @staticmethod
+    def new_id():
+        return _uuid.uuid4().hex[:12]
+
+    def _ensure_id(self, g):
+        gid = str(g.get("id", "") or "").strip()
+        if not gid or gid in self._by_id:
+            gid = self.new_id()
+            while gid in self._by_id:
+                gid = self.new_id()
+            g["id"] = gid
+            self.ids_assigned = True
+        return gid
+
+    def _adopt(self, g):
+        if isinstance(g, GameRecord):
+            return g
+        self._ensure_id(g)
+        return GameRecord(g)
+
+    # ---- index maintenance ----
+    def _index(self, g):
+        gid = self._ensure_id(g)
+        self._by_id[gid] = g
+        keys = {}
+        for field in self.INDEXED_FIELDS:
+            key = self._key(field, g.get(field))
+            if not key:
+                continue
+            keys[field] = key
+            self._indexes[field].setdefault(key, []).append(gid)
+        self._keys[gid] = keys
+        return gid
+
+    def _unindex(self, g):
+        try:
+            gid = str(g.get("id", "") or "")
+        except Exception:
+            return
+        if self._by_id.get(gid) is not g:
+            return
+        del self._by_id[gid]
+        for field, key in (self._keys.pop(gid, None) or {}).items():
+            bucket = self._indexes[field].get(key)
+            if not bucket:
+                continue
+            try:
+                bucket.remove(gid)
+            except ValueError:
+                pass
+            if not bucket:
+                del self._indexes[field][key]
+
+    def _rebuild(self):
+        self._by_id.clear()
+        self._keys.clear()
+        for idx in self._indexes.values():
+            idx.clear()
+        for g in self:
+            self._index(g)
+        self._positions_valid = False
+
+    def _invalidate_positions(self):
+        self._positions_valid = False
+
+    # ---- change tracking ----
+    def _reset_changes(self):
+        self._chg_full = False
+        self._chg_added = {}                # gid -> None (insertion ordered)
+        self._chg_removed = set()
+        self._chg_fields = {}               # gid -> set(fields) | None (= whole entry)
+        self._chg_order = False
+
+    def _note_added(self, gid):
+        self._chg_removed.discard(gid)
+        self._chg_added[gid] = None
+
+    def _note_removed(self, gid):
+        self._chg_fields.pop(gid, None)
+        if self._chg_added.pop(gid, 0) is None:
+            return                          # added and removed before any save
+        self._chg_removed.add(gid)
+
+    def _note_fields(self, gid, fields=None):
+        if gid in self._chg_added:
+            return                          # the insert will carry the latest data
+        if fields is None:
+            self._chg_fields[gid] = None
+            return
+        cur = self._chg_fields.setdefault(gid, set())
+        if cur is not None:
+            cur.update(fields)
+
+    def mark_dirty(self, game_or_id, *fields):
+        """Record an in-place edit of non-indexed fields (no fields = whole entry)."""
+        g = self._entry(game_or_id)
+        if g is None:
+            return
+        self._note_fields(str(g.get("id", "")), set(fields) if fields else None)
+
+    @property
+    def has_changes(self) -> bool:
+        return bool(self._chg_full or self._chg_added or self._chg_removed
+                    or self._chg_fields or self._chg_order)
+
+    def take_changes(self) -> dict:
+        """Return and clear the pending change set."""
+        ch = {
+            "full": self._chg_full,
+            "added": list(self._chg_added),
+            "removed": set(self._chg_removed),
+            "updated": dict(self._chg_fields),
+            "reordered": self._chg_order,
+        }
+        self._reset_changes()
+        return ch
+
+    def mark_full_rewrite(self):
+        """Force the next store commit to rewrite everything (e.g. after a failed write)."""
+        self._chg_full = True
+
+    # ---- list mutators ----
+    def append(self, g):
+        g = self._adopt(g)
+        gid = self._index(g)
+        super().append(g)
+        if self._positions_valid:
+            self._positions[gid] = len(self) - 1
+        self._note_added(gid)
+
+    def extend(self, games):
+        for g in games:
+            self.append(g)
+
+    def __iadd__(self, games):
+        self.extend(games)
+        return self
+
+    def insert(self, i, g):
+        g = self._adopt(g)
+        gid = self._index(g)
+        super().insert(i, g)
+        self._invalidate_positions()
+        self._note_added(gid)
+        self._chg_order = True
+
+    def pop(self, i=-1):
+        g = super().pop(i)
+        self._unindex(g)
+        self._invalidate_positions()
+        self._note_removed(str(g.get("id", "")))
+        return g
+
+    def remove(self, g):
+        # Stored entries are records, so find the caller's dict by id first
+        pos = self.position(g)
+        if pos < 0:
+            pos = super().index(g)          # ValueError, like list.remove
+        self.pop(pos)
+
+    def clear(self):
+        super().clear()
+        self._rebuild()
+        self._chg_full = True
+
+    def __setitem__(self, i, value):
+        if isinstance(i, slice):
+            super().__setitem__(i, [GameRecord.coerce(g) for g in value])
+            self._rebuild()
+            self._chg_full = True
+            return
+        old = self[i]
+        self._unindex(old)
+        # Keep the entry's id across in-place replacement (edit dialog returns a fresh dict)
+        try:
+            if not value.get("id") and old.get("id"):
+                value["id"] = old["id"]
+        except Exception:
+            pass
+        value = self._adopt(value)
+        super().__setitem__(i, value)
+        gid = self._index(value)
+        self._invalidate_positions()
+        old_id = str(old.get("id", ""))
+        if gid == old_id:
+            self._note_fields(gid)
+        else:
+            self._note_removed(old_id)
+            self._note_added(gid)
+            self._chg_order = True
+
+    def __delitem__(self, i):
+        if isinstance(i, slice):
+            super().__delitem__(i)
+            self._rebuild()
+            self._chg_full = True
+            return
+        g = self[i]
+        super().__delitem__(i)
+        self._unindex(g)
+        self._invalidate_positions()
+        self._note_removed(str(g.get("id", "")))
+
+    def sort(self, *args, **kwargs):
+        super().sort(*args, **kwargs)
+        self._invalidate_positions()
+        self._chg_order = True
+
+    def reverse(self):
+        super().reverse()
+        self._invalidate_positions()
+        self._chg_order = True
+
+    # ---- lookups ----
+    def get(self, gid, default=None):
+        return self._by_id.get(str(gid or ""), default)
+
+    def _entry(self, game_or_id):
+        """The stored record for a record, a dict carrying its id, or an id."""
+        if isinstance(game_or_id, GAME_ENTRY_TYPES):
+            game_or_id = game_or_id.get("id")
+        return self.get(game_or_id)
+
+    def find(self, field, value):
+        """First game whose indexed `field` equals `value` (or None)."""
+        bucket = self._indexes.get(field, {}).get(self._key(field, value))
+        return self._by_id.get(bucket[0]) if bucket else None
+
+    def find_all(self, field, value):
+        bucket = self._indexes.get(field, {}).get(self._key(field, value)) or []
+        return [self._by_id[gid] for gid in bucket if gid in self._by_id]
+
+    def by_name(self, name):
+        return self.find("name", name)
+
+    def by_appid(self, appid):
+        return self.find("appid", appid)
+
+    def by_aumid(self, aumid):
+        return self.find("aumid", aumid)
+
+    def by_exe_name(self, exe_name):
+        return self.find("exe_name", exe_name)
+
+    def resolve(self, key):
+        """Resolve an id, name, appid or aumid (in that order) to a game."""
+        if isinstance(key, GAME_ENTRY_TYPES):
+            return self.get(key.get("id")) or None
+        for lookup in (self.get, self.by_name, self.by_appid, self.by_aumid):
+            g = lookup(key)
+            if g is not None:
+                return g
+        return None
+
+    def position(self, game_or_id):
+        """List position for a game (or id); -1 if it is not in the library."""
+        gid = game_or_id.get("id") if isinstance(game_or_id, GAME_ENTRY_TYPES) else game_or_id
+        gid = str(gid or "")
+        if gid not in self._by_id:
+            return -1
+        if not self._positions_valid:
+            self._positions = {str(g.get("id", "")): i for i, g in enumerate(self)}
+            self._positions_valid = True
+        return self._positions.get(gid, -1)
+
+    # ---- edits ----
+    def update(self, game_or_id, **fields):
+        """Apply field edits to an entry and refresh its index keys."""
+        g = self._entry(game_or_id)
+        if g is None:
+            return None
+        fields.pop("id", None)
+        if fields and not any(f in fields for f in self.INDEXED_FIELDS):
+            # Plain field edit (e.g. playtimes): index keys are unaffected
+            g.update(fields)
+            self._note_fields(str(g.get("id", "")), set(fields))
+            return g
+        self._unindex(g)
+        g.update(fields)
+        gid = self._index(g)
+        if fields:
+            self._note_fields(gid, set(fields))
+        return g
+
+    def reindex(self, game_or_id):
+        """Re-read the indexed fields of an entry that was edited in place."""
+        g = self.update(game_or_id)
+        if g is not None:
+            self._note_fields(str(g.get("id", "")))
+        return g
+
+    def replace(self, old, new):
+        """Swap an entry for an edited copy, keeping its id and position."""
+        pos = self.position(old)
+        if pos < 0:
+            return None
+        self[pos] = new
+        return new
+
+    def remove_id(self, gid):
+        pos = self.position(gid)
+        if pos < 0:
+            return None
+        return self.pop(pos)
+# === END ADD-ONLY GameLibrary ===
+
+# === ADD-ONLY: write-behind persistence (coalesced, atomic JSON writes) ===
+# save_settings, FriendsDock settings and the JSON library store (snapshot
+# rewrites + journal appends) no longer write on the caller's thread. Each
+# target path keeps only its latest pending payload; a daemon
+# thread writes it once the path has been quiet for a short window (or at the
+# latest after MAX_WAIT), via temp file + fsync + os.replace so a crash never
+# leaves a truncated file. flush_pending_writes() forces everything out now
+# (Main.closeEvent and atexit).
+import copy as _copy
+import tempfile as _tempfile
+import atexit as _atexit
+
+# (size, mtime_ns) of the last write this process made per path, so the
+# hot-reload watcher can tell our own saves from external edits.
+_OWN_WRITES = {}
+
+def _file_sig(path: str):
+    try:
+        st = os.stat(path)
+        return (st.st_size, st.st_mtime_ns)
+    except OSError:
+        return None
+
+def note_own_write(path: str):
+    """Record path's current state as written by us (call right after writing it)."""
+    _OWN_WRITES[os.path.abspath(path)] = _file_sig(path)
+
+def is_own_write(path: str) -> bool:
+    """True if path is unchanged since our last recorded write."""
+    key = os.path.abspath(path)
+    return key in _OWN_WRITES and _OWN_WRITES[key] == _file_sig(path)
+
+def _atomic_write_text(path: str, text: str):
+    """Write text to path atomically (temp file in the same directory + os.replace)."""
+    _atomic_write_bytes(path, text.encode("utf-8"))
+
+# Read once at import (os.umask can only be queried by setting it, which is
+# not thread-safe later on)
+_UMASK = os.umask(0o022)
+os.umask(_UMASK)
+
+def _replacement_mode(path: str) -> int:
+    """Permission bits for a file replacing path: the target's, else 0o666 & ~umask."""
+    try:
+        return os.stat(path).st_mode & 0o7777
+    except OSError:
+        return 0o666 & ~_UMASK
+
+def _atomic_write_bytes(path: str, data: bytes):
+    """Write bytes to path atomically (temp file in the same directory + os.replace)."""
+    d = os.path.dirname(os.path.abspath(path)) or "."
+    os.makedirs(d, exist_ok=True)
+    fd, tmp = _tempfile.mkstemp(prefix="." + os.path.basename(path) + ".", suffix=".tmp", dir=d)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            # mkstemp creates 0600; keep the mode a plain open() would have given
+            if hasattr(os, "fchmod"):
+                os.fchmod(f.fileno(), _replacement_mode(path))
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        # On Windows the target can be briefly locked (AV, indexer); retry a few times
+        for attempt in range(5):
+            try:
+                os.replace(tmp, path)
+                note_own_write(path)
+                return
+            except PermissionError:
+                if attempt == 4:
+                    raise
+                time.sleep(0.05 * (attempt + 1))
+    except Exception:
+        try:
+            os.remove(tmp)
+        except Exception:
+            pass
+        raise
+
+
+class _WriteBehind:
+    """Coalescing background writer: latest snapshot per path wins."""
+    DELAY = 0.4      # quiet period before a path is written
+    MAX_WAIT = 2.0   # upper bound while writes keep arriving (slider drags)
+
+    def __init__(self):
+        self._cv = threading.Condition()
+        self._io = threading.Lock()      # serializes pops+writes so order is preserved
+        self._pending = {}               # path -> [first_ts, last_ts, obj, dump_kwargs, writer]
+        self._thread = None
+
+    def schedule(self, path: str, obj, **dump_kwargs):
+        """Queue obj (already a private snapshot) to be JSON-dumped to path."""
+        self._put(path, lambda _prev: obj, None, dump_kwargs)
+
+    def schedule_merge(self, path: str, merge, writer):
+        """Queue a custom write for path.
+
+        merge(previous payload or None) -> new payload runs under the queue lock
+        (keep it trivial); writer(path, payload) runs on the writer thread (or
+        in flush()) and does the actual I/O.
+        """
+        self._put(path, merge, writer, {})
+
+    def _put(self, path, merge, writer, dump_kwargs):
+        now = time.monotonic()
+        with self._cv:
+            entry = self._pending.get(path)
+            first = entry[0] if entry else now
+            obj = merge(entry[2] if entry else None)
+            self._pending[path] = [first, now, obj, dump_kwargs, writer]
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+                self._thread.start()
+            self._cv.notify()
+
+    def peek(self, path: str):
+        """Return a copy of the not-yet-written snapshot for path, or None."""
+        with self._cv:
+            entry = self._pending.get(path)
+            return _copy.deepcopy(entry[2]) if entry else None
+
+    def is_pending(self, path: str) -> bool:
+        with self._cv:
+            return path in self._pending
+
+    def flush(self, path: str = None):
+        """Write pending snapshots (all, or just `path`) on the calling thread."""
+        with self._io:
+            with self._cv:
+                if path is None:
+                    items = list(self._pending.items())
+                    self._pending.clear()
+                else:
+                    entry = self._pending.pop(path, None)
+                    items = [(path, entry)] if entry else []
+            for p, entry in items:
+                self._write(p, entry)
+
+    def _due(self, entry):
+        return min(entry[1] + self.DELAY, entry[0] + self.MAX_WAIT)
+
+    def _run(self):
+        while True:
+            with self._cv:
+                while not self._pending:
+                    self._cv.wait()
+                path, due = min(((p, self._due(e)) for p, e in self._pending.items()), key=lambda t: t[1])
+                wait = due - time.monotonic()
+                if wait > 0:
+                    self._cv.wait(wait)
+                    continue
+            with self._io:
+                with self._cv:
+                    entry = self._pending.pop(path, None)
+                if entry is not None:
+                    self._write(path, entry)
+
+    @staticmethod
+    def _write(path, entry):
+        try:
+            if entry[4] is not None:
+                entry[4](path, entry[2])
+            else:
+                _atomic_write_text(path, json.dumps(entry[2], **entry[3]))
+        except Exception as e:
+            print("Failed writing", os.path.basename(path) + ":", e)
+
+
+_WRITE_BEHIND = _WriteBehind()
+
+def write_json_later(path: str, data, **dump_kwargs):
+    """Schedule an atomic JSON write of a snapshot of `data` (deep-copied now)."""
+    _WRITE_BEHIND.schedule(path, _copy.deepcopy(data), **dump_kwargs)
+
+def flush_pending_writes(path: str = None):
+    """Force queued writes to disk now (all paths by default)."""
+    try:
+        _WRITE_BEHIND.flush(path)
+    except Exception as e:
+        print("Failed flushing pending writes:", e)
+
+_atexit.register(flush_pending_writes)
+# === END ADD-ONLY write-behind persistence ===
+
+# === ADD-ONLY: binary snapshot cache (fast cold start) ===
+# Parsed + normalized JSON (library, settings, friends cache) is also kept as
+# a marshal snapshot next to the source file, keyed on the sources' size and
+# mtime (plus the Python version, since marshal is version specific). A hit
+# skips the JSON parse and normalization; any change to a source makes the
+# snapshot stale and the next load falls back to JSON and rewrites it.
+# main() logs one [startup] line with each source's load time and the time a
+# snapshot hit saved compared to the last JSON parse; later (runtime) reads
+# only update SNAPSHOT_STATS.
+import gc as _gc      # _marshal: imported with the embedded bytecode pack above
+
+SNAPSHOT_FORMAT = 2
+SNAPSHOT_STATS = {}     # label -> {"hit": bool, "ms": float, "saved_ms": float}
+_SNAPSHOT_PARSE_MS = {} # label -> last known JSON parse cost (for "time saved")
+
+def _snapshot_key(paths):
+    key = [SNAPSHOT_FORMAT, sys.version_info[0], sys.version_info[1]]
+    for p in paths:
+        try:
+            st = os.stat(p)
+            key.append((st.st_size, st.st_mtime_ns))
+        except OSError:
+            key.append(None)
+    return tuple(key)
+
+def snapshot_load(label, sources, snap_path, parse, to_snapshot=None, from_snapshot=None):
+    """Return parse() result, served from snap_path when none of `sources` changed.
+
+    parse() -> data (None = nothing to cache). to_snapshot/from_snapshot convert
+    between the returned data and marshal-able builtins (default: identity).
+    """
+    key = _snapshot_key(sources)
+    t0 = time.perf_counter()
+    gc_was_enabled = _gc.isenabled()
+    try:
+        # One read + loads: marshal.load() on a file object reads in tiny chunks.
+        # The cyclic GC is paused while thousands of containers are created.
+        with open(snap_path, "rb") as f:
+            blob = f.read()
+        _gc.disable()
+        snap = _marshal.loads(blob)
+        if isinstance(snap, dict) and snap.get("key") == key:
+            data = snap["data"]
+            if from_snapshot is not None:
+                data = from_snapshot(data)
+            ms = (time.perf_counter() - t0) * 1000.0
+            parse_ms = float(snap.get("parse_ms", 0.0))
+            saved = max(0.0, parse_ms - ms)
+            _SNAPSHOT_PARSE_MS[label] = parse_ms
+            SNAPSHOT_STATS[label] = {"hit": True, "ms": ms, "saved_ms": saved}
+            return data
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        print(f"[snapshot] {label}: ignoring unreadable snapshot ({e})")
+    finally:
+        if gc_was_enabled:
+            _gc.enable()
+
+    t0 = time.perf_counter()
+    data = parse()
+    ms = (time.perf_counter() - t0) * 1000.0
+    _SNAPSHOT_PARSE_MS[label] = ms
+    SNAPSHOT_STATS[label] = {"hit": False, "ms": ms, "saved_ms": 0.0}
+    if data is not None:
+        try:
+            payload = to_snapshot(data) if to_snapshot is not None else data
+            _atomic_write_bytes(snap_path, _marshal.dumps({"key": key, "parse_ms": ms, "data": payload}))
+        except Exception as e:
+            print(f"[snapshot] {label}: not written ({e})")
+    return data
+
+def snapshot_report() -> str:
+    """One line summarizing the latest load per label (logged once at boot by main())."""
+    parts = []
+    for label, st in sorted(SNAPSHOT_STATS.items()):
+        if st["hit"]:
+            parts.append(f"{label} snapshot {st['ms']:.1f} ms (saved {st['saved_ms']:.1f} ms)")
+        else:
+            parts.append(f"{label} JSON {st['ms']:.1f} ms")
+    return "; ".join(parts)
+
+def snapshot_store(label, sources, snap_path, payload):
+    """Write a snapshot of already-current data (marshal-able) for the sources as they are now."""
+    try:
+        blob = _marshal.dumps({"key": _snapshot_key(sources),
+                               "parse_ms": _SNAPSHOT_PARSE_MS.get(label, 0.0),
+                               "data": payload})
+        _atomic_write_bytes(snap_path, blob)
+    except Exception as e:
+        print(f"[snapshot] {label}: not written ({e})")
+
+def snapshot_path_for(path, name=None):
+    """Snapshot file for a JSON source: foo.json -> foo.snapshot.bin (same dir)."""
+    base = name or os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(os.path.dirname(os.path.abspath(path)), base + ".snapshot.bin")
+# === END ADD-ONLY binary snapshot cache ===
+
+# === ADD-ONLY: library stores (games.json or SQLite) ===
+# settings.json -> "library_backend": "json" (default) keeps the classic
+# config/games.json file (plus games.journal.jsonl, see _JsonGameStore). "sqlite" switches to config/games.db (stdlib sqlite3,
+# WAL mode): one row per game, indexed source/appid/steam_last_played columns,
+# and GameLibrary's pending changes applied as row INSERT/UPDATE/DELETEs in one
+# transaction. The first start on SQLite imports the existing games.json.
+#
+# This is the only place game data is read or written. The embedded
+# nonuwp.launcher module's load_games/save_games are pointed here as well (see
+# _install_nonuwp_storage), so there is one library file instead of a second
+# {"games": [...]} copy under %APPDATA%/UniversalUWPLauncher.
+#
+# On-disk snapshot format (games.json), version 2:
+#   {"format": "uwplauncher.library", "version": 2, "games": [...]}
+# Older shapes are still read and rewritten once in the current format:
+#   version 1 = bare list (old config/games.json)
+#   version 0 = {"games": [...]} (nonuwp launcher; merged from %APPDATA% once)
+import sqlite3
+
+GAMES_SQLITE_PATH = os.path.join(CONFIG_DIR, "games.db")
+LIBRARY_FORMAT = "uwplauncher.library"
+LIBRARY_FORMAT_VERSION = 2
+LEGACY_NONUWP_GAMES_PATH = os.path.join(
+    os.getenv("APPDATA", os.path.join(os.path.expanduser("~"), "AppData", "Roaming")),
+    "UniversalUWPLauncher", "games.json",
+)
+
+def _library_unwrap(data):
+    """Return (games, version) for any known snapshot shape; (None, 0) if unreadable."""
+    if isinstance(data, list):
+        return data, 1
+    if isinstance(data, dict) and isinstance(data.get("games"), list):
+        if data.get("format") == LIBRARY_FORMAT:
+            try:
+                return data["games"], int(data.get("version") or 0)
+            except (TypeError, ValueError):
+                return data["games"], 0
+        return data["games"], 0
+    return None, 0
+
+def _library_wrap(games):
+    return {
+        "format": LIBRARY_FORMAT,
+        "version": LIBRARY_FORMAT_VERSION,
+        "games": [game_to_dict(g) for g in games],
+    }
+
+class _JsonGameStore:
+    """Classic backend: games.json snapshot plus an append-only change journal.
+
+    Commits append one JSON line per change to games.journal.jsonl (add /
+    update(id, fields) / replace / delete / order) instead of rewriting the
+    whole list; load() replays the journal over the snapshot. Once the journal
+    grows past JOURNAL_COMPACT_BYTES the snapshot is rewritten and the journal
+    starts over (the previous one is kept as .jsonl.1 for auditing).
+
+    Both kinds of write go through the write-behind thread, keyed on the
+    snapshot path: the pending payload is (snapshot text or None, journal
+    chunks to append after it). A queued snapshot supersedes journal chunks
+    queued before it, since it already contains those changes.
+    """
+    name = "json"
+    JOURNAL_COMPACT_BYTES = 512 * 1024
+
+    def __init__(self, path=None):
+        self.path = path or GAMES_DB_PATH
+        self.journal_path = os.path.splitext(self.path)[0] + ".journal.jsonl"
+        self._lock = threading.RLock()
+        self.needs_upgrade = False          # last load() read an older snapshot format
+        self.write_failed = False           # next commit() rewrites everything
+
+    # ---- reading ----
+    def _read_journal(self):
+        records = []
+        try:
+            with open(self.journal_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        rec = json.loads(line)
+                    except Exception:
+                        continue            # torn last line after a crash
+                    if isinstance(rec, dict):
+                        records.append(rec)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print("Failed reading library journal:", e)
+        return records
+
+    @staticmethod
+    def _replay(games, records):
+        state = {}
+        for i, g in enumerate(games):
+            if isinstance(g, dict):
+                state[str(g.get("id") or "") or f"#{i}"] = g
+        for rec in records:
+            op = rec.get("op")
+            gid = str(rec.get("id") or "")
+            if op in ("add", "replace"):
+                g = rec.get("game")
+                if not isinstance(g, dict):
+                    continue
+                if op == "add":
+                    state.pop(gid, None)
+                state[gid] = g
+            elif op == "update":
+                g = state.get(gid)
+                if g is not None:
+                    g.update(rec.get("fields") or {})
+                    for k in rec.get("unset") or ():
+                        g.pop(k, None)
+            elif op == "delete":
+                state.pop(gid, None)
+            elif op == "order":
+                ordered = {k: state[k] for k in (rec.get("ids") or []) if k in state}
+                for k, g in state.items():
+                    ordered.setdefault(k, g)
+                state = ordered
+        return list(state.values())
+
+    def load(self):
+        """Current library as GameRecords (snapshot hit) or normalized from JSON + journal."""
+        flush_pending_writes(self.path)     # disk must match what we queued
+        with self._lock:
+            self.needs_upgrade = False
+            return snapshot_load(
+                "games",
+                (self.path, self.journal_path),
+                snapshot_path_for(self.path),
+                self._load_json,
+                to_snapshot=lambda recs: [r.snapshot_row() for r in recs],
+                from_snapshot=lambda rows: [GameRecord.from_snapshot_row(r) for r in rows],
+            )
+
+    def _load_json(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception:
+            data = None
+        games, version = _library_unwrap(data)
+        self.needs_upgrade = games is not None and version < LIBRARY_FORMAT_VERSION
+        records = self._read_journal()
+        if records:
+            games = self._replay(games or [], records)
+            try:
+                if os.path.getsize(self.journal_path) >= self.JOURNAL_COMPACT_BYTES:
+                    self.save(games)
+            except Exception:
+                pass
+        if games is None:
+            return None
+        return [GameRecord(g) for g in games if isinstance(g, GAME_ENTRY_TYPES)]
+
+    def refresh_snapshot(self, library):
+        """Rewrite the snapshot from the in-memory library (at exit) so the next start hits.
+
+        Only valid when every change has been committed, i.e. memory == disk.
+        """
+        if getattr(library, "has_changes", True):
+            return
+        flush_pending_writes(self.path)
+        with self._lock:
+            snapshot_store("games", (self.path, self.journal_path), snapshot_path_for(self.path),
+                           [GameRecord.coerce(r).snapshot_row() for r in library])
+
+    # ---- writing ----
+    def save(self, games):
+        """Queue a snapshot rewrite (atomic) that starts a fresh journal."""
+        # Serialized now: the caller keeps editing the library meanwhile
+        text = json.dumps(_library_wrap(games), indent=2)
+        _WRITE_BEHIND.schedule_merge(self.path, lambda _prev: (text, ()), self._write_pending)
+        return True
+
+    def _append(self, records):
+        """Queue journal lines (after any snapshot that is still pending)."""
+        line_ts = int(time.time())
+        chunk = "".join(json.dumps(dict(r, ts=line_ts), ensure_ascii=False) + "\n" for r in records)
+        _WRITE_BEHIND.schedule_merge(
+            self.path,
+            lambda prev: (prev[0], prev[1] + (chunk,)) if prev else (None, (chunk,)),
+            self._write_pending)
+
+    def _write_pending(self, path, payload):
+        """Write-behind thread: snapshot + journal rotation, then journal appends."""
+        snapshot, chunks = payload
+        with self._lock:
+            if snapshot is not None:
+                try:
+                    _atomic_write_text(self.path, snapshot)
+                except Exception as e:
+                    print("Failed saving games.json:", e)
+                    self.write_failed = True
+                    return
+                try:
+                    if os.path.exists(self.journal_path):
+                        os.replace(self.journal_path, self.journal_path + ".1")
+                except Exception as e:
+                    print("Failed rotating library journal:", e)
+                note_own_write(self.journal_path)
+            if chunks:
+                try:
+                    with open(self.journal_path, "a", encoding="utf-8") as f:
+                        f.write("".join(chunks))
+                        f.flush()
+                        os.fsync(f.fileno())
+                    note_own_write(self.journal_path)
+                except Exception as e:
+                    print("Failed appending to library journal:", e)
+                    self.write_failed = True
+
+    def commit(self, library):
+        """Append the library's pending changes to the journal (one small write)."""
+        with self._lock:
+            ch = library.take_changes()
+            if self.write_failed or ch["full"] or not (
+                    os.path.exists(self.path) or _WRITE_BEHIND.is_pending(self.path)):
+                # A lost write can't be replayed from the change set: rewrite it all
+                self.write_failed = False
+                self.save(library)
+                return
+            records = [{"op": "delete", "id": gid} for gid in ch["removed"]]
+            for gid in ch["added"]:
+                g = library.get(gid)
+                if g is not None:
+                    records.append({"op": "add", "id": gid, "game": dict(g)})
+            for gid, fields in ch["updated"].items():
+                g = library.get(gid)
+                if g is None:
+                    continue
+                if fields is None:
+                    records.append({"op": "replace", "id": gid, "game": dict(g)})
+                    continue
+                rec = {"op": "update", "id": gid, "fields": {f: g[f] for f in fields if f in g}}
+                unset = [f for f in fields if f not in g]
+                if unset:
+                    rec["unset"] = unset
+                records.append(rec)
+            if ch["reordered"]:
+                records.append({"op": "order", "ids": [str(g.get("id", "")) for g in library]})
+            if not records:
+                return
+            self._append(records)
+            try:
+                if os.path.getsize(self.journal_path) >= self.JOURNAL_COMPACT_BYTES:
+                    self.save(library)
+            except Exception:
+                pass
+
+
+class _SqliteGameStore:
+    """SQLite backend: one row per game, full entry kept as JSON in `data`."""
+    name = "sqlite"
+
+    _SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS games ("
+        " id TEXT PRIMARY KEY,"
+        " pos INTEGER NOT NULL DEFAULT 0,"
+        " name TEXT NOT NULL DEFAULT '',"
+        " source TEXT NOT NULL DEFAULT '',"
+        " appid TEXT NOT NULL DEFAULT '',"
+        " steam_last_played INTEGER NOT NULL DEFAULT 0,"
+        " data TEXT NOT NULL)",
+        "CREATE INDEX IF NOT EXISTS ix_games_source ON games(source)",
+        "CREATE INDEX IF NOT EXISTS ix_games_appid ON games(appid)",
+        "CREATE INDEX IF NOT EXISTS ix_games_last_played ON games(steam_last_played)",
+        "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)",
+    )
+
+    def __init__(self, path=None, json_path=None):
+        self.path = path or GAMES_SQLITE_PATH
+        self.json_path = json_path or GAMES_DB_PATH
+        self._conn = None
+        self._lock = threading.RLock()
+
+    def _db(self):
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            try:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+            except Exception:
+                pass
+            with conn:
+                for stmt in self._SCHEMA:
+                    conn.execute(stmt)
+            self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def _row(g, pos):
+        try:
+            last_played = int(g.get("steam_last_played", 0) or 0)
+        except Exception:
+            last_played = 0
+        return (
+            str(g.get("id", "")),
+            int(pos),
+            str(g.get("name", "") or ""),
+            str(g.get("source", "") or "").lower(),
+            str(g.get("appid", "") or "").strip(),
+            last_played,
+            json.dumps(game_to_dict(g), ensure_ascii=False),
+        )
+
+    @staticmethod
+    def _mark_imported(conn):
+        conn.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES ('imported_json', ?)",
+            (str(int(time.time())),),
+        )
+
+    def _import_json_once(self, conn):
+        """First start on SQLite: pull the existing games.json into the db.
+
+        Returns True if the db already holds the library (imported earlier, or
+        written by save() on a backend switch); the JSON is never read again.
+        """
+        done = conn.execute("SELECT value FROM meta WHERE key='imported_json'").fetchone()
+        if done is not None:
+            return True
+        # Rows without the marker come from a backend switch by an older build:
+        # they are newer than games.json, so keep them
+        if conn.execute("SELECT 1 FROM games LIMIT 1").fetchone() is not None:
+            with conn:
+                self._mark_imported(conn)
+            return True
+        games = _JsonGameStore(self.json_path).load()
+        with conn:
+            if games:
+                lib = GameLibrary(games)    # mints ids for legacy entries
+                conn.executemany(
+                    "INSERT OR IGNORE INTO games (id,pos,name,source,appid,steam_last_played,data)"
+                    " VALUES (?,?,?,?,?,?,?)",
+                    [self._row(g, i) for i, g in enumerate(lib)],
+                )
+                print(f"[library] imported {len(lib)} games from {self.json_path} into {self.path}")
+            self._mark_imported(conn)
+        return False
+
+    def load(self):
+        """Stored library; [] if the user emptied it, None on a fresh db (seed defaults)."""
+        with self._lock:
+            conn = self._db()
+            established = self._import_json_once(conn)
+            rows = conn.execute("SELECT data FROM games ORDER BY pos, rowid").fetchall()
+        if not rows:
+            return [] if established else None
+        out = []
+        for (raw,) in rows:
+            try:
+                g = json.loads(raw)
+            except Exception:
+                continue
+            if isinstance(g, dict):
+                out.append(g)
+        return out
+
+    def save(self, games):
+        """Replace the whole table (seed data, migrations, backend switch)."""
+        try:
+            with self._lock:
+                conn = self._db()
+                with conn:
+                    conn.execute("DELETE FROM games")
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO games (id,pos,name,source,appid,steam_last_played,data)"
+                        " VALUES (?,?,?,?,?,?,?)",
+                        [self._row(g, i) for i, g in enumerate(games) if isinstance(g, GAME_ENTRY_TYPES)],
+                    )
+                    # The table is now the library: never import games.json over it
+                    self._mark_imported(conn)
+        except Exception as e:
+            print("Failed saving games.db:", e)
+
+    def commit(self, library):
+        """Apply the library's pending changes as row operations in one transaction."""
+        ch = library.take_changes()
+        if ch["full"]:
+            self.save(library)
+            return
+        try:
+            with self._lock:
+                conn = self._db()
+                with conn:
+                    if ch["removed"]:
+                        conn.executemany("DELETE FROM games WHERE id=?", [(gid,) for gid in ch["removed"]])
+                    # Appends go after the current last row; deletes leave gaps
+                    # in `pos`, which keeps ORDER BY pos stable without renumbering.
+                    next_pos = conn.execute("SELECT COALESCE(MAX(pos), -1) + 1 FROM games").fetchone()[0]
+                    rows = []
+                    for gid in ch["added"]:
+                        g = library.get(gid)
+                        if g is not None:
+                            rows.append(self._row(g, next_pos + len(rows)))
+                    if rows:
+                        conn.executemany(
+                            "INSERT OR REPLACE INTO games (id,pos,name,source,appid,steam_last_played,data)"
+                            " VALUES (?,?,?,?,?,?,?)",
+                            rows,
+                        )
+                    # Field edits (and whole-entry replacements) are plain row UPDATEs
+                    updates = []
+                    for gid in ch["updated"]:
+                        g = library.get(gid)
+                        if g is None:
+                            continue
+                        r = self._row(g, 0)
+                        updates.append((r[2], r[3], r[4], r[5], r[6], gid))
+                    if updates:
+                        conn.executemany(
+                            "UPDATE games SET name=?, source=?, appid=?, steam_last_played=?, data=? WHERE id=?",
+                            updates,
+                        )
+                    if ch["reordered"]:
+                        conn.executemany(
+                            "UPDATE games SET pos=? WHERE id=?",
+                            [(i, str(g.get("id", ""))) for i, g in enumerate(library)],
+                        )
+        except Exception as e:
+            print("Failed saving games.db:", e)
+            # Nothing was applied; make sure the next save writes everything
+            library.mark_full_rewrite()
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                try:
+                    self._conn.close()
+                except Exception:
+                    pass
+                self._conn = None
+
+
+_GAME_STORE = None
+
+def _game_store():
+    """Return the active library store (chosen by settings 'library_backend')."""
+    global _GAME_STORE
+    if _GAME_STORE is None:
+        try:
+            backend = str(load_settings().get("library_backend", "json") or "json").lower()
+        except Exception:
+            backend = "json"
+        _GAME_STORE = _SqliteGameStore() if backend == "sqlite" else _JsonGameStore()
+    return _GAME_STORE
+
+def _switch_game_store(backend: str, games=None):
+    """Switch backends at runtime; the current library is written to the new store in full."""
+    global _GAME_STORE
+    old = _GAME_STORE
+    _GAME_STORE = _SqliteGameStore() if backend == "sqlite" else _JsonGameStore()
+    if games is not None:
+        if isinstance(games, GameLibrary):
+            games.take_changes()
+        _GAME_STORE.save(games)
+    try:
+        if old is not None and hasattr(old, "close"):
+            old.close()
+    except Exception:
+        pass
+    return _GAME_STORE
+
+
+def _merge_legacy_nonuwp_games(library) -> int:
+    """One-time: fold the nonuwp launcher's %APPDATA% games.json into the library.
+
+    The legacy file is renamed to games.json.imported afterwards so it is never
+    read (or written) again. Returns the number of entries added.
+    """
+    path = LEGACY_NONUWP_GAMES_PATH
+    if not os.path.isfile(path) or os.path.abspath(path) == os.path.abspath(GAMES_DB_PATH):
+        return 0
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            games, _version = _library_unwrap(json.load(f))
+    except Exception as e:
+        print("Failed reading legacy nonuwp library:", e)
+        return 0
+    added = 0
+    for g in games or []:
+        if not isinstance(g, dict):
+            continue
+        g = dict(g)
+        g.pop("id", None)
+        # nonuwp entries carry the Steam id as steam_appid
+        if not str(g.get("appid", "") or "").strip() and g.get("steam_appid"):
+            g["appid"] = g["steam_appid"]
+        appid = str(g.get("appid", "") or "").strip()
+        aumid = str(g.get("aumid", "") or "").strip()
+        if (appid and library.by_appid(appid)) or (aumid and library.by_aumid(aumid)) \
+                or library.by_name(g.get("name", "")):
+            continue
+        library.append(g)
+        added += 1
+    try:
+        os.replace(path, path + ".imported")
+    except Exception as e:
+        print("Failed retiring legacy nonuwp library:", e)
+    if added:
+        print(f"[library] merged {added} games from {path}")
+    return added
+
+
+def _nonuwp_view(g) -> dict:
+    """An entry in the shape the nonuwp launcher UI expects (flags as a string)."""
+    d = game_to_dict(g)
+    if isinstance(d.get("flags"), list):
+        d["flags"] = " ".join(d["flags"])
+    if d.get("appid") and not d.get("steam_appid"):
+        d["steam_appid"] = d["appid"]
+    return d
+
+
+def _install_nonuwp_storage(mod=None):
+    """Point nonuwp.launcher's load_games/save_games at this storage engine."""
+    mod = mod or sys.modules.get("nonuwp.launcher")
+    if mod is None:
+        return
+
+    def _load():
+        return {"games": [_nonuwp_view(g) for g in load_games()]}
+
+    def _save(data):
+        games = data.get("games") if isinstance(data, dict) else data
+        if isinstance(games, list):
+            save_games(games)
+
+    try:
+        from pathlib import Path as _P
+        mod.load_games = _load
+        mod.save_games = _save
+        mod.GAMES_PATH = _P(GAMES_DB_PATH)
+    except Exception as e:
+        print("[NONUWP] storage hookup failed:", e)
+
+on_embedded_import("nonuwp.launcher", _install_nonuwp_storage)
+# === END ADD-ONLY library stores ===
+
+# ============= Settings persistence (Discord RPC) =============
+def _seed_settings():
+    return {
+        "discord_enabled": DISCORD_ENABLED_DEFAULT,
+        "discord_client_id": DISCORD_CLIENT_ID_DEFAULT,
+        "discord_details_tpl": "{name}",
+        "discord_state_tpl": "HighPrio={high}  Affinity={aff}  Flags={flags}",
+        # New: opt-in artwork-based background
+        "use_artwork_theme": False,
+        # New: remember game grid cover size
+        "cover_size": 220,
+        # New: global developer mode switch for exposing advanced options
+        "dev_mode": False,
+        # Library storage backend: "json" (config/games.json) or "sqlite" (config/games.db)
+        "library_backend": "json",
+    }
+
+def _read_settings_json():
+    with open(SETTINGS_PATH, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def load_settings():
+    try:
+        data = _WRITE_BEHIND.peek(SETTINGS_PATH)
+        if data is None:
+            data = snapshot_load("settings", (SETTINGS_PATH,), snapshot_path_for(SETTINGS_PATH), _read_settings_json)
+        if isinstance(data, dict):
+            base = _seed_settings()
+            base.update(data)
+            # Fallback order: env var -> file -> hardcoded default
+            cid_env = os.environ.get("DISCORD_CLIENT_ID", "").strip()
+            if cid_env:
+                base["discord_client_id"] = cid_env
+            if not base.get("discord_client_id"):
+                base["discord_client_id"] = DISCORD_CLIENT_ID_DEFAULT
+            # If we have an ID, default to enabled
+            if base.get("discord_client_id") and base.get("discord_enabled") is False:
+                base["discord_enabled"] = DISCORD_ENABLED_DEFAULT
+            return base
+    except Exception:
+        pass
+    data = _seed_settings()
+    save_settings(data)
+    return data
+
+def save_settings(data):
+    # Coalesced + atomic; see write-behind block. Rapid calls (cover slider) cost one write.
+    try:
+        write_json_later(SETTINGS_PATH, data, indent=2)
+    except Exception as e:
+        print("Failed saving settings.json:", e)
+
+# === ADD-ONLY: ConfigStore (cached small JSON reads) ===
+# Launch, selection and plugin info paths used to re-open and re-parse the
+# same small files (settings.json, steam.json, tokens.json, friends_cache.json)
+# every time. CONFIG_STORE keeps the parsed value per path and only re-parses
+# when (size, mtime_ns) changes; values are handed out as read-only views
+# (MappingProxyType / tuple) so one caller can't mutate another's copy. Use
+# thaw() (or read_copy) when you need something to edit and save back.
+from types import MappingProxyType as _MappingProxyType
+
+def _freeze(obj):
+    if isinstance(obj, dict):
+        return _MappingProxyType({k: _freeze(v) for k, v in obj.items()})
+    if isinstance(obj, list):
+        return tuple(_freeze(v) for v in obj)
+    return obj
+
+def thaw(obj):
+    """Mutable deep copy of a ConfigStore view (dicts and lists again)."""
+    if isinstance(obj, (dict, _MappingProxyType)):
+        return {k: thaw(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [thaw(v) for v in obj]
+    return obj
+
+def _read_json_file(path):
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        raw = f.read()
+    return json.loads(raw) if raw.strip() else None
+
+class ConfigStore:
+    """Parsed config files cached per path, revalidated by (size, mtime_ns)."""
+    FIND_TTL = 5.0   # seconds a located candidate path is trusted without re-stat
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}    # (abspath, parse) -> (sig, frozen value)
+        self._found = {}      # candidate tuple -> (expires, path)
+        self.hits = 0
+        self.misses = 0
+
+    def read(self, path, default=None, parse=None):
+        """Read-only view of path's parsed content (JSON unless parse(path) is given).
+
+        Missing or unparsable files return default; a broken file is not
+        re-parsed until it changes. Pending write-behind data wins over disk.
+        """
+        path = os.fspath(path)
+        if _WRITE_BEHIND.is_pending(path):
+            try:
+                return _freeze(parse(path) if parse else _WRITE_BEHIND.peek(path))
+            except Exception:
+                return default
+        key = (os.path.abspath(path), parse)
+        sig = _file_sig(path)
+        if sig is None:
+            with self._lock:
+                self._entries.pop(key, None)
+            return default
+        with self._lock:
+            ent = self._entries.get(key)
+            if ent is not None and ent[0] == sig:
+                self.hits += 1
+                return ent[1]
+            self.misses += 1
+        try:
+            value = _freeze(parse(path) if parse else _read_json_file(path))
+        except Exception:
+            value = default
+        with self._lock:
+            self._entries[key] = (sig, value)
+        return value
+
+    def read_copy(self, path, default=None, parse=None):
+        """Like read() but returns a mutable deep copy."""
+        return thaw(self.read(path, default, parse))
+
+    def first_existing(self, candidates):
+        """First candidate that is an existing file (as str), or None.
+
+        A hit is remembered for FIND_TTL seconds; misses are never cached so a
+        file created by a sign-in helper is picked up immediately.
+        """
+        cands = tuple(os.fspath(c) for c in candidates if c)
+        now = time.monotonic()
+        with self._lock:
+            ent = self._found.get(cands)
+        if ent is not None and ent[0] > now:
+            return ent[1]
+        for c in cands:
+            try:
+                if os.path.isfile(c):
+                    with self._lock:
+                        self._found[cands] = (now + self.FIND_TTL, c)
+                    return c
+            except Exception:
+                continue
+        with self._lock:
+            self._found.pop(cands, None)
+        return None
+
+    def invalidate(self, path=None):
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+                self._found.clear()
+                return
+            ap = os.path.abspath(os.fspath(path))
+            for key in [k for k in self._entries if k[0] == ap]:
+                del self._entries[key]
+
+CONFIG_STORE = ConfigStore()
+
+def _settings_parse(_path):
+    return load_settings()
+
+def settings_view():
+    """Read-only view of the effective settings (seeds + env overrides), cached."""
+    view = CONFIG_STORE.read(SETTINGS_PATH, parse=_settings_parse)
+    return view if view is not None else _freeze(load_settings())
+
+def _tokens_candidates():
+    env = os.environ.get("XBL_TOKENS_PATH")
+    local = Path(os.environ.get("LOCALAPPDATA", os.path.expanduser("~"))) / "OpenXbox" / "xbox" / "tokens.json"
+    return env, os.path.join(os.getcwd(), "tokens.json"), local
+
+# The embedded FriendsDock resolves tokens.json on every refresh; route it
+# through the same cached lookup (same candidate order as the original).
+def _install_cached_find_tokens(mod):
+    def _find_tokens_path():
+        env, cwd, local = _tokens_candidates()
+        try:
+            here = Path(mod.__file__).resolve().parent / "tokens.json"
+        except Exception:
+            here = None
+        found = CONFIG_STORE.first_existing((env, here, cwd, local))
+        return Path(found) if found else None
+    mod._find_tokens_path = _find_tokens_path
+
+for _fd_name in ("xbl_friends_dock_INLINE_v5_REFRESH_UI_v2_PATCHED",
+                 "xbl.xbl_friends_dock_INLINE_v5_REFRESH_UI_v2_PATCHED"):
+    on_embedded_import(_fd_name, lambda m: hasattr(m, "_find_tokens_path") and _install_cached_find_tokens(m))
+# === END ADD-ONLY ConfigStore ===
+
+# ============= Process helpers =============
+class PROCESSENTRY32(ctypes.Structure):
+    _fields_ = [
+        ('dwSize', ctypes.c_ulong),
+        ('cntUsage', ctypes.c_ulong),
+        ('th32ProcessID', ctypes.c_ulong),
+        ('th32DefaultHeapID', ctypes.POINTER(ctypes.c_ulong)),
+        ('th32ModuleID', ctypes.c_ulong),
+        ('cntThreads', ctypes.c_ulong),
+        ('th32ParentProcessID', ctypes.c_ulong),
+        ('pcPriClassBase', ctypes.c_long),
+        ('dwFlags', ctypes.c_ulong),
+        ('szExeFile', ctypes.c_char * 260),
+    ]
+
+if os.name == "nt":
+    CreateToolhelp32Snapshot = ctypes.windll.kernel32.CreateToolhelp32Snapshot
+    Process32First           = ctypes.windll.kernel32.Process32First
+    Process32Next            = ctypes.windll.kernel32.Process32Next
+    _CloseHandle             = ctypes.windll.kernel32.CloseHandle
+else:
+    CreateToolhelp32Snapshot = Process32First = Process32Next = _CloseHandle = None
+TH32CS_SNAPPROCESS       = 0x00000002
+
+def iter_pids_by_name(exe_name: str):
+    exe_name_low = exe_name.lower()
+    hSnapshot = CreateToolhelp32Snapshot(TH32CS_SNAPPROCESS, 0)
+    if hSnapshot == ctypes.c_void_p(-1).value:
+        return
+    entry = PROCESSENTRY32()
+    entry.dwSize = ctypes.sizeof(PROCESSENTRY32)
+    if not Process32First(hSnapshot, ctypes.byref(entry)):
+        _CloseHandle(hSnapshot); return
+    while True:
+        name = entry.szExeFile.decode(errors='ignore').lower()
+        if name == exe_name_low:
+            yield entry.th32ProcessID
+        if not Process32Next(hSnapshot, ctypes.byref(entry)):
+            break
+    _CloseHandle(hSnapshot)
+
+def compute_mask(mask_hex: str | None) -> int:
+    if mask_hex:
+        try:
+            return int(mask_hex, 16)
+        except Exception:
+            pass
     # auto: use all CPUs except CPU0
     try:
         import multiprocessing
@@ -1663,72 +4049,195 @@ def apply_affinity_priority(exe_name: str, mask_hex: str, do_aff: bool, do_high:
     return changed, mask
 
 # ============= Discord RPC =============
+def _pypresence_client(client_id):
+    from pypresence import Presence  # requires pypresence installed
+    return Presence(client_id)
+
+
 class DiscordManager:
-    def __init__(self):
+    """Discord Rich Presence on a background service thread.
+
+    UI-facing calls never block: configure()/connect() only wake the service,
+    set_presence()/clear() overwrite a latest-wins slot that the service
+    flushes at most once per UPDATE_INTERVAL (Discord throttles updates
+    anyway). A failed connect or update is retried with exponential backoff.
+    log_cb is called from the service thread.
+
+    Tests can pass a fake client_factory/clock with start_thread=False and
+    drive service_step(now) directly.
+    """
+    UPDATE_INTERVAL = 15.0
+    BACKOFF_MIN = 2.0
+    BACKOFF_MAX = 120.0
+
+    def __init__(self, client_factory=None, clock=None, start_thread=True):
         self.enabled = False
         self.client_id = ""
         self.rpc = None
         self.connected = False
         self.start_time = None
-
-        # Keyboard shortcut: Ctrl+F opens Friends pop-out
-        try:
-            sc = QtGui.QShortcut(QtGui.QKeySequence('Ctrl+F'), self)
-            sc.activated.connect(_friends_click)
-            self._friends_shortcut = sc
-        except Exception:
-            pass
-
+        self.updates_sent = 0
+        self._factory = client_factory or _pypresence_client
+        self._clock = clock or time.monotonic
+        self._start_thread = start_thread
+        self._cond = threading.Condition()
+        self._log = lambda s: None
+        self._want = False          # connect() was requested
+        self._pending = None        # ("update", details, state) | ("clear",)
+        self._dirty = False
+        self._closing = False
+        self._thread = None
+        self._rpc_client_id = ""
+        self._last_flush = None
+        self._next_connect = 0.0
+        self._backoff = self.BACKOFF_MIN
+
+    # ---- UI side (never blocks) ----
     def configure(self, enabled: bool, client_id: str):
-        self.enabled = bool(enabled)
-        self.client_id = (client_id or "").strip()
+        with self._cond:
+            self.enabled = bool(enabled)
+            self.client_id = (client_id or "").strip()
+            self._next_connect = 0.0
+            self._backoff = self.BACKOFF_MIN
+        self._wake()
 
     def connect(self, log_cb=lambda s: None):
+        """Ask the service to (re)connect; True if RPC is enabled and configured."""
         if not self.enabled or not self.client_id:
             return False
-        try:
-            from pypresence import Presence  # requires pypresence installed
-        except Exception as e:
-            log_cb(f"Discord RPC unavailable (pypresence not installed): {e}")
-            return False
-        try:
-            self.rpc = Presence(self.client_id)
-            self.rpc.connect()
-            self.connected = True
-            self.start_time = int(time.time())
-            log_cb("Discord RPC connected.")
-            return True
-        except Exception as e:
-            log_cb(f"Discord RPC failed to connect: {e}")
-            self.connected = False
-            return False
+        with self._cond:
+            self._log = log_cb or (lambda s: None)
+            self._want = True
+            self._next_connect = 0.0
+        self._wake()
+        return True
 
-    def set_presence(self, details: str, state: str, log_cb=lambda s: None):
-        if not self.connected or not self.rpc:
-            return
-        try:
-            self.rpc.update(details=details[:127], state=state[:127], start=self.start_time)
-        except Exception as e:
-            log_cb(f"Discord RPC update failed: {e}")
+    def set_presence(self, details: str, state: str, log_cb=None):
+        with self._cond:
+            self._pending = ("update", (details or "")[:127], (state or "")[:127])
+        self._wake()
+
+    def clear(self, log_cb=None):
+        with self._cond:
+            self._pending = ("clear",)
+        self._wake()
+
+    def close(self, log_cb=None, timeout=1.0):
+        """Stop the service (closing the RPC connection); waits at most `timeout`."""
+        with self._cond:
+            self._closing = True
+            self._want = False
+            self._dirty = True
+            self._cond.notify_all()
+            t = self._thread
+        if t is not None and t is not threading.current_thread():
+            t.join(timeout)
+        elif t is None:
+            self._disconnect()
+
+    def _wake(self):
+        with self._cond:
+            self._dirty = True
+            self._cond.notify_all()
+            start = (self._thread is None and self._start_thread and not self._closing
+                     and self._want and self.enabled and self.client_id)
+            if start:
+                self._thread = threading.Thread(target=self._run, name="discord-rpc", daemon=True)
+        if start:
+            self._thread.start()
+
+    # ---- service side ----
+    def _run(self):
+        while True:
+            try:
+                delay = self.service_step(self._clock())
+            except Exception as e:
+                self._log(f"Discord RPC service error: {e}")
+                delay = self.BACKOFF_MAX
+            with self._cond:
+                if self._closing:
+                    break
+                if not self._dirty:
+                    self._cond.wait(delay)
+                self._dirty = False
+        self._disconnect()
 
-    def clear(self, log_cb=lambda s: None):
-        if not self.connected or not self.rpc:
-            return
-        try:
-            self.rpc.clear()
-            log_cb("Discord RPC cleared.")
-        except Exception as e:
-            log_cb(f"Discord RPC clear failed: {e}")
+    def _disconnect(self):
+        rpc, self.rpc = self.rpc, None
+        self.connected = False
+        if rpc is not None:
+            try:
+                rpc.close()
+                self._log("Discord RPC closed.")
+            except Exception as e:
+                self._log(f"Discord RPC close failed: {e}")
+
+    def _retry_later(self, now):
+        self._next_connect = now + self._backoff
+        self._backoff = min(self._backoff * 2, self.BACKOFF_MAX)
+
+    def service_step(self, now):
+        """One service iteration: (re)connect if due, then flush the presence slot
+        if the rate limit allows. Returns seconds until the next step is due
+        (None: nothing to do until the UI calls in)."""
+        with self._cond:
+            want = self._want and self.enabled and bool(self.client_id) and not self._closing
+            client_id = self.client_id
+            log = self._log
+        if self.rpc is not None and (not want or client_id != self._rpc_client_id):
+            self._disconnect()
+        if not want:
+            return None
+        if self.rpc is None:
+            if now < self._next_connect:
+                return self._next_connect - now
+            try:
+                rpc = self._factory(client_id)
+                rpc.connect()
+            except ImportError as e:
+                log(f"Discord RPC unavailable (pypresence not installed): {e}")
+                with self._cond:
+                    self._want = False
+                return None
+            except Exception as e:
+                self._retry_later(now)
+                log(f"Discord RPC failed to connect: {e} (retrying in {self._next_connect - now:.0f}s)")
+                return self._next_connect - now
+            self.rpc = rpc
+            self._rpc_client_id = client_id
+            self.connected = True
+            self.start_time = int(time.time())
+            self._backoff = self.BACKOFF_MIN
+            self._last_flush = None
+            log("Discord RPC connected.")
 
-    def close(self, log_cb=lambda s: None):
-        if not self.connected or not self.rpc:
-            return
-        try:
-            self.rpc.close()
-            self.connected = False
-            log_cb("Discord RPC closed.")
+        with self._cond:
+            pending = self._pending
+        if pending is None:
+            return None
+        if self._last_flush is not None and now - self._last_flush < self.UPDATE_INTERVAL:
+            return self._last_flush + self.UPDATE_INTERVAL - now
+        with self._cond:
+            if self._pending is pending:
+                self._pending = None
+        try:
+            if pending[0] == "clear":
+                self.rpc.clear()
+            else:
+                self.rpc.update(details=pending[1], state=pending[2], start=self.start_time)
+            self.updates_sent += 1
+            self._last_flush = now
         except Exception as e:
-            log_cb(f"Discord RPC close failed: {e}")
+            log(f"Discord RPC update failed: {e}")
+            with self._cond:
+                if self._pending is None:
+                    self._pending = pending   # resend after reconnecting
+            self._disconnect()
+            self._retry_later(now)
+            return self._next_connect - now
+        with self._cond:
+            more = self._pending is not None
+        return self.UPDATE_INTERVAL if more else None
 
 # ============= UWP Sync (Get-StartApps) =============
 def get_start_apps_via_powershell():
@@ -1790,20 +4299,9 @@ class UWPSyncDialog(QtWidgets.QDialog):
         btn_layout.addWidget(lbl_text)
         btn_layout.addStretch(1)
 
-        # Give it a clickable cursor and a subtle border so it feels like a widget.
+        # Give it a clickable cursor; the subtle border comes from BASE_QSS (#RefreshWidget).
         try:
             self.btn_refresh.setCursor(QtGui.QCursor(QtCore.Qt.CursorShape.PointingHandCursor))
-            self.btn_refresh.setStyleSheet(
-                "#RefreshWidget {"
-                "  border: 1px solid #3c3c3c;"
-                "  border-radius: 6px;"
-                "  background-color: #202020;"
-                "}"
-                "#RefreshWidget:hover {"
-                "  border-color: #4caf50;"
-                "  background-color: #262626;"
-                "}"
-            )
         except Exception:
             pass
 
@@ -1893,7 +4391,7 @@ class GameEditor(QtWidgets.QDialog):
         art_row = QtWidgets.QHBoxLayout()
         self.btn_artwork = QtWidgets.QPushButton("Choose artwork image...")
         self.lbl_artwork_status = QtWidgets.QLabel(self._artwork_status_text())
-        self.lbl_artwork_status.setStyleSheet("color: gray;")
+        self.lbl_artwork_status.setProperty("muted", True)
         art_row.addWidget(self.btn_artwork)
         art_row.addWidget(self.lbl_artwork_status, 1)
 
@@ -1972,6 +4470,14 @@ class GameEditor(QtWidgets.QDialog):
             dst = target_dir_path / base_name
             shutil.copyfile(src, dst)
             self.custom_art_path = str(dst)
+            # Re-render this file's packed grid thumbnails (the copy may have
+            # replaced art that was already packed), at least at the current size
+            try:
+                parent = self.parent()
+                widths = (parent._grid_cover_size(),) if hasattr(parent, "_grid_cover_size") else ()
+                _thumb_pack().refresh(str(dst), widths)
+            except Exception as e:
+                print(f"[thumbs] refresh failed for {dst}: {e}")
             self.lbl_artwork_status.setText(self._artwork_status_text())
         except Exception as e:
             try:
@@ -2024,7 +4530,7 @@ class SettingsEditor(QtWidgets.QDialog):
             form.addRow("State Template", self.state_tpl)
 
             hint = QtWidgets.QLabel("Template vars: {name}, {high}, {aff}, {flags}")
-            hint.setStyleSheet("color: gray;")
+            hint.setProperty("muted", True)
             form.addRow(hint)
         else:
             # Hide widgets from layout when not in dev mode, but keep values alive
@@ -2037,6 +4543,36 @@ class SettingsEditor(QtWidgets.QDialog):
         self.chk_artwork_theme.setChecked(bool(self.settings.get("use_artwork_theme", False)))
         form.addRow("Use game artwork for theme", self.chk_artwork_theme)
 
+        # Steam artwork the CDN doesn't have is re-checked after this long,
+        # doubling after every further miss
+        self.spin_art_miss_ttl = QtWidgets.QSpinBox()
+        self.spin_art_miss_ttl.setRange(1, 24 * 30)
+        self.spin_art_miss_ttl.setSuffix(" h")
+        try:
+            self.spin_art_miss_ttl.setValue(int(self.settings.get(
+                "artwork_miss_ttl_hours", _ArtworkMissIndex.DEFAULT_TTL_HOURS)))
+        except Exception:
+            self.spin_art_miss_ttl.setValue(_ArtworkMissIndex.DEFAULT_TTL_HOURS)
+        form.addRow("Re-check missing artwork after", self.spin_art_miss_ttl)
+
+        # Memory budget for decoded artwork shared by the grid, artwork panel and background
+        self.spin_pixmap_cache = QtWidgets.QSpinBox()
+        self.spin_pixmap_cache.setRange(16, 8192)
+        self.spin_pixmap_cache.setSuffix(" MB")
+        try:
+            self.spin_pixmap_cache.setValue(int(self.settings.get(
+                "pixmap_cache_mb", PixmapCache.DEFAULT_BUDGET_MB)))
+        except Exception:
+            self.spin_pixmap_cache.setValue(PixmapCache.DEFAULT_BUDGET_MB)
+        form.addRow("Image cache size", self.spin_pixmap_cache)
+        if dev_mode:
+            stats = _pixmap_cache().stats()
+            cache_info = QtWidgets.QLabel(
+                f"Image cache: {stats['bytes'] >> 20} MB in {stats['entries']} images, "
+                f"{stats['hits']} hits / {stats['misses']} misses / {stats['evictions']} evictions")
+            cache_info.setProperty("muted", True)
+            form.addRow(cache_info)
+
         # OK / Cancel buttons so changes can be applied
         btns = QtWidgets.QDialogButtonBox(
             QtWidgets.QDialogButtonBox.StandardButton.Ok
@@ -2056,6 +4592,8 @@ class SettingsEditor(QtWidgets.QDialog):
             "discord_state_tpl": self.state_tpl.text().strip() or "HighPrio={high}  Affinity={aff}  Flags={flags}",
             # Persist artwork-driven theme toggle
             "use_artwork_theme": self.chk_artwork_theme.isChecked(),
+            "artwork_miss_ttl_hours": self.spin_art_miss_ttl.value(),
+            "pixmap_cache_mb": self.spin_pixmap_cache.value(),
             "dev_mode": dev_mode,
         }
 
@@ -2151,7 +4689,8 @@ class PluginManagerDialog(QtWidgets.QDialog):
         # Info label
         info = QtWidgets.QLabel(
             "Plugins are simple .py files in the 'scripts' folder.\n"
-            "Uncheck a plugin to disable it. Changes apply next time you start the launcher."
+            "Uncheck a plugin to disable it. Changes apply next time you start the launcher.\n"
+            "Plugins with a manifest stay deferred until one of their actions is used."
         )
         info.setWordWrap(True)
         layout.addWidget(info)
@@ -2208,8 +4747,22 @@ class PluginManagerDialog(QtWidgets.QDialog):
         except Exception:
             pass
 
+        states = {}
+        try:
+            for meta in getattr(self._parent, "_plugin_meta", []) or []:
+                states.setdefault(str(meta.get("name", "")).strip(), meta)
+        except Exception:
+            states = {}
+
         for stem, path in sorted(paths.items(), key=lambda kv: kv[0].lower()):
             item = QtWidgets.QListWidgetItem(stem)
+            item.setData(self._STEM_ROLE, stem)
+            status = self._status_text(states.get(stem))
+            if status:
+                item.setText(f"{stem}  —  {status}")
+            err = (states.get(stem) or {}).get("error")
+            if err:
+                item.setToolTip(str(err))
             item.setFlags(item.flags() | QtCore.Qt.ItemFlag.ItemIsUserCheckable | QtCore.Qt.ItemFlag.ItemIsSelectable | QtCore.Qt.ItemFlag.ItemIsEnabled)
             if stem in self._disabled:
                 item.setCheckState(QtCore.Qt.CheckState.Unchecked)
@@ -2219,6 +4772,28 @@ class PluginManagerDialog(QtWidgets.QDialog):
                 item.setData(QtCore.Qt.ItemDataRole.UserRole, str(path))
             self.list.addItem(item)
 
+    _STEM_ROLE = QtCore.Qt.ItemDataRole.UserRole + 1
+
+    @staticmethod
+    def _status_text(meta):
+        """'loaded · import 12.3 ms' / 'deferred (loads on first use)' / ... for a _plugin_meta entry."""
+        if not meta:
+            return "not loaded this session"
+        state = meta.get("state") or ("loaded" if meta.get("module_object") is not None else "")
+        if state == "deferred":
+            return "deferred (loads on first use)"
+        if state == "disabled":
+            return "disabled"
+        parts = [state or "loaded"]
+        if meta.get("import_ms") is not None:
+            parts.append(f"import {meta['import_ms']:.1f} ms")
+        if meta.get("register_ms") is not None:
+            parts.append(f"register {meta['register_ms']:.1f} ms")
+        return " · ".join(parts)
+
+    def _item_stem(self, item):
+        return item.data(self._STEM_ROLE) or item.text()
+
     def _on_add(self):
         """Allow user to pick a .py file and copy it into scripts folder."""
         try:
@@ -2292,7 +4867,7 @@ class PluginManagerDialog(QtWidgets.QDialog):
         item = self.list.currentItem()
         if not item:
             return
-        stem = item.text()
+        stem = self._item_stem(item)
         path = item.data(QtCore.Qt.ItemDataRole.UserRole)
         if not path:
             # Nothing we can safely remove
@@ -2332,7 +4907,7 @@ class PluginManagerDialog(QtWidgets.QDialog):
             for i in range(self.list.count()):
                 item = self.list.item(i)
                 if item.checkState() == QtCore.Qt.CheckState.Unchecked:
-                    disabled.append(item.text())
+                    disabled.append(self._item_stem(item))
         except Exception:
             disabled = []
 
@@ -2363,9 +4938,11 @@ class Worker(QtCore.QObject):
     done = QtCore.pyqtSignal(bool, str)
     presence = QtCore.pyqtSignal(dict)  # {details,str; state,str}
 
-    def __init__(self, game, use_flags: bool, mask_hex: str, do_aff: bool, do_high: bool, extra_flags: list[str], discord_cfg: dict):
+    def __init__(self, game, use_flags: bool, mask_hex: str, do_aff: bool, do_high: bool, extra_flags: list[str], discord_cfg: dict, library=None, interactive=True):
         super().__init__()
         self.game = game
+        self.library = library
+        self.interactive = interactive  # False: never open dialogs (headless --launch)
         self.use_flags = use_flags
         self.mask_hex = mask_hex
         self.do_aff = do_aff
@@ -2375,18 +4952,30 @@ class Worker(QtCore.QObject):
 
     def run(self):
         try:
-            # Normalize core fields
-            aumid = (self.game.get("aumid", "") or "").strip()
-            exe_name = (self.game.get("exe_name", "") or "").strip()
-            exe_path = (self.game.get("exe", "") or "").strip()
+            # Resolve the game through the library by id/name so the thread
+            # launches the current entry even if it was edited meanwhile.
+            if self.library is not None:
+                try:
+                    g = self.library.resolve(self.game)
+                    if g is None and not isinstance(self.game, GAME_ENTRY_TYPES):
+                        self.done.emit(False, f"Game not found: {self.game}")
+                        return
+                    if g is not None:
+                        self.game = g
+                except Exception:
+                    pass
 
-            base_flags = self.game.get("flags", [])
-            if isinstance(base_flags, str):
-                base_flags = [x for x in base_flags.strip().split() if x]
+            # Core fields (GameRecord normalizes them once at load)
+            self.game = GameRecord.coerce(self.game)
+            aumid = self.game.aumid
+            exe_name = self.game.exe_name
+            exe_path = self.game.exe
+
+            base_flags = self.game.flags
             flags = (base_flags if self.use_flags else []) + self.extra_flags
 
             # --- Steam library games: launch via Steam, never UWPHook (ADD-ONLY) ---
-            source = (self.game.get("source", "") or "").lower()
+            source = self.game.source.lower()
             appid = (self.game.get("appid", "") or "").strip()
             if source == "steam" and appid:
                 uri = f"steam://rungameid/{appid}"
@@ -2455,9 +5044,12 @@ class Worker(QtCore.QObject):
 
             # ---------- ORIGINAL UWP / UWPHook PATH ----------
             else:
-                uwp_path = _resolve_uwphook_path(None)
+                uwp_path = _resolve_uwphook_path(None, prompt=self.interactive)
                 if not uwp_path:
-                    self.done.emit(False, "UWPHook.exe not found. Please locate it.")
+                    if self.interactive:
+                        self.done.emit(False, "UWPHook.exe not found. Please locate it.")
+                    else:
+                        self.done.emit(False, "UWPHook.exe not found. Set uwphook_path in settings.json or start the launcher once to locate it.")
                     return
 
                 argv = [uwp_path, aumid, exe_name] + flags
@@ -2519,8 +5111,13 @@ try:
 except Exception:
     _HAVE_QT = False
 
+# UWPLauncher --launch <game> never builds the UI (see _cli_launch)
+_HEADLESS_LAUNCH = any(a == "--launch" or a.startswith("--launch=") for a in sys.argv[1:])
+
 try:
-    # Python Windows SDK projection
+    # Python Windows SDK projection (slow to import; only the UI mirrors notifications)
+    if _HEADLESS_LAUNCH:
+        raise ImportError("not needed for a headless launch")
     from winsdk.windows.ui.notifications.management import UserNotificationListener, UserNotificationListenerAccessStatus
     from winsdk.windows.ui.notifications import NotificationKinds
     _HAVE_WINSDK = True
@@ -2688,7 +5285,674 @@ def _xbl_save_tokens_atomic(obj):
             return True
         except Exception:
             return False
+
+# === BEGIN ADD-ONLY staged startup jobs ===
+import heapq as _heapq
+
+class _BootJobs(QtCore.QObject):
+    """Prioritized startup work that runs after the window is on screen.
+
+    UI jobs run on the GUI thread, one per event-loop tick, so input and
+    painting stay responsive between them. Thread jobs run on daemon threads
+    (at most MAX_THREADS at once); their result is handed back to the GUI
+    thread through `then`. Lower priority numbers run first.
+    """
+    MAX_THREADS = 3
+    _delivered = QtCore.pyqtSignal(object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._heap = []           # (priority, seq, name, fn, thread, then)
+        self._seq = 0
+        self._scheduled = False
+        self._running = 0         # thread jobs in flight
+        self._idle = []
+        self._delivered.connect(self._deliver)
+
+    def add(self, name, fn, priority=50, thread=False, then=None):
+        _heapq.heappush(self._heap, (priority, self._seq, name, fn, bool(thread), then))
+        self._seq += 1
+        self._kick()
+
+    def when_idle(self, callback):
+        """Call `callback` once the queue is empty and no thread job is running."""
+        self._idle.append(callback)
+        self._check_idle()
+
+    def _kick(self):
+        if self._scheduled or not self._heap:
+            return
+        if self._heap[0][4] and self._running >= self.MAX_THREADS:
+            return                # _deliver() kicks again when a thread frees up
+        self._scheduled = True
+        QtCore.QTimer.singleShot(0, self._step)
+
+    def _step(self):
+        self._scheduled = False
+        if self._heap and not (self._heap[0][4] and self._running >= self.MAX_THREADS):
+            prio, _seq, name, fn, thread, then = _heapq.heappop(self._heap)
+            if thread:
+                self._running += 1
+                try:
+                    threading.Thread(target=self._run_thread, args=(name, prio, fn, then),
+                                     name=f"boot:{name}", daemon=True).start()
+                except Exception as e:
+                    self._running -= 1
+                    print(f"[boot] {name} could not start: {e}")
+            else:
+                with PROFILE.span(f"job {name}", cat="boot", priority=prio):
+                    try:
+                        fn()
+                    except Exception as e:
+                        print(f"[boot] {name} failed: {e}")
+        self._kick()
+        self._check_idle()
+
+    def _run_thread(self, name, prio, fn, then):
+        result = error = None
+        with PROFILE.span(f"job {name}", cat="boot", priority=prio, thread=True):
+            try:
+                result = fn()
+            except Exception as e:
+                error = e
+        try:
+            self._delivered.emit((name, then, result, error))
+        except RuntimeError:
+            pass                  # window already gone (shutdown during startup)
+
+    def _deliver(self, payload):
+        name, then, result, error = payload
+        self._running -= 1
+        if error is not None:
+            print(f"[boot] {name} failed: {error}")
+        elif then is not None:
+            with PROFILE.span(f"job {name}: apply", cat="boot"):
+                try:
+                    then(result)
+                except Exception as e:
+                    print(f"[boot] {name} apply failed: {e}")
+        self._kick()
+        self._check_idle()
+
+    def _check_idle(self):
+        if self._heap or self._running or self._scheduled or not self._idle:
+            return
+        callbacks, self._idle = self._idle, []
+        for cb in callbacks:
+            try:
+                cb()
+            except Exception as e:
+                print(f"[boot] idle callback failed: {e}")
+# === END ADD-ONLY staged startup jobs ===
+
+# === BEGIN ADD-ONLY artwork fetch service ===
+class ArtworkService(QtCore.QObject):
+    """Downloads Steam cover art on a few worker threads, never on the GUI thread.
+
+    request() returns the path when the art is already on disk; otherwise the
+    appid is queued and artworkReady(appid, path) or artworkFailed(appid) is
+    emitted (delivered on the GUI thread) once a worker has tried it. Repeated
+    requests for a queued or in-flight appid coalesce; a repeat with a more
+    urgent priority moves it up the queue. Lower priority numbers go first.
+    """
+    VISIBLE, SELECTED, PREFETCH = 0, 1, 2
+    MAX_WORKERS = 3
+    artworkReady = QtCore.pyqtSignal(str, str)
+    artworkFailed = QtCore.pyqtSignal(str)
+
+    def __init__(self, parent=None, fetch=None):
+        super().__init__(parent)
+        self._fetch = fetch or _steam_artwork_ensure_cached
+        self._lock = threading.Lock()
+        self._heap = []           # (priority, seq, appid); superseded entries are skipped
+        self._queued = {}         # appid -> priority of its live heap entry
+        self._inflight = set()
+        self._seq = 0
+        self._workers = 0
+        self._closed = False
+
+    @staticmethod
+    def cached_path(appid):
+        """Path of the artwork already on disk for appid, or None (no network)."""
+        try:
+            p = _steam_artwork_path(str(appid).strip())
+            return str(p) if p and os.path.isfile(p) else None
+        except Exception:
+            return None
+
+    def request(self, appid, priority=PREFETCH):
+        """Cached path for appid, else None (queued unless it is a known miss)."""
+        appid = str(appid or "").strip()
+        if not appid:
+            return None
+        path = self.cached_path(appid)
+        if path or appid in _STEAM_ARTWORK_NEG_CACHE:
+            return path           # on disk, or a recent known miss: no request
+        with self._lock:
+            if self._closed or appid in self._inflight:
+                return None
+            best = self._queued.get(appid)
+            if best is not None and best <= priority:
+                return None
+            self._queued[appid] = priority
+            _heapq.heappush(self._heap, (priority, self._seq, appid))
+            self._seq += 1
+            while self._workers < min(self.MAX_WORKERS, len(self._queued)):
+                self._workers += 1
+                threading.Thread(target=self._work, name="artwork", daemon=True).start()
+        return None
+
+    def pending(self, appid):
+        """True while appid is queued or being downloaded."""
+        appid = str(appid or "").strip()
+        with self._lock:
+            return appid in self._queued or appid in self._inflight
+
+    def close(self):
+        """Drop queued work; downloads already running finish on their own."""
+        with self._lock:
+            self._closed = True
+            self._heap.clear()
+            self._queued.clear()
+
+    def _next(self):
+        with self._lock:
+            while self._heap and not self._closed:
+                prio, _seq, appid = _heapq.heappop(self._heap)
+                if self._queued.get(appid) == prio:
+                    del self._queued[appid]
+                    self._inflight.add(appid)
+                    return appid
+            self._workers -= 1
+            return None
+
+    def _work(self):
+        while True:
+            appid = self._next()
+            if appid is None:
+                return
+            with PROFILE.span(f"artwork {appid}", cat="artwork", thread=True):
+                try:
+                    self._fetch(appid)
+                except Exception as e:
+                    print(f"[ART] fetch failed for appid {appid}: {e}")
+            path = self.cached_path(appid)
+            with self._lock:
+                self._inflight.discard(appid)
+            try:
+                if path:
+                    self.artworkReady.emit(appid, path)
+                else:
+                    self.artworkFailed.emit(appid)
+            except RuntimeError:
+                pass              # window already gone
+# === END ADD-ONLY artwork fetch service ===
+
+# === BEGIN ADD-ONLY thumbnail pack ===
+# Grid covers come from one file, config/cache/thumbs.pack, holding raw
+# pre-scaled pixels per (artwork file, width bucket), so building a card
+# never decodes the full 600x900 JPEG. Layout:
+#   header   "UWPTHMB1" | u32 format | u64 index offset | u64 index size | u64 dead bytes
+#   records  raw scanlines (RGB888, or ARGB32 premultiplied when the art has alpha)
+#   index    marshal dict: key -> (offset, w, h, bytes/line, QImage format, src size, src mtime_ns)
+# Updates append records plus a fresh index behind the current one and only
+# then rewrite the header, so a crash mid-write leaves the old index valid.
+# Superseded records and indexes are counted as dead bytes and dropped by
+# compacting on open. Records are read through mmap and wrapped by QImages
+# without a copy; mappings stay open for the life of the process because
+# such images point into them.
+import mmap as _mmap, struct as _struct
+
+THUMB_BUCKETS = (128, 160, 192, 224, 256, 320)   # cover widths (slider range 96-320)
+THUMB_PACK_NAME = "thumbs.pack"
+
+def thumb_bucket(width):
+    """Smallest bucket that is at least `width` wide (the largest one otherwise)."""
+    for b in THUMB_BUCKETS:
+        if width <= b:
+            return b
+    return THUMB_BUCKETS[-1]
+
+class ThumbnailPack:
+    MAGIC = b"UWPTHMB1"
+    FORMAT = 1
+    HEADER = _struct.Struct("<8sIQQQ")
+    DATA_START = 64
+    ALIGN = 16
+    COMPACT_MIN_DEAD = 16 << 20     # compact once dead bytes exceed this and half the file
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()     # index / pending / mappings
+        self._io = threading.Lock()       # one writer at a time
+        self._opened = False
+        self._index = {}
+        self._end = self.DATA_START       # end of the current index: next append goes here
+        self._index_size = 0
+        self._dead = 0
+        self._maps = []
+        self._mapped = 0                  # bytes covered by self._maps[-1]
+        self._pending = {}                # key -> (QImage, src sig), not yet on disk
+
+    @staticmethod
+    def _key(path, bucket):
+        return f"{os.path.normcase(os.path.abspath(path))}|{bucket}"
+
+    def __len__(self):
+        with self._lock:
+            self._open()
+            return len(self._index) + len(self._pending)
+
+    def has_pending(self):
+        return bool(self._pending)
+
+    # -- reading ---------------------------------------------------------
+    def _open(self):
+        """Load header + index and map the file (lock held)."""
+        if self._opened:
+            return
+        self._opened = True
+        try:
+            with open(self.path, "rb") as f:
+                magic, fmt, off, size, dead = self.HEADER.unpack(f.read(self.HEADER.size))
+                if magic != self.MAGIC or fmt != self.FORMAT:
+                    raise ValueError("not a thumbnail pack of this format")
+                f.seek(off)
+                blob = f.read(size)
+                if len(blob) != size:
+                    raise ValueError("truncated index")
+                index = _marshal.loads(blob)
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            print(f"[thumbs] discarding {os.path.basename(self.path)}: {e}")
+            try:
+                os.remove(self.path)
+            except Exception:
+                pass
+            return
+        self._index, self._end, self._index_size, self._dead = index, off + size, size, dead
+        if dead > self.COMPACT_MIN_DEAD and dead * 2 > self._end:
+            self._compact()
+        self._remap()
+
+    def _remap(self):
+        try:
+            with open(self.path, "rb") as f:
+                mm = _mmap.mmap(f.fileno(), 0, access=_mmap.ACCESS_READ)
+        except (OSError, ValueError) as e:
+            print(f"[thumbs] mmap failed: {e}")
+            return
+        self._maps.append(mm)
+        self._mapped = len(mm)
+
+    def get(self, path, bucket):
+        """QImage for path at bucket if packed and still current, else None.
+
+        The image wraps the mapped file read-only: convert or copy it, never
+        paint into it.
+        """
+        sig = _file_sig(path)
+        if sig is None:
+            return None
+        key = self._key(path, bucket)
+        with self._lock:
+            self._open()
+            pending = self._pending.get(key)
+            if pending is not None and pending[1] == sig:
+                return pending[0]
+            e = self._index.get(key)
+            if e is None or (e[5], e[6]) != sig:
+                return None
+            off, w, h, bpl, fmt = e[:5]
+            if off + bpl * h > self._mapped:
+                self._remap()
+                if off + bpl * h > self._mapped:
+                    return None
+            view = memoryview(self._maps[-1])[off:off + bpl * h]
+        img = QtGui.QImage(view, w, h, bpl, QtGui.QImage.Format(fmt))
+        img._pack_view = view         # keep the mapped bytes referenced with the image
+        return img
+
+    def thumbnail(self, path, width):
+        """Cover image for path at least `width` wide: from the pack, or rendered and queued for it."""
+        bucket = thumb_bucket(width)
+        img = self.get(path, bucket)
+        return img if img is not None else self.render(path, bucket)
+
+    # -- writing ---------------------------------------------------------
+    @staticmethod
+    def decode(path, bucket):
+        """(QImage at most bucket wide, source sig) for path, or None. Safe on any thread.
+
+        QImageReader.setScaledSize lets the JPEG decoder produce the reduced
+        size directly (DCT scaling) instead of decoding 600x900 and scaling.
+        """
+        sig = _file_sig(path)
+        if sig is None:
+            return None
+        reader = QtGui.QImageReader(path)
+        reader.setAutoTransform(True)
+        size = reader.size()
+        if size.isValid() and size.width() > bucket:
+            reader.setScaledSize(QtCore.QSize(bucket, max(1, round(size.height() * bucket / size.width()))))
+        img = reader.read()
+        if img.isNull():
+            return None
+        fmt = (QtGui.QImage.Format.Format_ARGB32_Premultiplied if img.hasAlphaChannel()
+               else QtGui.QImage.Format.Format_RGB888)
+        return img.convertToFormat(fmt), sig
+
+    def add(self, path, bucket, img, sig):
+        """Queue a thumbnail decoded elsewhere for the next flush()."""
+        with self._lock:
+            self._pending[self._key(path, bucket)] = (img, sig)
+
+    def render(self, path, bucket):
+        """Decode path at bucket width on the calling thread; queued for the next flush()."""
+        result = self.decode(path, bucket)
+        if result is None:
+            return None
+        self.add(path, bucket, *result)
+        return result[0]
+
+    def refresh(self, path, widths=()):
+        """Re-render path for every bucket it is packed at (plus `widths`) and write now."""
+        prefix = self._key(path, 0)[:-1]
+        with self._lock:
+            self._open()
+            buckets = {int(k[len(prefix):]) for k in list(self._index) + list(self._pending)
+                       if k.startswith(prefix)}
+        buckets.update(thumb_bucket(w) for w in widths)
+        for b in sorted(buckets):
+            self.render(path, b)
+        self.flush()
+
+    def flush(self):
+        """Append queued thumbnails and a new index; returns how many were written."""
+        with self._io:
+            with self._lock:
+                self._open()
+                items = list(self._pending.items())
+                if not items:
+                    return 0
+                index = dict(self._index)
+                pos, dead = self._end, self._dead + self._index_size
+            try:
+                fresh = not os.path.exists(self.path)
+                with open(self.path, "w+b" if fresh else "r+b") as f:
+                    if fresh:                       # first write, or the pack was deleted
+                        f.write(b"\0" * self.DATA_START)
+                        index, pos, dead = {}, self.DATA_START, 0
+                    for key, (img, sig) in items:
+                        pos = (pos + self.ALIGN - 1) // self.ALIGN * self.ALIGN
+                        bits = img.constBits()
+                        bits.setsize(img.sizeInBytes())
+                        old = index.get(key)
+                        if old is not None:
+                            dead += old[3] * old[2]
+                        f.seek(pos)
+                        f.write(bits.asstring())
+                        index[key] = (pos, img.width(), img.height(), img.bytesPerLine(),
+                                      img.format().value, sig[0], sig[1])
+                        pos += img.sizeInBytes()
+                    blob = _marshal.dumps(index)
+                    f.seek(pos)
+                    f.write(blob)
+                    f.flush()
+                    os.fsync(f.fileno())
+                    f.seek(0)
+                    f.write(self.HEADER.pack(self.MAGIC, self.FORMAT, pos, len(blob), dead))
+                    f.flush()
+                    os.fsync(f.fileno())
+            except Exception as e:
+                print(f"[thumbs] write failed: {e}")
+                return 0
+            with self._lock:
+                self._index, self._end, self._index_size, self._dead = index, pos + len(blob), len(blob), dead
+                for key, entry in items:
+                    if self._pending.get(key) is entry:
+                        del self._pending[key]
+            return len(items)
+
+    def _compact(self):
+        """Rewrite only live records whose source is unchanged (on open, before mapping)."""
+        tmp = self.path + ".tmp"
+        index, pos = {}, self.DATA_START
+        try:
+            with open(self.path, "rb") as src, open(tmp, "wb") as dst:
+                dst.write(b"\0" * self.DATA_START)
+                for key, e in self._index.items():
+                    path = key.rsplit("|", 1)[0]
+                    if _file_sig(path) != (e[5], e[6]):
+                        continue
+                    src.seek(e[0])
+                    data = src.read(e[3] * e[2])
+                    pos = (pos + self.ALIGN - 1) // self.ALIGN * self.ALIGN
+                    dst.seek(pos)
+                    dst.write(data)
+                    index[key] = (pos,) + tuple(e[1:])
+                    pos += len(data)
+                blob = _marshal.dumps(index)
+                dst.seek(pos)
+                dst.write(blob)
+                dst.seek(0)
+                dst.write(self.HEADER.pack(self.MAGIC, self.FORMAT, pos, len(blob), 0))
+                dst.flush()
+                os.fsync(dst.fileno())
+            os.replace(tmp, self.path)
+        except Exception as e:
+            print(f"[thumbs] compaction failed: {e}")
+            try:
+                os.remove(tmp)
+            except Exception:
+                pass
+            return
+        print(f"[thumbs] compacted: {len(self._index)} -> {len(index)} entries, {self._dead >> 20} MB reclaimed")
+        self._index, self._end, self._index_size, self._dead = index, pos + len(blob), len(blob), 0
+
+_THUMB_PACK = None
+
+def _thumb_pack():
+    """The launcher's ThumbnailPack (config/cache/thumbs.pack), created on first use."""
+    global _THUMB_PACK
+    if _THUMB_PACK is None:
+        d = os.path.join(CONFIG_DIR, "cache")
+        try:
+            os.makedirs(d, exist_ok=True)
+        except Exception:
+            pass
+        _THUMB_PACK = ThumbnailPack(os.path.join(d, THUMB_PACK_NAME))
+    return _THUMB_PACK
+# === END ADD-ONLY thumbnail pack ===
+
+# === BEGIN ADD-ONLY pixmap cache ===
+from collections import OrderedDict as _OrderedDict
+
+class PixmapCache:
+    """Shared LRU of decoded artwork, bounded by a byte budget (GUI thread only).
+
+    Keys are (path, bucket): bucket is a THUMB_BUCKETS cover width, served
+    from the thumbnail pack, or 0 for the full-size file (window background).
+    An entry is dropped when its file's size/mtime changes. Grid cards, the
+    artwork panel and the background keep only the scaled copy they display;
+    the source pixmap lives here and is reloaded cheaply after eviction.
+    """
+    DEFAULT_BUDGET_MB = 256
+
+    def __init__(self, budget_bytes=DEFAULT_BUDGET_MB << 20):
+        self._entries = _OrderedDict()    # key -> (QPixmap, cost, src sig), oldest first
+        self.budget = int(budget_bytes)
+        self.bytes = 0
+        self.hits = self.misses = self.evictions = 0
+
+    @staticmethod
+    def bucket_for(width):
+        return thumb_bucket(width) if 0 < width <= THUMB_BUCKETS[-1] else 0
+
+    @staticmethod
+    def cost(pix):
+        return pix.width() * pix.height() * max(1, pix.depth()) // 8
+
+    def set_budget(self, budget_bytes):
+        self.budget = max(0, int(budget_bytes))
+        self._trim()
+
+    def get(self, path, width=0, render=True):
+        """Pixmap of path for display about `width` px wide (0: full size); None if unreadable.
+
+        With render=False a thumbnail that isn't packed yet is not decoded
+        here (None is returned); grid cards hand those to the CoverDecoder.
+        """
+        if not path:
+            return None
+        key = (os.path.normcase(os.path.abspath(path)), self.bucket_for(width))
+        sig = _file_sig(path)
+        entry = self._entries.get(key)
+        if entry is not None and entry[2] == sig:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+        self.misses += 1
+        if entry is not None:
+            self._drop(key)
+        if sig is None:
+            return None
+        pix = self._load(path, key[1], render)
+        if pix is None or pix.isNull():
+            return None
+        cost = self.cost(pix)
+        if cost <= self.budget:
+            self._entries[key] = (pix, cost, sig)
+            self.bytes += cost
+            self._trim()
+        return pix
+
+    @staticmethod
+    def _load(path, bucket, render=True):
+        if bucket:
+            try:
+                pack = _thumb_pack()
+                img = pack.thumbnail(path, bucket) if render else pack.get(path, bucket)
+                return QtGui.QPixmap.fromImage(img) if img is not None else None
+            except Exception as e:
+                print(f"[thumbs] {path}: {e}")
+                if not render:
+                    return None
+        return QtGui.QPixmap(path)
+
+    def invalidate(self, path=None):
+        """Forget cached pixmaps of path (all buckets), or everything."""
+        norm = os.path.normcase(os.path.abspath(path)) if path else None
+        for key in [k for k in self._entries if norm is None or k[0] == norm]:
+            self._drop(key)
+
+    def _drop(self, key):
+        _pix, cost, _sig = self._entries.pop(key)
+        self.bytes -= cost
+
+    def _trim(self):
+        while self.bytes > self.budget and self._entries:
+            _key, (_pix, cost, _sig) = self._entries.popitem(last=False)
+            self.bytes -= cost
+            self.evictions += 1
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                "entries": len(self._entries), "bytes": self.bytes, "budget": self.budget}
+
+_PIXMAP_CACHE = None
+
+def _pixmap_cache():
+    """The launcher's shared PixmapCache (budget from the pixmap_cache_mb setting)."""
+    global _PIXMAP_CACHE
+    if _PIXMAP_CACHE is None:
+        _PIXMAP_CACHE = PixmapCache()
+    return _PIXMAP_CACHE
+# === END ADD-ONLY pixmap cache ===
+
+# === BEGIN ADD-ONLY cover decoder pool ===
+class _CoverDecodeJob(QtCore.QRunnable):
+    def __init__(self, decoder, key):
+        super().__init__()
+        self.setAutoDelete(False)     # the decoder owns jobs so cancel() can tryTake them
+        self.decoder, self.key = decoder, key
+        self.cancelled = False
+        self.skipped = False      # cancelled before it started: nothing decoded
+        self.result = None
+
+    def run(self):
+        self.skipped = self.cancelled
+        if not self.skipped:
+            path, bucket = self.key
+            with PROFILE.span("decode cover", cat="artwork", thread=True, bucket=bucket):
+                try:
+                    self.result = ThumbnailPack.decode(path, bucket)
+                except Exception as e:
+                    print(f"[thumbs] decode failed for {path}: {e}")
+        try:
+            self.decoder._done.emit(self)
+        except RuntimeError:
+            pass                  # window already gone
+
+class CoverDecoder(QtCore.QObject):
+    """Decodes grid covers to thumbnail size on QThreadPool workers.
+
+    request((path, bucket)) queues a decode unless that key is already queued
+    or running; decoded(key, (QImage, sig) | None) arrives on the GUI thread,
+    which does the QPixmap conversion. cancel(key) takes a queued job back
+    out of the pool; a job that already started still finishes and reports.
+    """
+    decoded = QtCore.pyqtSignal(object, object)
+    _done = QtCore.pyqtSignal(object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._pool = QtCore.QThreadPool(self)
+        self._pool.setMaxThreadCount(max(2, min(4, QtCore.QThread.idealThreadCount() - 1)))
+        self._jobs = {}           # key -> job queued or running
+        self._done.connect(self._on_done)
+
+    def request(self, key, priority=0):
+        job = self._jobs.get(key)
+        if job is not None:
+            job.cancelled = False
+            return
+        job = self._jobs[key] = _CoverDecodeJob(self, key)
+        self._pool.start(job, priority)
+
+    def cancel(self, key):
+        job = self._jobs.get(key)
+        if job is None:
+            return
+        job.cancelled = True
+        if self._pool.tryTake(job):
+            del self._jobs[key]
+
+    def close(self):
+        """Drop queued decodes and wait briefly for running ones."""
+        for job in self._jobs.values():
+            job.cancelled = True
+        self._pool.clear()
+        self._pool.waitForDone(1000)
+
+    def _on_done(self, job):
+        if self._jobs.get(job.key) is job:
+            del self._jobs[job.key]
+        if job.skipped:
+            if not job.cancelled:
+                self.request(job.key)     # re-requested after it had already bailed out
+            return
+        # A cancelled job that still decoded is reported too: the image goes
+        # into the thumbnail pack even if its card has scrolled away
+        if not job.cancelled or job.result is not None:
+            self.decoded.emit(job.key, job.result)
+# === END ADD-ONLY cover decoder pool ===
+
 class Main(QtWidgets.QWidget):
+    # Discord service log lines arrive on its thread; this hands them to _append
+    _discord_log = QtCore.pyqtSignal(str)
+
     def on_xbox_sign_in(self):
         try:
             self._append("Xbox Live: checking tokens.json...")
@@ -2866,7 +6130,8 @@ class Main(QtWidgets.QWidget):
 
     def _open_friends(self):
         try:
-            if 'FriendsDock' in globals() and FriendsDock:
+            FriendsDock = _friends_dock_class()
+            if FriendsDock:
                 try:
                     dlg = FriendsDock(self)
                     dlg.setWindowModality(QtCore.Qt.WindowModality.NonModal)
@@ -2894,6 +6159,30 @@ class Main(QtWidgets.QWidget):
     def __init__(self):
         super().__init__()
 
+        # Staged startup: the grid starts with placeholder covers; real art,
+        # network work and plugins are filled in after the first paint
+        # (see start_staged_boot).
+        self._boot_stage = 1
+        self._boot_placeholders = True
+        self._boot = _BootJobs(self)
+
+        # Steam cover downloads run on ArtworkService workers; cards waiting
+        # for an appid are listed in _art_waiting until its signal arrives.
+        self._artwork = ArtworkService(self)
+        self._artwork.artworkReady.connect(self._on_artwork_ready)
+        self._artwork.artworkFailed.connect(self._on_artwork_failed)
+        self._art_waiting = {}
+        # Newly rendered cover thumbnails are appended to the pack in batches
+        self._thumb_flush_timer = QtCore.QTimer(self)
+        self._thumb_flush_timer.setSingleShot(True)
+        self._thumb_flush_timer.setInterval(1500)
+        self._thumb_flush_timer.timeout.connect(self._flush_thumbnails)
+        # Covers not packed at the grid size yet are decoded on a thread
+        # pool; cards waiting per (path, bucket) are kept in _cover_waiting
+        self._decoder = CoverDecoder(self)
+        self._decoder.decoded.connect(self._on_cover_decoded)
+        self._cover_waiting = {}
+
         # --- XBL token auto-refresh ---
         try:
             from PyQt6 import QtCore as _QtCore
@@ -2956,7 +6245,10 @@ class Main(QtWidgets.QWidget):
         self._artwork_bg = None
 
         self.discord = DiscordManager()
-        self.settings = load_settings()
+        self._discord_log.connect(self._append)
+        with PROFILE.span("load_settings"):
+            self.settings = load_settings()
+        self._apply_artwork_settings()
         self.discord.configure(self.settings.get("discord_enabled", False), self.settings.get("discord_client_id",""))
 
 
@@ -2964,6 +6256,7 @@ class Main(QtWidgets.QWidget):
         self._xbl_headers = None
 
         # --- Root layout: sidebar + main content ---
+        PROFILE.begin("build widgets")
         root_layout = QtWidgets.QHBoxLayout(self)
         root_layout.setContentsMargins(0, 0, 0, 0)
         root_layout.setSpacing(0)
@@ -3047,6 +6340,12 @@ class Main(QtWidgets.QWidget):
         self.btn_nav_plugins.setAutoRaise(True)
         sidebar.addWidget(self.btn_nav_plugins)
 
+        # Sidebar buttons contributed by plugin manifests
+        self._sidebar_plugins = QtWidgets.QVBoxLayout()
+        self._sidebar_plugins.setContentsMargins(0, 0, 0, 0)
+        self._sidebar_plugins.setSpacing(8)
+        sidebar.addLayout(self._sidebar_plugins)
+
         sidebar.addStretch(1)
 
         # Settings / skins / add-edit-delete-sync menu
@@ -3063,31 +6362,13 @@ class Main(QtWidgets.QWidget):
         layout.setContentsMargins(8, 8, 8, 8)
         layout.setSpacing(8)
         root_layout.addLayout(layout, 1)
-        # Add Xbox profile header (gamertag + avatar)
-        if 'XboxProfileWidget' in globals() and XboxProfileWidget:
-            try:
-                self.xbox_profile = XboxProfileWidget(self)
-                layout.addWidget(self.xbox_profile)
-                # Hide the built‑in refresh button on the profile widget; we
-                # expose this as a sidebar action instead so all refresh /
-                # actions live in one place.
-                try:
-                    if hasattr(self.xbox_profile, "btn_refresh"):
-                        self.xbox_profile.btn_refresh.setVisible(False)
-                except Exception:
-                    pass
-                try:
-                    if getattr(self, '_xbl_headers', None):
-                        self.xbox_profile.set_headers(self._xbl_headers)
-                except Exception:
-                    pass
-                try:
-                    self.xbox_profile.refresh()
-                except Exception:
-                    pass
-            except Exception as _e:
-                pass
-
+        # Xbox profile header (gamertag + avatar). The widget itself is built
+        # by a stage-3 boot job (_boot_install_xbox_profile); this slot keeps
+        # its place at the top of the main column.
+        self._xbox_profile_slot = QtWidgets.QWidget()
+        _slot_layout = QtWidgets.QVBoxLayout(self._xbox_profile_slot)
+        _slot_layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(self._xbox_profile_slot)
 
         # Toggles
         toggles = QtWidgets.QHBoxLayout()
@@ -3148,6 +6429,15 @@ class Main(QtWidgets.QWidget):
         self.games_layout.setVerticalSpacing(24)
         self.games_scroll.setWidget(self.games_container)
         layout.addWidget(self.games_scroll, 2)
+        # Cards scrolled into view move to the front of the artwork queue
+        self._visible_art_timer = QtCore.QTimer(self)
+        self._visible_art_timer.setSingleShot(True)
+        self._visible_art_timer.setInterval(50)
+        self._visible_art_timer.timeout.connect(self._prioritize_visible_art)
+        self._visible_art_timer.timeout.connect(self._decode_visible_covers)
+        self.games_scroll.verticalScrollBar().valueChanged.connect(self._visible_art_timer.start)
+        # ...and so do cards a resize or relayout brings into view
+        self.games_scroll.verticalScrollBar().rangeChanged.connect(lambda *_: self._visible_art_timer.start())
 
         # Game selector + CRUD (buttons kept but hidden; settings menu handles them)
         row = QtWidgets.QHBoxLayout()
@@ -3184,6 +6474,7 @@ class Main(QtWidgets.QWidget):
         act_delete = self.menu_actions.addAction('Delete')
         self.menu_actions.addSeparator()
         act_sync = self.menu_actions.addAction('Sync UWP')
+        act_retry_art = self.menu_actions.addAction('Retry Missing Artwork')
         # ---- Skins submenu (add-only) ----
         skins = self.menu_actions.addMenu('Skins')
         act_skin_default = skins.addAction('Default')
@@ -3223,11 +6514,34 @@ class Main(QtWidgets.QWidget):
                 pass
         act_dev_mode.toggled.connect(_toggle_dev_mode)
 
+        # Library storage backend (JSON file vs SQLite database)
+        act_sqlite = self.menu_actions.addAction('Store library in SQLite')
+        act_sqlite.setCheckable(True)
+        try:
+            act_sqlite.setChecked(str(self.settings.get('library_backend', 'json')).lower() == 'sqlite')
+        except Exception:
+            act_sqlite.setChecked(False)
+        def _toggle_sqlite(checked):
+            try:
+                backend = 'sqlite' if checked else 'json'
+                self.settings['library_backend'] = backend
+                save_settings(self.settings)
+                # Write the current library into the newly selected store right away
+                _switch_game_store(backend, getattr(self, 'games', None))
+                self._show_toast(f"Library now stored in {'config/games.db' if checked else 'config/games.json'}.", "info")
+            except Exception as e:
+                try:
+                    self._append(f"[library] backend switch failed: {e}")
+                except Exception:
+                    pass
+        act_sqlite.toggled.connect(_toggle_sqlite)
+
         # Wire actions to existing slots
         act_add.triggered.connect(self._on_add)
         act_edit.triggered.connect(self._on_edit)
         act_delete.triggered.connect(self._on_del)
         act_sync.triggered.connect(self._on_sync)
+        act_retry_art.triggered.connect(self._on_retry_missing_art)
         # Hide the original row buttons so only the Settings menu shows
         self.btn_add.setVisible(False)
         self.btn_edit.setVisible(False)
@@ -3264,15 +6578,14 @@ class Main(QtWidgets.QWidget):
 
 # Steam status (LED + label) + Discord RPC status (same bottom row)
         status_row = QtWidgets.QHBoxLayout()
-        self.lbl_steam_led = QtWidgets.QLabel()
-        self.lbl_steam_led.setFixedSize(14, 14)
-        # default color; will be updated by _update_steam_led()
-        self.lbl_steam_led.setStyleSheet("border-radius: 7px; background-color: #c62828;")
+        # red until _update_steam_led() finds Steam credentials
+        self.lbl_steam_led = StatusLed()
+        self.lbl_steam_led.setObjectName("steamLed")
         status_row.addWidget(self.lbl_steam_led)
         status_row.addWidget(QtWidgets.QLabel("Steam"))
         status_row.addStretch(1)
         self.lbl_discord = QtWidgets.QLabel(self._discord_status_text())
-        self.lbl_discord.setStyleSheet("color: gray;")
+        self.lbl_discord.setProperty("muted", True)
         # Only show this debug-style status line when developer mode is enabled
         try:
             self.lbl_discord.setVisible(bool(self.settings.get("dev_mode", False)))
@@ -3289,9 +6602,13 @@ class Main(QtWidgets.QWidget):
         status_row.addWidget(self.lbl_discord)
         layout.addLayout(status_row)
 
+        PROFILE.end("build widgets")
+
         # Data
-        self.games = load_games()
-        self._refresh_selector()
+        with PROFILE.span("load_games"):
+            self.games = load_games()
+        with PROFILE.span("_refresh_selector"):
+            self._refresh_selector()
 
         # Sidebar refresh: reload games + selector + grid when the user clicks
         # the refresh tool button.
@@ -3309,12 +6626,6 @@ class Main(QtWidgets.QWidget):
         except Exception:
             pass
 
-        # Rebuild grid once after loading
-        try:
-            self._rebuild_game_grid()
-        except Exception:
-            pass
-
         # Initialize Steam LED based on current config/steam.json (if any)
         try:
             self._update_steam_led()
@@ -3380,18 +6691,13 @@ class Main(QtWidgets.QWidget):
             pass
 
         # Show defaults of first game
-        self._on_sel_change(self.selector.currentIndex())
+        with PROFILE.span("select first game"):
+            self._on_sel_change(self.selector.currentIndex())
 
-        # Try to connect Discord if enabled
-        self._connect_discord_if_needed()
-        # Xbox tokens: auto-refresh at startup + every 5 minutes (silent)
+        # Discord, the startup XBL refresh, the profile header and the config
+        # watcher are stage-3 boot jobs (_boot_stage3).
+        # Xbox tokens: auto-refresh every 5 minutes (silent)
         try:
-            import threading as _threading
-            try:
-                t = _threading.Thread(target=_auto_refresh_xbl_token_silent, daemon=True)
-                t.start()
-            except Exception:
-                _auto_refresh_xbl_token_silent()
             self._xbl_auto_timer = QtCore.QTimer(self)
             self._xbl_auto_timer.setInterval(5 * 60 * 1000)
             self._xbl_auto_timer.timeout.connect(_auto_refresh_xbl_token_silent)
@@ -3442,31 +6748,12 @@ class Main(QtWidgets.QWidget):
             return
 
         try:
-            from PyQt6 import QtWidgets as _QtWidgets, QtGui as _QtGui, QtCore as _QtCore
+            from PyQt6 import QtWidgets as _QtWidgets, QtCore as _QtCore
         except Exception:
             return
 
-        # Pick background color based on level
-        if level == "success":
-            bg = "#2e7d32"   # green-ish
-        elif level == "error":
-            bg = "#c62828"   # red-ish
-        else:
-            bg = "#37474f"   # neutral dark
-
-        toast = _QtWidgets.QFrame(self)
-        toast.setObjectName("toast")
-        toast.setAttribute(_QtCore.Qt.WidgetAttribute.WA_StyledBackground, True)
-        toast.setStyleSheet(
-            f"""
-            QFrame#toast {{
-                background-color: {bg};
-                color: #ffffff;
-                border-radius: 8px;
-                padding: 8px 12px;
-            }}
-            """
-        )
+        # Background color per level is painted by ToastFrame
+        toast = ToastFrame(level, self)
 
         layout = _QtWidgets.QHBoxLayout(toast)
         layout.setContentsMargins(10, 6, 10, 6)
@@ -3563,30 +6850,24 @@ class Main(QtWidgets.QWidget):
         """
         try:
             from pathlib import Path as _Path
-            import json as _json
 
             ok = False
             cfg = _Path("config") / "steam.json"
-            if cfg.is_file():
-                try:
-                    data = _json.loads(cfg.read_text(encoding="utf-8"))
+            try:
+                data = CONFIG_STORE.read(cfg)
+                if data is not None:
                     steamid = str(data.get("steamid", "")).strip()
                     enc = str(data.get("api_key_enc", "")).strip()
                     ok = bool(steamid and enc)
-                except Exception:
-                    ok = False
+            except Exception:
+                ok = False
 
             if hasattr(self, "lbl_steam_led"):
-                color = "#00c853" if ok else "#c62828"
-                self.lbl_steam_led.setStyleSheet(
-                    f"border-radius: 7px; background-color: {color};"
-                )
+                self.lbl_steam_led.set_ok(ok)
         except Exception:
             try:
                 if hasattr(self, "lbl_steam_led"):
-                    self.lbl_steam_led.setStyleSheet(
-                        "border-radius: 7px; background-color: #c62828;"
-                    )
+                    self.lbl_steam_led.set_ok(False)
             except Exception:
                 pass
 
@@ -3598,19 +6879,21 @@ class Main(QtWidgets.QWidget):
         Also makes sure artwork is cached on demand for the current Steam appid.
         """
         try:
-            from PyQt6 import QtGui, QtCore as _QtCore
+            from PyQt6 import QtCore as _QtCore
         except Exception:
             return
         try:
             g = self._current_game()
         except Exception:
             g = None
+        if getattr(self, "_boot_placeholders", False):
+            return  # staged startup: shown once the artwork boot job has run
         art_path = None
         try:
             if g:
                 # Prefer per-game custom artwork if present
                 try:
-                    custom = str(g.get("custom_art_path", "")).strip()
+                    custom = g.custom_art_path
                 except Exception:
                     custom = ""
                 if custom:
@@ -3620,34 +6903,21 @@ class Main(QtWidgets.QWidget):
                             art_path = custom
                     except Exception:
                         art_path = None
-                # If no custom artwork, fall back to Steam artwork by appid
-                if not art_path:
-                    appid = str(g.get("appid", "")).strip()
-                    if appid:
-                        # Ensure artwork is cached for this appid (also creates config/artwork).
-                        try:
-                            _steam_artwork_ensure_cached(appid)
-                        except Exception as e:
-                            print(f"[ART] on-select cache failed for appid {appid}: {e}")
-                        p = _steam_artwork_path(appid)
-                        # Support both Path and plain string
-                        if hasattr(p, "is_file"):
-                            if p.is_file():
-                                art_path = str(p)
-                        else:
-                            import os as _os
-                            if _os.path.isfile(p):
-                                art_path = str(p)
+                # If no custom artwork, fall back to Steam artwork by appid.
+                # A missing image is queued ahead of prefetch work and shown
+                # when artworkReady arrives (_on_artwork_ready).
+                if not art_path and g.appid:
+                    art_path = self._art_path_for_game(g, priority=ArtworkService.SELECTED)
         except Exception:
             art_path = None
 
         if art_path and hasattr(self, "lbl_artwork"):
             try:
-                pix = QtGui.QPixmap(art_path)
-                if not pix.isNull():
-                    # Scale to fit label while keeping aspect ratio
-                    w = max(1, self.lbl_artwork.width() or 320)
-                    h = max(1, self.lbl_artwork.height() or 240)
+                # Scale to fit label while keeping aspect ratio
+                w = max(1, self.lbl_artwork.width() or 320)
+                h = max(1, self.lbl_artwork.height() or 240)
+                pix = _pixmap_cache().get(art_path, w)
+                if pix is not None and not pix.isNull():
                     scaled = pix.scaled(
                         w,
                         h,
@@ -3682,18 +6952,16 @@ class Main(QtWidgets.QWidget):
         Store the selected artwork path and trigger a repaint so the entire
         window background is covered by that image.
         """
-        try:
-            from PyQt6 import QtGui
-        except Exception:
-            return
         try:
             if not art_path:
                 self._artwork_bg_path = None
                 self._artwork_bg = None
                 self.update()
                 return
-            pix = QtGui.QPixmap(art_path)
-            if pix.isNull():
+            # Full-size source from the shared cache (the artwork panel and
+            # grid use thumbnail buckets of the same file)
+            pix = _pixmap_cache().get(art_path)
+            if pix is None or pix.isNull():
                 return
             self._artwork_bg_path = art_path
             self._artwork_bg = pix
@@ -3703,8 +6971,9 @@ class Main(QtWidgets.QWidget):
 
     def paintEvent(self, event):
         """Custom paint to draw the artwork across the whole window background."""
+        if self._boot_stage == 1 and getattr(self, "_boot_started", False):
+            QtCore.QTimer.singleShot(0, self._boot_stage2)
         try:
-            from PyQt6 import QtGui, QtCore
             pix = getattr(self, "_artwork_bg", None)
             if pix is not None and not pix.isNull():
                 painter = QtGui.QPainter(self)
@@ -3785,7 +7054,9 @@ class Main(QtWidgets.QWidget):
     def _refresh_selector(self):
         self.selector.blockSignals(True)
         self.selector.clear()
-        self.selector.addItems([g.get("name","") for g in self.games])
+        # Item data carries the stable game id so selection never needs a name scan
+        for g in self.games:
+            self.selector.addItem(g.get("name",""), g.get("id", ""))
         self.selector.blockSignals(False)
         if self.selector.count() > 0:
             self.selector.setCurrentIndex(0)
@@ -3813,12 +7084,10 @@ class Main(QtWidgets.QWidget):
 
         # Discord Rich Presence: reflect current selection while browsing
         try:
-            if self.settings.get("discord_enabled") and getattr(self, "discord", None) and self.discord.connected:
+            if self.settings.get("discord_enabled") and getattr(self, "discord", None) and self.discord.enabled:
                 details_tpl = self.settings.get("discord_details_tpl", "{name}")
                 state_tpl = self.settings.get("discord_state_tpl", "HighPrio={high}  Affinity={aff}  Flags={flags}")
-                base_flags = g.get("flags", [])
-                if isinstance(base_flags, str):
-                    base_flags = [x for x in base_flags.strip().split() if x]
+                base_flags = g.flags
                 show_flags = " ".join(base_flags) if base_flags else "(none)"
                 high = bool(self.chk_priority.isChecked())
                 aff = bool(self.chk_affinity.isChecked())
@@ -3831,21 +7100,232 @@ class Main(QtWidgets.QWidget):
                 )
                 self.discord.set_presence(details, state, self._append)
         except Exception:
-            # Never let Discord issues break selection changes
-            pass
+            # Never let Discord issues break selection changes
+            pass
+
+
+    def _set_card_cover(self, card, cover, art_path):
+        """Show art_path (or the "No Art" tile) on a card's cover label."""
+        card._art_pending = False
+        card._cover_key = None
+        pix = None
+        if art_path:
+            try:
+                # Shared cache, backed by the thumbnail pack; nothing is decoded here
+                pix = _pixmap_cache().get(art_path, cover.maximumWidth(), render=False)
+            except Exception as e:
+                print(f"[thumbs] {art_path}: {e}")
+                pix = None
+            if pix is None and _file_sig(art_path) is not None:
+                # Not packed at this size yet: blank until the decoder pool has it
+                card._cover_art_path = art_path
+                cover.setText("")
+                set_style_props(cover, art="pending")
+                self._wait_for_cover(card, art_path, cover.maximumWidth())
+                return
+        if pix is not None and (not pix.isNull()):
+            # The card keeps only the scaled copy it shows; the slider
+            # re-fetches the source from the shared PixmapCache by path.
+            card._cover_art_path = art_path
+            self._show_card_pixmap(cover, pix)
+        else:
+            card._cover_art_path = None
+            set_style_props(cover, art="none")
+            cover.setText("No Art")
+            cover.setWordWrap(True)
+
+    @staticmethod
+    def _show_card_pixmap(cover, pix):
+        from PyQt6 import QtCore
+        scaled = pix.scaled(
+            cover.maximumWidth(),
+            cover.maximumHeight(),
+            QtCore.Qt.AspectRatioMode.KeepAspectRatioByExpanding,
+            QtCore.Qt.TransformationMode.SmoothTransformation,
+        )
+        cover.setText("")
+        set_style_props(cover, art="image")
+        cover.setPixmap(scaled)
+
+    def _wait_for_cover(self, card, art_path, width):
+        """Register card for a pool decode of art_path; started once it is on screen."""
+        key = (art_path, thumb_bucket(width))
+        card._cover_key = key
+        waiting = self._cover_waiting.setdefault(key, [])
+        if not any(c is card for c in waiting):
+            waiting.append(card)
+        timer = getattr(self, "_visible_art_timer", None)
+        if timer is not None:
+            timer.start()
+
+    def _visible_grid_rect(self):
+        """Part of the grid container currently inside the viewport (container coords), or None."""
+        container = getattr(self, "games_container", None)
+        if container is None:
+            return None
+        try:
+            area = container.visibleRegion().boundingRect()
+        except Exception:
+            return None
+        return None if area.isEmpty() else area
+
+    def _decode_visible_covers(self, keys=None):
+        """Show or decode covers of on-screen cards; cancel decodes nobody can see.
+
+        QPixmap conversion happens here, on the GUI thread, for visible cards
+        only; off-screen cards stay blank until they are scrolled into view.
+        """
+        if not self._cover_waiting:
+            return
+        area = self._visible_grid_rect()
+        cache = _pixmap_cache()
+        for key in list(keys if keys is not None else self._cover_waiting):
+            live, shown = [], []
+            for card in self._cover_waiting.get(key, ()):
+                try:
+                    if getattr(card, "_cover_key", None) != key:
+                        continue          # rebuilt, resized or given other art since
+                    on_screen = area is not None and card.isVisible() and card.geometry().intersects(area)
+                except RuntimeError:
+                    continue              # card deleted
+                (shown if on_screen else live).append(card)
+            if not shown:
+                if live:
+                    self._cover_waiting[key] = live
+                else:
+                    self._cover_waiting.pop(key, None)
+                self._decoder.cancel(key)
+                continue
+            pix = cache.get(key[0], key[1], render=False)
+            if pix is None:
+                self._cover_waiting[key] = live + shown
+                self._decoder.request(key)
+                continue
+            for card in shown:
+                card._cover_key = None
+                self._show_card_pixmap(card._cover_label, pix)
+            if live:
+                self._cover_waiting[key] = live
+            else:
+                self._cover_waiting.pop(key, None)
+
+    def _on_cover_decoded(self, key, result):
+        if result is None:
+            # Unreadable image: "No Art" for the cards still waiting on it
+            for card in self._cover_waiting.pop(key, ()):
+                try:
+                    if getattr(card, "_cover_key", None) == key:
+                        self._set_card_cover(card, card._cover_label, None)
+                except RuntimeError:
+                    continue
+            return
+        _thumb_pack().add(key[0], key[1], *result)
+        self._thumb_flush_timer.start()
+        self._decode_visible_covers([key])
+
+    def _wait_for_card_art(self, card, gid, appid):
+        """Leave card's cover blank until the ArtworkService reports on appid."""
+        card._art_pending = True
+        waiting = self._art_waiting.setdefault(str(appid).strip(), [])
+        if gid not in waiting:
+            waiting.append(gid)
+
+    def _prioritize_visible_art(self):
+        """Move the appids of on-screen cards still waiting for art to the queue front."""
+        area = self._visible_grid_rect() if self._art_waiting else None
+        if area is None:
+            return
+        cards = getattr(self, "_cards_by_id", {}) or {}
+        for appid, ids in list(self._art_waiting.items()):
+            for gid in ids:
+                card = cards.get(gid)
+                try:
+                    if card is not None and card.isVisible() and card.geometry().intersects(area):
+                        self._artwork.request(appid, ArtworkService.VISIBLE)
+                        break
+                except RuntimeError:
+                    continue
+
+    def _on_artwork_ready(self, appid, path):
+        cards = getattr(self, "_cards_by_id", {}) or {}
+        for gid in self._art_waiting.pop(appid, ()):
+            card = cards.get(gid)
+            try:
+                if card is not None and getattr(card, "_art_pending", False):
+                    self._set_card_cover(card, card._cover_label, path)
+            except RuntimeError:
+                continue          # card deleted by a rebuild meanwhile
+        try:
+            g = self._current_game()
+            if g and str(GameRecord.coerce(g).appid).strip() == appid:
+                self._update_artwork_for_current_game()
+        except Exception:
+            pass
+
+    def _on_artwork_failed(self, appid):
+        cards = getattr(self, "_cards_by_id", {}) or {}
+        for gid in self._art_waiting.pop(appid, ()):
+            card = cards.get(gid)
+            try:
+                if card is not None and getattr(card, "_art_pending", False):
+                    self._set_card_cover(card, card._cover_label, None)
+            except RuntimeError:
+                continue
+
+    def _flush_thumbnails(self):
+        """Write queued cover thumbnails to the pack on a worker thread."""
+        threading.Thread(target=_thumb_pack().flush, name="thumbs", daemon=True).start()
+
+    def _apply_artwork_settings(self):
+        try:
+            hours = float(self.settings.get("artwork_miss_ttl_hours", _ArtworkMissIndex.DEFAULT_TTL_HOURS))
+        except Exception:
+            hours = _ArtworkMissIndex.DEFAULT_TTL_HOURS
+        _STEAM_ARTWORK_NEG_CACHE.ttl_hours = max(1.0, hours)
+        try:
+            mb = int(self.settings.get("pixmap_cache_mb", PixmapCache.DEFAULT_BUDGET_MB))
+        except Exception:
+            mb = PixmapCache.DEFAULT_BUDGET_MB
+        _pixmap_cache().set_budget(max(16, mb) << 20)
+
+    def _on_retry_missing_art(self):
+        """Forget recorded artwork misses and queue every Steam game still without art."""
+        forgotten = _STEAM_ARTWORK_NEG_CACHE.clear()
+        cards = getattr(self, "_cards_by_id", {}) or {}
+        queued = 0
+        for g in getattr(self, "games", []) or []:
+            g = GameRecord.coerce(g)
+            card = cards.get(g.id)
+            if not g.appid or card is None or getattr(card, "_cover_art_path", None):
+                continue
+            if self._art_path_for_game(g, fetch=False):
+                continue
+            self._artwork.request(g.appid, ArtworkService.PREFETCH)
+            try:
+                card._cover_art_path = None
+                card._cover_label.setText("")
+                set_style_props(card._cover_label, art="pending")
+                self._wait_for_card_art(card, g.id, g.appid)
+                queued += 1
+            except RuntimeError:
+                continue
+        self._prioritize_visible_art()
+        self._show_toast(f"Retrying artwork for {queued} game(s) ({forgotten} recorded miss(es) cleared).", "info")
 
+    def _art_path_for_game(self, g, fetch=True, priority=ArtworkService.PREFETCH):
+        """Return best artwork path for a given game dict, honoring custom_art_path first.
 
-    def _art_path_for_game(self, g):
-        """Return best artwork path for a given game dict, honoring custom_art_path first."""
+        Only artwork already on disk is returned. With fetch=True missing Steam
+        art is queued on the ArtworkService at `priority` (never blocks); the
+        image arrives later through artworkReady.
+        """
         if not g:
             return None
         art_path = None
         try:
+            g = GameRecord.coerce(g)
             # Prefer per-game custom artwork if present
-            try:
-                custom = str(g.get("custom_art_path", "")).strip()
-            except Exception:
-                custom = ""
+            custom = g.custom_art_path
             if custom:
                 try:
                     import os as _os
@@ -3855,34 +7335,19 @@ class Main(QtWidgets.QWidget):
                     art_path = None
             # If no custom artwork, fall back to Steam artwork by appid
             if not art_path:
-                appid = str(g.get("appid", "")).strip()
+                appid = g.appid
                 if appid:
-                    try:
-                        _steam_artwork_ensure_cached(appid)
-                    except Exception as e:
-                        print(f"[ART] grid cache failed for appid {appid}: {e}")
-                    try:
-                        p = _steam_artwork_path(appid)
-                    except Exception:
-                        p = None
-                    if p is not None:
-                        if hasattr(p, "is_file"):
-                            if p.is_file():
-                                art_path = str(p)
-                        else:
-                            import os as _os
-                            if _os.path.isfile(p):
-                                art_path = str(p)
+                    service = getattr(self, "_artwork", None)
+                    if fetch and service is not None:
+                        art_path = service.request(appid, priority)
+                    else:
+                        art_path = ArtworkService.cached_path(appid)
         except Exception:
             art_path = None
         return art_path
 
     def _rebuild_game_grid(self):
         """Rebuild the cover grid to look like the Xenia-style layout."""
-        try:
-            from PyQt6 import QtGui, QtCore, QtWidgets as _QtWidgets
-        except Exception:
-            return
         layout = getattr(self, "games_layout", None)
         container = getattr(self, "games_container", None)
         if layout is None or container is None:
@@ -3897,25 +7362,65 @@ class Main(QtWidgets.QWidget):
                     w.setParent(None)
         except Exception:
             pass
+        # Cards hidden by the search filter are not in the layout; drop them too.
+        for card in (getattr(self, "_cards_by_id", {}) or {}).values():
+            try:
+                card.setParent(None)
+                card.deleteLater()
+            except Exception:
+                pass
 
         self._card_widgets = []
+        self._cards_by_id = {}
+        self._art_waiting = {}
+        for key in self._cover_waiting:
+            self._decoder.cancel(key)
+        self._cover_waiting = {}
 
         games = getattr(self, "games", []) or []
         if not games:
             return
 
-        query = ""
+        size = self._grid_cover_size()
+        for g in games:
+            g = GameRecord.coerce(g)
+            try:
+                self._cards_by_id[g.id] = self._build_game_card(g, size)
+            except Exception as e:
+                print(f"[grid] card for {g.name!r} failed: {e}")
+        self._relayout_game_grid()
+
+    def _grid_cover_size(self) -> int:
+        try:
+            size = int(self.cover_size_slider.value()) if hasattr(self, "cover_size_slider") else 160
+        except Exception:
+            size = 160
+        return max(96, min(size, 320))
+
+    def _grid_query(self) -> str:
         try:
             if hasattr(self, "search_edit") and self.search_edit is not None:
-                query = self.search_edit.text().strip().lower()
+                return self.search_edit.text().strip().lower()
         except Exception:
-            query = ""
+            pass
+        return ""
 
+    def _relayout_game_grid(self):
+        """Place the existing cards (self._cards_by_id) in library order, honoring the search filter.
+
+        Cards are only moved, never rebuilt, so this is cheap after incremental updates.
+        """
+        layout = getattr(self, "games_layout", None)
+        container = getattr(self, "games_container", None)
+        if layout is None or container is None:
+            return
         try:
-            size = int(self.cover_size_slider.value()) if hasattr(self, "cover_size_slider") else 160
+            while layout.count():
+                layout.takeAt(0)
         except Exception:
-            size = 160
-        size = max(96, min(size, 320))
+            pass
+        cards = getattr(self, "_cards_by_id", {}) or {}
+        query = self._grid_query()
 
         # Grid layout: cap to 4 columns max per row.
         # We fill columns left-to-right, then move to the next row so there
@@ -3924,308 +7429,540 @@ class Main(QtWidgets.QWidget):
         max_cols = 4
         row = 0
         col = 0
-
-        for idx, g in enumerate(games):
-            name = str(g.get("name", "") or "").strip()
-            if query and query not in name.lower():
+        self._card_widgets = []
+        for g in getattr(self, "games", []) or []:
+            card = cards.get(str(g.get("id", "")))
+            if card is None:
+                continue
+            if query and query not in str(g.get("name", "")).lower():
+                card.setVisible(False)
                 continue
+            layout.addWidget(card, row, col)
+            card.setVisible(True)
+            self._card_widgets.append(card)
 
-            card = _QtWidgets.QFrame()
-            card.setFrameShape(_QtWidgets.QFrame.Shape.StyledPanel)
-            card.setObjectName("gameCard")
-
-            v = _QtWidgets.QVBoxLayout(card)
-            v.setContentsMargins(4, 4, 4, 4)
-            v.setSpacing(4)
-
-            cover = _QtWidgets.QLabel()
-            cover.setAlignment(QtCore.Qt.AlignmentFlag.AlignCenter)
-            cover_w = size
-            cover_h = int(size * 1.4)
-            cover.setFixedSize(cover_w, cover_h)
-
-            # Lock card width to the cover width so cards
-            # don't stretch wider than their artwork when the
-            # main window is resized.
-            card_w = cover_w + 8  # 4px margins on each side
-            card.setFixedWidth(card_w)
-
-            # Quick-action row (Play / Edit / Folder), initially hidden.
-            actions_row = _QtWidgets.QHBoxLayout()
-            actions_row.setContentsMargins(0, 0, 0, 0)
-            actions_row.setSpacing(4)
-            actions_widget = _QtWidgets.QWidget(card)
-            actions_widget.setLayout(actions_row)
-            actions_widget.setVisible(False)
-
-            btn_play = _QtWidgets.QToolButton(actions_widget)
-            btn_play.setText("Play")
-            btn_play.setToolTip("Launch this game")
-
-            btn_edit = _QtWidgets.QToolButton(actions_widget)
-            btn_edit.setText("Edit")
-            btn_edit.setToolTip("Edit this game's options")
-
-            btn_folder = _QtWidgets.QToolButton(actions_widget)
-            btn_folder.setText("Folder")
-            btn_folder.setToolTip("Open the install folder for this game")
-
-            actions_row.addWidget(btn_play)
-            actions_row.addWidget(btn_edit)
-            actions_row.addWidget(btn_folder)
-            # Optional Steam playtime label (shown on hover alongside quick actions).
-            try:
-                playtime_label = _QtWidgets.QLabel(actions_widget)
-                txt = ""
-                gg = g  # use the game dict for this card directly
-                if isinstance(gg, dict):
-                    minutes = gg.get("steam_playtime_minutes") or 0
-                    hours = gg.get("steam_playtime_hours")
-                    try:
-                        minutes_val = int(minutes)
-                    except Exception:
-                        minutes_val = 0
-                    # Always show if we have any stored minutes, even if 0, so it's obvious the wiring works.
-                    if minutes_val >= 0:
-                        if hours is None:
+            # Fill columns first (up to max_cols), then move to the next row.
+            col += 1
+            if col >= max_cols:
+                col = 0
+                row += 1
+
+        # Force relayout
+        try:
+            container.updateGeometry()
+            container.adjustSize()
+        except Exception:
+            pass
+        # Which cards are on screen may have changed (filter, rebuild)
+        timer = getattr(self, "_visible_art_timer", None)
+        if timer is not None and (self._art_waiting or self._cover_waiting):
+            timer.start()
+
+
+    def _build_game_card(self, g, size):
+        """Create the cover card widget for one game (not yet placed in the grid)."""
+        from PyQt6 import QtCore, QtWidgets as _QtWidgets
+        name = g.name
+        # Handlers below capture the stable game id, not the list index,
+        # so they stay correct after adds/deletes reorder the library.
+        gid = g.id
+
+        # Parented up front: cards hidden by the search filter never enter the layout
+        card = _QtWidgets.QFrame(getattr(self, "games_container", None))
+        card.setFrameShape(_QtWidgets.QFrame.Shape.StyledPanel)
+        card.setObjectName("gameCard")
+
+        v = _QtWidgets.QVBoxLayout(card)
+        v.setContentsMargins(4, 4, 4, 4)
+        v.setSpacing(4)
+
+        cover = _QtWidgets.QLabel()
+        cover.setAlignment(QtCore.Qt.AlignmentFlag.AlignCenter)
+        cover.setObjectName("gameCover")
+        cover_w = size
+        cover_h = int(size * 1.4)
+        cover.setFixedSize(cover_w, cover_h)
+
+        # Lock card width to the cover width so cards
+        # don't stretch wider than their artwork when the
+        # main window is resized.
+        card_w = cover_w + 8  # 4px margins on each side
+        card.setFixedWidth(card_w)
+
+        # Quick-action row (Play / Edit / Folder), initially hidden.
+        actions_row = _QtWidgets.QHBoxLayout()
+        actions_row.setContentsMargins(0, 0, 0, 0)
+        actions_row.setSpacing(4)
+        actions_widget = _QtWidgets.QWidget(card)
+        actions_widget.setLayout(actions_row)
+        actions_widget.setVisible(False)
+
+        btn_play = _QtWidgets.QToolButton(actions_widget)
+        btn_play.setText("Play")
+        btn_play.setToolTip("Launch this game")
+
+        btn_edit = _QtWidgets.QToolButton(actions_widget)
+        btn_edit.setText("Edit")
+        btn_edit.setToolTip("Edit this game's options")
+
+        btn_folder = _QtWidgets.QToolButton(actions_widget)
+        btn_folder.setText("Folder")
+        btn_folder.setToolTip("Open the install folder for this game")
+
+        actions_row.addWidget(btn_play)
+        actions_row.addWidget(btn_edit)
+        actions_row.addWidget(btn_folder)
+        # Optional Steam playtime label (shown on hover alongside quick actions).
+        try:
+            playtime_label = _QtWidgets.QLabel(actions_widget)
+            txt = ""
+            gg = g  # use the game dict for this card directly
+            if isinstance(gg, GAME_ENTRY_TYPES):
+                minutes = gg.get("steam_playtime_minutes") or 0
+                hours = gg.get("steam_playtime_hours")
+                try:
+                    minutes_val = int(minutes)
+                except Exception:
+                    minutes_val = 0
+                # Always show if we have any stored minutes, even if 0, so it's obvious the wiring works.
+                if minutes_val >= 0:
+                    if hours is None:
+                        try:
+                            hours = round(minutes_val / 60.0, 2)
+                        except Exception:
                             try:
-                                hours = round(minutes_val / 60.0, 2)
+                                hours = minutes_val // 60
                             except Exception:
-                                try:
-                                    hours = minutes_val // 60
-                                except Exception:
-                                    hours = 0
-                        txt = f"Steam: {hours} hrs"
-                playtime_label.setText(txt)
-                playtime_label.setAlignment(
-                    QtCore.Qt.AlignmentFlag.AlignRight | QtCore.Qt.AlignmentFlag.AlignVCenter
-                )
-                playtime_label.setStyleSheet("font-size: 10px; color: #A0A0A0;")
-                actions_row.addStretch(1)
-                actions_row.addWidget(playtime_label)
-            except Exception:
-                pass
+                                hours = 0
+                    txt = f"Steam: {hours} hrs"
+            playtime_label.setText(txt)
+            playtime_label.setAlignment(
+                QtCore.Qt.AlignmentFlag.AlignRight | QtCore.Qt.AlignmentFlag.AlignVCenter
+            )
+            playtime_label.setObjectName("playtime")
+            actions_row.addStretch(1)
+            actions_row.addWidget(playtime_label)
+        except Exception:
+            pass
 
 
 
+        if getattr(self, "_boot_placeholders", False):
+            # Staged startup: blank cover now, real art on the next ticks
+            card._cover_art_path = None
+            cover.setProperty("art", "pending")
+            card._art_pending = True
+        else:
             art_path = self._art_path_for_game(g)
-            pix = None
-            if art_path:
-                try:
-                    pix = QtGui.QPixmap(art_path)
-                except Exception:
-                    pix = None
-            if pix is not None and (not pix.isNull()):
-                # Keep the original pixmap on the card so we can rescale it
-                # smoothly as the user moves the slider, without hitting disk
-                # or network again.
-                card._cover_pixmap = pix
-                cover._base_pixmap = pix
-                scaled = pix.scaled(
-                    cover_w,
-                    cover_h,
-                    QtCore.Qt.AspectRatioMode.KeepAspectRatioByExpanding,
-                    QtCore.Qt.TransformationMode.SmoothTransformation,
-                )
-                cover.setPixmap(scaled)
+            if not art_path and self._artwork.pending(g.appid):
+                # Download queued: blank cover until artworkReady/artworkFailed
+                card._cover_art_path = None
+                cover.setProperty("art", "pending")
+                self._wait_for_card_art(card, gid, g.appid)
             else:
-                card._cover_pixmap = None
-                cover._base_pixmap = None
-                cover.setStyleSheet("background-color: #202020; border-radius: 4px;")
-                cover.setText("No Art")
-                cover.setWordWrap(True)
-
-            title = _QtWidgets.QLabel(name or "(unnamed)")
-            title.setAlignment(QtCore.Qt.AlignmentFlag.AlignCenter)
-            title.setWordWrap(True)
+                self._set_card_cover(card, cover, art_path)
 
-            v.addWidget(cover)
-            v.addWidget(title)
-            v.addWidget(actions_widget)
+        title = _QtWidgets.QLabel(name or "(unnamed)")
+        title.setAlignment(QtCore.Qt.AlignmentFlag.AlignCenter)
+        title.setWordWrap(True)
 
-            # Keep a reference to the quick-action widget on the card so we can
-            # show/hide it on hover.
+        v.addWidget(cover)
+        v.addWidget(title)
+        v.addWidget(actions_widget)
+
+        # Keep a reference to the quick-action widget on the card so we can
+        # show/hide it on hover.
+        try:
+            card._hover_actions = actions_widget
+        except Exception:
+            pass
+
+        # Wire quick action buttons for this specific card.
+        def _play_from_hover(_checked=False, i=gid):
+            """Quick 'Play' button from hover row: select this game then launch it immediately."""
             try:
-                card._hover_actions = actions_widget
+                self._on_game_card_clicked(i)
             except Exception:
                 pass
-
-            # Wire quick action buttons for this specific card.
-            def _play_from_hover(_checked=False, i=idx):
-                """Quick 'Play' button from hover row: select this game then launch it immediately."""
-                try:
-                    self._on_game_card_clicked(i)
-                except Exception:
-                    pass
-                try:
-                    self._on_launch()
-                except Exception:
-                    pass
-
-            def _edit_from_hover(_checked=False, i=idx):
-                try:
-                    if hasattr(self, "selector") and self.selector is not None:
-                        if 0 <= i < self.selector.count():
-                            self.selector.setCurrentIndex(i)
-                except Exception:
-                    pass
-                try:
-                    self._on_edit()
-                except Exception:
-                    pass
-
-            def _folder_from_hover(_checked=False, i=idx):
-                try:
-                    self._open_game_install_folder_for_index(i)
-                except Exception:
-                    pass
-
             try:
-                btn_play.clicked.connect(_play_from_hover)
+                self._on_launch()
             except Exception:
                 pass
+
+        def _edit_from_hover(_checked=False, i=gid):
             try:
-                btn_edit.clicked.connect(_edit_from_hover)
+                self._on_game_card_clicked(i)
             except Exception:
                 pass
             try:
-                btn_folder.clicked.connect(_folder_from_hover)
+                self._on_edit()
             except Exception:
                 pass
 
-            # Remember the cover widget so we can resize it later when the
-            # slider moves, without rebuilding the whole grid.
+        def _folder_from_hover(_checked=False, i=gid):
             try:
-                card._cover_label = cover
+                self._open_game_install_folder_for_index(i)
             except Exception:
                 pass
 
-            # Wire click + hover behaviors onto the card so it feels interactive.
-            def _clicked(ev, index=idx, _card=card):
-                try:
-                    # Right-click opens a proper context menu for this card.
-                    if ev.button() == QtCore.Qt.MouseButton.RightButton:
-                        try:
-                            menu = _QtWidgets.QMenu(_card)
-                        except Exception:
-                            menu = None
-                        if menu is not None:
-                            try:
-                                act_play = menu.addAction("Play")
-                                act_edit = menu.addAction("Edit options…")
-                                act_folder = menu.addAction("Open install folder")
-                                act_remove = menu.addAction("Remove from launcher")
-                            except Exception:
-                                act_play = act_edit = act_folder = act_remove = None
+        try:
+            btn_play.clicked.connect(_play_from_hover)
+        except Exception:
+            pass
+        try:
+            btn_edit.clicked.connect(_edit_from_hover)
+        except Exception:
+            pass
+        try:
+            btn_folder.clicked.connect(_folder_from_hover)
+        except Exception:
+            pass
 
-                            chosen = menu.exec(ev.globalPos())
-                            try:
-                                if chosen is act_play:
-                                    # Same as left-click behavior
-                                    self._on_game_card_clicked(index)
-                                elif chosen is act_edit:
-                                    # Select in combo and reuse existing editor
-                                    try:
-                                        if hasattr(self, "selector") and self.selector is not None:
-                                            if 0 <= index < self.selector.count():
-                                                self.selector.setCurrentIndex(index)
-                                    except Exception:
-                                        pass
-                                    try:
-                                        self._on_edit()
-                                    except Exception:
-                                        pass
-                                elif chosen is act_folder:
-                                    try:
-                                        self._open_game_install_folder_for_index(index)
-                                    except Exception:
-                                        pass
-                                elif chosen is act_remove:
-                                    # Select in combo and reuse existing delete logic
-                                    try:
-                                        if hasattr(self, "selector") and self.selector is not None:
-                                            if 0 <= index < self.selector.count():
-                                                self.selector.setCurrentIndex(index)
-                                    except Exception:
-                                        pass
-                                    try:
-                                        self._on_del()
-                                    except Exception:
-                                        pass
-                            except Exception:
-                                pass
-                        return
+        # Remember the cover widget so we can resize it later when the
+        # slider moves, without rebuilding the whole grid.
+        try:
+            card._cover_label = cover
+        except Exception:
+            pass
 
-                    # Left-click (or anything else) keeps the original behavior: select the card.
-                    self._on_game_card_clicked(index)
-                except Exception:
-                    # As a last resort, fall back to the original click behavior.
+        # Wire click + hover behaviors onto the card so it feels interactive.
+        def _clicked(ev, index=gid, _card=card):
+            try:
+                # Right-click opens a proper context menu for this card.
+                if ev.button() == QtCore.Qt.MouseButton.RightButton:
                     try:
-                        self._on_game_card_clicked(index)
+                        menu = _QtWidgets.QMenu(_card)
                     except Exception:
-                        pass
+                        menu = None
+                    if menu is not None:
+                        try:
+                            act_play = menu.addAction("Play")
+                            act_edit = menu.addAction("Edit options…")
+                            act_folder = menu.addAction("Open install folder")
+                            act_remove = menu.addAction("Remove from launcher")
+                        except Exception:
+                            act_play = act_edit = act_folder = act_remove = None
 
-            card.mousePressEvent = _clicked
+                        chosen = menu.exec(ev.globalPos())
+                        try:
+                            if chosen is act_play:
+                                # Same as left-click behavior
+                                self._on_game_card_clicked(index)
+                            elif chosen is act_edit:
+                                # Select in combo and reuse existing editor
+                                try:
+                                    self._on_game_card_clicked(index)
+                                except Exception:
+                                    pass
+                                try:
+                                    self._on_edit()
+                                except Exception:
+                                    pass
+                            elif chosen is act_folder:
+                                try:
+                                    self._open_game_install_folder_for_index(index)
+                                except Exception:
+                                    pass
+                            elif chosen is act_remove:
+                                # Select in combo and reuse existing delete logic
+                                try:
+                                    self._on_game_card_clicked(index)
+                                except Exception:
+                                    pass
+                                try:
+                                    self._on_del()
+                                except Exception:
+                                    pass
+                        except Exception:
+                            pass
+                    return
 
-            # Simple hover card on enter/leave to show extra details,
-            # and reveal the quick-action row.
-            def _enter(ev, game=g, _card=card):
-                try:
-                    pos = _card.mapToGlobal(_card.rect().bottomRight())
-                except Exception:
-                    pos = None
-                try:
-                    self._show_hover_card_for_game(game, pos)
-                except Exception:
-                    pass
-                # Show quick-action row when hovered.
-                try:
-                    actions = getattr(_card, "_hover_actions", None)
-                    if actions is not None:
-                        actions.setVisible(True)
-                except Exception:
-                    pass
+                # Left-click (or anything else) keeps the original behavior: select the card.
+                self._on_game_card_clicked(index)
+            except Exception:
+                # As a last resort, fall back to the original click behavior.
                 try:
-                    _QtWidgets.QFrame.enterEvent(_card, ev)
+                    self._on_game_card_clicked(index)
                 except Exception:
                     pass
 
-            def _leave(ev, game=g, _card=card):
-                try:
-                    self._hide_hover_card()
-                except Exception:
-                    pass
-                # Hide quick-action row when leaving.
-                try:
-                    actions = getattr(_card, "_hover_actions", None)
-                    if actions is not None:
-                        actions.setVisible(False)
-                except Exception:
-                    pass
-                try:
-                    _QtWidgets.QFrame.leaveEvent(_card, ev)
-                except Exception:
-                    pass
+        card.mousePressEvent = _clicked
+
+        # Simple hover card on enter/leave to show extra details,
+        # and reveal the quick-action row.
+        def _enter(ev, game=g, _card=card):
+            try:
+                pos = _card.mapToGlobal(_card.rect().bottomRight())
+            except Exception:
+                pos = None
+            try:
+                self._show_hover_card_for_game(game, pos)
+            except Exception:
+                pass
+            # Show quick-action row when hovered.
+            try:
+                actions = getattr(_card, "_hover_actions", None)
+                if actions is not None:
+                    actions.setVisible(True)
+            except Exception:
+                pass
+            try:
+                _QtWidgets.QFrame.enterEvent(_card, ev)
+            except Exception:
+                pass
 
-            card.enterEvent = _enter
-            card.leaveEvent = _leave
+        def _leave(ev, game=g, _card=card):
+            try:
+                self._hide_hover_card()
+            except Exception:
+                pass
+            # Hide quick-action row when leaving.
+            try:
+                actions = getattr(_card, "_hover_actions", None)
+                if actions is not None:
+                    actions.setVisible(False)
+            except Exception:
+                pass
+            try:
+                _QtWidgets.QFrame.leaveEvent(_card, ev)
+            except Exception:
+                pass
 
-            layout.addWidget(card, row, col)
-            self._card_widgets.append(card)
+        card.enterEvent = _enter
+        card.leaveEvent = _leave
 
-            # Fill columns first (up to max_cols), then move to the next row.
-            col += 1
-            if col >= max_cols:
-                col = 0
-                row += 1
+        card._game_id = gid
+        return card
 
-        # Force relayout
+    # === ADD-ONLY: hot-reload of games.json / settings.json ===
+    # A QFileSystemWatcher (plus a slow mtime poll, since editors that save via
+    # rename drop the watch and network drives never notify) feeds one
+    # stat-compare; our own writes are recognised through note_own_write().
+    # Library reloads are diffed by id and only the affected selector items
+    # and cards are touched.
+    CONFIG_POLL_MS = 2000
+    CONFIG_DEBOUNCE_MS = 300
+
+    def _config_watch_paths(self):
+        paths = [SETTINGS_PATH]
+        try:
+            store = _game_store()
+            if isinstance(store, _JsonGameStore):
+                paths += [store.path, store.journal_path]
+        except Exception:
+            pass
+        return [os.path.abspath(p) for p in paths]
+
+    def _install_config_watcher(self):
+        from PyQt6 import QtCore as _QtCore
+        self._config_sigs = {p: _file_sig(p) for p in self._config_watch_paths()}
+        self._config_dirty = set()
+        self._config_debounce = _QtCore.QTimer(self)
+        self._config_debounce.setSingleShot(True)
+        self._config_debounce.setInterval(self.CONFIG_DEBOUNCE_MS)
+        self._config_debounce.timeout.connect(self._apply_config_changes)
+        try:
+            self._config_watcher = _QtCore.QFileSystemWatcher(self)
+            self._config_watcher.fileChanged.connect(lambda _p: self._poll_config_files())
+            # Replace-on-save shows up as a directory change once the file watch is gone
+            self._config_watcher.directoryChanged.connect(lambda _p: self._poll_config_files())
+            self._config_watcher.addPath(os.path.abspath(CONFIG_DIR))
+            self._rewatch_config_files()
+        except Exception as e:
+            self._config_watcher = None
+            print("[hot-reload] file watcher unavailable, polling only:", e)
+        self._config_poll = _QtCore.QTimer(self)
+        self._config_poll.setInterval(self.CONFIG_POLL_MS)
+        self._config_poll.timeout.connect(self._poll_config_files)
+        self._config_poll.start()
+
+    def _rewatch_config_files(self):
+        w = getattr(self, "_config_watcher", None)
+        if w is None:
+            return
         try:
-            container.updateGeometry()
-            container.adjustSize()
+            watched = set(w.files())
+            for p in self._config_watch_paths():
+                if p not in watched and os.path.exists(p):
+                    w.addPath(p)
         except Exception:
             pass
 
+    def _poll_config_files(self):
+        sigs = getattr(self, "_config_sigs", None)
+        if sigs is None:
+            return
+        for p in self._config_watch_paths():
+            sig = _file_sig(p)
+            if sigs.get(p) == sig:
+                continue
+            sigs[p] = sig
+            if not is_own_write(p):
+                self._config_dirty.add(p)
+        self._rewatch_config_files()
+        if self._config_dirty:
+            self._config_debounce.start()
+
+    def _apply_config_changes(self):
+        dirty, self._config_dirty = self._config_dirty, set()
+        if os.path.abspath(SETTINGS_PATH) in dirty:
+            dirty.discard(os.path.abspath(SETTINGS_PATH))
+            try:
+                self._reload_settings_from_disk()
+            except Exception as e:
+                self._append(f"[hot-reload] settings.json not applied: {e}")
+        if dirty:
+            try:
+                self._reload_library_from_disk()
+            except Exception as e:
+                self._append(f"[hot-reload] games.json not applied: {e}")
+
+    def _reload_settings_from_disk(self):
+        if _WRITE_BEHIND.is_pending(SETTINGS_PATH):
+            return  # our newer in-memory copy is about to overwrite it anyway
+        try:
+            if not isinstance(_read_settings_json(), dict):
+                return
+        except Exception as e:
+            # Half-written or invalid: keep what we have (load_settings would reseed)
+            self._append(f"[hot-reload] settings.json unreadable, ignored: {e}")
+            return
+        new = load_settings()
+        old = getattr(self, "settings", None) or {}
+        changed = {k for k in set(old) | set(new) if old.get(k) != new.get(k)}
+        if not changed:
+            return
+        self.settings = new
+        if changed & {"artwork_miss_ttl_hours", "pixmap_cache_mb"}:
+            self._apply_artwork_settings()
+        if changed & {"discord_enabled", "discord_client_id"}:
+            try:
+                self.lbl_discord.setText(self._discord_status_text())
+                self.discord.configure(new.get("discord_enabled", False), new.get("discord_client_id", ""))
+                self._connect_discord_if_needed()
+            except Exception:
+                pass
+        if "dev_mode" in changed:
+            try:
+                self.lbl_discord.setVisible(bool(new.get("dev_mode", False)))
+            except Exception:
+                pass
+        if "cover_size" in changed:
+            try:
+                self.cover_size_slider.setValue(int(new.get("cover_size", 220)))
+            except Exception:
+                pass
+        if "use_artwork_theme" in changed:
+            try:
+                self._update_artwork_for_current_game()
+            except Exception:
+                pass
+        self._append("[hot-reload] settings.json: " + ", ".join(sorted(changed)))
+
+    def _reload_library_from_disk(self):
+        store = _game_store()
+        if _WRITE_BEHIND.is_pending(getattr(store, "path", "")):
+            return  # our newer library write is queued and would win anyway
+        if isinstance(store, _JsonGameStore) and os.path.exists(store.path):
+            # A half-written or invalid file must not replace the library
+            try:
+                with open(store.path, "r", encoding="utf-8") as f:
+                    json.load(f)
+            except Exception as e:
+                self._append(f"[hot-reload] games.json unreadable, ignored: {e}")
+                return
+        data = store.load()
+        if not isinstance(data, list):
+            return
+        new = GameLibrary(data)
+        if new.ids_assigned:
+            # Hand-added entries without ids: persist the minted ids once
+            new.take_changes()
+            store.save(new)
+
+        old_by_id = {str(g.get("id", "")): g for g in self.games}
+        new_ids = [g.id for g in new]
+        new_set = set(new_ids)
+        added = [gid for gid in new_ids if gid not in old_by_id]
+        removed = [gid for gid in old_by_id if gid not in new_set]
+        updated = [gid for gid in new_ids
+                   if gid in old_by_id and game_to_dict(old_by_id[gid]) != game_to_dict(new.get(gid))]
+        kept_old = [gid for gid in old_by_id if gid in new_set]
+        kept_new = [gid for gid in new_ids if gid in old_by_id]
+        reordered = kept_old != kept_new
+        if not (added or removed or updated or reordered):
+            return
+
+        # Swap entries in place so anything holding self.games stays valid;
+        # unchanged records keep their identity.
+        upd = set(updated)
+        self.games[:] = [old_by_id[gid] if gid in old_by_id and gid not in upd else new.get(gid)
+                         for gid in new_ids]
+        self.games.take_changes()   # memory == disk now
+
+        self._apply_library_diff(added, removed, updated, reordered)
+        self._append(f"[hot-reload] games.json: +{len(added)} -{len(removed)} ~{len(updated)}"
+                     + (" (reordered)" if reordered else ""))
+
+    def _apply_library_diff(self, added, removed, updated, reordered):
+        """Update selector items and grid cards for just the given ids."""
+        sel = self.selector
+        cur_id = sel.currentData()
+        sel.blockSignals(True)
+        try:
+            if reordered:
+                sel.clear()
+                for g in self.games:
+                    sel.addItem(g.get("name", ""), g.get("id", ""))
+            else:
+                gone = set(removed)
+                for i in range(sel.count() - 1, -1, -1):
+                    if sel.itemData(i) in gone:
+                        sel.removeItem(i)
+                for gid in updated:
+                    i = sel.findData(gid)
+                    if i >= 0:
+                        sel.setItemText(i, self.games.get(gid).get("name", ""))
+                # Ascending positions: everything before i is already in place
+                new_ids = set(added)
+                for i, g in enumerate(self.games):
+                    if g.get("id", "") in new_ids:
+                        sel.insertItem(i, g.get("name", ""), g.get("id", ""))
+            idx = sel.findData(cur_id)
+            if idx < 0 and sel.count() > 0:
+                idx = 0
+            sel.setCurrentIndex(idx)
+        finally:
+            sel.blockSignals(False)
+        if cur_id in removed or cur_id in updated or sel.currentData() != cur_id:
+            try:
+                self._on_sel_change(sel.currentIndex())
+            except Exception:
+                pass
+
+        cards = getattr(self, "_cards_by_id", None)
+        if cards is None:
+            self._rebuild_game_grid()
+            return
+        for gid in list(removed) + list(updated):
+            card = cards.pop(gid, None)
+            if card is not None:
+                try:
+                    card.setParent(None)
+                    card.deleteLater()
+                except Exception:
+                    pass
+        size = self._grid_cover_size()
+        for gid in list(added) + list(updated):
+            g = self.games.get(gid)
+            if g is None:
+                continue
+            try:
+                cards[gid] = self._build_game_card(g, size)
+            except Exception as e:
+                print(f"[grid] card for {g.name!r} failed: {e}")
+        self._relayout_game_grid()
+    # === END ADD-ONLY hot-reload ===
 
     def _on_cover_size_changed(self, value:int):
         """Smoothly resize existing game cards when the slider moves.
@@ -4242,13 +7979,19 @@ class Main(QtWidgets.QWidget):
             size = 160
         size = max(96, min(size, 320))
 
-        cards = getattr(self, "_card_widgets", []) or []
+        cards = list((getattr(self, "_cards_by_id", {}) or {}).values()) or getattr(self, "_card_widgets", []) or []
         for card in cards:
             try:
                 cover = getattr(card, "_cover_label", None)
                 if cover is None:
                     continue
-                base_pix = getattr(card, "_cover_pixmap", None)
+                art_path = getattr(card, "_cover_art_path", None)
+                base_pix = _pixmap_cache().get(art_path, size, render=False) if art_path else None
+                if art_path and base_pix is None:
+                    # Not packed at this bucket yet: stretch what is shown for
+                    # now; the decoder pool delivers it if the card is on screen
+                    base_pix = cover.pixmap()
+                    self._wait_for_cover(card, art_path, size)
                 cover_w = size
                 cover_h = int(size * 1.4)
                 cover.setFixedSize(cover_w, cover_h)
@@ -4326,19 +8069,7 @@ class Main(QtWidgets.QWidget):
             self._hover_title = title
             self._hover_subtitle = subtitle
             self._hover_meta = meta
-            try:
-                card.setStyleSheet(
-                    "QFrame#gameHoverCard {"
-                    " background-color: #202020;"
-                    " color: #ffffff;"
-                    " border-radius: 8px;"
-                    " border: 1px solid #4caf50;"
-                    "}"
-                    "QLabel#hoverTitle { font-weight: bold; }"
-                    "QLabel#hoverMeta { color: #aaaaaa; font-size: 9pt; }"
-                )
-            except Exception:
-                pass
+            # Look: QFrame#gameHoverCard / QLabel#hover* rules in BASE_QSS
         return card
 
     def _show_hover_card_for_game(self, game: dict | None, global_pos):
@@ -4431,15 +8162,35 @@ class Main(QtWidgets.QWidget):
         except Exception:
             pass
 
-    def _on_game_card_clicked(self, index:int):
-        """When user clicks a card, select that game in the underlying combo and update details."""
+    def _game_index(self, key) -> int:
+        """Selector/list position for a game id, game dict or plain index."""
+        if isinstance(key, int):
+            return key
         try:
+            return self.games.position(key)
+        except Exception:
+            return -1
+
+    def _on_game_card_clicked(self, index):
+        """When user clicks a card, select that game in the underlying combo and update details.
+
+        `index` may be a list index (legacy callers) or a stable game id.
+        """
+        try:
+            index = self._game_index(index)
             if 0 <= index < self.selector.count():
                 self.selector.setCurrentIndex(index)
         except Exception:
             pass
 
     def _current_game(self):
+        # Resolve through the selector's item data (game id) -> O(1) library lookup
+        try:
+            g = self.games.get(self.selector.currentData())
+            if g is not None:
+                return g
+        except Exception:
+            pass
         name = self.selector.currentText().strip()
         return get_game_by_name(name, self.games)
 
@@ -4460,33 +8211,30 @@ class Main(QtWidgets.QWidget):
         dlg = GameEditor(self, g)
         if dlg.exec() == QtWidgets.QDialog.DialogCode.Accepted:
             newg = dlg.get_data()
-            # replace the entry
-            idx = 0
-            for i, e in enumerate(self.games):
-                if e.get("name") == g.get("name"):
-                    self.games[i] = newg
-                    idx = i
-                    break
+            # replace the entry (same id, same position)
+            idx = self.games.position(g)
+            self.games.replace(g, newg)
             save_games(self.games)
             self._refresh_selector()
             self.selector.setCurrentIndex(max(0, idx))
 
     def _on_del(self):
-        idx = self.selector.currentIndex()
-        if idx < 0: return
-        name = self.selector.currentText()
+        g = self._current_game()
+        if not g: return
+        name = g.get("name", "")
         if QtWidgets.QMessageBox.question(self, "Delete", f"Remove '{name}' from launcher?") == QtWidgets.QMessageBox.StandardButton.Yes:
-            self.games.pop(idx)
+            self.games.remove_id(g.get("id"))
             save_games(self.games)
             self._refresh_selector()
 
 
-    def _open_game_install_folder_for_index(self, index:int):
-        """Best-effort helper to open the install folder for a game by grid index."""
+    def _open_game_install_folder_for_index(self, index):
+        """Best-effort helper to open the install folder for a game by grid index or game id."""
         try:
             games = getattr(self, "games", []) or []
         except Exception:
             games = []
+        index = self._game_index(index)
         if not games or index < 0 or index >= len(games):
             return
         try:
@@ -4563,23 +8311,251 @@ class Main(QtWidgets.QWidget):
         if dlg.exec() == QtWidgets.QDialog.DialogCode.Accepted:
             self.settings = dlg.get_settings()
             save_settings(self.settings)
+            self._apply_artwork_settings()
             self.lbl_discord.setText(self._discord_status_text())
             self.discord.configure(self.settings.get("discord_enabled", False), self.settings.get("discord_client_id",""))
             self._connect_discord_if_needed()
 
-    def _connect_discord_if_needed(self):
+    def _connect_discord_if_needed(self, log=None):
+        log = log or self._append
         if self.settings.get("discord_enabled") and self.settings.get("discord_client_id",""):
-            ok = self.discord.connect(self._append)
+            # Returns at once: the service thread connects (and retries with
+            # backoff), reporting through the thread-safe _discord_log signal
+            ok = self.discord.connect(self._discord_log.emit)
             if ok:
-                # Set an initial idle presence so Discord shows the app immediately
-                try:
-                    self.discord.set_presence("UWPLauncher", "Browsing library", self._append)
-                except Exception:
-                    pass
+                # Initial idle presence, sent as soon as the connection is up
+                self.discord.set_presence("UWPLauncher", "Browsing library")
             else:
-                self._append("Discord not connected; continue without RPC.")
+                log("Discord not connected; continue without RPC.")
         else:
-            self._append("Discord RPC disabled.")
+            log("Discord RPC disabled.")
+
+    # ---------- Staged startup ----------
+    # Stage 1: Main() + show() with placeholder covers from the cached library.
+    # Stage 2: real cover art from disk, a few cards per event-loop tick.
+    # Stage 3: network work and plugins as prioritized _BootJobs.
+    BOOT_ART_BUDGET_MS = 8         # cover-art work per tick in stage 2
+    BOOT_PAINT_FALLBACK_MS = 500   # start stage 2 even if no paint arrives (minimized)
+
+    def start_staged_boot(self):
+        """Run stages 2 and 3 after the first paint. Called by main() after show()."""
+        self._boot_started = True
+        try:
+            with PROFILE.span("first frame: restore"):
+                self._show_first_frame()
+        except Exception as e:
+            print("[first-frame] not shown:", e)
+        PROFILE.hold("staged boot")
+        QtCore.QTimer.singleShot(self.BOOT_PAINT_FALLBACK_MS, self._boot_stage2)
+
+    def _boot_stage2(self):
+        if self._boot_stage != 1:
+            return
+        self._boot_stage = 2
+        PROFILE.end("stage 1: window")
+        PROFILE.begin("stage 2: cover art")
+        # Cards built from here on (hot reload, refresh) get their art directly
+        self._boot_placeholders = False
+        visible = list(getattr(self, "_card_widgets", []) or [])
+        seen = set(map(id, visible))
+        hidden = [c for c in (getattr(self, "_cards_by_id", {}) or {}).values() if id(c) not in seen]
+        from collections import deque
+        self._boot_art_queue = deque(c for c in visible + hidden if getattr(c, "_art_pending", False))
+        self._boot_art_missing = []
+        self._boot_art_ticks = 0
+        self._boot_art_cards = len(self._boot_art_queue)
+        QtCore.QTimer.singleShot(0, self._boot_art_tick)
+
+    def _boot_art_tick(self):
+        deadline = time.perf_counter() + self.BOOT_ART_BUDGET_MS / 1000.0
+        queue = self._boot_art_queue
+        games = getattr(self, "games", None)
+        self._boot_art_ticks += 1
+        while queue:
+            card = queue.popleft()
+            try:
+                if not getattr(card, "_art_pending", False):
+                    continue
+                g = games.get(card._game_id) if games is not None else None
+                if g is None:
+                    continue
+                g = GameRecord.coerce(g)
+                art_path = self._art_path_for_game(g, fetch=False)
+                if not art_path and g.appid and str(g.appid).strip() not in _STEAM_ARTWORK_NEG_CACHE:
+                    # Stays blank; queued for download in stage 3
+                    self._wait_for_card_art(card, g.id, g.appid)
+                    self._boot_art_missing.append(str(g.appid))
+                else:
+                    self._set_card_cover(card, card._cover_label, art_path)
+            except RuntimeError:
+                continue  # card was deleted by a grid rebuild meanwhile
+            except Exception as e:
+                print(f"[boot] cover art failed: {e}")
+            if time.perf_counter() >= deadline:
+                break
+        if queue:
+            QtCore.QTimer.singleShot(0, self._boot_art_tick)
+            return
+        PROFILE.end("stage 2: cover art", cards=self._boot_art_cards, ticks=self._boot_art_ticks,
+                    missing=len(self._boot_art_missing))
+        self._fade_first_frame()
+        self._boot_stage3()
+
+    def _boot_stage3(self):
+        self._boot_stage = 3
+        PROFILE.begin("stage 3: background jobs")
+        jobs = self._boot
+        jobs.add("artwork: queue missing", self._boot_queue_artwork, priority=10)
+        jobs.add("discord connect", self._connect_discord_if_needed, priority=20)
+        jobs.add("xbl token refresh", _auto_refresh_xbl_token_silent, priority=30, thread=True)
+        jobs.add("xbox profile: import", _xbox_profile_widget_class,
+                 priority=40, thread=True, then=self._boot_install_xbox_profile)
+        # Plugins touch widgets, so they load on the GUI thread
+        jobs.add("plugins", lambda: _load_launcher_plugins(self), priority=50)
+        # Pick up hand edits / script output in config/games.json and settings.json
+        jobs.add("config watcher", self._install_config_watcher, priority=90)
+        jobs.when_idle(self._boot_finished)
+
+    def _boot_queue_artwork(self):
+        """Hand the covers stage 2 found missing to the ArtworkService."""
+        for appid in self._boot_art_missing:
+            self._artwork.request(appid, ArtworkService.PREFETCH)
+        self._prioritize_visible_art()
+        # Selected game's artwork panel / background (deferred during stage 1)
+        self._update_artwork_for_current_game()
+
+    def _boot_install_xbox_profile(self, XboxProfileWidget):
+        """Build the Xbox profile header (gamertag + avatar) into its reserved slot."""
+        if not XboxProfileWidget:
+            return
+        self.xbox_profile = XboxProfileWidget(self)
+        self._xbox_profile_slot.layout().addWidget(self.xbox_profile)
+        # Hide the built‑in refresh button on the profile widget; we
+        # expose this as a sidebar action instead so all refresh /
+        # actions live in one place.
+        try:
+            if hasattr(self.xbox_profile, "btn_refresh"):
+                self.xbox_profile.btn_refresh.setVisible(False)
+        except Exception:
+            pass
+        try:
+            if getattr(self, '_xbl_headers', None):
+                self.xbox_profile.set_headers(self._xbl_headers)
+        except Exception:
+            pass
+        try:
+            with PROFILE.span("XboxProfileWidget.refresh"):
+                self.xbox_profile.refresh()
+        except Exception:
+            pass
+
+    # ---------- Instant-on first frame ----------
+    # closeEvent saves a downscaled grab of the grid viewport (+ scroll
+    # position); the next start shows it over the placeholder grid until
+    # stage 2 has the real covers, then cross-fades. The frame is keyed on
+    # the library, cover size, theme and viewport size.
+    FIRST_FRAME_SCALE = 0.5
+    FIRST_FRAME_FADE_MS = 250
+
+    @staticmethod
+    def _first_frame_paths():
+        d = os.path.join(CONFIG_DIR, "cache")
+        return os.path.join(d, "first_frame.jpg"), os.path.join(d, "first_frame.json")
+
+    def _first_frame_key(self, viewport_size):
+        import hashlib
+        h = hashlib.sha1(usedforsecurity=False)
+        for g in getattr(self, "games", []) or []:
+            h.update(repr((g.get("id"), g.get("name"), g.get("appid"), g.get("custom_art_path"))).encode("utf-8", "replace"))
+        app = QtWidgets.QApplication.instance()
+        theme = (app.styleSheet() if app is not None else "") + "|" + self.styleSheet()
+        h.update(theme.encode("utf-8", "replace"))
+        h.update(repr((self._grid_cover_size(), bool(self.settings.get("use_artwork_theme", False)),
+                       viewport_size.width(), viewport_size.height())).encode("ascii"))
+        return h.hexdigest()
+
+    def _save_first_frame(self):
+        """Grab the visible grid for the next start (closeEvent)."""
+        if self._boot_stage < 4 or self._grid_query() or getattr(self, "_first_frame_overlay", None) is not None:
+            return  # grid not final / filtered: keep the previous frame (its key still decides)
+        vp = self.games_scroll.viewport()
+        pix = vp.grab()
+        if pix.isNull() or vp.width() <= 0 or vp.height() <= 0:
+            return
+        small = pix.scaled(max(1, int(vp.width() * self.FIRST_FRAME_SCALE)),
+                           max(1, int(vp.height() * self.FIRST_FRAME_SCALE)),
+                           QtCore.Qt.AspectRatioMode.IgnoreAspectRatio,
+                           QtCore.Qt.TransformationMode.SmoothTransformation)
+        data = QtCore.QByteArray()
+        buf = QtCore.QBuffer(data)
+        buf.open(QtCore.QIODevice.OpenModeFlag.WriteOnly)
+        if not small.save(buf, "JPG", 85):
+            return
+        buf.close()
+        img_path, meta_path = self._first_frame_paths()
+        meta = {
+            "key": self._first_frame_key(vp.size()),
+            "scroll": self.games_scroll.verticalScrollBar().value(),
+        }
+        _atomic_write_bytes(img_path, bytes(data))
+        _atomic_write_bytes(meta_path, json.dumps(meta).encode("utf-8"))
+
+    def _show_first_frame(self):
+        """Cover the (placeholder) grid with last session's frame if it still matches."""
+        img_path, meta_path = self._first_frame_paths()
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return
+        vp = self.games_scroll.viewport()
+        if meta.get("key") != self._first_frame_key(vp.size()):
+            return  # library, cover size, theme or window size changed
+        pix = QtGui.QPixmap(img_path)
+        if pix.isNull():
+            return
+        try:
+            self.games_scroll.verticalScrollBar().setValue(int(meta.get("scroll", 0)))
+        except Exception:
+            pass
+        overlay = QtWidgets.QLabel(vp)
+        overlay.setAttribute(QtCore.Qt.WidgetAttribute.WA_TransparentForMouseEvents, True)
+        overlay.setScaledContents(True)
+        overlay.setPixmap(pix)
+        overlay.setGeometry(vp.rect())
+        overlay.show()
+        overlay.raise_()
+        self._first_frame_overlay = overlay
+        # Scrolling the live grid underneath would make the still image lie
+        self.games_scroll.verticalScrollBar().valueChanged.connect(self._fade_first_frame)
+
+    def _fade_first_frame(self, *_):
+        overlay = getattr(self, "_first_frame_overlay", None)
+        if overlay is None:
+            return
+        self._first_frame_overlay = None
+        try:
+            self.games_scroll.verticalScrollBar().valueChanged.disconnect(self._fade_first_frame)
+        except Exception:
+            pass
+        try:
+            effect = QtWidgets.QGraphicsOpacityEffect(overlay)
+            overlay.setGraphicsEffect(effect)
+            anim = QtCore.QPropertyAnimation(effect, b"opacity", overlay)
+            anim.setDuration(self.FIRST_FRAME_FADE_MS)
+            anim.setStartValue(1.0)
+            anim.setEndValue(0.0)
+            anim.finished.connect(overlay.deleteLater)
+            anim.start()
+        except Exception:
+            overlay.deleteLater()
+
+    def _boot_finished(self):
+        self._boot_stage = 4
+        PROFILE.end("stage 3: background jobs", pixmap_cache=_pixmap_cache().stats())
+        # Persist bytecode for the embedded modules startup pulled in
+        _embedded_cache_save()
+        PROFILE.release("staged boot")
 
 
     # ---------- Launch ----------
@@ -4610,10 +8586,7 @@ class Main(QtWidgets.QWidget):
         self._append(f"AUMID:   {aumid}")
         log_exe = exe_name or (os.path.basename(exe_path) if exe_path else "")
         self._append(f"EXE:     {log_exe}")
-        base_flags = g.get('flags', [])
-        if isinstance(base_flags, str):
-            base_flags = [x for x in base_flags.strip().split() if x]
-        show_flags = (base_flags if use_flags else []) + extra
+        show_flags = (g.flags if use_flags else []) + extra
         self._append(f"Flags:   {' '.join(show_flags) if show_flags else '(none)'}")
         self._append(f"Mask:    {mask_hex or '(auto: all CPUs except CPU0)'}")
         self._append(f"HighPrio:{do_high}  Affinity:{do_aff}")
@@ -4625,7 +8598,7 @@ class Main(QtWidgets.QWidget):
             "discord_details_tpl": self.settings.get("discord_details_tpl","{name}"),
             "discord_state_tpl": self.settings.get("discord_state_tpl","HighPrio={high}  Affinity={aff}  Flags={flags}"),
         }
-        self.worker = Worker(g, use_flags, mask_hex, do_aff, do_high, extra, discord_cfg)
+        self.worker = Worker(g.get("id") or g, use_flags, mask_hex, do_aff, do_high, extra, discord_cfg, library=self.games)
         self.worker.moveToThread(self.thread)
         self.thread.started.connect(self.worker.run)
         self.worker.progress.connect(self._append)
@@ -4635,7 +8608,7 @@ class Main(QtWidgets.QWidget):
 
     def _on_presence(self, payload: dict):
         if not payload: return
-        if self.settings.get("discord_enabled") and self.discord.connected:
+        if self.settings.get("discord_enabled") and self.discord.enabled:
             self.discord.set_presence(payload.get("details",""), payload.get("state",""), self._append)
 
     def _on_done(self, ok: bool, msg: str):
@@ -4655,6 +8628,38 @@ class Main(QtWidgets.QWidget):
         except Exception:
             pass
 
+    def _on_forwarded_args(self, argv):
+        """Arguments from a second UWPLauncher invocation (single-instance mode)."""
+        try:
+            if self.isMinimized():
+                self.showNormal()
+            self.show()
+            self.raise_()
+            self.activateWindow()
+        except Exception:
+            pass
+        target, extra = _cli_launch_target(list(argv))
+        if target is None:
+            return  # plain start / --show: bringing the window up is all
+        g = self.games.resolve(target) if target else None
+        if g is None:
+            self._append(f"Forwarded launch: game not found: {target!r}")
+            self._show_toast(f"Game not found: {target}", "error")
+            return
+        if not self.btn.isEnabled():
+            self._show_toast("A launch is already in progress.", "error")
+            return
+        self._append(f"Forwarded launch: {g.get('name', '')}")
+        self._on_game_card_clicked(g.get("id"))
+        # Extra flags after "--" apply to this launch only
+        prev_extra = self.extra_flags.text()
+        if extra:
+            self.extra_flags.setText(" ".join(extra))
+        try:
+            self._on_launch()
+        finally:
+            self.extra_flags.setText(prev_extra)
+
     # ---------- close ----------
 
     # ---------- Xbox Live Sign-In ----------
@@ -4684,6 +8689,37 @@ class Main(QtWidgets.QWidget):
                 w.wait(1000)
         except Exception:
             pass
+        # Stop the Discord service (closes the RPC connection; bounded wait)
+        try:
+            self.discord.close()
+        except Exception:
+            pass
+        try:
+            self._artwork.close()
+        except Exception:
+            pass
+        try:
+            self._decoder.close()
+        except Exception:
+            pass
+        try:
+            _thumb_pack().flush()
+        except Exception as e:
+            print("[thumbs] final flush failed:", e)
+        # Push any coalesced settings/library writes to disk before exit
+        flush_pending_writes()
+        # ...and leave a fresh library snapshot for the next cold start
+        try:
+            store = _game_store()
+            if hasattr(store, "refresh_snapshot"):
+                store.refresh_snapshot(self.games)
+        except Exception:
+            pass
+        # ...plus the grid as it looks now, shown as the next start's first frame
+        try:
+            self._save_first_frame()
+        except Exception as e:
+            print("[first-frame] not saved:", e)
         try:
             super().closeEvent(event)
         except Exception:
@@ -4762,7 +8798,8 @@ class Main(QtWidgets.QWidget):
 
 def _open_friends(self):
     try:
-        if 'FriendsDock' in globals() and FriendsDock:
+        FriendsDock = _friends_dock_class()
+        if FriendsDock:
             try:
                 dlg = FriendsDock(self)
                 dlg.setWindowModality(QtCore.Qt.WindowModality.NonModal)
@@ -4792,15 +8829,234 @@ def _open_plugin_manager(self):
 
 
 
+# === BEGIN ADD-ONLY single instance ===
+# The first launcher listens on a per-user local socket (QLocalServer: a
+# named pipe on Windows, a Unix-domain socket elsewhere). Later invocations
+# send their arguments there as one JSON line and exit; the server answers
+# "ok". The client side is plain Python so forwarding needs no Qt setup.
+INSTANCE_ENV = "UWPLAUNCHER_INSTANCE_NAME"   # override the server name (tests, portable copies)
+INSTANCE_FLAG = "--new-instance"             # opt out: always start a separate process
+
+def _instance_server_name():
+    name = (os.environ.get(INSTANCE_ENV) or "").strip()
+    if not name:
+        import getpass, hashlib
+        try:
+            user = getpass.getuser()
+        except Exception:
+            user = ""
+        # One instance per user and config dir (portable copies stay separate)
+        key = f"{user}|{os.path.abspath(CONFIG_DIR)}".encode("utf-8", "replace")
+        name = "UWPLauncher-" + hashlib.sha1(key, usedforsecurity=False).hexdigest()[:12]
+    if os.name != "nt" and "/" not in name:
+        # Absolute path so QLocalServer and the socket client agree on it
+        import tempfile
+        name = os.path.join(tempfile.gettempdir(), name)
+    return name
+
+def _forward_to_running_instance(argv, name=None, timeout=0.25):
+    """Send argv to a running launcher. True if one accepted it (the caller should exit)."""
+    name = name or _instance_server_name()
+    payload = json.dumps({"argv": [str(a) for a in argv], "cwd": os.getcwd()}).encode("utf-8") + b"\n"
+    reply = b""
+    if os.name == "nt":
+        try:
+            pipe = open("\\\\.\\pipe\\" + name, "r+b", buffering=0)
+        except OSError:
+            return False          # nobody listening
+        with pipe:
+            pipe.write(payload)
+            while b"\n" not in reply:
+                chunk = pipe.read(64)
+                if not chunk:
+                    break
+                reply += chunk
+    else:
+        import socket
+        if not hasattr(socket, "AF_UNIX"):
+            return False
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(timeout)
+        try:
+            sock.connect(name)
+        except OSError:
+            sock.close()
+            return False          # no server, or a stale socket file from a crash
+        try:
+            sock.settimeout(2.0)
+            sock.sendall(payload)
+            while b"\n" not in reply:
+                chunk = sock.recv(64)
+                if not chunk:
+                    break
+                reply += chunk
+        except OSError:
+            return False
+        finally:
+            sock.close()
+    return reply.split(b"\n", 1)[0].strip() == b"ok"
+
+class _InstanceServer(QtCore.QObject):
+    """Receives forwarded argument lists from later launcher invocations."""
+    received = QtCore.pyqtSignal(list)
+    MAX_MESSAGE = 64 * 1024
+
+    def __init__(self, name, parent=None):
+        super().__init__(parent)
+        from PyQt6 import QtNetwork
+        self.name = name
+        self._server = QtNetwork.QLocalServer(self)
+        self._server.setSocketOptions(QtNetwork.QLocalServer.SocketOption.UserAccessOption)
+        self._server.newConnection.connect(self._on_connection)
+
+    @classmethod
+    def start(cls, name=None, parent=None):
+        """Listen on the instance socket; None if that is not possible."""
+        from PyQt6 import QtNetwork
+        srv = cls(name or _instance_server_name(), parent)
+        if not srv._server.listen(srv.name):
+            # Forwarding already failed, so whatever holds the name is stale
+            QtNetwork.QLocalServer.removeServer(srv.name)
+            if not srv._server.listen(srv.name):
+                print(f"[instance] cannot listen on {srv.name}: {srv._server.errorString()}")
+                return None
+        return srv
+
+    def _on_connection(self):
+        while self._server.hasPendingConnections():
+            sock = self._server.nextPendingConnection()
+            buf = bytearray()
+            sock.readyRead.connect(lambda s=sock, b=buf: self._on_ready(s, b))
+            sock.disconnected.connect(sock.deleteLater)
+            if sock.bytesAvailable():
+                self._on_ready(sock, buf)
+
+    def _on_ready(self, sock, buf):
+        buf += bytes(sock.readAll())
+        if b"\n" not in buf:
+            if len(buf) > self.MAX_MESSAGE:
+                sock.abort()
+            return
+        line = bytes(buf).split(b"\n", 1)[0]
+        del buf[:]
+        try:
+            msg = json.loads(line.decode("utf-8"))
+            argv = [str(a) for a in msg.get("argv") or []]
+        except Exception:
+            sock.write(b"error\n")
+            sock.disconnectFromServer()
+            return
+        sock.write(b"ok\n")
+        sock.flush()
+        sock.disconnectFromServer()
+        self.received.emit(argv)
+# === END ADD-ONLY single instance ===
+
+def _cli_launch_target(argv):
+    """Value of --launch <id|name> / --launch=<id|name> plus extra game flags after "--"."""
+    target = None
+    extra = []
+    if "--" in argv:
+        cut = argv.index("--")
+        argv, extra = argv[:cut], argv[cut + 1:]
+    for i, a in enumerate(argv):
+        if a == "--launch":
+            target = argv[i + 1] if i + 1 < len(argv) else ""
+        elif a.startswith("--launch="):
+            target = a.split("=", 1)[1]
+    return target, extra
+
+def _cli_launch(argv) -> int:
+    """Headless launch for shortcuts / Stream Deck: UWPLauncher --launch <id|name> [-- extra flags]
+
+    Loads only the library store and runs the same Worker pipeline as the
+    Play button (UWPHook/AUMID, Steam, native, affinity, priority), without a
+    QApplication or any window. Exit codes: 0 launched, 1 launch failed,
+    2 usage error / game not found.
+    """
+    target, extra = _cli_launch_target(argv)
+    if not target:
+        print("usage: UWPLauncher --launch <id|name|appid|aumid> [-- extra flags]")
+        return 2
+
+    def _log(msg):
+        print(f"[launch +{(time.perf_counter_ns() - PROFILE.t0) / 1e6:7.0f} ms] {msg}", flush=True)
+
+    with PROFILE.span("load_games"):
+        games = load_games()
+    g = games.resolve(target)
+    if g is None:
+        _log(f"Game not found: {target}")
+        flush_pending_writes()
+        return 2
+    g = GameRecord.coerce(g)
+    _log(f"{g.name} ({g.id})")
+
+    # Same defaults the UI applies when the game is selected (see _on_sel_change)
+    worker = Worker(
+        g.id,
+        bool(g.get("use_flags", True)),
+        g.get("mask_hex", ""),
+        bool(g.get("apply_affinity", True)),
+        bool(g.get("high_priority", True)),
+        [x for x in extra if x],
+        {},
+        library=games,
+        interactive=False,
+    )
+    result = {"ok": False}
+
+    def _done(ok, msg):
+        result["ok"] = bool(ok)
+        _log(msg)
+
+    # No event loop: Worker signals are delivered synchronously to these callables
+    worker.progress.connect(_log)
+    worker.done.connect(_done)
+    with PROFILE.span("launch pipeline"):
+        worker.run()
+    flush_pending_writes()
+    return 0 if result["ok"] else 1
+
 def main():
-    app = QtWidgets.QApplication(sys.argv)
-    w = Main()
-    # Load plugins from scripts/ folder (best-effort; never crashes the app)
-    try:
-        _load_launcher_plugins(w)
-    except Exception:
-        pass
-    w.show()
+    PROFILE.end("module import")
+    single = INSTANCE_FLAG not in sys.argv
+    # Already running? Hand it our arguments (--launch X, --show, ...) and exit.
+    if single:
+        try:
+            with PROFILE.span("instance forward"):
+                forwarded = _forward_to_running_instance(sys.argv[1:])
+        except Exception as e:
+            print("[instance] forward failed:", e)
+            forwarded = False
+        if forwarded:
+            sys.exit(0)
+    if _HEADLESS_LAUNCH:
+        sys.exit(_cli_launch(sys.argv[1:]))
+    with PROFILE.span("QApplication"):
+        app = QtWidgets.QApplication(sys.argv)
+    with PROFILE.span("app stylesheet"):
+        ThemeManager(app).apply("default")
+    server = None
+    if single:
+        try:
+            server = _InstanceServer.start(parent=app)
+        except Exception as e:
+            print("[instance] server not started:", e)
+    PROFILE.begin("stage 1: window")
+    with PROFILE.span("Main.__init__"):
+        w = Main()
+    report = snapshot_report()
+    if report:
+        print("[startup]", report)
+    if server is not None:
+        server.received.connect(w._on_forwarded_args)
+    PROFILE.watch_first_paint(w)
+    with PROFILE.span("show"):
+        w.show()
+    # Cover art, network work and plugins (scripts/ folder) follow on the next
+    # event-loop ticks; see Main.start_staged_boot.
+    w.start_staged_boot()
     sys.exit(app.exec())
 
 # === BEGIN NONUWP HANDLERS + AUGMENT (add-only) ===
@@ -4898,30 +9154,16 @@ def NONUWP_validate_dialog(self):
         except Exception as e: QtWidgets.QMessageBox.warning(self, "Validate through Steam", str(e))
 
 def NONUWP_load_games_generic():
-    mod = _NONUWP_module()
-    lg = getattr(mod, "load_games", None)
-    if not callable(lg): return {}
-    import inspect
-    try:
-        sig = inspect.signature(lg)
-        if len(sig.parameters) == 0: return lg()
-        if len(sig.parameters) == 1: return lg("games.json")
-    except Exception: pass
-    try: return lg()
-    except Exception: return {}
+    """The library in the nonuwp {"games": [...]} shape (same storage as the main app)."""
+    return {"games": load_games()}
 
 def NONUWP_save_games_generic(data):
-    mod = _NONUWP_module()
-    sg = getattr(mod, "save_games", None)
-    if not callable(sg): return False
-    import inspect
-    try:
-        sig = inspect.signature(sg)
-        if len(sig.parameters) == 1: return sg(data)
-        if len(sig.parameters) >= 2: return sg("games.json", data)
-    except Exception: pass
-    try: return sg(data)
-    except Exception: return False
+    """Save a {"games": [...]} dict or a game list through the shared library store."""
+    games = data.get("games") if isinstance(data, dict) else data
+    if not isinstance(games, list):
+        return False
+    save_games(games)
+    return True
 
 def _NONUWP_act_sign_in(self):
     from PyQt6 import QtWidgets
@@ -4949,6 +9191,124 @@ def _NONUWP_act_sign_in(self):
 
 
 
+# === ADD-ONLY: Steam library merge engine ===
+# Steam sync used to compare every incoming game with every library entry,
+# then walk payload x library a second time for playtimes (O(n*m) on the UI
+# thread). plan_steam_merge() indexes the library by appid and case-folded
+# name once, walks the payload once, and returns a changeset; the caller
+# applies it in one batch with apply_steam_merge(). Benchmark:
+#   python tests/bench.py steam-merge
+
+def _steam_playtime_fields(src) -> dict:
+    """steam_playtime_minutes/_hours and steam_last_played from one payload game."""
+    minutes = 0
+    try:
+        # Prefer total, but fall back to OS-specific counters if present.
+        for key in ("playtime_forever", "playtime_windows_forever",
+                    "playtime_linux_forever", "playtime_mac_forever"):
+            val = src.get(key)
+            if val:
+                minutes = int(val)
+                break
+    except Exception:
+        minutes = 0
+    fields = {
+        "steam_playtime_minutes": minutes,
+        "steam_playtime_hours": round(minutes / 60.0, 2),
+    }
+    try:
+        last_played = int(src.get("rtime_last_played", 0) or 0)
+    except Exception:
+        last_played = 0
+    if last_played > 0:
+        fields["steam_last_played"] = last_played
+    return fields
+
+
+def plan_steam_merge(games, steam_games, add_new=True) -> dict:
+    """Changeset for a Steam owned-games list against the library, in O(n + m).
+
+    Returns {"add": [new entry dicts], "update": [(entry, changed_fields)],
+    "unchanged": int, "skipped": int}. Existing entries are matched by appid
+    (all entries sharing an appid get the playtimes); payload games without an
+    appid match, or whose name already exists, are not added twice.
+    """
+    plan = {"add": [], "update": [], "unchanged": 0, "skipped": 0}
+    by_appid = {}
+    names = set()
+    for g in games or ():
+        if not isinstance(g, GAME_ENTRY_TYPES):
+            continue
+        appid = _norm_str(g.get("appid"))
+        if appid:
+            by_appid.setdefault(appid, []).append(g)
+        name = _norm_str(g.get("name")).casefold()
+        if name:
+            names.add(name)
+
+    new_by_appid = {}
+    for src in steam_games or ():
+        if not isinstance(src, dict):
+            plan["skipped"] += 1
+            continue
+        name = _norm_str(src.get("name"))
+        appid = _norm_str(src.get("appid"))
+        if not name and not appid:
+            plan["skipped"] += 1
+            continue
+        fields = _steam_playtime_fields(src)
+
+        matches = by_appid.get(appid) if appid else None
+        if matches:
+            for g in matches:
+                changed = {k: v for k, v in fields.items() if g.get(k) != v}
+                if changed:
+                    plan["update"].append((g, changed))
+                else:
+                    plan["unchanged"] += 1
+            continue
+        if appid and appid in new_by_appid:
+            new_by_appid[appid].update(fields)      # repeated appid in the payload
+            continue
+        if not add_new or (name and name.casefold() in names):
+            plan["unchanged"] += 1
+            continue
+
+        entry = {
+            "name": name or f"App {appid}",
+            "exe_name": "",
+            "exe": "",      # Steam API does not give the EXE path; user fills this later.
+            "aumid": "",
+            "appid": appid,
+            "flags": [],
+            "mask_hex": "",
+            "use_flags": True,
+            "high_priority": True,
+            "apply_affinity": True,
+            "source": "steam",
+        }
+        entry.update(fields)
+        plan["add"].append(entry)
+        if appid:
+            new_by_appid[appid] = entry
+        names.add(entry["name"].casefold())
+    return plan
+
+
+def apply_steam_merge(games, plan):
+    """Apply a plan_steam_merge() changeset in one pass. Returns (added, updated)."""
+    is_lib = isinstance(games, GameLibrary)
+    for entry in plan.get("add", ()):
+        games.append(entry)
+    for g, fields in plan.get("update", ()):
+        if is_lib:
+            games.update(g, **fields)
+        else:
+            g.update(fields)
+    return len(plan.get("add", ())), len(plan.get("update", ()))
+
+# === END ADD-ONLY Steam library merge engine ===
+
 def _NONUWP_apply_steam_playtimes(self, games_src):
     """ADD-ONLY: Merge Steam playtime + last played into existing game entries.
 
@@ -4966,67 +9326,8 @@ def _NONUWP_apply_steam_playtimes(self, games_src):
         games = getattr(self, "games", None)
         if not isinstance(games, list):
             return
-
-        debug_printed = 0
-
-        for g in games_src:
-            if not isinstance(g, dict):
-                continue
-            appid = str(g.get("appid", "")).strip()
-            if not appid:
-                continue
-
-            # Extract playtime + last-played from Steam payload.
-            # Prefer total, but fall back to OS-specific counters if present.
-            pt_minutes = 0
-            try:
-                for key in (
-                    "playtime_forever",
-                    "playtime_windows_forever",
-                    "playtime_linux_forever",
-                    "playtime_mac_forever",
-                ):
-                    val = g.get(key)
-                    if val:
-                        pt_minutes = int(val)
-                        break
-            except Exception:
-                pt_minutes = 0
-
-            try:
-                last_played = int(g.get("rtime_last_played", 0) or 0)
-            except Exception:
-                last_played = 0
-
-            # Even if both are zero, still write the fields once so it's obvious
-            # that the wiring is working; the label logic will then show 0.0 hrs.
-            # This also means if Steam is actually returning zeros due to privacy
-            # settings, you'll at least see that something ran.
-            try:
-                if debug_printed < 5:
-                    debug_printed += 1
-                    print(f"[STEAM-PT] appid {appid} -> minutes={pt_minutes}, last_played={last_played}")
-            except Exception:
-                pass
-
-            # Update all matching entries with the same appid.
-            for gg in games:
-                try:
-                    if not isinstance(gg, dict):
-                        continue
-                    if str(gg.get("appid", "")).strip() != appid:
-                        continue
-                    gg["steam_playtime_minutes"] = pt_minutes
-                    try:
-                        gg["steam_playtime_hours"] = round(pt_minutes / 60.0, 2)
-                    except Exception:
-                        # Fallback: integer hours
-                        gg["steam_playtime_hours"] = pt_minutes // 60 if pt_minutes > 0 else 0
-                    if last_played > 0:
-                        gg["steam_last_played"] = last_played
-                except Exception:
-                    # Best-effort only; never break the whole sync.
-                    continue
+        # Only real changes end up in the plan, so the store writes just those rows
+        apply_steam_merge(games, plan_steam_merge(games, games_src, add_new=False))
     except Exception:
         # Completely non-critical helper; swallow everything.
         pass
@@ -5057,189 +9358,45 @@ def _NONUWP_act_sync(self):
                 resp = payload.get("response") or payload
                 games_src = resp.get("games") or []
 
-        # Merge into in-memory list without deleting existing entries
-        if isinstance(games_src, list):
-            for g in games_src:
-                if not isinstance(g, dict):
-                    continue
-                name = (g.get("name") or "").strip()
-                appid = str(g.get("appid", "")).strip()
-                exe = ""  # Steam API does not give the EXE path; user fills this later.
-                if not name and not appid:
-                    continue
-
-                # Avoid duplicates by (appid, name) combo
-                is_dup = False
-                try:
-                    for existing in self.games:
-                        if not isinstance(existing, dict):
-                            continue
-                        if appid and str(existing.get("appid","")).strip() == appid:
-                            is_dup = True
-                            break
-                        if name and existing.get("name","").strip() == name:
-                            is_dup = True
-                            break
-                except Exception:
-                    pass
-                if is_dup:
-                    continue
-
-
-                if appid:
-                    try:
-                        _steam_artwork_ensure_cached(appid)
-                    except Exception:
-                        pass
-
-                entry = {
-                    "name": name or f"App {appid}",
-                    "exe_name": "",
-                    "exe": exe,
-                    "aumid": "",
-                    "appid": appid,
-                    "flags": [],
-                    "mask_hex": "",
-                    "use_flags": True,
-                    "high_priority": True,
-                    "apply_affinity": True,
-                    "source": "steam",
-                }
-                try:
-                    self.games.append(entry)
-                    merged = True
-                except Exception:
-                    pass
-
-        
-        # ADD-ONLY: merge Steam playtime info into matching games (no UI changes).
+        # Merge new games and playtimes in one linear pass, then apply as one batch
+        new_appids = []
         try:
-            _NONUWP_apply_steam_playtimes(self, games_src)
-        except Exception:
-            pass
+            plan = plan_steam_merge(self.games, games_src if isinstance(games_src, list) else [])
+            added, _updated = apply_steam_merge(self.games, plan)
+            merged = added > 0
+            new_appids = [e["appid"] for e in plan["add"] if e.get("appid")]
+        except Exception as e:
+            print(f"[STEAM] merge failed: {e}")
 
 # ADD-ONLY: ensure Steam artwork is cached for all Steam games after sync
-        # Shows a small progress dialog so the UI doesn't feel frozen while images download.
+        # Queued on the ArtworkService (worker threads, lowest priority); covers
+        # fill in through artworkReady as they land, so the sync returns at once.
         try:
-            try:
-                from PyQt6 import QtWidgets, QtCore
-            except Exception:
-                QtWidgets = None
-                QtCore = None
-
-            steam_games = []
-            steam_games = []
+            service = getattr(self, "_artwork", None)
+            steam_games = list(new_appids)
             for gg in self.games:
-                if not isinstance(gg, dict):
+                if not isinstance(gg, GAME_ENTRY_TYPES):
                     continue
                 if gg.get("platform") != "steam":
                     continue
                 appid = gg.get("appid")
-                if not appid:
+                if not appid or appid in steam_games:
                     continue
                 steam_games.append(appid)
-
-            dlg = None
-            total = len(steam_games)
-            if steam_games and QtWidgets is not None and QtCore is not None:
-                try:
-                    dlg = QtWidgets.QProgressDialog("Fetching Steam artwork...", "Cancel", 0, total, self)
-                    dlg.setWindowTitle("Artwork")
-                    dlg.setWindowModality(QtCore.Qt.WindowModality.WindowModal)
-                    dlg.setAutoClose(True)
-                    dlg.setAutoReset(True)
-                except Exception:
-                    dlg = None
-                # Set wait cursor while we work
-                try:
-                    self.setCursor(QtCore.Qt.CursorShape.WaitCursor)
-                except Exception:
-                    pass
-
-            # Console progress bar (single line) so the user sees progress without spam
-            try:
-                _steam_art_console_start(total)
-            except Exception:
-                pass
-
-            # Multi-threaded artwork caching: small thread pool so HTTP fetches happen in parallel.
-            try:
-                import concurrent.futures as _cf
-                done = 0
-
-                def _worker(appid):
-                    try:
-                        _steam_artwork_ensure_cached(appid)
-                    except Exception as e:
-                        try:
-                            print(f"[ART] sync cache failed for appid {appid}: {e}")
-                        except Exception:
-                            pass
-
-                max_workers = min(8, total) if total > 0 else 0
-                if max_workers > 0:
-                    with _cf.ThreadPoolExecutor(max_workers=max_workers) as _exec:
-                        futures = [_exec.submit(_worker, appid) for appid in steam_games]
-                        for _f in _cf.as_completed(futures):
-                            done += 1
-                            # update GUI progress
-                            if dlg is not None and QtWidgets is not None:
-                                try:
-                                    dlg.setValue(done)
-                                    QtWidgets.QApplication.processEvents()
-                                    if dlg.wasCanceled():
-                                        break
-                                except Exception:
-                                    pass
-                            # update console progress
-                            try:
-                                _steam_art_console_update(done)
-                            except Exception:
-                                pass
-            except Exception as _e:
-                try:
-                    print(f"[ART] threaded artwork sync failed, falling back to sequential: {_e}")
-                except Exception:
-                    pass
-                for i, appid in enumerate(steam_games, start=1):
-                    if dlg is not None and QtWidgets is not None:
-                        try:
-                            dlg.setValue(i)
-                            QtWidgets.QApplication.processEvents()
-                            if dlg.wasCanceled():
-                                break
-                        except Exception:
-                            pass
-                    try:
-                        _steam_artwork_ensure_cached(appid)
-                    except Exception as e:
-                        print(f"[ART] sync cache failed for appid {appid}: {e}")
-                    # console progress in fallback
-                    try:
-                        _steam_art_console_update(i)
-                    except Exception:
-                        pass
-
-            if dlg is not None:
-                try:
-                    dlg.setValue(total)
-                    dlg.close()
-                except Exception:
-                    pass
-            # Restore cursor
-            if QtWidgets is not None and QtCore is not None:
-                try:
-                    self.unsetCursor()
-                except Exception:
-                    pass
+            if service is not None:
+                for appid in steam_games:
+                    service.request(appid, ArtworkService.PREFETCH)
         except Exception as e:
-            print(f"[ART] bulk cache failure: {e}")
+            print(f"[ART] queueing sync artwork failed: {e}")
 
-        if merged:
+        # Persist new entries and playtime updates. With the SQLite backend the
+        # playtime merge is a batch of row UPDATEs in one transaction.
+        if merged or getattr(self.games, "has_changes", False):
             try:
                 save_games(self.games)
             except Exception:
                 pass
+        if merged:
             try:
                 self._refresh_selector()
             except Exception:
@@ -5250,6 +9407,11 @@ def _NONUWP_act_sync(self):
             self._rebuild_game_grid()
         except Exception:
             pass
+        # Cards still waiting for art: visible ones download first
+        try:
+            self._prioritize_visible_art()
+        except Exception:
+            pass
 
         if res is not None:
             QtWidgets.QMessageBox.information(self, "Sync Steam Library", str(res))
@@ -5287,7 +9449,7 @@ def _NONUWP_act_validate(self):
         appid = None
         try:
             g = self._current_game()
-            appid = g.get("appid") if isinstance(g, dict) else None
+            appid = g.get("appid") if isinstance(g, GAME_ENTRY_TYPES) else None
         except Exception:
             appid = None
 
@@ -5335,8 +9497,8 @@ def _NONUWP_act_validate(self):
             # persist back
             try:
                 gg = self._current_game()
-                if isinstance(gg, dict): gg["appid"] = _appid
-                NONUWP_save_games_generic({"games": self.games})
+                if isinstance(gg, GAME_ENTRY_TYPES): self.games.update(gg, appid=_appid)
+                save_games(self.games)
             except Exception:
                 pass
             # try again quickly on UI thread (short blocking call is okay; if it waits long, it will still block)
@@ -5369,19 +9531,18 @@ def _NONUWP_act_add_game(self):
             self.games.append(entry)
         except Exception:
             pass
-        # Persist via launcher helpers (signature-flexible)
+        # Persist (one journal line in the shared library store)
         try:
-            db = {"games": self.games}
-            NONUWP_save_games_generic(db)
+            save_games(self.games)
         except Exception:
             pass
         # Refresh the dropdown
         try:
             self._refresh_selector()
             # Focus/select the newly added game
-            for i,g in enumerate(self.games):
-                if g.get("exe") == path:
-                    self.selector.setCurrentIndex(i); break
+            i = self.games.position(entry)
+            if i >= 0:
+                self.selector.setCurrentIndex(i)
         except Exception:
             pass
         QtWidgets.QMessageBox.information(self, "Add Game", f"Added: {name}")
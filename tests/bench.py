@@ -0,0 +1,180 @@
+"""Developer benchmarks for the launcher (not shipped with the app).
+
+    python tests/bench.py <name> [n]
+
+The launcher is imported from a temp copy of src/UWPLauncher.py (as in the
+test suite), so its config/ folder and caches never touch the checkout.
+"""
+import atexit
+import importlib.util
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SOURCE = Path(__file__).resolve().parent.parent / "src" / "UWPLauncher.py"
+
+
+def load_launcher():
+    """Import a throwaway copy of the launcher module."""
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    os.environ.setdefault("UWPLAUNCHER_NO_BYTECODE_CACHE", "1")
+    tmp = tempfile.mkdtemp(prefix="uwplauncher-bench-")
+    # Registered first, so it runs after the module's own exit handlers
+    atexit.register(shutil.rmtree, tmp, True)
+    shutil.copy2(SOURCE, os.path.join(tmp, SOURCE.name))
+    spec = importlib.util.spec_from_file_location("UWPLauncher", os.path.join(tmp, SOURCE.name))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def bench_steam_merge(launcher, n=10000):
+    """Plan + apply an n-game payload against an n-entry library (half overlapping)."""
+    library = launcher.GameLibrary(
+        {"name": f"Game {i}", "appid": str(100000 + i), "source": "steam",
+         "steam_playtime_minutes": i % 500, "steam_playtime_hours": round((i % 500) / 60.0, 2)}
+        for i in range(n)
+    )
+    # Every third overlapping game gets a different playtime (deterministic spread)
+    payload = [
+        {"appid": 100000 + i, "name": f"Game {i}",
+         "playtime_forever": (i % 500) if i % 3 else (i * 7919) % 10001,
+         "rtime_last_played": 0}
+        for i in range(n // 2, n // 2 + n)
+    ]
+    t0 = time.perf_counter()
+    plan = launcher.plan_steam_merge(library, payload)
+    t1 = time.perf_counter()
+    added, updated = launcher.apply_steam_merge(library, plan)
+    t2 = time.perf_counter()
+    print(f"steam-merge: library={n} payload={len(payload)} "
+          f"add={added} update={updated} unchanged={plan['unchanged']} skipped={plan['skipped']}")
+    print(f"  plan  {1000 * (t1 - t0):8.1f} ms")
+    print(f"  apply {1000 * (t2 - t1):8.1f} ms")
+    if added != n // 2 or len(library) != n + n // 2:
+        print(f"  FAILED: expected {n // 2} added / {n + n // 2} entries, "
+              f"got {added} / {len(library)}")
+        return 1
+    return 0
+
+
+def bench_styles(launcher, n=500):
+    """Grid cards, toasts and LED flips: per-widget setStyleSheet vs BASE_QSS (+ painted state)."""
+    from PyQt6 import QtCore, QtWidgets
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication(sys.argv[:1])
+    root = QtWidgets.QWidget()
+
+    def build_cards(inline):
+        for i in range(n):
+            card = QtWidgets.QFrame(root)
+            cover = QtWidgets.QLabel("No Art", card)
+            playtime = QtWidgets.QLabel(f"{i % 90} h played", card)
+            if inline:
+                cover.setStyleSheet("background-color: #202020; border-radius: 4px;")
+                playtime.setStyleSheet("font-size: 10px; color: #A0A0A0;")
+            else:
+                cover.setObjectName("gameCover")
+                cover.setProperty("art", "none")
+                playtime.setObjectName("playtime")
+            card.ensurePolished(); cover.ensurePolished(); playtime.ensurePolished()
+            card.deleteLater()
+
+    def toasts(inline):
+        for i in range(n):
+            bg = ("#2e7d32", "#c62828", "#37474f")[i % 3]
+            if inline:
+                toast = QtWidgets.QFrame(root)
+                toast.setObjectName("toast")
+                toast.setStyleSheet(
+                    f"QFrame#toast {{ background-color: {bg}; color: #ffffff;"
+                    f" border-radius: 8px; padding: 8px 12px; }}")
+            else:
+                toast = launcher.ToastFrame(("success", "error", "info")[i % 3], root)
+            QtWidgets.QLabel("Saved", toast).ensurePolished()
+            toast.ensurePolished()
+            toast.deleteLater()
+
+    label_led = QtWidgets.QLabel(root)
+    led = launcher.StatusLed(root)
+
+    def led_flips(inline):
+        for i in range(n):
+            ok = bool(i % 2)
+            if inline:
+                color = "#00c853" if ok else "#c62828"
+                label_led.setStyleSheet(f"border-radius: 7px; background-color: {color};")
+            else:
+                led.set_ok(ok)
+
+    print(f"styles: {n} cards / toasts / LED flips (ms)")
+    print(f"  {'':12}{'inline QSS':>12}{'app QSS+state':>15}")
+    for label, fn in (("grid build", build_cards), ("toasts", toasts), ("led flips", led_flips)):
+        row = []
+        for inline in (True, False):
+            app.setStyleSheet("" if inline else launcher.BASE_QSS)
+            label_led.setStyleSheet("")
+            t0 = time.perf_counter()
+            fn(inline)
+            row.append(1000 * (time.perf_counter() - t0))
+            app.sendPostedEvents(None, QtCore.QEvent.Type.DeferredDelete.value)
+        print(f"  {label:12}{row[0]:12.1f}{row[1]:15.1f}")
+    root.deleteLater()
+    return 0
+
+
+def bench_game_records(launcher, n=5000):
+    """Resident size of an n-entry library: json.loads dicts vs GameRecords."""
+    import json
+    import tracemalloc
+
+    raw = json.dumps([
+        {"id": f"{i:012x}", "name": f"Game {i}", "aumid": "", "exe_name": f"game{i}.exe",
+         "exe": f"C:\\Games\\Game {i}\\game{i}.exe", "appid": str(100000 + i),
+         "source": "steam", "platform": "pc", "flags": "-dx12 -fullscreen",
+         "mask_hex": "", "use_flags": True, "high_priority": True, "apply_affinity": True,
+         "steam_playtime_minutes": i % 500, "steam_playtime_hours": round((i % 500) / 60.0, 2),
+         "steam_last_played": 1700000000 + i}
+        for i in range(n)
+    ])
+
+    def measure(build):
+        tracemalloc.start()
+        data = build()
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del data
+        return size
+
+    rows = [
+        ("plain dicts", measure(lambda: json.loads(raw))),
+        ("GameRecords", measure(lambda: [launcher.GameRecord(g) for g in json.loads(raw)])),
+    ]
+    print(f"game-records: {n} entries (traced size after load)")
+    for label, size in rows:
+        print(f"  {label:12}{size / 1024 / 1024:8.2f} MiB  ({size / n:6.0f} B/entry)")
+    return 0
+
+
+BENCHMARKS = {
+    "game-records": bench_game_records,
+    "steam-merge": bench_steam_merge,
+    "styles": bench_styles,
+}
+
+
+def main(argv):
+    name = argv[1] if len(argv) > 1 else ""
+    fn = BENCHMARKS.get(name)
+    if fn is None:
+        print("usage: bench.py <name> [n]; available:", ", ".join(sorted(BENCHMARKS)))
+        return 2
+    kwargs = {"n": int(argv[2])} if len(argv) > 2 else {}
+    return int(fn(load_launcher(), **kwargs) or 0)
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,77 @@
+"""Shared fixtures for the launcher tests.
+
+The launcher keeps its config/ folder (games, settings, snapshots, artwork
+caches) next to the script, so the tests import a throwaway copy of
+src/UWPLauncher.py from a temp directory and never touch the repo's config.
+Qt runs on the offscreen platform; Windows-only launch paths are not covered.
+"""
+import gc
+import importlib.util
+import os
+import shutil
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+SOURCE = ROOT / "src" / "UWPLauncher.py"
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _isolated_env(tmp_path_factory):
+    """Point the per-user cache/config locations at a temp dir (inherited by subprocesses)."""
+    home = tmp_path_factory.mktemp("home")
+    saved = {k: os.environ.get(k) for k in ("LOCALAPPDATA", "APPDATA", "UWPLAUNCHER_NO_BYTECODE_CACHE")}
+    os.environ["LOCALAPPDATA"] = str(home / "Local")
+    os.environ["APPDATA"] = str(home / "Roaming")
+    os.environ["UWPLAUNCHER_NO_BYTECODE_CACHE"] = "1"
+    yield home
+    for k, v in saved.items():
+        if v is None:
+            os.environ.pop(k, None)
+        else:
+            os.environ[k] = v
+
+
+@pytest.fixture(scope="session")
+def app_dir(tmp_path_factory):
+    """Temp directory holding a copy of the launcher script (its BASE_DIR)."""
+    d = tmp_path_factory.mktemp("app")
+    shutil.copy2(SOURCE, d / SOURCE.name)
+    return d
+
+
+@pytest.fixture(scope="session")
+def launcher(app_dir):
+    """The launcher module, imported from the temp copy."""
+    pytest.importorskip("PyQt6.QtWidgets")
+    spec = importlib.util.spec_from_file_location("UWPLauncher", app_dir / SOURCE.name)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture(scope="session")
+def qapp(launcher):
+    from PyQt6 import QtWidgets
+    return QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+
+@pytest.fixture
+def window(launcher, qapp):
+    """A Main window (not shown) on the temp config."""
+    w = launcher.Main()
+    # Run the deferred setup Main.__init__ queues (QTimer.singleShot(0, ...)) now;
+    # left pending it would fire during teardown against the deleted window.
+    qapp.processEvents()
+    yield w
+    w.close()
+    w.deleteLater()
+    qapp.processEvents()
+    # Main's signal lambdas capture self, so the wrapper lives on in a cycle;
+    # collect it now, not at a random point after its C++ side is gone.
+    gc.collect()
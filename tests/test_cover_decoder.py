@@ -0,0 +1,100 @@
+import threading
+import time
+
+import pytest
+
+from test_thumbnail_pack import make_cover
+
+
+def pump(qapp, until, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not until() and time.monotonic() < deadline:
+        qapp.processEvents()
+        time.sleep(0.005)
+    qapp.processEvents()
+    return until()
+
+
+@pytest.fixture
+def decoder(launcher, qapp):
+    d = launcher.CoverDecoder()
+    results = []
+    d.decoded.connect(lambda key, result: results.append((key, result)))
+    d.results = results
+    yield d
+    d.close()
+
+
+def block_pool(decoder):
+    """Occupy the pool's only thread; set the returned event to free it."""
+    from PyQt6 import QtCore
+    gate = threading.Event()
+    decoder._pool.setMaxThreadCount(1)
+    decoder._pool.start(QtCore.QRunnable.create(gate.wait))
+    return gate
+
+
+def test_request_decodes_once_per_key(launcher, tmp_path, qapp, decoder):
+    key = (make_cover(tmp_path / "a.png"), 160)
+
+    decoder.request(key)
+    decoder.request(key)                                   # coalesced with the queued job
+
+    assert pump(qapp, lambda: decoder.results and not decoder._jobs)
+    assert len(decoder.results) == 1
+    (got_key, (img, sig)), = decoder.results
+    assert got_key == key and img.width() == 160 and sig == launcher._file_sig(key[0])
+
+
+def test_unreadable_cover_reports_none(tmp_path, qapp, decoder):
+    key = (str(tmp_path / "missing.png"), 160)
+
+    decoder.request(key)
+
+    assert pump(qapp, lambda: decoder.results)
+    assert decoder.results == [(key, None)]
+
+
+def test_cancel_takes_queued_job_back(tmp_path, qapp, decoder):
+    gate = block_pool(decoder)
+    key = (make_cover(tmp_path / "a.png"), 160)
+    decoder.request(key)
+
+    decoder.cancel(key)
+    gate.set()
+
+    assert decoder._jobs == {}
+    assert decoder._pool.waitForDone(5000)
+    pump(qapp, lambda: False, timeout=0.1)
+    assert decoder.results == []
+
+
+def test_job_that_bailed_out_is_requeued_when_wanted_again(launcher, tmp_path, qapp, decoder):
+    key = (make_cover(tmp_path / "a.png"), 128)
+    job = decoder._jobs[key] = launcher._CoverDecodeJob(decoder, key)
+    job.cancelled = True
+    job.run()                                              # starts after cancel(): decodes nothing
+    assert job.skipped and job.result is None and key not in decoder._jobs
+
+    assert decoder.results == []
+
+    # Same, but request() un-cancelled it after the job had already bailed out
+    job = decoder._jobs[key] = launcher._CoverDecodeJob(decoder, key)
+    job.skipped, job.cancelled = True, False
+    decoder._on_done(job)
+
+    assert pump(qapp, lambda: decoder.results)
+    assert decoder.results[0][0] == key and decoder.results[0][1][0].width() == 128
+
+
+def test_close_drops_queued_jobs(tmp_path, qapp, decoder):
+    gate = block_pool(decoder)
+    keys = [(make_cover(tmp_path / f"{i}.png"), 160) for i in range(3)]
+    for key in keys:
+        decoder.request(key)
+
+    threading.Timer(0.2, gate.set).start()
+    decoder.close()
+
+    pump(qapp, lambda: False, timeout=0.1)
+    assert decoder.results == []
@@ -0,0 +1,135 @@
+import pytest
+
+
+class FakeClock:
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class FakePresence:
+    """Stands in for pypresence.Presence; failures are scripted per instance."""
+
+    def __init__(self, client_id, fail_connect=False, fail_updates=0):
+        self.client_id = client_id
+        self.fail_connect = fail_connect
+        self.fail_updates = fail_updates
+        self.calls = []
+        self.closed = False
+
+    def connect(self):
+        self.calls.append(("connect",))
+        if self.fail_connect:
+            raise ConnectionRefusedError("discord not running")
+
+    def update(self, details, state, start):
+        if self.fail_updates:
+            self.fail_updates -= 1
+            raise BrokenPipeError("pipe closed")
+        self.calls.append(("update", details, state))
+
+    def clear(self):
+        self.calls.append(("clear",))
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def make_manager(launcher):
+    def make(*scripts):
+        """scripts[i]: FakePresence kwargs for the i-th client (later ones behave)."""
+        clients = []
+
+        def factory(client_id):
+            kwargs = scripts[len(clients)] if len(clients) < len(scripts) else {}
+            clients.append(FakePresence(client_id, **kwargs))
+            return clients[-1]
+
+        clock = FakeClock()
+        mgr = launcher.DiscordManager(client_factory=factory, clock=clock, start_thread=False)
+        mgr.configure(True, "1234")
+        assert mgr.connect()
+        return mgr, clients, clock
+    return make
+
+
+def sent(client):
+    return [c for c in client.calls if c[0] != "connect"]
+
+
+def test_presence_is_coalesced_latest_wins(make_manager):
+    mgr, clients, _ = make_manager()
+    interval = mgr.UPDATE_INTERVAL
+    mgr.set_presence("Playing A", "solo")
+    assert mgr.service_step(0.0) is None
+    assert mgr.connected and sent(clients[0]) == [("update", "Playing A", "solo")]
+
+    mgr.set_presence("Playing B", "solo")
+    mgr.set_presence("Playing C", "co-op")
+    assert mgr.service_step(5.0) == pytest.approx(interval - 5.0)   # rate limited, nothing sent
+    assert len(sent(clients[0])) == 1
+
+    assert mgr.service_step(interval) is None
+    assert sent(clients[0]) == [("update", "Playing A", "solo"), ("update", "Playing C", "co-op")]
+    assert mgr.updates_sent == 2 and mgr._thread is None
+
+
+def test_connect_backoff_doubles_up_to_max(make_manager):
+    mgr, clients, _ = make_manager(*[{"fail_connect": True}] * 10)
+    now, delays = 0.0, []
+    for _ in range(10):
+        delay = mgr.service_step(now)
+        delays.append(delay)
+        # Before the retry is due nothing is attempted
+        assert mgr.service_step(now + delay / 2) == pytest.approx(delay / 2)
+        now += delay
+
+    expected, d = [], mgr.BACKOFF_MIN
+    for _ in range(10):
+        expected.append(d)
+        d = min(d * 2, mgr.BACKOFF_MAX)
+    assert delays == expected and delays[-1] == mgr.BACKOFF_MAX
+    assert len(clients) == 10 and not mgr.connected
+
+    # The next (successful) connect resets the backoff
+    assert mgr.service_step(now) is None and mgr.connected
+    assert mgr._backoff == mgr.BACKOFF_MIN
+
+
+def test_failed_update_is_resent_after_reconnect(make_manager):
+    mgr, clients, _ = make_manager({"fail_updates": 1})
+    mgr.set_presence("Playing A", "solo")
+
+    assert mgr.service_step(0.0) == pytest.approx(mgr.BACKOFF_MIN)
+    assert clients[0].closed and not mgr.connected and mgr.updates_sent == 0
+
+    assert mgr.service_step(mgr.BACKOFF_MIN) is None   # reconnects and resends
+    assert len(clients) == 2 and mgr.connected
+    assert sent(clients[1]) == [("update", "Playing A", "solo")]
+
+
+def test_newer_presence_wins_over_failed_one(make_manager):
+    mgr, clients, _ = make_manager({"fail_updates": 1})
+    mgr.set_presence("Playing A", "solo")
+    mgr.service_step(0.0)
+    mgr.set_presence("Playing B", "solo")     # arrives while waiting to reconnect
+
+    mgr.service_step(mgr.BACKOFF_MIN)
+    assert sent(clients[1]) == [("update", "Playing B", "solo")]
+
+
+def test_close_without_thread_disconnects(make_manager):
+    mgr, clients, _ = make_manager()
+    mgr.set_presence("Playing A", "solo")
+    mgr.service_step(0.0)
+    assert mgr.connected
+
+    mgr.close()
+
+    assert clients[0].closed and not mgr.connected and mgr.rpc is None
+    assert mgr._thread is None
+    mgr.set_presence("Playing B", "solo")
+    assert mgr.service_step(100.0) is None and len(clients) == 1
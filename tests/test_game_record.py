@@ -0,0 +1,51 @@
+import json
+
+
+def test_record_is_a_plain_dict_to_callers(launcher):
+    rec = launcher.GameRecord({"name": " Halo ", "appid": 976730, "flags": "-a  -b", "extra": {"x": 1}})
+
+    assert isinstance(rec, dict)
+    assert rec == {"name": "Halo", "appid": "976730", "flags": ["-a", "-b"], "extra": {"x": 1}}
+    assert rec.appid == "976730" and rec.flags == ["-a", "-b"] and rec.use_flags is True
+    assert json.loads(json.dumps(rec)) == dict(rec)
+    assert dict(rec) == {**rec} == rec.to_dict()
+
+
+def test_writes_are_normalized(launcher):
+    rec = launcher.GameRecord()
+    rec["appid"] = " 42 "
+    rec.update(flags="x y", high_priority="no")
+    rec.setdefault("steam_playtime_minutes", "90")
+    rec |= {"mask_hex": " ff "}
+    rec.custom_art_path = None
+
+    assert rec.to_dict() == {
+        "appid": "42", "flags": ["x", "y"], "high_priority": False,
+        "steam_playtime_minutes": 90, "mask_hex": "ff", "custom_art_path": "",
+    }
+
+
+def test_snapshot_row_roundtrip(launcher):
+    rec = launcher.GameRecord({"name": "A", "flags": ["-x"], "note": "kept"})
+    row = rec.snapshot_row()
+
+    assert type(row) is dict
+    assert launcher.GameRecord.from_snapshot_row(row) == rec
+
+
+def test_window_games_json_roundtrip(window):
+    window.games.append({"name": "Extra", "appid": 10, "flags": "-dx12", "custom": [1, 2]})
+    games = list(window.games)
+    assert games and all(isinstance(g, dict) for g in games)
+
+    loaded = json.loads(json.dumps(games))
+
+    assert loaded == [g.to_dict() for g in games]
+    assert loaded[-1]["appid"] == "10" and loaded[-1]["flags"] == ["-dx12"]
+
+
+def test_bench_game_records_runs(launcher, capsys):
+    from bench import bench_game_records
+
+    assert bench_game_records(launcher, n=200) == 0
+    assert "GameRecords" in capsys.readouterr().out
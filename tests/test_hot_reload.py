@@ -0,0 +1,89 @@
+import json
+import os
+
+import pytest
+
+
+@pytest.fixture
+def library(launcher, window):
+    """The window's JSON store with everything flushed, plus a helper for external edits."""
+    store = launcher._game_store()
+    if not isinstance(store, launcher._JsonGameStore):
+        pytest.skip("JSON backend only")
+    window.games.extend([{"name": "Halo"}, {"name": "Forza"}, {"name": "Gears"}])
+    launcher.save_games(window.games)
+    launcher.flush_pending_writes()
+
+    def write_external(games):
+        launcher.flush_pending_writes()
+        if os.path.exists(store.journal_path):
+            os.remove(store.journal_path)
+        with open(store.path, "w", encoding="utf-8") as f:
+            json.dump(launcher._library_wrap(games), f)
+    return store, write_external
+
+
+def selector_names(window):
+    return [window.selector.itemText(i) for i in range(window.selector.count())]
+
+
+def test_external_edit_is_diffed_by_id(launcher, window, library):
+    store, write_external = library
+    on_disk = [g.to_dict() for g in window.games]
+    by_name = {g["name"]: g for g in on_disk}
+    kept = [g for g in on_disk if g["name"] not in ("Halo", "Forza")]
+    by_name["Forza"]["name"] = "Forza Horizon"
+    edited = [by_name["Forza"]] + kept + [{"name": "Hand added"}]   # reordered, one removed, one new
+    untouched = window.games.get(kept[0]["id"])
+    write_external(edited)
+
+    window._reload_library_from_disk()
+
+    names = [g.name for g in window.games]
+    assert names == [g["name"] for g in edited]
+    assert selector_names(window) == names
+    assert window.games.get(kept[0]["id"]) is untouched            # unchanged records keep identity
+    assert window.games.by_name("Hand added").id                   # minted id...
+    launcher.flush_pending_writes()
+    assert [g["id"] for g in json.load(open(store.path))["games"]] == [g.id for g in window.games]  # ...persisted
+    assert not window.games.has_changes
+
+
+def test_half_written_file_is_ignored(launcher, window, library):
+    store, _ = library
+    before = [g.name for g in window.games]
+    with open(store.path, "w", encoding="utf-8") as f:
+        f.write('{"format": "uwplauncher.library", "games": [{"name": "Hal')
+
+    window._reload_library_from_disk()
+
+    assert [g.name for g in window.games] == before
+
+
+def test_queued_library_write_wins(launcher, window, library):
+    store, write_external = library
+    write_external([{"name": "Someone else's edit"}])
+    store.save(window.games)                                       # queued, not yet on disk
+    before = [g.name for g in window.games]
+
+    window._reload_library_from_disk()
+
+    assert [g.name for g in window.games] == before
+    launcher.flush_pending_writes()
+
+
+def test_own_writes_do_not_trigger_reload(launcher, window, library, monkeypatch):
+    store, write_external = library
+    window._install_config_watcher()
+    window._config_poll.stop()
+    monkeypatch.setattr(window._config_debounce, "start", lambda *a: None)
+
+    window.games.update(window.games.by_name("Halo"), name="Halo Infinite")
+    launcher.save_games(window.games)
+    launcher.flush_pending_writes()
+    window._poll_config_files()
+    assert window._config_dirty == set()
+
+    write_external([g.to_dict() for g in window.games][:1])
+    window._poll_config_files()
+    assert os.path.abspath(store.path) in window._config_dirty
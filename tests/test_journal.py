@@ -0,0 +1,121 @@
+import json
+import os
+
+import pytest
+
+
+def test_replay_applies_every_op(launcher):
+    games = [{"id": "a", "name": "A", "exe": "a.exe"}, {"id": "b", "name": "B"}, {"name": "legacy"}]
+    records = [
+        {"op": "add", "id": "c", "game": {"id": "c", "name": "C"}},
+        {"op": "update", "id": "a", "fields": {"name": "A2"}, "unset": ["exe"]},
+        {"op": "replace", "id": "b", "game": {"id": "b", "name": "B2", "appid": "7"}},
+        {"op": "delete", "id": "#2"},
+        {"op": "order", "ids": ["c", "a"]},
+        {"op": "update", "id": "gone", "fields": {"name": "ignored"}},
+        {"op": "add", "id": "d", "game": "not a dict"},
+    ]
+
+    out = launcher._JsonGameStore._replay(games, records)
+
+    assert out == [
+        {"id": "c", "name": "C"},
+        {"id": "a", "name": "A2"},
+        {"id": "b", "name": "B2", "appid": "7"},   # not in the order record: keeps its place after
+    ]
+
+
+def test_replay_add_of_existing_id_moves_it_last(launcher):
+    games = [{"id": "a", "name": "A"}, {"id": "b", "name": "B"}]
+    out = launcher._JsonGameStore._replay(games, [{"op": "add", "id": "a", "game": {"id": "a", "name": "A'"}}])
+    assert [g["name"] for g in out] == ["B", "A'"]
+
+
+def test_torn_last_line_is_skipped(launcher, tmp_path):
+    store = launcher._JsonGameStore(str(tmp_path / "games.json"))
+    with open(store.journal_path, "w", encoding="utf-8") as f:
+        f.write(json.dumps({"op": "delete", "id": "a"}) + "\n\n")
+        f.write(json.dumps({"op": "add", "id": "b", "game": {"id": "b"}}) + "\n")
+        f.write('{"op": "update", "id": "b", "fie')          # crash mid-append
+
+    assert [r["op"] for r in store._read_journal()] == ["delete", "add"]
+
+
+@pytest.fixture
+def store(launcher, tmp_path):
+    store = launcher._JsonGameStore(str(tmp_path / "games.json"))
+    lib = launcher.GameLibrary([{"name": "A"}, {"name": "B"}, {"name": "C"}])
+    store.save(lib)
+    launcher.flush_pending_writes(store.path)
+    lib.take_changes()
+    yield store, lib
+    launcher.flush_pending_writes()
+
+
+def _edit(lib):
+    lib.append({"name": "D"})
+    lib.update(lib.by_name("A"), name="A2")
+    lib.remove(lib.by_name("B"))
+    lib.insert(0, lib.pop(lib.position(lib.by_name("C"))))
+
+
+def test_commit_is_queued_then_journaled(launcher, store):
+    store, lib = store
+    _edit(lib)
+
+    store.commit(lib)
+    assert launcher._WRITE_BEHIND.is_pending(store.path)
+    assert not os.path.exists(store.journal_path)           # nothing written on the caller's thread
+
+    launcher.flush_pending_writes(store.path)
+    ops = [r["op"] for r in store._read_journal()]
+    assert "add" in ops and "update" in ops and "delete" in ops and "order" in ops
+    assert [g.name for g in store.load()] == [g.name for g in lib] == ["C", "A2", "D"]
+
+
+def test_snapshot_supersedes_queued_journal_lines(launcher, store):
+    store, lib = store
+    lib.append({"name": "D"})
+    store.commit(lib)
+    store.save(lib)
+
+    assert launcher._WRITE_BEHIND.peek(store.path)[1] == ()
+    launcher.flush_pending_writes(store.path)
+    assert not os.path.exists(store.journal_path)
+    assert [g.name for g in store.load()] == ["A", "B", "C", "D"]
+
+
+def test_compaction_rotates_the_journal(launcher, store):
+    store, lib = store
+    lib.update(lib.by_name("A"), name="A2")
+    store.commit(lib)
+    launcher.flush_pending_writes(store.path)
+    first_journal = open(store.journal_path, encoding="utf-8").read()
+
+    store.JOURNAL_COMPACT_BYTES = 1
+    lib.update(lib.by_name("B"), name="B2")
+    store.commit(lib)                                       # journal is over the limit: rewrite
+    launcher.flush_pending_writes(store.path)
+
+    assert not os.path.exists(store.journal_path)
+    assert open(store.journal_path + ".1", encoding="utf-8").read() == first_journal
+    with open(store.path, encoding="utf-8") as f:
+        assert [g["name"] for g in json.load(f)["games"]] == ["A2", "B2", "C"]
+    assert [g.name for g in store.load()] == ["A2", "B2", "C"]
+
+
+def test_failed_append_forces_full_rewrite(launcher, store, monkeypatch):
+    store, lib = store
+    lib.update(lib.by_name("A"), name="A2")
+    store.commit(lib)
+    os.makedirs(store.journal_path)                         # make the append fail
+    launcher.flush_pending_writes(store.path)
+    assert store.write_failed
+    os.rmdir(store.journal_path)
+
+    lib.update(lib.by_name("B"), name="B2")
+    store.commit(lib)
+    launcher.flush_pending_writes(store.path)
+
+    assert not store.write_failed
+    assert [g.name for g in store.load()] == ["A2", "B2", "C"]
@@ -0,0 +1,81 @@
+import json
+
+import pytest
+
+
+@pytest.fixture
+def stores(launcher, tmp_path, monkeypatch):
+    """Library files in tmp_path, JSON backend active (as on a default install)."""
+    monkeypatch.setattr(launcher, "GAMES_DB_PATH", str(tmp_path / "games.json"))
+    monkeypatch.setattr(launcher, "GAMES_SQLITE_PATH", str(tmp_path / "games.db"))
+    monkeypatch.setattr(launcher, "_GAME_STORE", launcher._JsonGameStore())
+    yield tmp_path
+    launcher.flush_pending_writes()
+    store = launcher._GAME_STORE
+    if hasattr(store, "close"):
+        store.close()
+
+
+def restart(launcher, backend):
+    """Drop the open store and load the library the way a fresh start does."""
+    old = launcher._GAME_STORE
+    if hasattr(old, "close"):
+        old.close()
+    launcher.flush_pending_writes()
+    launcher._GAME_STORE = launcher._SqliteGameStore() if backend == "sqlite" else launcher._JsonGameStore()
+    return launcher.load_games()
+
+
+def names(games):
+    return [g["name"] for g in games]
+
+
+def test_switch_to_sqlite_keeps_later_edits(launcher, stores):
+    lib = launcher.load_games()                     # seeds the defaults into games.json
+    lib.append({"name": "Halo", "appid": "976730"})
+    launcher.save_games(lib)
+
+    launcher._switch_game_store("sqlite", lib)
+    lib.update(lib.by_name("Halo"), name="Halo MCC")
+    lib.remove(lib[0])
+    launcher.save_games(lib)
+    expected = names(lib)
+
+    assert names(restart(launcher, "sqlite")) == expected
+    # games.json still holds the pre-switch library; it must not come back
+    assert names(restart(launcher, "sqlite")) == expected
+
+
+def test_emptied_sqlite_library_stays_empty(launcher, stores):
+    launcher._switch_game_store("sqlite", launcher.load_games())
+    lib = launcher.load_games()
+    for g in list(lib):
+        lib.remove(g)
+    launcher.save_games(lib)
+
+    assert list(restart(launcher, "sqlite")) == []
+
+
+def test_fresh_sqlite_imports_json_once(launcher, stores):
+    (stores / "games.json").write_text(json.dumps([{"name": "A"}, {"name": "B"}]))
+    lib = restart(launcher, "sqlite")
+    assert names(lib) == ["A", "B"]
+
+    lib.remove(lib.by_name("A"))
+    launcher.save_games(lib)
+    assert names(restart(launcher, "sqlite")) == ["B"]
+
+
+def test_fresh_sqlite_without_json_seeds_defaults(launcher, stores):
+    assert names(restart(launcher, "sqlite")) == names(launcher._seed_defaults())
+
+
+def test_rows_without_import_marker_win_over_json(launcher, stores):
+    store = launcher._SqliteGameStore()
+    store.save(launcher.GameLibrary([{"name": "Switched"}]))
+    with store._db() as conn:                       # db written before the marker existed
+        conn.execute("DELETE FROM meta")
+    store.close()
+    (stores / "games.json").write_text(json.dumps([{"name": "Stale"}]))
+
+    assert names(restart(launcher, "sqlite")) == ["Switched"]
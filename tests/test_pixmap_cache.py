@@ -0,0 +1,61 @@
+from test_thumbnail_pack import make_cover, touch_later
+
+
+def test_lru_eviction_under_budget(launcher, tmp_path, qapp):
+    covers = [make_cover(tmp_path / f"{i}.png", 100, 100) for i in range(3)]
+    cache = launcher.PixmapCache()
+    for c in covers:
+        cache.get(c)
+    one = cache.cost(cache.get(covers[0]))                 # touch 0: 1 is now the oldest
+    assert cache.stats()["bytes"] == 3 * one
+
+    cache.set_budget(2 * one)
+
+    stats = cache.stats()
+    assert (stats["entries"], stats["bytes"], stats["evictions"]) == (2, 2 * one, 1)
+    hits = stats["hits"]
+    cache.get(covers[0]), cache.get(covers[2])
+    assert cache.stats()["hits"] == hits + 2              # the survivors
+    cache.get(covers[1])
+    assert cache.stats()["evictions"] == 2                # reloaded, pushing out the LRU one
+
+    cache.set_budget(0)
+    assert cache.stats()["entries"] == 0 and cache.bytes == 0
+
+
+def test_oversized_pixmap_is_returned_but_not_kept(launcher, tmp_path, qapp):
+    cover = make_cover(tmp_path / "big.png", 200, 300)
+    cache = launcher.PixmapCache(budget_bytes=1024)
+
+    pix = cache.get(cover)
+
+    assert pix is not None and not pix.isNull()
+    assert cache.stats()["entries"] == 0 and cache.bytes == 0
+
+
+def test_changed_file_is_reloaded(launcher, tmp_path, qapp):
+    cover = make_cover(tmp_path / "a.png", 100, 100)
+    cache = launcher.PixmapCache()
+    first = cache.get(cover)
+    assert cache.get(cover) is first
+
+    touch_later(cover)
+
+    assert cache.get(cover) is not first
+    assert cache.stats()["entries"] == 1 and cache.stats()["misses"] == 2
+
+
+def test_thumbnail_buckets_and_invalidate(launcher, tmp_path, qapp):
+    cover = make_cover(tmp_path / "a.png")
+    cache = launcher.PixmapCache()
+
+    assert cache.get(cover, 150, render=False) is None    # not packed: left to the CoverDecoder
+    thumb = cache.get(cover, 150)
+    full = cache.get(cover)
+    assert (thumb.width(), full.width()) == (160, 600)
+    assert cache.stats()["entries"] == 2
+
+    cache.invalidate(cover)
+
+    assert cache.stats()["entries"] == 0 and cache.bytes == 0
+    assert cache.get(None) is None and cache.get(str(tmp_path / "missing.png")) is None
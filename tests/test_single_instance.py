@@ -0,0 +1,82 @@
+import os
+import socket
+import subprocess
+import sys
+import textwrap
+import time
+
+import pytest
+
+pytestmark = pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="Unix-domain sockets only")
+
+FORWARD = textwrap.dedent("""
+    import importlib.util, sys
+    spec = importlib.util.spec_from_file_location("UWPLauncher", sys.argv[1])
+    m = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(m)
+    print("forwarded" if m._forward_to_running_instance(sys.argv[2:], timeout=2.0) else "not forwarded")
+""")
+
+
+@pytest.fixture
+def instance_name(tmp_path, monkeypatch):
+    name = str(tmp_path / "instance.sock")
+    monkeypatch.setenv("UWPLAUNCHER_INSTANCE_NAME", name)
+    return name
+
+
+def _forward_from_subprocess(qapp, app_dir, *argv):
+    """Run a second launcher process that forwards argv; pump Qt events meanwhile."""
+    proc = subprocess.Popen([sys.executable, "-c", FORWARD, str(app_dir / "UWPLauncher.py"), *argv],
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    deadline = time.monotonic() + 60
+    while proc.poll() is None and time.monotonic() < deadline:
+        qapp.processEvents()
+        time.sleep(0.005)
+    out, err = proc.communicate(timeout=5)
+    for _ in range(20):             # deliver the received signal queued after the reply
+        qapp.processEvents()
+    return out.strip(), err
+
+
+def _start(launcher, qapp, received):
+    server = launcher._InstanceServer.start()
+    assert server is not None
+    server.received.connect(received.append)
+    return server
+
+
+def test_forward_reaches_running_instance(launcher, qapp, app_dir, instance_name):
+    received = []
+    server = _start(launcher, qapp, received)
+    try:
+        out, err = _forward_from_subprocess(qapp, app_dir, "--launch", "Halo Infinite")
+    finally:
+        server._server.close()
+
+    assert server.name == instance_name
+    assert out == "forwarded", err[-2000:]
+    assert received == [["--launch", "Halo Infinite"]]
+
+
+def test_no_server_means_no_forward(launcher, instance_name):
+    assert launcher._forward_to_running_instance(["--show"]) is False
+
+
+def test_stale_socket_is_replaced(launcher, qapp, app_dir, instance_name):
+    # A crashed launcher leaves its socket file behind with nobody listening
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(instance_name)
+    stale.close()
+    assert os.path.exists(instance_name)
+    assert launcher._forward_to_running_instance(["--show"]) is False
+
+    received = []
+    server = _start(launcher, qapp, received)     # removeServer + listen again
+    try:
+        out, err = _forward_from_subprocess(qapp, app_dir, "--show")
+    finally:
+        server._server.close()
+
+    assert out == "forwarded", err[-2000:]
+    assert received == [["--show"]]
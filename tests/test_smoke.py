@@ -0,0 +1,54 @@
+import os
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+# Runs in a child process: a crash inside a Qt virtual (paintEvent, ...)
+# aborts the interpreter, which must fail the test instead of the whole run.
+SMOKE = textwrap.dedent("""
+    import importlib.util, sys
+    spec = importlib.util.spec_from_file_location("UWPLauncher", sys.argv[1])
+    m = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = m
+    spec.loader.exec_module(m)
+    from PyQt6 import QtCore, QtWidgets
+    app = QtWidgets.QApplication(sys.argv[:1])
+    m.ThemeManager(app).apply("default")
+    w = m.Main()
+    w.show()
+    w.start_staged_boot()
+    QtCore.QTimer.singleShot(1500, app.quit)
+    rc = app.exec()
+    print("boot stage", w._boot_stage)
+    print("smoke ok" if rc == 0 else f"exec rc {rc}")
+""")
+
+
+def test_window_shows_and_boots_offscreen(app_dir, tmp_path):
+    pytest.importorskip("PyQt6.QtWidgets")
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen",
+               UWPLAUNCHER_INSTANCE_NAME=str(tmp_path / "smoke.sock"))
+    proc = subprocess.run([sys.executable, "-c", SMOKE, str(app_dir / "UWPLauncher.py")],
+                          capture_output=True, text=True, timeout=120, env=env)
+
+    assert proc.returncode == 0, proc.stdout[-2000:] + proc.stderr[-4000:]
+    assert "smoke ok" in proc.stdout
+    assert "boot stage 1" not in proc.stdout   # stage 2 is scheduled from the first paint
+    assert "UnboundLocalError" not in proc.stderr
+
+
+@pytest.mark.parametrize("target", ["Gears 5", "No Such Game"])
+def test_headless_launch_never_prompts(app_dir, tmp_path, target):
+    # UWPHook.exe is not configured here; --launch has no QApplication, so a
+    # file dialog would abort the interpreter (rc 134) instead of failing.
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen",
+               UWPLAUNCHER_INSTANCE_NAME=str(tmp_path / "cli.sock"))
+    proc = subprocess.run([sys.executable, str(app_dir / "UWPLauncher.py"), "--new-instance", "--launch", target],
+                          capture_output=True, text=True, timeout=120, env=env, cwd=str(app_dir))
+
+    assert proc.returncode in (0, 1, 2), proc.stdout[-2000:] + proc.stderr[-4000:]
+    assert "QApplication" not in proc.stderr
+    if target == "Gears 5" and proc.returncode == 1:
+        assert "UWPHook.exe not found" in proc.stdout
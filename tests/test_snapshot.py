@@ -0,0 +1,44 @@
+import json
+import os
+
+
+def test_library_snapshot_hit_and_stale(launcher, tmp_path):
+    src = tmp_path / "games.json"
+    src.write_text(json.dumps([{"name": " A ", "flags": "-x -y"}, {"name": "B", "note": 1}]))
+    snap = launcher.snapshot_path_for(str(src))
+    calls = []
+
+    def parse():
+        calls.append(1)
+        return [launcher.GameRecord(g) for g in json.loads(src.read_text())]
+
+    def load():
+        return launcher.snapshot_load(
+            "test-games", (str(src),), snap, parse,
+            to_snapshot=lambda recs: [r.snapshot_row() for r in recs],
+            from_snapshot=lambda rows: [launcher.GameRecord.from_snapshot_row(r) for r in rows])
+
+    first = load()
+    assert os.path.exists(snap) and len(calls) == 1
+
+    second = load()
+    assert len(calls) == 1 and launcher.SNAPSHOT_STATS["test-games"]["hit"]
+    assert second == first and all(isinstance(g, launcher.GameRecord) for g in second)
+    assert second[0].flags == ["-x", "-y"]
+
+    src.write_text(json.dumps([{"name": "C"}]))
+    os.utime(src, ns=(1, 1))
+    assert [g.name for g in load()] == ["C"] and len(calls) == 2
+
+
+def test_runtime_reads_are_quiet(launcher, tmp_path, capsys):
+    src = tmp_path / "settings.json"
+    src.write_text(json.dumps({"cover_size": 200}))
+    snap = launcher.snapshot_path_for(str(src))
+    for _ in range(3):
+        assert launcher.snapshot_load("test-settings", (str(src),), snap,
+                                      lambda: json.loads(src.read_text())) == {"cover_size": 200}
+
+    assert capsys.readouterr().out == ""
+    assert launcher.SNAPSHOT_STATS["test-settings"]["hit"]
+    assert "test-settings snapshot" in launcher.snapshot_report()
@@ -0,0 +1,58 @@
+from bench import bench_steam_merge
+
+
+def test_plan_updates_changed_playtimes_only(launcher):
+    library = launcher.GameLibrary([
+        {"name": "Portal", "appid": "400", "steam_playtime_minutes": 60, "steam_playtime_hours": 1.0},
+        {"name": "Local Game", "exe": "C:/x.exe"},
+    ])
+    payload = [
+        {"appid": 400, "name": "Portal", "playtime_forever": 60},
+        {"appid": 620, "name": "Portal 2", "playtime_forever": 125, "rtime_last_played": 5},
+        {"appid": 620, "name": "Portal 2", "playtime_forever": 130},
+        {"name": "local game"},
+        "junk",
+    ]
+
+    plan = launcher.plan_steam_merge(library, payload)
+
+    assert plan["update"] == [] and plan["skipped"] == 1 and plan["unchanged"] == 2
+    assert [(e["appid"], e["steam_playtime_minutes"]) for e in plan["add"]] == [("620", 130)]
+    assert launcher.apply_steam_merge(library, plan) == (1, 0)
+    assert library.by_appid("620")["steam_last_played"] == 5
+
+
+def test_bench_steam_merge(launcher, capsys):
+    assert bench_steam_merge(launcher, n=2000) == 0
+    assert "add=1000" in capsys.readouterr().out
+
+
+class RecordingArtwork:
+    """Stands in for Main._artwork: records requests, never downloads."""
+    def __init__(self):
+        self.requests = []
+
+    def request(self, appid, priority=2):
+        self.requests.append((str(appid), priority))
+
+    def pending(self, appid):
+        return any(a == str(appid) for a, _ in self.requests)
+
+    def close(self):
+        pass
+
+
+def test_sync_queues_artwork_instead_of_downloading(launcher, window, monkeypatch):
+    downloads = []
+    window._artwork = RecordingArtwork()
+    monkeypatch.setattr(launcher, "_steam_artwork_ensure_cached", downloads.append)
+    monkeypatch.setattr(launcher, "NONUWP_sync_steam_library_dialog", lambda self: (
+        True, "Fetched 2 games.",
+        {"response": {"games": [{"appid": 400, "name": "Portal"}, {"appid": 620, "name": "Portal 2"}]}}))
+    monkeypatch.setattr(launcher.QtWidgets.QMessageBox, "information", lambda *a: None)
+
+    launcher._NONUWP_act_sync(window)
+
+    assert downloads == []                        # nothing fetched on the GUI thread
+    queued = set(window._artwork.requests)
+    assert {("400", launcher.ArtworkService.PREFETCH), ("620", launcher.ArtworkService.PREFETCH)} <= queued
@@ -0,0 +1,30 @@
+def _center_color(widget):
+    img = widget.grab().toImage()
+    return img.pixelColor(img.width() // 2, img.height() // 2).name()
+
+
+def test_status_led_paints_its_state(launcher, qapp):
+    led = launcher.StatusLed()
+    assert not led.is_ok() and _center_color(led) == "#c62828"
+
+    led.set_ok(True)
+
+    assert led.is_ok() and _center_color(led) == "#00c853"
+
+
+def test_toast_level_colors(launcher, qapp):
+    toast = launcher.ToastFrame("error")
+    toast.resize(120, 40)
+    assert _center_color(toast) == "#c62828"
+
+    toast.set_level("bogus")
+
+    assert toast.level() == "info" and _center_color(toast) == "#37474f"
+
+
+
+def test_bench_styles_runs(launcher, qapp, capsys):
+    from bench import bench_styles
+
+    assert bench_styles(launcher, n=20) == 0
+    assert "led flips" in capsys.readouterr().out
@@ -0,0 +1,98 @@
+import os
+
+import pytest
+
+
+def make_cover(path, w=600, h=900, color=0x3366CC):
+    from PyQt6 import QtGui
+    img = QtGui.QImage(w, h, QtGui.QImage.Format.Format_RGB32)
+    img.fill(color)
+    assert img.save(str(path))
+    return str(path)
+
+
+def touch_later(path):
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10_000_000))
+
+
+@pytest.fixture
+def pack_path(tmp_path, qapp):
+    return str(tmp_path / "thumbs.pack")
+
+
+def test_render_flush_reopen_get(launcher, tmp_path, pack_path):
+    cover = make_cover(tmp_path / "a.png")
+    pack = launcher.ThumbnailPack(pack_path)
+
+    img = pack.thumbnail(cover, 150)                       # rendered, queued
+    assert (img.width(), img.height()) == (160, 240)
+    assert pack.has_pending() and pack.flush() == 1 and not pack.has_pending()
+
+    again = launcher.ThumbnailPack(pack_path).get(cover, 160)
+    assert again is not None and (again.width(), again.height()) == (160, 240)
+    assert again.pixelColor(80, 120).rgb() & 0xFFFFFF == 0x3366CC
+    assert launcher.ThumbnailPack(pack_path).get(cover, 128) is None   # other bucket never rendered
+
+
+def test_rewrite_counts_dead_bytes(launcher, tmp_path, pack_path):
+    cover = make_cover(tmp_path / "a.png")
+    pack = launcher.ThumbnailPack(pack_path)
+    pack.render(cover, 128)
+    pack.flush()
+    first_index = pack._index_size
+    record = pack._index[pack._key(cover, 128)]
+
+    pack.render(cover, 128)
+    pack.flush()
+
+    with open(pack_path, "rb") as f:
+        _magic, _fmt, _off, _size, dead = pack.HEADER.unpack(f.read(pack.HEADER.size))
+    assert dead == pack._dead == first_index + record[3] * record[2]
+    assert len(launcher.ThumbnailPack(pack_path)) == 1
+
+
+def test_changed_source_is_stale(launcher, tmp_path, pack_path):
+    cover = make_cover(tmp_path / "a.png")
+    pack = launcher.ThumbnailPack(pack_path)
+    pack.render(cover, 128)
+    pack.flush()
+
+    touch_later(cover)
+
+    assert pack.get(cover, 128) is None
+    assert launcher.ThumbnailPack(pack_path).get(cover, 128) is None
+
+
+def test_open_compacts_dead_and_stale_records(launcher, tmp_path, pack_path, monkeypatch, capsys):
+    keep = make_cover(tmp_path / "keep.png", color=0x11AA22)
+    stale = make_cover(tmp_path / "stale.png")
+    pack = launcher.ThumbnailPack(pack_path)
+    for _ in range(3):                                     # two superseded copies of each
+        pack.render(keep, 192)
+        pack.render(stale, 192)
+        pack.flush()
+    touch_later(stale)
+    before = os.path.getsize(pack_path)
+    monkeypatch.setattr(launcher.ThumbnailPack, "COMPACT_MIN_DEAD", 0)
+
+    reopened = launcher.ThumbnailPack(pack_path)
+
+    assert len(reopened) == 1 and reopened._dead == 0
+    assert "compacted: 2 -> 1 entries" in capsys.readouterr().out
+    assert os.path.getsize(pack_path) < before // 3
+    img = reopened.get(keep, 192)
+    assert img is not None and img.pixelColor(10, 10).rgb() & 0xFFFFFF == 0x11AA22
+    assert not os.path.exists(pack_path + ".tmp")
+
+
+def test_corrupt_pack_is_discarded(launcher, pack_path, tmp_path):
+    with open(pack_path, "wb") as f:
+        f.write(b"not a pack" * 10)
+    cover = make_cover(tmp_path / "a.png")
+
+    pack = launcher.ThumbnailPack(pack_path)
+
+    assert len(pack) == 0 and not os.path.exists(pack_path)
+    pack.render(cover, 128)
+    assert pack.flush() == 1 and launcher.ThumbnailPack(pack_path).get(cover, 128) is not None
@@ -0,0 +1,98 @@
+import json
+import os
+import time
+
+import pytest
+
+posix_only = pytest.mark.skipif(os.name == "nt", reason="POSIX permission bits")
+
+
+@posix_only
+def test_atomic_write_keeps_existing_mode(launcher, tmp_path):
+    target = tmp_path / "settings.json"
+    target.write_text("{}")
+    target.chmod(0o640)
+
+    launcher._atomic_write_text(str(target), '{"a": 1}')
+
+    assert target.stat().st_mode & 0o777 == 0o640
+    assert json.loads(target.read_text()) == {"a": 1}
+
+
+@posix_only
+def test_atomic_write_new_file_follows_umask(launcher, tmp_path):
+    target = tmp_path / "games.json"
+
+    launcher._atomic_write_text(str(target), "[]")
+
+    assert target.stat().st_mode & 0o777 == 0o666 & ~launcher._UMASK
+
+
+def test_failed_replace_keeps_target_and_cleans_up(launcher, tmp_path, monkeypatch):
+    target = tmp_path / "games.json"
+    target.write_text("old")
+
+    def boom(src, dst):
+        raise OSError("disk full")
+    monkeypatch.setattr(os, "replace", boom)
+
+    with pytest.raises(OSError):
+        launcher._atomic_write_text(str(target), "new")
+
+    assert target.read_text() == "old"
+    assert os.listdir(tmp_path) == ["games.json"]       # no temp file left behind
+
+
+def test_atomic_write_is_recorded_as_own_write(launcher, tmp_path):
+    target = tmp_path / "friends_settings.json"
+    launcher._atomic_write_text(str(target), "{}")
+    assert launcher.is_own_write(str(target))
+
+    target.write_text('{"edited": true}')
+    assert not launcher.is_own_write(str(target))
+
+
+def _counting_writer(launcher, monkeypatch):
+    wb = launcher._WriteBehind()
+    writes = []
+    real = wb._write
+
+    def write(path, entry):
+        writes.append(entry[2])
+        real(path, entry)
+    monkeypatch.setattr(wb, "_write", write)
+    return wb, writes
+
+
+def test_rapid_saves_coalesce_into_one_write(launcher, tmp_path, monkeypatch):
+    wb, writes = _counting_writer(launcher, monkeypatch)
+    wb.DELAY = 0.05
+    path = str(tmp_path / "settings.json")
+
+    for size in range(100, 200):                        # cover-size slider drag
+        wb.schedule(path, {"cover_size": size}, indent=2)
+    assert wb.peek(path) == {"cover_size": 199}
+
+    deadline = time.monotonic() + 5
+    while wb.is_pending(path) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    time.sleep(0.1)
+
+    assert writes == [{"cover_size": 199}]
+    assert json.loads(open(path).read()) == {"cover_size": 199}
+
+
+def test_flush_writes_pending_now(launcher, tmp_path, monkeypatch):
+    wb, writes = _counting_writer(launcher, monkeypatch)
+    wb.DELAY = wb.MAX_WAIT = 60.0
+    a, b = str(tmp_path / "a.json"), str(tmp_path / "b.json")
+    wb.schedule(a, {"v": 1})
+    wb.schedule(a, {"v": 2})
+    wb.schedule(b, [1])
+
+    wb.flush(a)
+    assert writes == [{"v": 2}] and wb.is_pending(b) and not wb.is_pending(a)
+
+    wb.flush()
+    assert writes == [{"v": 2}, [1]]
+    assert json.loads(open(b).read()) == [1]